@@ -0,0 +1 @@
+"""Performance benchmarks for Otter KDS v6."""
@@ -0,0 +1,87 @@
+"""Benchmark per-request overhead of AuthMiddleware.
+
+Measures two things for the same signed token, with the verified-token
+cache disabled (every request runs ``jwt.decode``) and enabled:
+
+* ``authenticate`` alone, the cost added to every authenticated request
+* a full request through a minimal Starlette app with only the middleware
+  and a trivial endpoint, via an in-process ASGI transport
+
+Usage:
+    python -m benchmarks.bench_auth_middleware [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+import jwt
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from src.api.middleware.auth import AuthMiddleware, TokenCache
+
+
+def _token() -> str:
+    return jwt.encode(
+        {
+            "user_id": "user_123",
+            "email": "chef@example.com",
+            "restaurant_id": "00000000-0000-0000-0000-000000000001",
+            "restaurant_name": "Test Kitchen",
+            "role": "chef",
+            "permissions": {"orders": True},
+            "exp": int(time.time()) + 3600
+        },
+        os.getenv("JWT_SECRET", "your-secret-key"),
+        algorithm="HS256"
+    )
+
+
+def bench_authenticate(cache_size: int, requests: int) -> float:
+    """Microseconds per ``authenticate`` call."""
+    middleware = AuthMiddleware(app=None, token_cache=TokenCache(max_size=cache_size))
+    token = _token()
+    start = time.perf_counter()
+    for _ in range(requests):
+        middleware.authenticate(token)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def bench_request(cache_size: int, requests: int) -> float:
+    """Microseconds per request through the middleware stack."""
+    async def ok(request):
+        return PlainTextResponse(request.state.user.restaurant_id)
+    
+    app = Starlette(routes=[Route("/api/ping", ok)])
+    app.add_middleware(AuthMiddleware, token_cache=TokenCache(max_size=cache_size))
+    headers = {"Authorization": f"Bearer {_token()}"}
+    
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        await client.get("/api/ping", headers=headers)
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/api/ping", headers=headers)
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    # Keep sampled auth logging out of the timings
+    os.environ.setdefault("AUTH_LOG_SAMPLE_RATE", "0")
+    
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    
+    print(f"{'mode':<10} {'authenticate (us)':>18} {'full request (us)':>18}")
+    for label, cache_size in (("uncached", 0), ("cached", 10000)):
+        per_call = bench_authenticate(cache_size, args.requests)
+        per_request = asyncio.run(bench_request(cache_size, max(args.requests // 10, 1)))
+        print(f"{label:<10} {per_call:>18.2f} {per_request:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark menu diffing on a large menu.
+
+Builds a synthetic menu of ``--items`` items in 100-item categories, with
+three options each, and a copy where 1% of the items changed. Compares:
+
+* ``fields``: the previous diff, per-field ``getattr`` comparisons of
+  every item (items only; options and categories are not compared)
+* ``fingerprint``: ``diff_menus`` on precomputed fingerprints, plus the
+  one-off cost of fingerprinting the new menu
+
+Usage:
+    python -m benchmarks.bench_menu_diff [--items 10000] [--rounds 20]
+"""
+
+import argparse
+import time
+from decimal import Decimal
+
+from src.menu_sync.diff import MenuFingerprints, diff_menus
+from src.menu_sync.models import Menu, MenuItem, MenuCategory, MenuItemOption, MenuDiff
+
+
+def _menu(items: int, changed_every: int = 0) -> Menu:
+    categories = []
+    for c in range(0, items, 100):
+        category_items = []
+        for i in range(c, min(c + 100, items)):
+            price = Decimal(5 + (i % 200)) / 4
+            if changed_every and i % changed_every == 0:
+                price += 1
+            category_items.append(MenuItem(
+                id=f"item_{i}",
+                name=f"Menu Item {i}",
+                description="Steamed rice, seasonal vegetables and a house sauce",
+                price=price,
+                category=f"Category {c // 100}",
+                options=[
+                    MenuItemOption(id=f"opt_{i}_{o}", name=f"Option {o}", price=Decimal(o) / 2)
+                    for o in range(3)
+                ],
+                tags=["popular"] if i % 5 == 0 else []
+            ))
+        categories.append(MenuCategory(
+            id=f"cat_{c}", name=f"Category {c // 100}", display_order=c // 100, items=category_items
+        ))
+    return Menu(id="menu_1", restaurant_id="rest_1", name="Benchmark Menu", categories=categories)
+
+
+def _fields_diff(old_menu: Menu, new_menu: Menu) -> MenuDiff:
+    """The per-field diff MenuSyncService used before fingerprints."""
+    diff = MenuDiff()
+    old_items = {item.id: item for cat in old_menu.categories for item in cat.items}
+    new_items = {item.id: item for cat in new_menu.categories for item in cat.items}
+    fields = ['name', 'description', 'price', 'category', 'available']
+    for item_id, new_item in new_items.items():
+        old_item = old_items.get(item_id)
+        if old_item is None:
+            diff.added_items.append(new_item)
+        elif any(getattr(old_item, f) != getattr(new_item, f) for f in fields):
+            diff.updated_items.append(new_item)
+    diff.deleted_items = [item_id for item_id in old_items if item_id not in new_items]
+    return diff
+
+
+def _ms(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    
+    old = _menu(args.items)
+    same = _menu(args.items)
+    changed = _menu(args.items, changed_every=100)
+    old_prints = MenuFingerprints.of(old)
+    same_prints = MenuFingerprints.of(same)
+    changed_prints = MenuFingerprints.of(changed)
+    
+    assert len(diff_menus(old_prints, changed_prints).updated_items) == len(_fields_diff(old, changed).updated_items)
+    
+    print(f"{args.items} items, {args.rounds} rounds")
+    print(f"{'method':<24} {'unchanged (ms)':>15} {'1% changed (ms)':>16}")
+    print(
+        f"{'fields':<24} {_ms(lambda: _fields_diff(old, same), args.rounds):>15.2f} "
+        f"{_ms(lambda: _fields_diff(old, changed), args.rounds):>16.2f}"
+    )
+    print(
+        f"{'fingerprint':<24} {_ms(lambda: diff_menus(old_prints, same_prints), args.rounds):>15.2f} "
+        f"{_ms(lambda: diff_menus(old_prints, changed_prints), args.rounds):>16.2f}"
+    )
+    print(f"{'fingerprinting (once)':<24} {_ms(lambda: MenuFingerprints.of(changed), args.rounds):>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
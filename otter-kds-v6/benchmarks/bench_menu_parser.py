@@ -0,0 +1,143 @@
+"""Benchmark parsing of a large Otter menu.
+
+Parses a synthetic menu of ``--items`` items in 100-item categories with:
+
+* ``baseline``: ``json.loads`` of the body, then fully validated models,
+  as OtterClient did before the incremental parser (which also dropped
+  options; they are validated here so both build the same menu)
+* ``stream``: ``parse_menu`` on the raw body
+
+Each method runs in its own subprocess so peak RSS is not shared; the
+reported memory is the growth of peak RSS while parsing.
+
+Usage:
+    python -m benchmarks.bench_menu_parser [--items 10000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.menu_sync.models import Menu, MenuItem, MenuCategory
+from src.menu_sync.parser import parse_menu
+
+
+def _menu(items: int) -> dict:
+    categories = []
+    for c in range(0, items, 100):
+        categories.append({
+            "id": f"cat_{c}",
+            "name": f"category {c // 100}",
+            "order": c // 100,
+            "items": [
+                {
+                    "id": f"item_{i}",
+                    "name": f"Menu Item {i}",
+                    "description": "Steamed rice, seasonal vegetables and a house sauce",
+                    "price": round(5 + (i % 200) * 0.25, 2),
+                    "available": i % 17 != 0,
+                    "options": [
+                        {"id": f"opt_{i}_{o}", "name": f"Option {o}", "price": 0.5 * o}
+                        for o in range(3)
+                    ],
+                    "images": [f"https://cdn.example.com/items/{i}.jpg"],
+                    "tags": ["popular"] if i % 5 == 0 else []
+                }
+                for i in range(c, min(c + 100, items))
+            ]
+        })
+    return {"id": "menu_1", "restaurant_id": "rest_1", "name": "Benchmark Menu", "categories": categories}
+
+
+def _baseline(body: bytes) -> Menu:
+    data = json.loads(body)
+    categories = []
+    for cat_data in data.get("categories", []):
+        items = [
+            MenuItem(
+                id=item_data["id"],
+                name=item_data["name"],
+                description=item_data.get("description"),
+                price=item_data["price"],
+                category=cat_data["name"],
+                available=item_data.get("available", True),
+                options=item_data.get("options", []),
+                images=item_data.get("images", []),
+                tags=item_data.get("tags", [])
+            )
+            for item_data in cat_data.get("items", [])
+        ]
+        categories.append(MenuCategory(
+            id=cat_data["id"],
+            name=cat_data["name"],
+            description=cat_data.get("description"),
+            display_order=cat_data.get("order", 0),
+            items=items
+        ))
+    return Menu(
+        id=data["id"],
+        restaurant_id=data["restaurant_id"],
+        name=data["name"],
+        description=data.get("description"),
+        categories=categories,
+        currency=data.get("currency", "USD")
+    )
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _child(method: str, path: str):
+    with open(path, "rb") as f:
+        body = f.read()
+    parse = _baseline if method == "baseline" else parse_menu
+    
+    before = _peak_rss_mb()
+    start = time.perf_counter()
+    menu = parse(body)
+    elapsed = time.perf_counter() - start
+    
+    items = sum(len(category.items) for category in menu.categories)
+    print(json.dumps({"seconds": elapsed, "rss_mb": _peak_rss_mb() - before, "items": items}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--child", choices=("baseline", "stream"), help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        _child(args.child, args.path)
+        return
+    
+    fd, path = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(_menu(args.items), f)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{args.items} items, {size_mb:.1f} MB body")
+        
+        print(f"{'method':<10} {'parse (ms)':>12} {'peak RSS growth (MB)':>22}")
+        for method in ("baseline", "stream"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_menu_parser", "--child", method, "--path", path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output)
+            print(f"{method:<10} {result['seconds'] * 1000:>12.1f} {result['rss_mb']:>22.1f}")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
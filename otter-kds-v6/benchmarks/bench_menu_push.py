@@ -0,0 +1,84 @@
+"""Benchmark pushing a bulk availability change to a simulated Otter.
+
+The fake Otter answers each PUT after ``--latency`` ms and rejects
+requests beyond ``--limit`` per second with a 429 and ``Retry-After: 1``.
+Compares:
+
+* ``sequential``: one ``put_menu_item`` at a time, as ``update_menu_item``
+  callers did
+* ``queue``: ``MenuPushQueue`` with ``--concurrency`` workers, limited
+  to the same rate as the fake Otter
+
+Usage:
+    python -m benchmarks.bench_menu_push [--items 200] [--latency 50] [--limit 40] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from src.menu_sync.models import MenuItem
+from src.menu_sync.push import MenuPushQueue
+
+
+class FakeOtter:
+    """Fixed-latency Otter with a one-second sliding window rate limit."""
+    
+    def __init__(self, latency: float, limit: int):
+        self.latency = latency
+        self.limit = limit
+        self.accepted = []
+        self.rejected = 0
+    
+    async def put_menu_item(self, item: MenuItem) -> httpx.Response:
+        now = time.monotonic()
+        self.accepted = [t for t in self.accepted if now - t < 1]
+        if len(self.accepted) >= self.limit:
+            self.rejected += 1
+            return httpx.Response(429, headers={"Retry-After": "1"})
+        self.accepted.append(now)
+        await asyncio.sleep(self.latency)
+        return httpx.Response(200)
+
+
+async def _sequential(otter: FakeOtter, items) -> None:
+    for item in items:
+        while (await otter.put_menu_item(item)).status_code == 429:
+            await asyncio.sleep(1)
+
+
+async def _queue(otter: FakeOtter, items, concurrency: int) -> None:
+    async with MenuPushQueue(otter, concurrency=concurrency, rate=otter.limit, burst=1) as queue:
+        results = await queue.push(items)
+    assert all(result.success for result in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=50, help="ms per request")
+    parser.add_argument("--limit", type=int, default=40, help="requests per second")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    
+    items = [
+        MenuItem(id=f"item_{i}", name=f"Salmon Item {i}", price=12, category="Bowls", available=False)
+        for i in range(args.items)
+    ]
+    
+    print(f"{args.items} items, {args.latency:.0f} ms latency, {args.limit} req/s limit")
+    print(f"{'method':<12} {'seconds':>8} {'429s':>6}")
+    for name, run in (
+        ("sequential", lambda otter: _sequential(otter, items)),
+        ("queue", lambda otter: _queue(otter, items, args.concurrency)),
+    ):
+        otter = FakeOtter(args.latency / 1000, args.limit)
+        start = time.perf_counter()
+        asyncio.run(run(otter))
+        print(f"{name:<12} {time.perf_counter() - start:>8.2f} {otter.rejected:>6}")
+
+
+if __name__ == "__main__":
+    main()
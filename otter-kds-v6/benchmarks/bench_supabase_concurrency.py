@@ -0,0 +1,109 @@
+"""Benchmark request concurrency of SupabaseManager under load.
+
+Starts a local fake PostgREST server with fixed latency and fires N
+concurrent ``get_active_orders`` calls, first through the legacy blocking
+supabase-py client and then through the async pooled client. For each
+backend it reports wall time and the worst event loop stall observed by a
+heartbeat task (a stand-in for every other WebSocket/HTTP request in the
+worker).
+
+Usage:
+    python -m benchmarks.bench_supabase_concurrency [--requests 50] [--latency-ms 50]
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.database.supabase_manager import SupabaseManager
+
+
+class FakePostgrestHandler(BaseHTTPRequestHandler):
+    """Answers every request with an empty JSON array after a fixed delay."""
+
+    latency = 0.05
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+        time.sleep(self.latency)
+        body = json.dumps([]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+    do_PATCH = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_server(latency: float) -> ThreadingHTTPServer:
+    """Start the fake PostgREST server on a free local port."""
+    FakePostgrestHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakePostgrestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Measure the worst event loop stall while the load runs."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def _run_load(call, requests: int) -> tuple:
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await heartbeat
+
+
+async def main(requests: int, latency_ms: float):
+    server = start_fake_server(latency_ms / 1000)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    manager = SupabaseManager(url, "header.payload.signature")
+
+    async def blocking_call():
+        # What every SupabaseManager method did before the async backend
+        return manager.client.rpc(
+            "get_active_orders", {"p_restaurant_id": "bench"}
+        ).execute().data
+
+    async def async_call():
+        return await manager.get_active_orders("bench")
+
+    print(f"{requests} concurrent requests, {latency_ms:.0f} ms server latency")
+    print(f"{'backend':<10}{'wall (s)':>10}{'req/s':>10}{'max loop stall (ms)':>22}")
+    for name, call in (("blocking", blocking_call), ("async", async_call)):
+        await call()  # warm up connections
+        elapsed, stall = await _run_load(call, requests)
+        print(f"{name:<10}{elapsed:>10.3f}{requests / elapsed:>10.1f}{stall * 1000:>22.1f}")
+
+    await manager.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency_ms))
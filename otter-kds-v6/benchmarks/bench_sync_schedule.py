@@ -0,0 +1,95 @@
+"""Simulate a day of menu syncs with a fixed and an adaptive schedule.
+
+Each simulated profile's menu changes at random (a Poisson process): most
+menus never change, some change a few times a day and a few change
+constantly. Compares, over ``--hours`` of simulated time:
+
+* ``fixed``: a sync every ``MENU_SYNC_INTERVAL_MINUTES`` (30) for every
+  profile, as the scheduler did before
+* ``adaptive``: ``SyncScheduler`` with the default 5-240 minute bounds
+
+and reports the Otter calls made and how long changes took to be picked up.
+
+Usage:
+    python -m benchmarks.bench_sync_schedule [--profiles 100] [--hours 24]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+from pathlib import Path
+
+from src.config.settings import settings
+from src.menu_sync.menu_store import MenuStore
+from src.menu_sync.scheduler import SyncScheduler
+
+# (share of profiles, menu changes per day)
+PROFILE_MIX = [(0.8, 0), (0.15, 4), (0.05, 48)]
+
+
+def _change_times(per_day: float, hours: float):
+    times, t = [], 0.0
+    while per_day:
+        t += random.expovariate(per_day / 86400)
+        if t >= hours * 3600:
+            break
+        times.append(t)
+    return times
+
+
+def _simulate(changes, hours: float, scheduler=None):
+    """Sync calls made and pickup delays (s) for one profile's change times."""
+    interval = settings.sync_interval_minutes * 60
+    t, calls, delays = 0.0, 0, []
+    pending = list(changes)
+    while t < hours * 3600:
+        calls += 1
+        picked = [c for c in pending if c <= t]
+        pending = [c for c in pending if c > t]
+        delays.extend(t - c for c in picked)
+        if scheduler is None:
+            t += interval
+        else:
+            entry = scheduler.record("profile", bool(picked), started_at=t, now=t)
+            t = entry.next_run_at
+    return calls, delays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=100)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    
+    profiles = []
+    for share, per_day in PROFILE_MIX:
+        profiles += [_change_times(per_day, args.hours) for _ in range(round(share * args.profiles))]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MenuStore(str(Path(tmp) / "menus.db"))
+        print(f"{len(profiles)} profiles, {args.hours:.0f} h, {sum(map(len, profiles))} menu changes")
+        print(f"{'schedule':<10} {'Otter calls':>12} {'median pickup (min)':>20} {'p95 pickup (min)':>17}")
+        for name in ("fixed", "adaptive"):
+            calls, delays = 0, []
+            for changes in profiles:
+                scheduler = None
+                if name == "adaptive":
+                    scheduler = SyncScheduler(store, ["profile"])
+                    asyncio.run(scheduler.load())
+                profile_calls, profile_delays = _simulate(changes, args.hours, scheduler)
+                calls += profile_calls
+                delays += profile_delays
+            delays.sort()
+            print(
+                f"{name:<10} {calls:>12} {statistics.median(delays) / 60:>20.1f} "
+                f"{delays[int(len(delays) * 0.95)] / 60:>17.1f}"
+            )
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
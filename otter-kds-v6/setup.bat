@@ -7,7 +7,15 @@ REM Check Python version
 python --version 2>nul
 if errorlevel 1 (
     echo Error: Python is not installed or not in PATH
-    echo Please install Python 3.8 or higher from https://www.python.org/
+    echo Please install Python 3.9 or higher from https://www.python.org/
+    pause
+    exit /b 1
+)
+
+python -c "import sys; sys.exit(sys.version_info < (3, 9))"
+if errorlevel 1 (
+    echo Error: Python 3.9 or higher is required
+    echo Please install it from https://www.python.org/
     pause
     exit /b 1
 )
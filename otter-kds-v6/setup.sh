@@ -6,7 +6,7 @@ echo "🚀 Setting up Otter Menu Sync..."
 
 # Check Python version
 python_version=$(python3 --version 2>&1 | grep -oE '[0-9]+\.[0-9]+' | head -1)
-required_version="3.8"
+required_version="3.9"
 
 if [ "$(printf '%s\n' "$required_version" "$python_version" | sort -V | head -n1)" != "$required_version" ]; then 
     echo "❌ Error: Python $required_version or higher is required (found $python_version)"
@@ -11,7 +11,13 @@ import structlog
 # Load environment variables
 load_dotenv()
 
+from ..auth.directory import MembershipDirectory
+from ..auth.tokens import RevocationList
 from ..database import SupabaseManager
+from ..orders.batching import BatchBoards
+from ..orders.board import ActiveOrderBoards
+from ..orders.dedup import OrderDeduplicator
+from ..orders.menu_index import MenuIndexes
 from .routers import auth, orders, websocket, health
 from .middleware.auth import AuthMiddleware
 
@@ -32,6 +38,8 @@ async def lifespan(app: FastAPI):
     try:
         db_manager = SupabaseManager()
         app.state.db = db_manager
+        app.state.auth_directory.start(db_manager)
+        app.state.revocations.start(db_manager)
         logger.info("Database connection established")
     except Exception as e:
         logger.warning("Database connection failed, running in limited mode", error=str(e))
@@ -44,9 +52,14 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down Otter KDS API server")
     if db_manager:
         try:
+            app.state.order_boards.close(db_manager)
+            app.state.batch_boards.close(db_manager)
+            app.state.auth_directory.stop(db_manager)
+            await app.state.revocations.stop(db_manager)
             db_manager.unsubscribe_all()
         except:
             pass
+        await db_manager.close()
 
 
 # Create FastAPI application
@@ -57,6 +70,24 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Remembers recently ingested orders so re-sent ones skip the database
+app.state.order_dedup = OrderDeduplicator()
+
+# Synced menu per restaurant, used to fill in what incoming items leave out
+app.state.menu_indexes = MenuIndexes()
+
+# Active orders per restaurant, kept current from the shared realtime channels
+app.state.order_boards = ActiveOrderBoards(websocket.hub)
+
+# Item batches per restaurant, kept current while sockets subscribe to them
+app.state.batch_boards = BatchBoards(websocket.hub)
+
+# User memberships and restaurant names, kept fresh from realtime changes
+app.state.auth_directory = MembershipDirectory()
+
+# Revoked refresh tokens, shared with the other workers
+app.state.revocations = RevocationList()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
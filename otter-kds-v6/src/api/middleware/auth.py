@@ -1,7 +1,12 @@
 """Authentication middleware for FastAPI."""
 
+import hashlib
 import os
-from typing import Optional
+import random
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional, Tuple
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -27,13 +32,127 @@ PUBLIC_ENDPOINTS = {
 }
 
 
+JWT_ALGORITHM = "HS256"
+
+
+def decode_access_token(token: str, secret: Optional[str] = None) -> dict:
+    """Verify an access token and return its claims.
+    
+    Refresh tokens are signed with the same key but only mint new tokens
+    at ``/api/auth/refresh``; they are never accepted for API or WebSocket
+    access.
+    
+    Raises:
+        jwt.InvalidTokenError: If the token is invalid, expired or a refresh token
+    """
+    payload = jwt.decode(
+        token,
+        secret or os.getenv("JWT_SECRET", "your-secret-key"),
+        algorithms=[JWT_ALGORITHM]
+    )
+    if payload.get("type") == "refresh":
+        raise jwt.InvalidTokenError("Refresh token used as access token")
+    return payload
+
+
+class UserContext(NamedTuple):
+    """Authenticated user of a request, built once per verified token."""
+    user_id: Optional[str]
+    email: Optional[str]
+    restaurant_id: Optional[str]
+    restaurant_name: Optional[str]
+    role: Optional[str]
+    permissions: Mapping[str, Any]
+    
+    @classmethod
+    def from_claims(cls, payload: dict) -> "UserContext":
+        """Build the context from verified JWT claims."""
+        return cls(
+            user_id=payload.get("user_id"),
+            email=payload.get("email"),
+            restaurant_id=payload.get("restaurant_id"),
+            restaurant_name=payload.get("restaurant_name"),
+            role=payload.get("role"),
+            permissions=MappingProxyType(dict(payload.get("permissions") or {}))
+        )
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens that expires each entry at its ``exp``."""
+    
+    def __init__(self, max_size: Optional[int] = None, default_ttl: Optional[float] = None):
+        """Initialize the cache.
+        
+        Args:
+            max_size: Max tokens remembered (defaults to env var
+                AUTH_TOKEN_CACHE_SIZE or 10000); 0 disables caching
+            default_ttl: Lifetime for tokens without ``exp`` (defaults to env
+                var AUTH_TOKEN_CACHE_TTL or 300 seconds)
+        """
+        self.max_size = max_size if max_size is not None else int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+        self.default_ttl = default_ttl or float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+        self._entries: "OrderedDict[bytes, Tuple[UserContext, float]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=20).digest()
+    
+    def get(self, token: str) -> Optional[UserContext]:
+        """Context of a previously verified, unexpired token."""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+    
+    def put(self, token: str, user: UserContext, exp: Optional[float]):
+        """Remember a verified token until it expires."""
+        if self.max_size <= 0:
+            return
+        expires_at = exp if exp is not None else time.time() + self.default_ttl
+        key = self._key(token)
+        self._entries[key] = (user, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Forget all tokens."""
+        self._entries.clear()
+
+
 class AuthMiddleware(BaseHTTPMiddleware):
     """JWT authentication middleware."""
     
-    def __init__(self, app):
+    def __init__(self, app, token_cache: Optional[TokenCache] = None):
         super().__init__(app)
         self.jwt_secret = os.getenv("JWT_SECRET", "your-secret-key")
-        self.jwt_algorithm = "HS256"
+        self.jwt_algorithm = JWT_ALGORITHM
+        self.token_cache = token_cache if token_cache is not None else TokenCache()
+        # Share of authenticated requests logged (at debug level)
+        self.log_sample_rate = float(os.getenv("AUTH_LOG_SAMPLE_RATE", "0.01"))
+    
+    def authenticate(self, token: str) -> UserContext:
+        """Verify a token, reusing the result of an earlier verification.
+        
+        Raises:
+            jwt.InvalidTokenError: If the token is invalid or expired
+        """
+        user = self.token_cache.get(token)
+        if user is not None:
+            return user
+        
+        payload = decode_access_token(token, self.jwt_secret)
+        user = UserContext.from_claims(payload)
+        self.token_cache.put(token, user, payload.get("exp"))
+        return user
     
     async def dispatch(self, request: Request, call_next):
         """Process each request for authentication."""
@@ -56,27 +175,16 @@ class AuthMiddleware(BaseHTTPMiddleware):
         token = auth_header.split(" ")[1]
         
         try:
-            # Decode and validate JWT token
-            payload = jwt.decode(
-                token,
-                self.jwt_secret,
-                algorithms=[self.jwt_algorithm]
-            )
-            
-            # Add user context to request state
-            request.state.user_id = payload.get("user_id")
-            request.state.email = payload.get("email")
-            request.state.restaurant_id = payload.get("restaurant_id")
-            request.state.restaurant_name = payload.get("restaurant_name")
-            request.state.role = payload.get("role")
-            request.state.permissions = payload.get("permissions", {})
+            # Validate JWT token and add user context to request state
+            request.state.user = self.authenticate(token)
             
-            logger.info(
-                "Authenticated request",
-                user_id=request.state.user_id,
-                restaurant_id=request.state.restaurant_id,
-                path=request.url.path
-            )
+            if self.log_sample_rate and random.random() < self.log_sample_rate:
+                logger.debug(
+                    "Authenticated request",
+                    user_id=request.state.user.user_id,
+                    restaurant_id=request.state.user.restaurant_id,
+                    path=request.url.path
+                )
             
         except jwt.ExpiredSignatureError:
             return JSONResponse(
@@ -101,25 +209,18 @@ class AuthMiddleware(BaseHTTPMiddleware):
         return response
 
 
-def get_current_user(request: Request) -> dict:
+def get_current_user(request: Request) -> UserContext:
     """Get current user from request state.
     
     This should be used in route handlers after middleware has run.
     """
-    if not hasattr(request.state, "user_id"):
+    user = getattr(request.state, "user", None)
+    if user is None:
         raise HTTPException(
             status_code=401,
             detail="Not authenticated"
         )
-    
-    return {
-        "user_id": request.state.user_id,
-        "email": request.state.email,
-        "restaurant_id": request.state.restaurant_id,
-        "restaurant_name": request.state.restaurant_name,
-        "role": request.state.role,
-        "permissions": request.state.permissions
-    }
+    return user
 
 
 def require_role(allowed_roles: list):
@@ -127,7 +228,7 @@ def require_role(allowed_roles: list):
     def decorator(func):
         async def wrapper(request: Request, *args, **kwargs):
             user = get_current_user(request)
-            if user["role"] not in allowed_roles:
+            if user.role not in allowed_roles:
                 raise HTTPException(
                     status_code=403,
                     detail=f"Requires one of roles: {allowed_roles}"
@@ -142,7 +243,7 @@ def require_permission(permission: str):
     def decorator(func):
         async def wrapper(request: Request, *args, **kwargs):
             user = get_current_user(request)
-            if not user["permissions"].get(permission, False):
+            if not user.permissions.get(permission, False):
                 raise HTTPException(
                     status_code=403,
                     detail=f"Requires permission: {permission}"
@@ -37,6 +37,17 @@ class TokenResponse(BaseModel):
     restaurant_id: UUID
     restaurant_name: str
     user_role: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    """Refresh token exchange request."""
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """Logout request; the refresh token, if sent, is revoked."""
+    refresh_token: Optional[str] = None
 
 
 # Order models
@@ -89,6 +100,54 @@ class OrderResponse(BaseModel):
     updated_at: datetime
 
 
+class ActiveOrderResponse(BaseModel):
+    """Active order summary for kitchen display."""
+    order_id: UUID
+    order_number: str
+    customer_name: Optional[str] = None
+    status: OrderStatus
+    ordered_at: datetime
+    elapsed_minutes: int
+    total_items: int
+    completed_items: int
+    urgency_score: int
+
+
+class BatchOrderEntry(BaseModel):
+    """An order's share of an item batch."""
+    order_id: UUID
+    order_number: Optional[str] = None
+    quantity: int
+
+
+class ItemBatchResponse(BaseModel):
+    """Open items of the same kind, cooked together."""
+    key: str
+    batch_id: Optional[UUID] = None
+    name: str
+    size: str
+    category: Optional[str] = None
+    total_quantity: int
+    orders: List[BatchOrderEntry]
+
+
+class BulkOrderResult(BaseModel):
+    """Per-order outcome of a bulk order push."""
+    order_number: str
+    platform: str
+    status: str  # created, updated, duplicate
+    order_id: Optional[UUID] = None
+
+
+class BulkOrdersResponse(BaseModel):
+    """Bulk order push response."""
+    created: int
+    updated: int
+    unchanged: int = 0
+    duplicates: int
+    results: List[BulkOrderResult]
+
+
 class UpdateOrderStatusRequest(BaseModel):
     """Update order status request."""
     status: OrderStatus
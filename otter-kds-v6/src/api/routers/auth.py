@@ -1,25 +1,36 @@
 """Authentication endpoints."""
 
+from typing import Optional
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import JSONResponse
 import structlog
 
 from ...auth.manager import AuthManager
 from ...auth.models import LoginRequest as AuthLoginRequest, SignupRequest
-from ..models.api_models import LoginRequest, TokenResponse, ErrorResponse
+from ..models.api_models import (
+    LoginRequest, TokenResponse, ErrorResponse, RefreshRequest, LogoutRequest
+)
 from ..middleware.auth import get_current_user
 
 router = APIRouter()
 logger = structlog.get_logger()
 
 
+def _auth_manager(request: Request) -> AuthManager:
+    """AuthManager sharing the app's membership cache and revocation list."""
+    return AuthManager(
+        request.app.state.db,
+        request.app.state.auth_directory,
+        request.app.state.revocations
+    )
+
+
 @router.post("/login", response_model=TokenResponse)
 async def login(request: Request, login_data: LoginRequest):
     """Login endpoint for Chrome extension."""
     try:
         # Get auth manager
-        db = request.app.state.db
-        auth_manager = AuthManager(db)
+        auth_manager = _auth_manager(request)
         
         # Convert to auth model
         auth_request = AuthLoginRequest(
@@ -38,7 +49,8 @@ async def login(request: Request, login_data: LoginRequest):
             expires_at=response.token.expires_at,
             restaurant_id=response.active_restaurant.id,
             restaurant_name=response.active_restaurant.name,
-            user_role=response.active_restaurant.role
+            user_role=response.active_restaurant.role,
+            refresh_token=response.token.refresh_token
         )
         
     except ValueError as e:
@@ -50,34 +62,28 @@ async def login(request: Request, login_data: LoginRequest):
 
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(request: Request):
-    """Refresh JWT token."""
+async def refresh_token(request: Request, refresh_data: RefreshRequest):
+    """Exchange a refresh token for new tokens.
+    
+    Served from the signed token, the in-memory revocation list and the
+    cached membership directory, so a fleet of tablets refreshing at once
+    rarely reaches the database.
+    """
     try:
-        # Get current user from middleware
-        user = get_current_user(request)
-        
-        # Get auth manager
-        db = request.app.state.db
-        auth_manager = AuthManager(db)
-        
-        # Generate new token with same context
-        new_token = auth_manager._generate_token(
-            user_id=user["user_id"],
-            email=user["email"],
-            restaurant_id=user["restaurant_id"],
-            role=user["role"],
-            permissions=user["permissions"]
-        )
+        new_token, claims = await _auth_manager(request).refresh(refresh_data.refresh_token)
         
         return TokenResponse(
             access_token=new_token.access_token,
             token_type=new_token.token_type,
             expires_at=new_token.expires_at,
-            restaurant_id=user["restaurant_id"],
-            restaurant_name=user["restaurant_name"],
-            user_role=user["role"]
+            restaurant_id=claims["restaurant_id"],
+            restaurant_name=claims["restaurant_name"],
+            user_role=claims["role"],
+            refresh_token=new_token.refresh_token
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
         logger.error("Token refresh failed", error=str(e))
         raise HTTPException(status_code=500, detail="Token refresh failed")
@@ -90,14 +96,14 @@ async def get_current_user_info(request: Request):
         user = get_current_user(request)
         
         return {
-            "user_id": user["user_id"],
-            "email": user["email"],
+            "user_id": user.user_id,
+            "email": user.email,
             "restaurant": {
-                "id": user["restaurant_id"],
-                "name": user["restaurant_name"]
+                "id": user.restaurant_id,
+                "name": user.restaurant_name
             },
-            "role": user["role"],
-            "permissions": user["permissions"]
+            "role": user.role,
+            "permissions": dict(user.permissions)
         }
         
     except HTTPException:
@@ -108,17 +114,21 @@ async def get_current_user_info(request: Request):
 
 
 @router.post("/logout")
-async def logout(request: Request):
-    """Logout endpoint (client-side token removal)."""
-    # For JWT, logout is typically handled client-side
-    # This endpoint can be used for audit logging
+async def logout(request: Request, logout_data: Optional[LogoutRequest] = None):
+    """Logout endpoint.
+    
+    The access token is removed client-side; a refresh token sent along is
+    revoked with every token rotated from it.
+    """
     try:
         user = get_current_user(request)
+        if logout_data is not None and logout_data.refresh_token:
+            _auth_manager(request).revoke_refresh_token(logout_data.refresh_token)
         logger.info(
             "User logged out",
-            user_id=user["user_id"],
-            email=user["email"],
-            restaurant_id=user["restaurant_id"]
+            user_id=user.user_id,
+            email=user.email,
+            restaurant_id=user.restaurant_id
         )
         
         return {"message": "Logged out successfully"}
@@ -9,14 +9,70 @@ import structlog
 
 from ...orders.models import OrderStatus, OrderType
 from ..models.api_models import (
-    CreateOrderRequest, OrderResponse, UpdateOrderStatusRequest,
-    BatchOrdersRequest, SuccessResponse, ErrorResponse
+    CreateOrderRequest, OrderResponse, ActiveOrderResponse, UpdateOrderStatusRequest,
+    ItemBatchResponse,
+    BatchOrdersRequest, BulkOrderResult, BulkOrdersResponse,
+    SuccessResponse, ErrorResponse
 )
 from ..middleware.auth import get_current_user, require_role
 
 router = APIRouter()
 logger = structlog.get_logger()
 
+# Maximum number of orders accepted in one bulk push
+MAX_BULK_ORDERS = 200
+
+
+def _build_order_rows(order_data: CreateOrderRequest, restaurant_id: str) -> tuple:
+    """Convert an order request into order and item rows for the database."""
+    order_dict = {
+        "restaurant_id": restaurant_id,
+        "order_number": order_data.order_number,
+        "customer_name": order_data.customer_name,
+        "customer_phone": order_data.customer_phone,
+        "order_type": order_data.order_type.value,
+        "platform": order_data.platform,
+        "status": "pending",
+        "priority": 0,
+        "ordered_at": datetime.utcnow().isoformat(),
+        "total_amount": order_data.total_amount,
+        "notes": order_data.notes,
+        "metadata": order_data.metadata
+    }
+    
+    items = []
+    for item_data in order_data.items:
+        item_dict = {
+            "item_name": item_data.item_name,
+            "quantity": item_data.quantity,
+            "price": item_data.price,
+            "modifiers": item_data.modifiers,
+            "special_instructions": item_data.special_instructions,
+            "status": "pending"
+        }
+        
+        # Add optional fields
+        if item_data.category:
+            item_dict["category"] = item_data.category
+        if item_data.subcategory:
+            item_dict["subcategory"] = item_data.subcategory
+        if item_data.protein_type:
+            item_dict["protein_type"] = item_data.protein_type
+        if item_data.sauce:
+            item_dict["sauce"] = item_data.sauce
+        if item_data.size:
+            item_dict["size"] = item_data.size
+        
+        items.append(item_dict)
+    
+    return order_dict, items
+
+
+async def _menu_enricher(request: Request, db, restaurant_id: str):
+    """Item enrichment from the restaurant's synced menu, or None without one."""
+    index = await request.app.state.menu_indexes.get(db, restaurant_id)
+    return index.enrich_items if index is not None else None
+
 
 @router.post("/", response_model=OrderResponse)
 async def create_order(request: Request, order_data: CreateOrderRequest):
@@ -25,70 +81,111 @@ async def create_order(request: Request, order_data: CreateOrderRequest):
         user = get_current_user(request)
         db = request.app.state.db
         
-        # Prepare order data
-        order_dict = {
-            "restaurant_id": user["restaurant_id"],
-            "order_number": order_data.order_number,
-            "customer_name": order_data.customer_name,
-            "customer_phone": order_data.customer_phone,
-            "order_type": order_data.order_type.value,
-            "platform": order_data.platform,
-            "status": "pending",
-            "priority": 0,
-            "ordered_at": datetime.utcnow(),
-            "total_amount": order_data.total_amount,
-            "notes": order_data.notes,
-            "metadata": order_data.metadata
-        }
+        order_dict, items = _build_order_rows(order_data, user.restaurant_id)
+        enrich = await _menu_enricher(request, db, user.restaurant_id)
         
-        # Create order
-        order = await db.create_order(order_dict)
-        
-        # Create order items
-        for item_data in order_data.items:
-            item_dict = {
-                "order_id": order["id"],
-                "item_name": item_data.item_name,
-                "quantity": item_data.quantity,
-                "price": item_data.price,
-                "modifiers": item_data.modifiers,
-                "special_instructions": item_data.special_instructions,
-                "status": "pending"
-            }
-            
-            # Add optional fields
-            if item_data.category:
-                item_dict["category"] = item_data.category
-            if item_data.subcategory:
-                item_dict["subcategory"] = item_data.subcategory
-            if item_data.protein_type:
-                item_dict["protein_type"] = item_data.protein_type
-            if item_data.sauce:
-                item_dict["sauce"] = item_data.sauce
-            if item_data.size:
-                item_dict["size"] = item_data.size
-            
-            await db.create_order_item(item_dict)
-        
-        # Get complete order with items
-        complete_order = await db.get_order(order["id"])
+        # Create order and items in a single transaction, skipping resends
+        order, outcome = await request.app.state.order_dedup.create_order(
+            db, order_dict, items, enrich
+        )
         
         logger.info(
-            "Order created",
+            "Order received",
+            outcome=outcome,
             order_id=order["id"],
             order_number=order_data.order_number,
-            restaurant_id=user["restaurant_id"],
+            restaurant_id=user.restaurant_id,
             item_count=len(order_data.items)
         )
         
         # Convert to response model
-        return OrderResponse(**complete_order)
+        return OrderResponse(**order)
         
     except Exception as e:
         logger.error("Failed to create order", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to create order")
 
 
+@router.post("/bulk", response_model=BulkOrdersResponse)
+async def create_orders_bulk(request: Request, orders_data: List[CreateOrderRequest]):
+    """Idempotently push many orders from Chrome extension in one request.
+    
+    Orders are upserted by (restaurant_id, order_number, platform), so a
+    tablet reconnecting with a backlog can resend everything it has seen.
+    """
+    if len(orders_data) > MAX_BULK_ORDERS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BULK_ORDERS} orders per bulk request"
+        )
+    
+    try:
+        user = get_current_user(request)
+        db = request.app.state.db
+        
+        # Keep the last copy of any order repeated within the payload
+        rows = {}
+        duplicates = []
+        for order_data in orders_data:
+            key = (order_data.order_number, order_data.platform)
+            if key in rows:
+                duplicates.append(key)
+            order_dict, items = _build_order_rows(order_data, user.restaurant_id)
+            order_dict["items"] = items
+            rows[key] = order_dict
+        
+        # Orders unchanged since their last push never reach the database
+        enrich = await _menu_enricher(request, db, user.restaurant_id)
+        upserted, unchanged = await request.app.state.order_dedup.upsert_orders(
+            db, user.restaurant_id, list(rows.values()), enrich
+        )
+        
+        results = [
+            BulkOrderResult(
+                order_number=row["order_number"],
+                platform=row["platform"],
+                status="created" if row["inserted"] else "updated",
+                order_id=row["order_id"]
+            )
+            for row in upserted
+        ]
+        results.extend(
+            BulkOrderResult(
+                order_number=row["order_number"],
+                platform=row["platform"],
+                status="unchanged"
+            )
+            for row in unchanged
+        )
+        results.extend(
+            BulkOrderResult(order_number=number, platform=platform, status="duplicate")
+            for number, platform in duplicates
+        )
+        created = sum(1 for row in upserted if row["inserted"])
+        
+        logger.info(
+            "Bulk orders pushed",
+            restaurant_id=user.restaurant_id,
+            received=len(orders_data),
+            created=created,
+            unchanged=len(unchanged)
+        )
+        
+        return BulkOrdersResponse(
+            created=created,
+            updated=len(upserted) - created,
+            unchanged=len(unchanged),
+            duplicates=len(duplicates),
+            results=results
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to push bulk orders", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to push bulk orders")
+
+
 @router.get("/", response_model=List[OrderResponse])
 async def list_orders(
     request: Request,
@@ -103,7 +200,7 @@ async def list_orders(
         db = request.app.state.db
         
         # Build filters
-        filters = {"restaurant_id": user["restaurant_id"]}
+        filters = {"restaurant_id": user.restaurant_id}
         if status:
             filters["status"] = status.value
         if order_type:
@@ -120,24 +217,41 @@ async def list_orders(
         raise HTTPException(status_code=500, detail="Failed to list orders")
 
 
-@router.get("/active", response_model=List[OrderResponse])
+@router.get("/active", response_model=List[ActiveOrderResponse])
 async def get_active_orders(request: Request):
     """Get all active orders for kitchen display."""
     try:
         user = get_current_user(request)
         db = request.app.state.db
         
-        # Get active orders
-        orders = await db.get_active_orders(user["restaurant_id"])
+        # Served from the in-memory board while its realtime feed is live
+        orders = await request.app.state.order_boards.get_active_orders(
+            db, user.restaurant_id
+        )
         
         # Convert to response models
-        return [OrderResponse(**order) for order in orders]
+        return [ActiveOrderResponse(**order) for order in orders]
         
     except Exception as e:
         logger.error("Failed to get active orders", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to get active orders")
 
 
+@router.get("/batches", response_model=List[ItemBatchResponse])
+async def get_item_batches(request: Request):
+    """Get open items grouped into batches for kitchen display."""
+    try:
+        user = get_current_user(request)
+        db = request.app.state.db
+        
+        batches = await request.app.state.batch_boards.get_batches(db, user.restaurant_id)
+        return [ItemBatchResponse(**batch) for batch in batches]
+        
+    except Exception as e:
+        logger.error("Failed to get item batches", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to get item batches")
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(request: Request, order_id: UUID):
     """Get a specific order."""
@@ -152,7 +266,7 @@ async def get_order(request: Request, order_id: UUID):
             raise HTTPException(status_code=404, detail="Order not found")
         
         # Verify restaurant access
-        if order["restaurant_id"] != user["restaurant_id"]:
+        if order["restaurant_id"] != user.restaurant_id:
             raise HTTPException(status_code=403, detail="Access denied")
         
         return OrderResponse(**order)
@@ -180,7 +294,7 @@ async def update_order_status(
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        if order["restaurant_id"] != user["restaurant_id"]:
+        if order["restaurant_id"] != user.restaurant_id:
             raise HTTPException(status_code=403, detail="Access denied")
         
         # Update status
@@ -193,7 +307,7 @@ async def update_order_status(
             "Order status updated",
             order_id=order_id,
             new_status=status_data.status.value,
-            updated_by=user["user_id"]
+            updated_by=user.user_id
         )
         
         return SuccessResponse(
@@ -215,48 +329,43 @@ async def create_batch(request: Request, batch_data: BatchOrdersRequest):
         user = get_current_user(request)
         db = request.app.state.db
         
-        # Verify all orders belong to the restaurant
-        for order_id in batch_data.order_ids:
-            order = await db.get_order(str(order_id))
-            if not order:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Order {order_id} not found"
-                )
-            if order["restaurant_id"] != user["restaurant_id"]:
-                raise HTTPException(
-                    status_code=403,
-                    detail=f"Access denied for order {order_id}"
-                )
-        
-        # Create batch
+        # Verify all orders belong to the restaurant in one query
+        order_ids = [str(order_id) for order_id in batch_data.order_ids]
+        lookup = await db.get_orders_by_ids(user.restaurant_id, order_ids)
+        if lookup["missing"]:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Orders not found: {', '.join(lookup['missing'])}"
+            )
+        if lookup["foreign"]:
+            raise HTTPException(
+                status_code=403,
+                detail=f"Access denied for orders: {', '.join(lookup['foreign'])}"
+            )
+        
+        # Create batch and link its orders in one transaction
+        order_count = len(lookup["orders"])
         batch_name = batch_data.batch_name or f"Batch-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
-        batch = await db.create_batch(
-            user["restaurant_id"],
-            {
-                "batch_number": batch_name,
-                "status": "active",
-                "notes": batch_data.notes
-            }
+        batch = await db.create_batch_with_orders(
+            user.restaurant_id,
+            batch_name,
+            order_ids,
+            notes=batch_data.notes
         )
         
-        # Associate orders with batch
-        # Note: This would require adding batch_id to orders table
-        # For now, we'll just log it
-        
         logger.info(
             "Batch created",
             batch_id=batch["id"],
-            order_count=len(batch_data.order_ids),
-            restaurant_id=user["restaurant_id"]
+            order_count=order_count,
+            restaurant_id=user.restaurant_id
         )
         
         return SuccessResponse(
-            message=f"Batch created with {len(batch_data.order_ids)} orders",
+            message=f"Batch created with {order_count} orders",
             data={
                 "batch_id": batch["id"],
                 "batch_number": batch_name,
-                "order_count": len(batch_data.order_ids)
+                "order_count": order_count
             }
         )
         
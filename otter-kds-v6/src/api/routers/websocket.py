@@ -3,14 +3,24 @@
 import json
 import os
 import asyncio
-from typing import Dict, Set
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from uuid import UUID
 from datetime import datetime
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 import jwt
 import structlog
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from ..middleware.auth import decode_access_token
 from ..models.api_models import WebSocketMessage, SubscribeRequest
 
 router = APIRouter()
@@ -20,19 +30,159 @@ logger = structlog.get_logger()
 connections: Dict[str, Set[WebSocket]] = {}
 
 
+@dataclass
+class FanoutStats:
+    """Broadcast counters and delivery latency for one restaurant."""
+    messages: int = 0
+    deliveries: int = 0
+    evictions: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    
+    def record(self, latency: float):
+        """Record one message written to one socket."""
+        self.deliveries += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+    
+    def to_dict(self) -> dict:
+        """Summary in milliseconds."""
+        return {
+            "messages": self.messages,
+            "deliveries": self.deliveries,
+            "evictions": self.evictions,
+            "avg_latency_ms": round(self.total_latency / self.deliveries * 1000, 3) if self.deliveries else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 3)
+        }
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_message(message: dict) -> str:
+    """Serialize a WebSocket message once for every recipient."""
+    if orjson is not None:
+        return orjson.dumps(message, default=_json_default).decode()
+    return json.dumps(message, default=_json_default)
+
+
+def build_payload(message: dict) -> str:
+    """Wrap a message in the WebSocketMessage envelope and serialize it."""
+    ws_message = WebSocketMessage(
+        type=message.get("type", "unknown"),
+        action=message.get("action", "update"),
+        data=message,
+        timestamp=datetime.utcnow()
+    )
+    return encode_message(ws_message.model_dump())
+
+
+class SocketSender:
+    """Bounded outbound queue drained by one writer task per socket."""
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        restaurant_id: str,
+        manager: "ConnectionManager",
+        station: Optional[str] = None,
+        protocol: int = 1
+    ):
+        self.websocket = websocket
+        self.restaurant_id = restaurant_id
+        self.station = station
+        self.protocol = protocol
+        self.manager = manager
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=manager.queue_size)
+        self.task = asyncio.create_task(self._run())
+    
+    def offer(self, payload: str, enqueued_at: float) -> bool:
+        """Queue a payload without waiting; False if the socket is backed up."""
+        try:
+            self.queue.put_nowait((payload, enqueued_at))
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    async def _run(self):
+        while True:
+            payload, enqueued_at = await self.queue.get()
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(payload),
+                    timeout=self.manager.send_timeout
+                )
+            except Exception as e:
+                self.manager.evict(self.websocket, self.restaurant_id, reason=str(e) or type(e).__name__)
+                return
+            self.manager.stats(self.restaurant_id).record(time.perf_counter() - enqueued_at)
+
+
 class ConnectionManager:
     """Manage WebSocket connections."""
     
-    def __init__(self):
+    def __init__(self, queue_size: Optional[int] = None, send_timeout: Optional[float] = None,
+                 max_stats: Optional[int] = None):
+        """Initialize the manager.
+        
+        Args:
+            queue_size: Max messages buffered per socket before it is evicted
+                as a slow consumer (defaults to env var WS_SEND_QUEUE_SIZE or 100)
+            send_timeout: Seconds a single send may take before the socket is
+                evicted (defaults to env var WS_SEND_TIMEOUT or 5)
+            max_stats: Fan-out stats kept for restaurants without sockets
+                beyond this many are forgotten, least recently used first
+                (defaults to env var WS_STATS_MAX_RESTAURANTS or 1000)
+        """
         self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # restaurant_id -> station -> sockets of that station's screens
+        self.station_connections: Dict[str, Dict[str, Set[WebSocket]]] = {}
+        self.queue_size = queue_size or int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+        self.send_timeout = send_timeout or float(os.getenv("WS_SEND_TIMEOUT", "5"))
+        self._senders: Dict[WebSocket, SocketSender] = {}
+        self.max_stats = max_stats or int(os.getenv("WS_STATS_MAX_RESTAURANTS", "1000"))
+        self._stats: "OrderedDict[str, FanoutStats]" = OrderedDict()
     
-    async def connect(self, websocket: WebSocket, restaurant_id: str):
-        """Accept and track a new connection."""
+    async def connect(
+        self,
+        websocket: WebSocket,
+        restaurant_id: str,
+        station: Optional[str] = None,
+        protocol: int = 1,
+        catch_up: Optional[Callable[[], List[str]]] = None
+    ):
+        """Accept and track a new connection.
+        
+        Args:
+            websocket: The socket to accept
+            restaurant_id: Restaurant the socket belongs to
+            station: Station the socket displays; station sockets only
+                receive their own item events, not the restaurant stream
+            protocol: Message protocol the client speaks (1 = full rows,
+                2 = sequenced patches)
+            catch_up: Returns payloads to queue ahead of live events; called
+                in the same step as registration so nothing slips between
+        """
         await websocket.accept()
-        if restaurant_id not in self.active_connections:
-            self.active_connections[restaurant_id] = set()
-        self.active_connections[restaurant_id].add(websocket)
-        logger.info("WebSocket connected", restaurant_id=restaurant_id)
+        if station is None:
+            self.active_connections.setdefault(restaurant_id, set()).add(websocket)
+        else:
+            station = station.lower()
+            stations = self.station_connections.setdefault(restaurant_id, {})
+            stations.setdefault(station, set()).add(websocket)
+        sender = SocketSender(websocket, restaurant_id, self, station, protocol)
+        self._senders[websocket] = sender
+        
+        if catch_up is not None:
+            enqueued_at = time.perf_counter()
+            for payload in catch_up():
+                if not sender.offer(payload, enqueued_at):
+                    self.evict(websocket, restaurant_id, reason="catch-up exceeds send queue")
+                    break
+        logger.info("WebSocket connected", restaurant_id=restaurant_id, station=station, protocol=protocol)
     
     def disconnect(self, websocket: WebSocket, restaurant_id: str):
         """Remove a connection."""
@@ -40,31 +190,132 @@ class ConnectionManager:
             self.active_connections[restaurant_id].discard(websocket)
             if not self.active_connections[restaurant_id]:
                 del self.active_connections[restaurant_id]
+        
+        sender = self._senders.pop(websocket, None)
+        if sender and sender.station is not None:
+            self._remove_station_socket(websocket, restaurant_id, sender.station)
+        if sender and sender.task is not asyncio.current_task():
+            sender.task.cancel()
         logger.info("WebSocket disconnected", restaurant_id=restaurant_id)
     
-    async def send_to_restaurant(self, restaurant_id: str, message: dict):
-        """Send message to all connections for a restaurant."""
-        if restaurant_id in self.active_connections:
-            # Create WebSocket message
-            ws_message = WebSocketMessage(
-                type=message.get("type", "unknown"),
-                action=message.get("action", "update"),
-                data=message,
-                timestamp=datetime.utcnow()
-            )
-            
-            # Send to all connections
-            disconnected = []
-            for connection in self.active_connections[restaurant_id]:
-                try:
-                    await connection.send_json(ws_message.dict())
-                except Exception as e:
-                    logger.error("Failed to send message", error=str(e))
-                    disconnected.append(connection)
-            
-            # Clean up disconnected connections
-            for connection in disconnected:
-                self.active_connections[restaurant_id].discard(connection)
+    def _remove_station_socket(self, websocket: WebSocket, restaurant_id: str, station: str):
+        stations = self.station_connections.get(restaurant_id)
+        if not stations or station not in stations:
+            return
+        stations[station].discard(websocket)
+        if not stations[station]:
+            del stations[station]
+        if not stations:
+            del self.station_connections[restaurant_id]
+    
+    def evict(self, websocket: WebSocket, restaurant_id: str, reason: str):
+        """Drop a slow or broken consumer so it cannot hold up the others."""
+        if websocket not in self._senders:
+            return
+        self.stats(restaurant_id).evictions += 1
+        logger.warning("Evicting WebSocket consumer", restaurant_id=restaurant_id, reason=reason)
+        self.disconnect(websocket, restaurant_id)
+        asyncio.create_task(self._close(websocket))
+    
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=1013, reason="Too slow, reconnect")
+        except Exception:
+            pass
+    
+    def stats(self, restaurant_id: str) -> FanoutStats:
+        """Fan-out stats for a restaurant."""
+        stats = self._stats.get(restaurant_id)
+        if stats is not None:
+            self._stats.move_to_end(restaurant_id)
+            return stats
+        
+        stats = self._stats[restaurant_id] = FanoutStats()
+        if len(self._stats) > self.max_stats:
+            self._trim_stats()
+        return stats
+    
+    def _trim_stats(self):
+        """Forget the least recently used stats of restaurants without sockets."""
+        excess = len(self._stats) - self.max_stats
+        for restaurant_id in list(self._stats):
+            if excess <= 0:
+                break
+            if restaurant_id not in self.active_connections and restaurant_id not in self.station_connections:
+                del self._stats[restaurant_id]
+                excess -= 1
+    
+    def get_fanout_metrics(self) -> Dict[str, dict]:
+        """Per-restaurant fan-out metrics."""
+        return {
+            restaurant_id: {
+                "connections": len(self.active_connections.get(restaurant_id, ())),
+                "station_connections": sum(
+                    len(sockets)
+                    for sockets in self.station_connections.get(restaurant_id, {}).values()
+                ),
+                **stats.to_dict()
+            }
+            for restaurant_id, stats in self._stats.items()
+        }
+    
+    def _fan_out(self, restaurant_id: str, sockets: Iterable[WebSocket], message: dict):
+        """Serialize a message once and queue it on every given socket."""
+        self.send_payload(restaurant_id, sockets, build_payload(message))
+    
+    def send_payload(self, restaurant_id: str, sockets: Iterable[WebSocket], payload: str):
+        """Queue an already serialized payload on every given socket."""
+        enqueued_at = time.perf_counter()
+        self.stats(restaurant_id).messages += 1
+        
+        for connection in sockets:
+            sender = self._senders.get(connection)
+            if sender and not sender.offer(payload, enqueued_at):
+                self.evict(connection, restaurant_id, reason="send queue full")
+    
+    def send_to_socket(self, websocket: WebSocket, message: dict):
+        """Queue a reply for one socket behind what it was already sent."""
+        sender = self._senders.get(websocket)
+        if sender and not sender.offer(encode_message(message), time.perf_counter()):
+            self.evict(websocket, sender.restaurant_id, reason="send queue full")
+    
+    async def send_to_restaurant(self, restaurant_id: str, message: dict, protocol: Optional[int] = None):
+        """Send message to all connections for a restaurant.
+        
+        The message is serialized once and queued on every socket; each
+        socket's writer task sends it independently, so one slow tablet
+        cannot delay the rest.
+        
+        Args:
+            restaurant_id: Restaurant to send to
+            message: Message data
+            protocol: Only send to sockets speaking this protocol
+        """
+        sockets = self.restaurant_sockets(restaurant_id, protocol)
+        if sockets:
+            self._fan_out(restaurant_id, sockets, message)
+    
+    def restaurant_sockets(self, restaurant_id: str, protocol: Optional[int] = None) -> List[WebSocket]:
+        """Restaurant-wide sockets, optionally only those of one protocol."""
+        sockets = self.active_connections.get(restaurant_id, ())
+        if protocol is None:
+            return list(sockets)
+        return [
+            socket for socket in sockets
+            if socket in self._senders and self._senders[socket].protocol == protocol
+        ]
+    
+    async def send_to_stations(self, restaurant_id: str, stations: Iterable[str], message: dict):
+        """Send message only to the screens of the given stations."""
+        index = self.station_connections.get(restaurant_id)
+        if not index:
+            return
+        
+        sockets = set()
+        for station in stations:
+            sockets.update(index.get(station.lower(), ()))
+        if sockets:
+            self._fan_out(restaurant_id, sockets, message)
     
     async def broadcast_order_update(self, order: dict):
         """Broadcast order update to relevant restaurant."""
@@ -80,22 +331,358 @@ class ConnectionManager:
             )
 
 
+# Realtime event types mapped to WebSocket message actions
+EVENT_ACTIONS = {"INSERT": "create", "UPDATE": "update", "DELETE": "delete"}
+
+# Realtime channels the hub can share, by kind
+ORDERS_CHANNEL = "orders"
+ITEMS_CHANNEL = "items"
+
+# Version of the sequenced patch protocol on /ws/orders
+DELTA_PROTOCOL = 2
+
+# Order statuses after which an order is no longer tracked for patches
+FINAL_ORDER_STATUSES = {"completed", "cancelled"}
+
+
+class OrderEventLog:
+    """Sequenced order patches for one restaurant with a replay buffer.
+    
+    Each order change gets the next sequence number and is kept, already
+    serialized, in a ring buffer so a reconnecting client can replay what
+    it missed. The epoch changes whenever the log is recreated, which tells
+    clients their sequence numbers no longer apply.
+    """
+    
+    def __init__(self, buffer_size: Optional[int] = None, max_tracked_orders: Optional[int] = None):
+        """Initialize the log.
+        
+        Args:
+            buffer_size: Events kept for replay (defaults to env var
+                WS_REPLAY_BUFFER_SIZE or 500)
+            max_tracked_orders: Orders whose last state is kept to compute
+                patches (defaults to env var WS_TRACKED_ORDERS or 1000)
+        """
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._buffer: deque = deque(maxlen=buffer_size or int(os.getenv("WS_REPLAY_BUFFER_SIZE", "500")))
+        self._max_tracked = max_tracked_orders or int(os.getenv("WS_TRACKED_ORDERS", "1000"))
+        self._orders: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    def record(self, event: dict) -> Optional[str]:
+        """Turn a realtime order event into the next sequenced patch.
+        
+        Returns:
+            Serialized patch message, or None if the event carried no order
+        """
+        new = event.get("new") or {}
+        old = event.get("old") or {}
+        order_id = new.get("id") or old.get("id")
+        if not order_id:
+            return None
+        
+        event_type = event.get("eventType") or event.get("type") or "UPDATE"
+        previous = self._orders.pop(order_id, None)
+        if event_type == "DELETE":
+            patch = None
+        elif previous is None:
+            patch = new
+        else:
+            patch = {
+                field: value for field, value in new.items()
+                if previous.get(field) != value
+            }
+            if not patch:
+                self._track(order_id, new)
+                return None
+        
+        if event_type != "DELETE" and new.get("status") not in FINAL_ORDER_STATUSES:
+            self._track(order_id, new)
+        
+        self.seq += 1
+        payload = build_payload({
+            "type": "order_patch",
+            "action": EVENT_ACTIONS.get(event_type, "update"),
+            "seq": self.seq,
+            "epoch": self.epoch,
+            "order_id": order_id,
+            "patch": patch
+        })
+        self._buffer.append((self.seq, payload))
+        return payload
+    
+    def _track(self, order_id: str, row: Dict[str, Any]):
+        self._orders[order_id] = row
+        while len(self._orders) > self._max_tracked:
+            self._orders.popitem(last=False)
+    
+    def since(self, seq: int, epoch: Optional[str] = None) -> Optional[List[str]]:
+        """Payloads after ``seq``, or None if they can no longer be replayed."""
+        if epoch is not None and epoch != self.epoch:
+            return None
+        if seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self._buffer or self._buffer[0][0] > seq + 1:
+            return None
+        return [payload for event_seq, payload in self._buffer if event_seq > seq]
+
+
+class RealtimeHub:
+    """Share one Supabase realtime subscription per restaurant and kind.
+    
+    Every socket for a restaurant holds a reference to the same upstream
+    channel. Order events are fanned out to the restaurant's sockets, item
+    events only to the stations they belong to. A channel stays open for a
+    short linger after its last socket leaves so a quick reconnect can still
+    resume from the order event log.
+    """
+    
+    def __init__(self, connections: ConnectionManager, linger_seconds: Optional[float] = None):
+        self.connections = connections
+        self.linger_seconds = (
+            linger_seconds if linger_seconds is not None
+            else float(os.getenv("WS_CHANNEL_LINGER_SECONDS", "15"))
+        )
+        self.logs: Dict[str, OrderEventLog] = {}
+        self._listeners: Dict[Tuple[str, str], List[Callable[[dict], None]]] = {}
+        self._refcounts: Dict[Tuple[str, str], int] = {}
+        self._subscriptions: Dict[Tuple[str, str], str] = {}
+        self._teardowns: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def acquire(self, db, restaurant_id: str, kind: str = ORDERS_CHANNEL):
+        """Register a socket and open the restaurant channel if needed."""
+        self._loop = asyncio.get_running_loop()
+        key = (kind, restaurant_id)
+        self._refcounts[key] = self._refcounts.get(key, 0) + 1
+        
+        pending = self._teardowns.pop(key, None)
+        if pending is not None:
+            pending.cancel()
+        
+        if key in self._subscriptions or db is None:
+            return
+        
+        if kind == ITEMS_CHANNEL:
+            subscribe, handler = db.subscribe_to_restaurant_items, self._on_item_event
+        else:
+            subscribe, handler = db.subscribe_to_orders, self._on_event
+        
+        try:
+            self._subscriptions[key] = subscribe(
+                restaurant_id,
+                lambda event: handler(restaurant_id, event)
+            )
+            if kind == ORDERS_CHANNEL:
+                # A fresh channel may have missed events, so start a new epoch
+                self.logs[restaurant_id] = OrderEventLog()
+            logger.info("Realtime channel opened", restaurant_id=restaurant_id, kind=kind)
+        except Exception as e:
+            # Sockets still work without live updates; the next one retries
+            logger.error("Realtime subscription failed", restaurant_id=restaurant_id, kind=kind, error=str(e))
+    
+    def release(self, db, restaurant_id: str, kind: str = ORDERS_CHANNEL):
+        """Unregister a socket and close the channel after the last one."""
+        key = (kind, restaurant_id)
+        count = self._refcounts.get(key, 0) - 1
+        if count > 0:
+            self._refcounts[key] = count
+            return
+        
+        self._refcounts.pop(key, None)
+        if self.linger_seconds > 0 and key in self._subscriptions:
+            self._teardowns[key] = self._loop.call_later(
+                self.linger_seconds, self._teardown, db, key
+            )
+        else:
+            self._teardown(db, key)
+    
+    def _teardown(self, db, key: Tuple[str, str]):
+        kind, restaurant_id = key
+        self._teardowns.pop(key, None)
+        if key in self._refcounts:
+            return
+        
+        if kind == ORDERS_CHANNEL:
+            self.logs.pop(restaurant_id, None)
+        subscription_id = self._subscriptions.pop(key, None)
+        if subscription_id and db is not None:
+            db.unsubscribe(subscription_id)
+            logger.info("Realtime channel closed", restaurant_id=restaurant_id, kind=kind)
+    
+    def subscriber_count(self, restaurant_id: str, kind: str = ORDERS_CHANNEL) -> int:
+        """Number of local sockets sharing a restaurant channel."""
+        return self._refcounts.get((kind, restaurant_id), 0)
+    
+    def is_live(self, restaurant_id: str, kind: str = ORDERS_CHANNEL) -> bool:
+        """Whether an upstream channel is currently open."""
+        return (kind, restaurant_id) in self._subscriptions
+    
+    def add_listener(self, restaurant_id: str, kind: str, callback: Callable[[dict], None]):
+        """Call ``callback`` on the event loop with every event of a channel."""
+        self._listeners.setdefault((kind, restaurant_id), []).append(callback)
+    
+    def remove_listener(self, restaurant_id: str, kind: str, callback: Callable[[dict], None]):
+        """Stop calling a listener."""
+        listeners = self._listeners.get((kind, restaurant_id), [])
+        if callback in listeners:
+            listeners.remove(callback)
+        if not listeners:
+            self._listeners.pop((kind, restaurant_id), None)
+    
+    def send(self, restaurant_id: str, sockets: Iterable[WebSocket], message: dict):
+        """Serialize a message once and queue it on the given local sockets."""
+        self.connections.send_payload(restaurant_id, sockets, build_payload(message))
+    
+    def _notify(self, restaurant_id: str, kind: str, event: dict):
+        for callback in self._listeners.get((kind, restaurant_id), ()):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error("Realtime listener failed", restaurant_id=restaurant_id, kind=kind, error=str(e))
+    
+    def _schedule(self, coro):
+        # Realtime callbacks may run outside the event loop thread, so the
+        # broadcast is handed to the loop that owns the sockets
+        asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    def _on_event(self, restaurant_id: str, event: dict):
+        """Hand an order event to the event loop for publishing."""
+        if self._loop is None or (ORDERS_CHANNEL, restaurant_id) not in self._subscriptions:
+            return
+        self._schedule(self._publish_order_event(restaurant_id, event))
+    
+    async def _publish_order_event(self, restaurant_id: str, event: dict):
+        """Send an order event as a full row (v1) and a sequenced patch (v2)."""
+        self._notify(restaurant_id, ORDERS_CHANNEL, event)
+        
+        order = event.get("new") or event.get("old") or {}
+        await self.connections.send_to_restaurant(
+            restaurant_id,
+            {
+                "type": "order_update",
+                "action": "update",
+                "order": order
+            },
+            protocol=1
+        )
+        
+        log = self.logs.get(restaurant_id)
+        if log is None:
+            return
+        payload = log.record(event)
+        if payload is not None:
+            self.connections.send_payload(
+                restaurant_id,
+                self.connections.restaurant_sockets(restaurant_id, DELTA_PROTOCOL),
+                payload
+            )
+    
+    def _on_item_event(self, restaurant_id: str, event: dict):
+        """Hand an item event to the event loop for publishing."""
+        if self._loop is None or (ITEMS_CHANNEL, restaurant_id) not in self._subscriptions:
+            return
+        self._schedule(self._publish_item_event(restaurant_id, event))
+    
+    async def _publish_item_event(self, restaurant_id: str, event: dict):
+        """Forward an item event to the stations it was and is assigned to."""
+        self._notify(restaurant_id, ITEMS_CHANNEL, event)
+        
+        new = event.get("new") or {}
+        old = event.get("old") or {}
+        stations = {station for station in (new.get("station"), old.get("station")) if station}
+        if not stations:
+            return
+        
+        event_type = event.get("eventType") or event.get("type") or "UPDATE"
+        await self.connections.send_to_stations(
+            restaurant_id,
+            stations,
+            {
+                "type": "item_update",
+                "action": EVENT_ACTIONS.get(event_type, "update"),
+                "item": new or old
+            }
+        )
+
+
 # Global connection manager
 manager = ConnectionManager()
 
+# Shared realtime channels for all sockets in this process
+hub = RealtimeHub(manager)
+
+
+async def _delta_catch_up(
+    db,
+    restaurant_id: str,
+    connected: dict,
+    since: Optional[int],
+    epoch: Optional[str]
+) -> Callable[[], List[str]]:
+    """Prepare what a protocol 2 client must receive before live patches.
+    
+    Replays the missed patches when the log still holds them, otherwise
+    fetches a snapshot of the active orders first.
+    """
+    log = hub.logs.get(restaurant_id)
+    snapshot = None
+    if since is None or log is None or log.since(since, epoch) is None:
+        base_seq = log.seq if log else 0
+        snapshot = await db.get_active_orders(restaurant_id) if db is not None else []
+    
+    def catch_up() -> List[str]:
+        current = hub.logs.get(restaurant_id)
+        seq, current_epoch = (current.seq, current.epoch) if current else (0, None)
+        payloads = [encode_message({
+            **connected,
+            "data": {**connected["data"], "protocol": DELTA_PROTOCOL, "seq": seq, "epoch": current_epoch}
+        })]
+        
+        if snapshot is None:
+            replay = current.since(since, epoch) if current else None
+            if replay is None:
+                # The gap grew past the buffer while connecting
+                payloads.append(build_payload({"type": "resync", "action": "snapshot_required"}))
+            else:
+                payloads.extend(replay)
+            return payloads
+        
+        payloads.append(build_payload({
+            "type": "snapshot",
+            "action": "replace",
+            "seq": base_seq,
+            "epoch": log.epoch if log else None,
+            "orders": snapshot
+        }))
+        # Patches that arrived while the snapshot was being fetched
+        if current is not None and current is log:
+            payloads.extend(current.since(base_seq) or [])
+        return payloads
+    
+    return catch_up
+
 
 @router.websocket("/orders")
 async def websocket_orders(
     websocket: WebSocket,
-    token: str = Query(..., description="JWT token for authentication")
+    token: str = Query(..., description="JWT token for authentication"),
+    protocol: int = Query(1, description="1 for full order rows, 2 for sequenced patches"),
+    since: Optional[int] = Query(None, description="Last sequence number seen; implies protocol 2"),
+    epoch: Optional[str] = Query(None, description="Epoch the sequence number belongs to"),
+    batches: bool = Query(False, description="Also receive item batch snapshots and deltas")
 ):
     """WebSocket endpoint for real-time order updates."""
     restaurant_id = None
+    joined = False
+    batch_boards = getattr(websocket.app.state, "batch_boards", None) if batches else None
+    db = getattr(websocket.app.state, "db", None)
     
     try:
-        # Validate JWT token
-        jwt_secret = os.getenv("JWT_SECRET", "your-secret-key")
-        payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
+        # Validate JWT token the way the HTTP middleware does
+        payload = decode_access_token(token)
         restaurant_id = payload.get("restaurant_id")
         user_id = payload.get("user_id")
         
@@ -103,11 +690,7 @@ async def websocket_orders(
             await websocket.close(code=4001, reason="Invalid token")
             return
         
-        # Connect
-        await manager.connect(websocket, restaurant_id)
-        
-        # Send initial connection success message
-        await websocket.send_json({
+        connected = {
             "type": "connection",
             "action": "connected",
             "data": {
@@ -115,16 +698,27 @@ async def websocket_orders(
                 "user_id": user_id,
                 "timestamp": datetime.utcnow().isoformat()
             }
-        })
+        }
         
-        # Set up Supabase real-time subscription
-        db = websocket.app.state.db
-        subscription_id = await db.subscribe_to_orders(
-            restaurant_id,
-            lambda event: asyncio.create_task(
-                manager.broadcast_order_update(event["new"])
-            )
-        )
+        # Join the restaurant's shared real-time channel
+        hub.acquire(db, restaurant_id)
+        joined = True
+        
+        if since is not None or protocol == DELTA_PROTOCOL:
+            # Connection message, snapshot or replay go out through the
+            # socket's queue ahead of any live patch
+            catch_up = await _delta_catch_up(db, restaurant_id, connected, since, epoch)
+            await manager.connect(websocket, restaurant_id, protocol=DELTA_PROTOCOL, catch_up=catch_up)
+        else:
+            await manager.connect(websocket, restaurant_id, catch_up=lambda: [encode_message(connected)])
+        
+        if batch_boards is not None and db is not None:
+            try:
+                snapshot = await batch_boards.subscribe(db, restaurant_id, websocket)
+                hub.send(restaurant_id, [websocket], batch_boards.snapshot(restaurant_id, snapshot))
+            except Exception as e:
+                batch_boards = None
+                logger.error("Batch subscription failed", restaurant_id=restaurant_id, error=str(e))
         
         # Keep connection alive and handle incoming messages
         while True:
@@ -134,7 +728,7 @@ async def websocket_orders(
             
             # Handle different message types
             if message.get("type") == "ping":
-                await websocket.send_json({
+                manager.send_to_socket(websocket, {
                     "type": "pong",
                     "timestamp": datetime.utcnow().isoformat()
                 })
@@ -147,10 +741,7 @@ async def websocket_orders(
                 )
             
     except WebSocketDisconnect:
-        if restaurant_id:
-            manager.disconnect(websocket, restaurant_id)
-            if 'subscription_id' in locals():
-                db.unsubscribe(subscription_id)
+        pass
     except jwt.ExpiredSignatureError:
         await websocket.close(code=4001, reason="Token expired")
     except jwt.InvalidTokenError:
@@ -158,8 +749,12 @@ async def websocket_orders(
     except Exception as e:
         logger.error("WebSocket error", error=str(e))
         await websocket.close(code=4000, reason="Internal error")
-        if restaurant_id:
+    finally:
+        if joined:
+            if batch_boards is not None:
+                batch_boards.unsubscribe(db, restaurant_id, websocket)
             manager.disconnect(websocket, restaurant_id)
+            hub.release(db, restaurant_id)
 
 
 @router.websocket("/kitchen/{station}")
@@ -170,24 +765,19 @@ async def websocket_kitchen_station(
 ):
     """WebSocket endpoint for station-specific updates."""
     restaurant_id = None
+    joined = False
+    db = getattr(websocket.app.state, "db", None)
     
     try:
-        # Validate JWT token
-        import os
-        jwt_secret = os.getenv("JWT_SECRET", "your-secret-key")
-        payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
+        # Validate JWT token the way the HTTP middleware does
+        payload = decode_access_token(token)
         restaurant_id = payload.get("restaurant_id")
         
         if not restaurant_id:
             await websocket.close(code=4001, reason="Invalid token")
             return
         
-        # Connect with station context
-        connection_id = f"{restaurant_id}:{station}"
-        await manager.connect(websocket, connection_id)
-        
-        # Send connection success
-        await websocket.send_json({
+        connected = {
             "type": "connection",
             "action": "connected",
             "data": {
@@ -195,20 +785,56 @@ async def websocket_kitchen_station(
                 "station": station,
                 "timestamp": datetime.utcnow().isoformat()
             }
-        })
+        }
+        
+        # Connect with station context and join the restaurant's item channel;
+        # the connection message is queued ahead of any item event
+        await manager.connect(
+            websocket, restaurant_id, station=station, catch_up=lambda: [encode_message(connected)]
+        )
+        hub.acquire(db, restaurant_id, kind=ITEMS_CHANNEL)
+        joined = True
         
         # Keep connection alive
         while True:
             data = await websocket.receive_text()
-            # Echo back for now
-            await websocket.send_text(f"Station {station}: {data}")
+            message = json.loads(data)
+            
+            if message.get("type") == "ping":
+                manager.send_to_socket(websocket, {
+                    "type": "pong",
+                    "timestamp": datetime.utcnow().isoformat()
+                })
             
     except WebSocketDisconnect:
-        if restaurant_id:
-            manager.disconnect(websocket, f"{restaurant_id}:{station}")
+        pass
+    except jwt.ExpiredSignatureError:
+        await websocket.close(code=4001, reason="Token expired")
+    except jwt.InvalidTokenError:
+        await websocket.close(code=4001, reason="Invalid token")
     except Exception as e:
         logger.error("WebSocket station error", error=str(e), station=station)
         await websocket.close(code=4000, reason="Internal error")
+    finally:
+        if joined:
+            manager.disconnect(websocket, restaurant_id)
+            hub.release(db, restaurant_id, kind=ITEMS_CHANNEL)
+
+
+@router.get("/stats")
+async def websocket_stats(token: str = Query(..., description="JWT token for authentication")):
+    """Fan-out metrics for the restaurant of the token."""
+    try:
+        payload = decode_access_token(token)
+    except jwt.InvalidTokenError:
+        return JSONResponse(status_code=401, content={"detail": "Invalid token"})
+    
+    restaurant_id = payload.get("restaurant_id")
+    metrics = manager.get_fanout_metrics()
+    return {
+        "restaurant_id": restaurant_id,
+        "fanout": metrics.get(restaurant_id, {"connections": 0, **FanoutStats().to_dict()})
+    }
 
 
 # Demo WebSocket client page
@@ -249,13 +875,13 @@ async def websocket_demo():
             <button onclick="clearMessages()">Clear Messages</button>
         </div>
     </div>
-
+    
     <script>
         let ws = null;
         const statusEl = document.getElementById('status');
         const messagesEl = document.getElementById('messages');
         const tokenEl = document.getElementById('token');
-
+        
         function updateStatus(connected) {
             if (connected) {
                 statusEl.textContent = 'Connected';
@@ -265,7 +891,7 @@ async def websocket_demo():
                 statusEl.className = 'status disconnected';
             }
         }
-
+        
         function addMessage(message) {
             const messageEl = document.createElement('div');
             messageEl.className = 'message';
@@ -273,46 +899,46 @@ async def websocket_demo():
             messagesEl.appendChild(messageEl);
             messagesEl.scrollTop = messagesEl.scrollHeight;
         }
-
+        
         function connect() {
             const token = tokenEl.value;
             if (!token) {
                 alert('Please enter a JWT token');
                 return;
             }
-
+            
             if (ws) {
                 ws.close();
             }
-
+            
             const wsUrl = `ws://localhost:8000/ws/orders?token=${encodeURIComponent(token)}`;
             ws = new WebSocket(wsUrl);
-
+            
             ws.onopen = () => {
                 updateStatus(true);
                 addMessage('Connected to WebSocket');
             };
-
+            
             ws.onmessage = (event) => {
                 addMessage('Received: ' + event.data);
             };
-
+            
             ws.onclose = () => {
                 updateStatus(false);
                 addMessage('Disconnected from WebSocket');
             };
-
+            
             ws.onerror = (error) => {
                 addMessage('Error: ' + error.message);
             };
         }
-
+        
         function disconnect() {
             if (ws) {
                 ws.close();
             }
         }
-
+        
         function sendPing() {
             if (ws && ws.readyState === WebSocket.OPEN) {
                 ws.send(JSON.stringify({ type: 'ping' }));
@@ -321,7 +947,7 @@ async def websocket_demo():
                 alert('Not connected');
             }
         }
-
+        
         function clearMessages() {
             messagesEl.innerHTML = '';
         }
@@ -0,0 +1,203 @@
+"""Cached user memberships and restaurant names for Otter KDS v6.
+
+Login and restaurant switches read a user's ``restaurant_users`` rows with
+their restaurants, and every token carries the restaurant's name. The
+MembershipDirectory keeps both in bounded TTL caches, dropped as soon as a
+realtime change to ``restaurant_users`` or ``restaurants`` touches them.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Set, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+# Nested select of a user with their memberships and restaurants
+MEMBERSHIP_SELECT = "*, restaurant_users(*, restaurants(*))"
+
+
+class MembershipDirectory:
+    """Bounded TTL cache of user memberships and restaurant names."""
+    
+    def __init__(self, ttl_seconds: Optional[float] = None, max_users: Optional[int] = None,
+                 max_restaurants: Optional[int] = None):
+        """Initialize the directory.
+        
+        Args:
+            ttl_seconds: How long an entry is trusted (defaults to env var
+                AUTH_DIRECTORY_TTL_SECONDS or 300)
+            max_users: Max users remembered (defaults to env var
+                AUTH_DIRECTORY_MAX_USERS or 10000)
+            max_restaurants: Max restaurant names remembered (defaults to env
+                var AUTH_DIRECTORY_MAX_RESTAURANTS or 10000)
+        """
+        self.ttl_seconds = ttl_seconds or float(os.getenv("AUTH_DIRECTORY_TTL_SECONDS", "300"))
+        self.max_users = max_users or int(os.getenv("AUTH_DIRECTORY_MAX_USERS", "10000"))
+        self.max_restaurants = max_restaurants or int(os.getenv("AUTH_DIRECTORY_MAX_RESTAURANTS", "10000"))
+        self._users: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._restaurants: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        # Cached users per restaurant, to drop them when the restaurant changes
+        self._members: Dict[str, Set[str]] = {}
+        # Bumped on every invalidation so an in-flight read cannot cache stale rows
+        self._generation = 0
+        self._subscription_id: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+    
+    async def get_user(self, db, user_id: Any) -> Dict[str, Any]:
+        """A user row with its ``restaurant_users`` and their restaurants."""
+        key = str(user_id)
+        entry = self._users.get(key)
+        if entry is not None:
+            if entry[1] >= time.monotonic():
+                self._users.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._drop_user(key)
+        
+        self.misses += 1
+        generation = self._generation
+        response = await db.rest.table("users")\
+            .select(MEMBERSHIP_SELECT)\
+            .eq("id", key)\
+            .single()\
+            .execute()
+        user = response.data
+        
+        if user and generation == self._generation:
+            self._put_user(key, user)
+        return user
+    
+    async def get_restaurant_name(self, db, restaurant_id: Any) -> Optional[str]:
+        """Name of a restaurant, or None if it does not exist."""
+        name = self.cached_restaurant_name(restaurant_id)
+        if name is not None:
+            self.hits += 1
+            return name
+        
+        self.misses += 1
+        generation = self._generation
+        response = await db.rest.table("restaurants")\
+            .select("id, name")\
+            .eq("id", str(restaurant_id))\
+            .execute()
+        if not response.data:
+            return None
+        
+        name = response.data[0]["name"]
+        if generation == self._generation:
+            self.put_restaurant_name(restaurant_id, name)
+        return name
+    
+    def cached_restaurant_name(self, restaurant_id: Any) -> Optional[str]:
+        """Name of a restaurant if it is cached, without a database read."""
+        key = str(restaurant_id)
+        entry = self._restaurants.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            del self._restaurants[key]
+            return None
+        self._restaurants.move_to_end(key)
+        return entry[0]
+    
+    def put_restaurant_name(self, restaurant_id: Any, name: str):
+        """Remember the name of a restaurant."""
+        key = str(restaurant_id)
+        self._restaurants[key] = (name, time.monotonic() + self.ttl_seconds)
+        self._restaurants.move_to_end(key)
+        while len(self._restaurants) > self.max_restaurants:
+            self._restaurants.popitem(last=False)
+    
+    def _put_user(self, key: str, user: Dict[str, Any]):
+        self._drop_user(key)
+        self._users[key] = (user, time.monotonic() + self.ttl_seconds)
+        for ru in user.get("restaurant_users") or []:
+            restaurant_id = str(ru.get("restaurant_id"))
+            self._members.setdefault(restaurant_id, set()).add(key)
+            restaurant = ru.get("restaurants")
+            if restaurant and restaurant.get("name"):
+                self.put_restaurant_name(restaurant["id"], restaurant["name"])
+        while len(self._users) > self.max_users:
+            self._drop_user(next(iter(self._users)))
+    
+    def _drop_user(self, key: str):
+        entry = self._users.pop(key, None)
+        if entry is None:
+            return
+        for ru in entry[0].get("restaurant_users") or []:
+            restaurant_id = str(ru.get("restaurant_id"))
+            members = self._members.get(restaurant_id)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._members[restaurant_id]
+    
+    def invalidate_user(self, user_id: Any):
+        """Forget a user's memberships."""
+        self._generation += 1
+        self._drop_user(str(user_id))
+    
+    def invalidate_restaurant(self, restaurant_id: Any):
+        """Forget a restaurant and every cached membership that embeds it."""
+        self._generation += 1
+        key = str(restaurant_id)
+        self._restaurants.pop(key, None)
+        for user_key in list(self._members.get(key, ())):
+            self._drop_user(user_key)
+    
+    def clear(self):
+        """Forget everything."""
+        self._generation += 1
+        self._users.clear()
+        self._restaurants.clear()
+        self._members.clear()
+    
+    def apply_membership_event(self, event: Dict[str, Any]):
+        """Apply a realtime change of the restaurant_users table."""
+        for row in (event.get("new"), event.get("old")):
+            if row and row.get("user_id"):
+                self.invalidate_user(row["user_id"])
+    
+    def apply_restaurant_event(self, event: Dict[str, Any]):
+        """Apply a realtime change of the restaurants table."""
+        for row in (event.get("new"), event.get("old")):
+            if row and row.get("id"):
+                self.invalidate_restaurant(row["id"])
+    
+    def start(self, db):
+        """Subscribe to membership and restaurant changes.
+        
+        Must be called from the event loop that reads the directory. Without
+        realtime, entries still expire after ``ttl_seconds``.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            self._subscription_id = db.subscribe_to_memberships(
+                lambda event: loop.call_soon_threadsafe(self.apply_membership_event, event),
+                lambda event: loop.call_soon_threadsafe(self.apply_restaurant_event, event)
+            )
+        except Exception as e:
+            logger.warning(
+                "Membership realtime unavailable, relying on TTL",
+                ttl_seconds=self.ttl_seconds,
+                error=str(e)
+            )
+    
+    def stop(self, db):
+        """Unsubscribe from realtime changes and forget everything."""
+        if self._subscription_id is not None:
+            db.unsubscribe(self._subscription_id)
+            self._subscription_id = None
+        self.clear()
+
+
+def active_memberships(user: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Active ``restaurant_users`` rows of a user whose restaurant is visible."""
+    return [
+        ru for ru in user.get("restaurant_users") or []
+        if ru.get("active") and ru.get("restaurants")
+    ]
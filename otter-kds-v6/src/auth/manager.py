@@ -1,13 +1,18 @@
 """Authentication manager for multi-restaurant support."""
 
+import calendar
 import os
-from typing import Optional, List, Dict, Any
+import time
+import uuid
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from uuid import UUID
 import jwt
 import structlog
 
 from ..database import SupabaseManager
+from .directory import MembershipDirectory, active_memberships
+from .tokens import RevocationList
 from .models import (
     LoginRequest,
     SignupRequest,
@@ -20,20 +25,37 @@ from .models import (
 
 logger = structlog.get_logger()
 
+# Claims copied from a refresh token into the tokens it mints
+REFRESH_CLAIMS = ("user_id", "email", "restaurant_id", "restaurant_name", "role", "permissions")
+
 
 class AuthManager:
     """Manages authentication with multi-restaurant support."""
     
-    def __init__(self, supabase: SupabaseManager):
+    def __init__(
+        self,
+        supabase: SupabaseManager,
+        directory: Optional[MembershipDirectory] = None,
+        revocations: Optional[RevocationList] = None
+    ):
         """Initialize authentication manager.
         
         Args:
             supabase: Supabase database manager instance
+            directory: Shared membership cache (a private one if omitted)
+            revocations: Shared refresh token revocation list (a private
+                one if omitted)
         """
         self.supabase = supabase
+        self.directory = directory if directory is not None else MembershipDirectory()
+        self.revocations = revocations if revocations is not None else RevocationList()
         self.jwt_secret = os.getenv("JWT_SECRET", "your-secret-key")
         self.jwt_algorithm = "HS256"
         self.token_expiry_hours = 24
+        self.refresh_token_days = int(os.getenv("AUTH_REFRESH_TOKEN_DAYS", "30"))
+        # A rotated refresh token may be replayed this long (client retries)
+        # before it counts as stolen
+        self.refresh_reuse_grace = float(os.getenv("AUTH_REFRESH_REUSE_GRACE_SECONDS", "10"))
     
     async def signup(self, request: SignupRequest) -> AuthResponse:
         """Sign up a new user with a new restaurant.
@@ -60,7 +82,7 @@ class AuthManager:
                 "timezone": request.timezone,
                 "settings": {}
             }
-            restaurant = await self.supabase.client.table("restaurants")\
+            restaurant = await self.supabase.rest.table("restaurants")\
                 .insert(restaurant_data).execute()
             restaurant_id = restaurant.data[0]["id"]
             
@@ -71,11 +93,11 @@ class AuthManager:
                 "role": "owner",
                 "active": True
             }
-            await self.supabase.client.table("restaurant_users")\
+            await self.supabase.rest.table("restaurant_users")\
                 .insert(association_data).execute()
             
             # Create user profile in public schema
-            await self.supabase.client.rpc(
+            await self.supabase.rest.rpc(
                 "create_user_profile",
                 {
                     "user_id": user_id,
@@ -84,12 +106,15 @@ class AuthManager:
                 }
             ).execute()
             
+            self.directory.put_restaurant_name(restaurant_id, request.restaurant_name)
+            
             # Generate token
             token = self._generate_token(
                 user_id=user_id,
                 email=request.email,
                 restaurant_id=restaurant_id,
-                role="owner"
+                role="owner",
+                restaurant_name=request.restaurant_name
             )
             
             # Build response
@@ -132,25 +157,10 @@ class AuthManager:
             user_id = auth_response["user"]["id"]
             
             # Get user data with restaurant associations
-            user_data = await self.supabase.client.table("users")\
-                .select("*, restaurant_users(*, restaurants(*))")\
-                .eq("id", user_id)\
-                .single()\
-                .execute()
-            
-            user = user_data.data
+            user = await self.directory.get_user(self.supabase, user_id)
             
             # Build restaurant list
-            restaurants = []
-            for ru in user.get("restaurant_users", []):
-                if ru["active"] and ru.get("restaurants"):
-                    restaurant = ru["restaurants"]
-                    restaurants.append(RestaurantInfo(
-                        id=restaurant["id"],
-                        name=restaurant["name"],
-                        location=restaurant.get("location"),
-                        role=ru["role"]
-                    ))
+            restaurants = self._restaurant_list(user)
             
             if not restaurants:
                 raise ValueError("User has no restaurant access")
@@ -174,7 +184,8 @@ class AuthManager:
                 user_id=user_id,
                 email=user["email"],
                 restaurant_id=active_restaurant.id,
-                role=active_restaurant.role
+                role=active_restaurant.role,
+                restaurant_name=active_restaurant.name
             )
             
             logger.info(
@@ -206,22 +217,14 @@ class AuthManager:
         """Switch active restaurant for a multi-location user."""
         try:
             # Get user's restaurant associations
-            user_data = await self.supabase.client.table("users")\
-                .select("*, restaurant_users(*, restaurants(*))")\
-                .eq("id", user_id)\
-                .single()\
-                .execute()
-            
-            user = user_data.data
+            user = await self.directory.get_user(self.supabase, user_id)
             
             # Find requested restaurant
             target_restaurant = None
             target_role = None
             
-            for ru in user.get("restaurant_users", []):
-                if (ru["active"] and 
-                    ru.get("restaurants") and 
-                    ru["restaurant_id"] == str(request.restaurant_id)):
+            for ru in active_memberships(user):
+                if ru["restaurant_id"] == str(request.restaurant_id):
                     target_restaurant = ru["restaurants"]
                     target_role = ru["role"]
                     break
@@ -234,20 +237,12 @@ class AuthManager:
                 user_id=user_id,
                 email=user["email"],
                 restaurant_id=request.restaurant_id,
-                role=target_role
+                role=target_role,
+                restaurant_name=target_restaurant["name"]
             )
             
             # Build full restaurant list
-            restaurants = []
-            for ru in user.get("restaurant_users", []):
-                if ru["active"] and ru.get("restaurants"):
-                    restaurant = ru["restaurants"]
-                    restaurants.append(RestaurantInfo(
-                        id=restaurant["id"],
-                        name=restaurant["name"],
-                        location=restaurant.get("location"),
-                        role=ru["role"]
-                    ))
+            restaurants = self._restaurant_list(user)
             
             active_restaurant = RestaurantInfo(
                 id=target_restaurant["id"],
@@ -289,6 +284,8 @@ class AuthManager:
                 self.jwt_secret,
                 algorithms=[self.jwt_algorithm]
             )
+            if payload.get("type") == "refresh":
+                raise ValueError("Refresh token used as access token")
             
             # Check expiration
             expires_at = datetime.fromisoformat(payload["expires_at"])
@@ -313,51 +310,154 @@ class AuthManager:
             logger.error("Token verification failed", error=str(e))
             raise
     
+    def _restaurant_list(self, user: Dict[str, Any]) -> List[RestaurantInfo]:
+        """Restaurants a user can access, from their membership rows."""
+        return [
+            RestaurantInfo(
+                id=ru["restaurants"]["id"],
+                name=ru["restaurants"]["name"],
+                location=ru["restaurants"].get("location"),
+                role=ru["role"]
+            )
+            for ru in active_memberships(user)
+        ]
+    
     def _generate_token(
         self,
         user_id: str,
         email: str,
         restaurant_id: str,
         role: str,
-        permissions: Optional[Dict[str, Any]] = None
+        permissions: Optional[Dict[str, Any]] = None,
+        restaurant_name: Optional[str] = None,
+        family: Optional[str] = None
     ) -> AuthToken:
-        """Generate JWT token with restaurant context."""
-        expires_at = datetime.utcnow() + timedelta(hours=self.token_expiry_hours)
+        """Generate an access token and a refresh token with restaurant context.
         
-        payload = {
-            "user_id": user_id,
+        The restaurant name is taken from the caller or the membership
+        directory; token generation never waits on the database.
+        
+        Args:
+            family: Refresh token family to continue (a new one if omitted)
+        """
+        issued_at = datetime.utcnow()
+        expires_at = issued_at + timedelta(hours=self.token_expiry_hours)
+        
+        if restaurant_name is None:
+            restaurant_name = self.directory.cached_restaurant_name(restaurant_id)
+        
+        claims = {
+            "user_id": str(user_id),
             "email": email,
-            "restaurant_id": restaurant_id,
+            "restaurant_id": str(restaurant_id),
+            "restaurant_name": restaurant_name or "Unknown",
             "role": role,
-            "permissions": permissions or {},
+            "permissions": permissions or {}
+        }
+        
+        payload = {
+            **claims,
             "expires_at": expires_at.isoformat(),
-            "issued_at": datetime.utcnow().isoformat()
+            "issued_at": issued_at.isoformat(),
+            "exp": calendar.timegm(expires_at.utctimetuple())
         }
         
-        # Get restaurant name for token
-        # In production, this would be cached
-        try:
-            restaurant = self.supabase.client.table("restaurants")\
-                .select("name")\
-                .eq("id", restaurant_id)\
-                .single()\
-                .execute()
-            payload["restaurant_name"] = restaurant.data["name"]
-        except:
-            payload["restaurant_name"] = "Unknown"
+        refresh_payload = {
+            **claims,
+            "type": "refresh",
+            "jti": uuid.uuid4().hex,
+            "fam": family or uuid.uuid4().hex,
+            "iat": calendar.timegm(issued_at.utctimetuple()),
+            "exp": calendar.timegm((issued_at + timedelta(days=self.refresh_token_days)).utctimetuple())
+        }
         
         access_token = jwt.encode(
             payload,
             self.jwt_secret,
             algorithm=self.jwt_algorithm
         )
+        refresh_token = jwt.encode(
+            refresh_payload,
+            self.jwt_secret,
+            algorithm=self.jwt_algorithm
+        )
         
         return AuthToken(
             access_token=access_token,
             token_type="bearer",
-            expires_at=expires_at
+            expires_at=expires_at,
+            refresh_token=refresh_token
         )
     
+    def _decode_refresh_token(self, refresh_token: str) -> Dict[str, Any]:
+        try:
+            payload = jwt.decode(
+                refresh_token,
+                self.jwt_secret,
+                algorithms=[self.jwt_algorithm]
+            )
+        except jwt.InvalidTokenError as e:
+            raise ValueError(f"Invalid refresh token: {e}")
+        
+        if payload.get("type") != "refresh" or not payload.get("jti") or not payload.get("fam"):
+            raise ValueError("Invalid refresh token")
+        return payload
+    
+    async def refresh(self, refresh_token: str) -> Tuple[AuthToken, Dict[str, Any]]:
+        """Rotate a refresh token into new tokens from its signed claims.
+        
+        The presented token is revoked. Presenting it again after
+        ``refresh_reuse_grace`` seconds means it was copied, so its whole
+        family is revoked. So is a family whose user is no longer an active
+        member of the restaurant, checked through the membership directory.
+        
+        Returns:
+            Tuple of (new tokens, claims they were minted from)
+            
+        Raises:
+            ValueError: If the token is invalid, expired or revoked
+        """
+        payload = self._decode_refresh_token(refresh_token)
+        
+        if self.revocations.is_revoked(payload["fam"]):
+            raise ValueError("Refresh token revoked")
+        
+        user = await self.directory.get_user(self.supabase, payload["user_id"])
+        if not any(
+            str(ru["restaurant_id"]) == payload["restaurant_id"]
+            for ru in active_memberships(user or {})
+        ):
+            self.revocations.revoke(payload["fam"], time.time() + self.refresh_token_days * 86400)
+            logger.warning(
+                "Refresh for a removed membership, revoking its family",
+                user_id=payload["user_id"],
+                restaurant_id=payload["restaurant_id"]
+            )
+            raise ValueError("User no longer has access to this restaurant")
+        
+        revoked_at = self.revocations.revoked_at(payload["jti"])
+        if revoked_at is None:
+            self.revocations.revoke(payload["jti"], payload["exp"])
+        elif time.time() - revoked_at > self.refresh_reuse_grace:
+            self.revocations.revoke(payload["fam"], time.time() + self.refresh_token_days * 86400)
+            logger.warning(
+                "Rotated refresh token reused, revoking its family",
+                user_id=payload["user_id"],
+                restaurant_id=payload["restaurant_id"]
+            )
+            raise ValueError("Refresh token revoked")
+        
+        token = self._generate_token(
+            family=payload["fam"],
+            **{claim: payload.get(claim) for claim in REFRESH_CLAIMS}
+        )
+        return token, payload
+    
+    def revoke_refresh_token(self, refresh_token: str):
+        """Revoke a refresh token and every token rotated from it (logout)."""
+        payload = self._decode_refresh_token(refresh_token)
+        self.revocations.revoke(payload["fam"], time.time() + self.refresh_token_days * 86400)
+    
     async def add_user_to_restaurant(
         self,
         restaurant_id: UUID,
@@ -373,7 +473,7 @@ class AuthManager:
                 raise ValueError("Insufficient permissions to add users")
             
             # Find user by email
-            user_data = await self.supabase.client.table("users")\
+            user_data = await self.supabase.rest.table("users")\
                 .select("id")\
                 .eq("email", email)\
                 .single()\
@@ -385,7 +485,7 @@ class AuthManager:
             user_id = user_data.data["id"]
             
             # Check if association already exists
-            existing = await self.supabase.client.table("restaurant_users")\
+            existing = await self.supabase.rest.table("restaurant_users")\
                 .select("id")\
                 .eq("restaurant_id", restaurant_id)\
                 .eq("user_id", user_id)\
@@ -393,7 +493,7 @@ class AuthManager:
             
             if existing.data:
                 # Update existing association
-                await self.supabase.client.table("restaurant_users")\
+                await self.supabase.rest.table("restaurant_users")\
                     .update({"role": role, "active": True})\
                     .eq("restaurant_id", restaurant_id)\
                     .eq("user_id", user_id)\
@@ -406,10 +506,13 @@ class AuthManager:
                     "role": role,
                     "active": True
                 }
-                await self.supabase.client.table("restaurant_users")\
+                await self.supabase.rest.table("restaurant_users")\
                     .insert(association_data)\
                     .execute()
             
+            # Don't wait for realtime to show the new membership
+            self.directory.invalidate_user(user_id)
+            
             logger.info(
                 "User added to restaurant",
                 user_id=user_id,
@@ -436,7 +539,7 @@ class AuthManager:
     ) -> Optional[str]:
         """Get user's role in a specific restaurant."""
         try:
-            data = await self.supabase.client.table("restaurant_users")\
+            data = await self.supabase.rest.table("restaurant_users")\
                 .select("role")\
                 .eq("user_id", user_id)\
                 .eq("restaurant_id", restaurant_id)\
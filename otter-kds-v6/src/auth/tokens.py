@@ -0,0 +1,143 @@
+"""Refresh token revocation for Otter KDS v6.
+
+A refresh mints new tokens from the claims of a signed refresh token, so it
+only reads the (cached) membership directory. The only state kept here is
+which refresh tokens (by ``jti``) and token families (by ``fam``) have been
+revoked. RevocationList keeps them in memory, writes new ones to the
+``revoked_tokens`` table in batches and polls for other workers'
+revocations. Realtime, when it delivers, only makes them arrive sooner.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+
+def _timestamp(value: Any) -> float:
+    """Epoch seconds from a number or an ISO timestamp."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+class RevocationList:
+    """Revoked refresh tokens and token families, shared across workers."""
+    
+    def __init__(self, sync_seconds: Optional[float] = None):
+        """Initialize the list.
+        
+        Args:
+            sync_seconds: How often new revocations are written and read
+                back (defaults to env var
+                AUTH_REVOCATION_SYNC_SECONDS or 2)
+        """
+        self.sync_seconds = sync_seconds or float(os.getenv("AUTH_REVOCATION_SYNC_SECONDS", "2"))
+        # Token id -> (expires_at, revoked_at), both epoch seconds
+        self._revoked: Dict[str, Tuple[float, float]] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self._last_seen: Optional[float] = None
+        self._subscription_id: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self._revoked)
+    
+    def revoked_at(self, token_id: str) -> Optional[float]:
+        """When a token id was revoked, or None if it is not."""
+        entry = self._revoked.get(token_id)
+        return entry[1] if entry is not None else None
+    
+    def is_revoked(self, token_id: str) -> bool:
+        """Whether a token id has been revoked."""
+        return token_id in self._revoked
+    
+    def revoke(self, token_id: str, expires_at: float):
+        """Revoke a token id until ``expires_at`` and share it with other workers."""
+        now = time.time()
+        if self._add(token_id, expires_at, now):
+            self._pending.append({"token_id": token_id, "expires_at": expires_at, "revoked_at": now})
+    
+    def _add(self, token_id: str, expires_at: float, revoked_at: float) -> bool:
+        if token_id in self._revoked or expires_at <= time.time():
+            return False
+        self._revoked[token_id] = (expires_at, revoked_at)
+        return True
+    
+    def _add_row(self, row: Dict[str, Any]):
+        self._add(row["token_id"], _timestamp(row["expires_at"]), _timestamp(row["revoked_at"]))
+        if row.get("recorded_at") is not None:
+            recorded_at = _timestamp(row["recorded_at"])
+            self._last_seen = max(self._last_seen or recorded_at, recorded_at)
+    
+    def prune(self):
+        """Forget revocations of tokens that have expired anyway."""
+        now = time.time()
+        for token_id in [k for k, (expires_at, _) in self._revoked.items() if expires_at <= now]:
+            del self._revoked[token_id]
+    
+    def apply_event(self, event: Dict[str, Any]):
+        """Apply a realtime insert into the revoked_tokens table."""
+        row = event.get("new") or {}
+        if row.get("token_id"):
+            self._add_row(row)
+    
+    async def sync(self, db):
+        """Write pending revocations and read other workers' new ones."""
+        self.prune()
+        if self._pending:
+            pending, self._pending = self._pending, []
+            try:
+                await db.revoke_tokens(pending)
+            except Exception:
+                self._pending = pending + self._pending
+                raise
+        
+        # Polled even with realtime, which may not deliver; rows may also be
+        # committed out of order, so overlap the previous read
+        since = self._last_seen - 60 if self._last_seen is not None else None
+        for row in await db.get_revoked_tokens(since):
+            self._add_row(row)
+        if self._last_seen is None:
+            self._last_seen = time.time()
+    
+    async def _run(self, db):
+        while True:
+            try:
+                await self.sync(db)
+            except Exception as e:
+                logger.warning("Token revocation sync failed", error=str(e), pending=len(self._pending))
+            await asyncio.sleep(self.sync_seconds)
+    
+    def start(self, db):
+        """Load existing revocations and keep in sync with other workers.
+        
+        Must be called from the event loop that checks the list.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            self._subscription_id = db.subscribe_to_revocations(
+                lambda event: loop.call_soon_threadsafe(self.apply_event, event)
+            )
+        except Exception as e:
+            logger.warning("Revocation realtime unavailable, polling only", error=str(e))
+        self._task = loop.create_task(self._run(db))
+    
+    async def stop(self, db):
+        """Stop syncing, writing any pending revocations first."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._subscription_id is not None:
+            db.unsubscribe(self._subscription_id)
+            self._subscription_id = None
+        if self._pending:
+            try:
+                await db.revoke_tokens(self._pending)
+                self._pending = []
+            except Exception as e:
+                logger.error("Failed to write token revocations", error=str(e), pending=len(self._pending))
@@ -14,6 +14,7 @@ import structlog
 from ..database import SupabaseManager
 from ..auth.manager import AuthManager
 from ..orders.models import OrderStatus, ItemStatus
+from ..orders.board import follow_board
 
 console = Console()
 logger = structlog.get_logger()
@@ -105,7 +106,7 @@ def show(ctx, order_id: str):
         
         try:
             # Get order details
-            order = await db.client.table("orders")\
+            order = await db.rest.table("orders")\
                 .select("*, order_items(*)")\
                 .eq("id", order_id)\
                 .single()\
@@ -165,7 +166,7 @@ def complete(ctx, order_id: str, force: bool):
         try:
             # Check if all items are completed (unless forced)
             if not force:
-                items = await db.client.table("order_items")\
+                items = await db.rest.table("order_items")\
                     .select("status")\
                     .eq("order_id", order_id)\
                     .execute()
@@ -205,18 +206,17 @@ def watch(ctx, restaurant_id: str, refresh: int):
         console.print(f"[cyan]Watching orders for restaurant {restaurant_id}[/cyan]")
         console.print("Press Ctrl+C to stop\n")
         
-        # Subscribe to real-time updates
-        def on_order_change(payload):
-            # This will be called when orders change
-            console.print(f"[yellow]Order updated: {payload['new']['order_number']}[/yellow]")
-        
-        subscription_id = db.subscribe_to_orders(restaurant_id, on_order_change)
+        # Seed the board once and keep it current from real-time updates
+        board, subscription_ids = await follow_board(db, restaurant_id)
         
         try:
             with Live(console=console, refresh_per_second=1/refresh) as live:
                 while True:
-                    # Get current orders
-                    orders_data = await db.get_active_orders(restaurant_id)
+                    # Get current orders, polling only if real-time is unavailable
+                    if board is not None:
+                        orders_data = board.rows()
+                    else:
+                        orders_data = await db.get_active_orders(restaurant_id)
                     
                     # Create table
                     table = Table(title=f"Live Orders - {datetime.now().strftime('%H:%M:%S')}")
@@ -244,7 +244,8 @@ def watch(ctx, restaurant_id: str, refresh: int):
         except KeyboardInterrupt:
             console.print("\n[yellow]Stopped watching orders[/yellow]")
         finally:
-            db.unsubscribe(subscription_id)
+            for subscription_id in subscription_ids:
+                db.unsubscribe(subscription_id)
     
     asyncio.run(watch_orders())
 
@@ -317,7 +318,7 @@ def item_complete(ctx, item_id: str):
                 
                 # Check if this completes the order
                 order_id = result['order_id']
-                order = await db.client.table("orders")\
+                order = await db.rest.table("orders")\
                     .select("*, order_items(status)")\
                     .eq("id", order_id)\
                     .single()\
@@ -15,6 +15,7 @@ class OtterProfile(BaseModel):
     password: str = Field(..., description="Otter password")
     base_url: str = Field(default="https://api.tryotter.com", description="Otter API URL")
     restaurant_ids: Optional[List[str]] = Field(default=None, description="Specific restaurant IDs for this account")
+    kds_restaurant_id: Optional[str] = Field(default=None, description="KDS restaurant the synced menu is written to")
     description: Optional[str] = Field(default=None, description="Profile description")
 
 
@@ -20,6 +20,16 @@ class Settings(BaseSettings):
     otter_password: Optional[str] = Field(default=None, alias="OTTER_PASSWORD")
     otter_base_url: str = Field(default="https://api.tryotter.com", alias="OTTER_BASE_URL")
     
+    # Otter session cache - reuses browser logins across syncs and workers
+    session_cache_dir: str = Field(default="~/.otter-kds/sessions", alias="OTTER_SESSION_CACHE_DIR")
+    session_ttl_hours: float = Field(default=12, alias="OTTER_SESSION_TTL_HOURS")
+    
+    # Otter menu pushes - concurrent item updates within Otter's rate limit
+    push_concurrency: int = Field(default=4, alias="OTTER_PUSH_CONCURRENCY")
+    push_rate_per_second: float = Field(default=5, alias="OTTER_PUSH_RATE_PER_SECOND")
+    push_burst: int = Field(default=10, alias="OTTER_PUSH_BURST")
+    push_max_retries: int = Field(default=3, alias="OTTER_PUSH_MAX_RETRIES")
+    
     # Database Configuration (optional)
     database_url: Optional[str] = Field(default=None, alias="DATABASE_URL")
     
@@ -27,6 +37,18 @@ class Settings(BaseSettings):
     sync_interval_minutes: int = Field(default=30, alias="MENU_SYNC_INTERVAL_MINUTES")
     sync_enabled: bool = Field(default=True, alias="MENU_SYNC_ENABLED")
     sync_all_profiles: bool = Field(default=False, alias="MENU_SYNC_ALL_PROFILES")
+    sync_concurrency: int = Field(default=5, alias="MENU_SYNC_CONCURRENCY")
+    sync_jitter_seconds: float = Field(default=10, alias="MENU_SYNC_JITTER_SECONDS")
+    # Adaptive schedule: each profile's interval moves between these bounds
+    # with how often its menu changes, starting at sync_interval_minutes
+    sync_min_interval_minutes: float = Field(default=5, alias="MENU_SYNC_MIN_INTERVAL_MINUTES")
+    sync_max_interval_minutes: float = Field(default=240, alias="MENU_SYNC_MAX_INTERVAL_MINUTES")
+    sync_trigger_poll_seconds: float = Field(default=5, alias="MENU_SYNC_TRIGGER_POLL_SECONDS")
+    snapshot_path: str = Field(default="~/.otter-kds/menus.db", alias="MENU_SYNC_SNAPSHOT_PATH")
+    
+    # KDS database write-through - needs SUPABASE_URL/SUPABASE_KEY
+    kds_restaurant_id: Optional[str] = Field(default=None, alias="KDS_RESTAURANT_ID")
+    write_chunk_size: int = Field(default=500, alias="MENU_SYNC_WRITE_CHUNK_SIZE")
     
     # Logging Configuration
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
@@ -4,21 +4,77 @@ import os
 from typing import Optional, List, Dict, Any, Callable
 from datetime import datetime, timedelta
 import asyncio
-from functools import wraps
+from functools import partial, wraps
 
+from httpx import ConnectError, ConnectTimeout, Limits, PoolTimeout, Timeout
 from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 from postgrest.exceptions import APIError
+from postgrest.utils import AsyncClient as PostgrestHTTPClient
 import structlog
 
+from ..utils.retry import (
+    retry, retry_budget, is_transient, CircuitOpenError, RETRYABLE_STATUS_CODES
+)
+
 logger = structlog.get_logger()
 
 
-def handle_supabase_errors(func):
-    """Decorator to handle Supabase errors."""
+# Postgres/PostgREST error codes worth retrying: serialization failures,
+# deadlocks, lock timeouts, cancelled queries, connection trouble
+TRANSIENT_SUPABASE_CODES = frozenset({
+    "40001", "40P01", "55P03", "57014", "53300", "57P01", "57P03",
+    "PGRST000", "PGRST001", "PGRST002"
+})
+
+
+def is_transient_supabase_error(e: BaseException) -> bool:
+    """Whether a Supabase call failed for a reason worth retrying."""
+    if isinstance(e, APIError):
+        # PostgREST reports non-JSON gateway errors with the HTTP status as code
+        code = str(e.code or "")
+        return (
+            code in TRANSIENT_SUPABASE_CODES
+            or code.startswith("08")
+            or (code.isdigit() and int(code) in RETRYABLE_STATUS_CODES)
+        )
+    return is_transient(e)
+
+
+def _request_not_sent(e: BaseException) -> bool:
+    """Whether a call failed before its request could reach Supabase."""
+    return isinstance(e, (ConnectError, ConnectTimeout, PoolTimeout))
+
+
+def handle_supabase_errors(func=None, *, idempotent: bool = True):
+    """Decorator to handle Supabase errors.
+    
+    Transient failures are retried with jittered backoff, within the
+    process-wide retry budget, and calls fail fast while the Supabase
+    circuit breaker is open. Calls that must not run twice
+    (``idempotent=False``) are only retried if the request was never sent.
+    """
+    if func is None:
+        return partial(handle_supabase_errors, idempotent=idempotent)
+    
+    retrying = retry(
+        attempts=3,
+        delay=0.2,
+        max_delay=2.0,
+        jitter=True,
+        retry_if=is_transient_supabase_error if idempotent else _request_not_sent,
+        breaker="supabase",
+        budget=retry_budget
+    )(func)
+    
     @wraps(func)
     async def wrapper(*args, **kwargs):
         try:
-            return await func(*args, **kwargs)
+            return await retrying(*args, **kwargs)
+        except CircuitOpenError as e:
+            logger.warning("Supabase circuit open", function=func.__name__, retry_after=e.retry_after)
+            raise
         except APIError as e:
             logger.error("Supabase API error", error=str(e), function=func.__name__)
             raise
@@ -28,18 +84,49 @@ def handle_supabase_errors(func):
     return wrapper
 
 
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client backed by a bounded keep-alive connection pool."""
+    
+    def __init__(self, base_url: str, *, headers: Dict[str, str],
+                 timeout: float, limits: Limits):
+        self._limits = limits
+        super().__init__(base_url, headers=headers, timeout=Timeout(timeout))
+    
+    def create_session(self, base_url: str, headers: Dict[str, str],
+                       timeout: Timeout) -> PostgrestHTTPClient:
+        return PostgrestHTTPClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=self._limits
+        )
+
+
 class SupabaseManager:
-    """Manages all Supabase database operations."""
+    """Manages all Supabase database operations.
     
-    def __init__(self, url: Optional[str] = None, key: Optional[str] = None):
+    Table and RPC calls go through a non-blocking PostgREST client (``rest``)
+    so a slow query never stalls the event loop. The synchronous supabase-py
+    ``client`` is kept for auth and real-time channels; its blocking auth
+    calls are pushed to a worker thread.
+    """
+    
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None,
+                 pool_size: Optional[int] = None, timeout: Optional[float] = None):
         """Initialize Supabase client.
         
         Args:
             url: Supabase project URL (defaults to env var SUPABASE_URL)
             key: Supabase anon key (defaults to env var SUPABASE_KEY)
+            pool_size: Max pooled HTTP connections (defaults to env var
+                SUPABASE_POOL_SIZE or 20)
+            timeout: Request timeout in seconds (defaults to env var
+                SUPABASE_TIMEOUT or 10)
         """
         self.url = url or os.getenv("SUPABASE_URL")
         self.key = key or os.getenv("SUPABASE_KEY")
+        self.pool_size = pool_size or int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+        self.timeout = timeout or float(os.getenv("SUPABASE_TIMEOUT", "10"))
         
         if not self.url or not self.key:
             raise ValueError("Supabase URL and key must be provided")
@@ -49,56 +136,173 @@ class SupabaseManager:
         
         try:
             self.client: Client = create_client(self.url, self.key)
+            self.rest = self._create_rest_client()
             self._realtime_subscriptions: Dict[str, Any] = {}
             logger.info("Supabase client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to create Supabase client: {type(e).__name__}: {str(e)}")
             raise
     
+    def _create_rest_client(self) -> PooledPostgrestClient:
+        """Create the async PostgREST client used for all table and RPC calls."""
+        headers = {
+            **DEFAULT_POSTGREST_CLIENT_HEADERS,
+            "apiKey": self.key,
+            "Authorization": f"Bearer {self.key}",
+        }
+        limits = Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.pool_size
+        )
+        return PooledPostgrestClient(
+            f"{self.url}/rest/v1",
+            headers=headers,
+            timeout=self.timeout,
+            limits=limits
+        )
+    
+    async def close(self):
+        """Close pooled HTTP connections."""
+        await self.rest.aclose()
+    
     # Authentication methods
     @handle_supabase_errors
     async def sign_in(self, email: str, password: str) -> Dict[str, Any]:
         """Sign in a user."""
-        response = self.client.auth.sign_in_with_password({
-            "email": email,
-            "password": password
-        })
+        response = await asyncio.to_thread(
+            self.client.auth.sign_in_with_password,
+            {"email": email, "password": password}
+        )
         logger.info("User signed in", email=email)
         return response.dict()
     
-    @handle_supabase_errors
+    @handle_supabase_errors(idempotent=False)
     async def sign_up(self, email: str, password: str, metadata: Optional[Dict] = None) -> Dict[str, Any]:
         """Sign up a new user."""
-        response = self.client.auth.sign_up({
-            "email": email,
-            "password": password,
-            "options": {"data": metadata} if metadata else {}
-        })
+        response = await asyncio.to_thread(
+            self.client.auth.sign_up,
+            {
+                "email": email,
+                "password": password,
+                "options": {"data": metadata} if metadata else {}
+            }
+        )
         logger.info("User signed up", email=email)
         return response.dict()
     
     async def sign_out(self):
         """Sign out the current user."""
-        self.client.auth.sign_out()
+        await asyncio.to_thread(self.client.auth.sign_out)
         logger.info("User signed out")
     
     # Order management
-    @handle_supabase_errors
+    @handle_supabase_errors(idempotent=False)
     async def create_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new order."""
-        response = self.client.table("orders").insert(order_data).execute()
+        response = await self.rest.table("orders").insert(order_data).execute()
         logger.info("Order created", order_id=response.data[0]["id"])
         return response.data[0]
     
+    @handle_supabase_errors(idempotent=False)
+    async def create_order_with_items(self, order_data: Dict[str, Any],
+                                      items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create an order and its items in one transactional round trip.
+        
+        Returns:
+            The created order row with its items under ``items``
+        """
+        response = await self.rest.rpc(
+            "create_order_with_items",
+            {"p_order": order_data, "p_items": items}
+        ).execute()
+        order = response.data
+        logger.info("Order created", order_id=order["id"], item_count=len(items))
+        return order
+    
+    @handle_supabase_errors
+    async def upsert_orders_with_items(self, restaurant_id: str,
+                                       orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Idempotently upsert many orders in one transactional round trip.
+        
+        Orders are keyed on ``(restaurant_id, order_number, platform)``. Each
+        order dict carries its rows under ``items``; items are only inserted
+        for orders that did not exist yet.
+        
+        Returns:
+            One row per order with ``order_id``, ``order_number``, ``platform``
+            and ``inserted``
+        """
+        response = await self.rest.rpc(
+            "upsert_orders_with_items",
+            {"p_restaurant_id": restaurant_id, "p_orders": orders}
+        ).execute()
+        inserted = sum(1 for row in response.data if row["inserted"])
+        logger.info(
+            "Orders upserted",
+            restaurant_id=restaurant_id,
+            created=inserted,
+            updated=len(response.data) - inserted
+        )
+        return response.data
+    
+    @handle_supabase_errors
+    async def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single order with its items."""
+        response = await self.rest.table("orders")\
+            .select("*, items:order_items(*)")\
+            .eq("id", order_id)\
+            .limit(1)\
+            .execute()
+        return response.data[0] if response.data else None
+    
+    @handle_supabase_errors
+    async def get_orders_by_ids(self, restaurant_id: str, order_ids: List[str]) -> Dict[str, Any]:
+        """Look up many orders in one query and sort out the ones a restaurant can't use.
+        
+        Args:
+            restaurant_id: Restaurant that should own the orders
+            order_ids: Order ids to look up
+        
+        Returns:
+            Dict with ``orders`` (rows owned by the restaurant), ``missing``
+            (ids with no order) and ``foreign`` (ids of other restaurants' orders)
+        """
+        ids = list(dict.fromkeys(str(order_id) for order_id in order_ids))
+        rows = []
+        if ids:
+            response = await self.rest.table("orders")\
+                .select("id, restaurant_id, order_number, status")\
+                .in_("id", ids)\
+                .execute()
+            rows = response.data
+        
+        found = {row["id"]: row for row in rows}
+        return {
+            "orders": [row for row in rows if row["restaurant_id"] == restaurant_id],
+            "missing": [order_id for order_id in ids if order_id not in found],
+            "foreign": [order_id for order_id in ids
+                        if order_id in found and found[order_id]["restaurant_id"] != restaurant_id]
+        }
+    
     @handle_supabase_errors
     async def get_active_orders(self, restaurant_id: str) -> List[Dict[str, Any]]:
         """Get all active orders for a restaurant."""
-        response = self.client.rpc(
+        response = await self.rest.rpc(
             "get_active_orders",
             {"p_restaurant_id": restaurant_id}
         ).execute()
         return response.data
     
+    @handle_supabase_errors
+    async def get_active_orders_with_items(self, restaurant_id: str) -> List[Dict[str, Any]]:
+        """Get active orders with the id and status of each item."""
+        response = await self.rest.table("orders")\
+            .select("id, order_number, customer_name, status, ordered_at, items:order_items(id, status)")\
+            .eq("restaurant_id", restaurant_id)\
+            .in_("status", ["pending", "in_progress"])\
+            .execute()
+        return response.data
+    
     @handle_supabase_errors
     async def update_order_status(self, order_id: str, status: str) -> Dict[str, Any]:
         """Update order status."""
@@ -108,18 +312,38 @@ class SupabaseManager:
         elif status == "completed":
             update_data["completed_at"] = datetime.utcnow().isoformat()
         
-        response = self.client.table("orders").update(update_data).eq("id", order_id).execute()
+        response = await self.rest.table("orders").update(update_data).eq("id", order_id).execute()
         logger.info("Order status updated", order_id=order_id, status=status)
         return response.data[0]
     
-    # Order items management
     @handle_supabase_errors
+    async def update_order(self, order_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Update selected columns of an order."""
+        response = await self.rest.table("orders").update(changes).eq("id", order_id).execute()
+        logger.info("Order updated", order_id=order_id, fields=list(changes))
+        return response.data[0]
+    
+    # Order items management
+    @handle_supabase_errors(idempotent=False)
     async def create_order_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Create multiple order items."""
-        response = self.client.table("order_items").insert(items).execute()
+        response = await self.rest.table("order_items").insert(items).execute()
         logger.info("Order items created", count=len(items))
         return response.data
     
+    @handle_supabase_errors
+    async def get_items_for_orders(self, order_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get the items of many orders in one query, by order id."""
+        response = await self.rest.table("order_items")\
+            .select("*")\
+            .in_("order_id", order_ids)\
+            .order("created_at")\
+            .execute()
+        items: Dict[str, List[Dict[str, Any]]] = {}
+        for item in response.data:
+            items.setdefault(str(item["order_id"]), []).append(item)
+        return items
+    
     @handle_supabase_errors
     async def update_item_status(self, item_id: str, status: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """Update order item status."""
@@ -131,7 +355,7 @@ class SupabaseManager:
             if user_id:
                 update_data["completed_by"] = user_id
         
-        response = self.client.table("order_items").update(update_data).eq("id", item_id).execute()
+        response = await self.rest.table("order_items").update(update_data).eq("id", item_id).execute()
         logger.info("Item status updated", item_id=item_id, status=status)
         return response.data[0]
     
@@ -139,7 +363,7 @@ class SupabaseManager:
     @handle_supabase_errors
     async def get_prep_time_stats(self, restaurant_id: str, time_window: str = "1 hour") -> Dict[str, Any]:
         """Get preparation time statistics."""
-        response = self.client.rpc(
+        response = await self.rest.rpc(
             "calculate_prep_time_stats",
             {
                 "p_restaurant_id": restaurant_id,
@@ -151,7 +375,7 @@ class SupabaseManager:
     @handle_supabase_errors
     async def get_demand_predictions(self, restaurant_id: str, time_window_minutes: int = 30) -> List[Dict[str, Any]]:
         """Get demand predictions for the next time window."""
-        response = self.client.rpc(
+        response = await self.rest.rpc(
             "generate_demand_prediction",
             {
                 "p_restaurant_id": restaurant_id,
@@ -170,7 +394,7 @@ class SupabaseManager:
         if hour_of_day is not None:
             params["p_hour_of_day"] = hour_of_day
         
-        response = self.client.rpc("get_item_popularity", params).execute()
+        response = await self.rest.rpc("get_item_popularity", params).execute()
         return response.data
     
     # Real-time subscriptions
@@ -216,6 +440,53 @@ class SupabaseManager:
         logger.info("Subscribed to order item updates", order_id=order_id)
         return subscription_id
     
+    def subscribe_to_restaurant_items(self, restaurant_id: str, callback: Callable) -> str:
+        """Subscribe to real-time order item updates for a whole restaurant."""
+        channel = self.client.channel(f"order_items:restaurant:{restaurant_id}")
+        
+        channel.on(
+            event="*",
+            schema="public",
+            table="order_items",
+            filter=f"restaurant_id=eq.{restaurant_id}",
+            callback=callback
+        ).subscribe()
+        
+        subscription_id = f"restaurant_items_{restaurant_id}"
+        self._realtime_subscriptions[subscription_id] = channel
+        logger.info("Subscribed to restaurant item updates", restaurant_id=restaurant_id)
+        return subscription_id
+    
+    def subscribe_to_memberships(self, membership_callback: Callable,
+                                 restaurant_callback: Callable) -> str:
+        """Subscribe to real-time changes of restaurant_users and restaurants.
+        
+        Args:
+            membership_callback: Function to call when a membership changes
+            restaurant_callback: Function to call when a restaurant changes
+        
+        Returns:
+            Subscription ID
+        """
+        channel = self.client.channel("memberships")
+        
+        channel.on(
+            event="*",
+            schema="public",
+            table="restaurant_users",
+            callback=membership_callback
+        ).on(
+            event="*",
+            schema="public",
+            table="restaurants",
+            callback=restaurant_callback
+        ).subscribe()
+        
+        subscription_id = "memberships"
+        self._realtime_subscriptions[subscription_id] = channel
+        logger.info("Subscribed to membership updates")
+        return subscription_id
+    
     def unsubscribe(self, subscription_id: str):
         """Unsubscribe from real-time updates."""
         if subscription_id in self._realtime_subscriptions:
@@ -230,18 +501,41 @@ class SupabaseManager:
             self.unsubscribe(subscription_id)
     
     # Batch management
-    @handle_supabase_errors
+    @handle_supabase_errors(idempotent=False)
     async def create_batch(self, restaurant_id: str, batch_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new batch."""
         batch_data["restaurant_id"] = restaurant_id
-        response = self.client.table("batches").insert(batch_data).execute()
+        response = await self.rest.table("batches").insert(batch_data).execute()
         logger.info("Batch created", batch_id=response.data[0]["id"])
         return response.data[0]
     
+    @handle_supabase_errors(idempotent=False)
+    async def create_batch_with_orders(self, restaurant_id: str, batch_number: str,
+                                       order_ids: List[str], notes: Optional[str] = None) -> Dict[str, Any]:
+        """Create a batch and link orders to it in one transaction.
+        
+        The call fails and creates nothing if any order is missing or
+        belongs to another restaurant.
+        
+        Returns:
+            The new batch row
+        """
+        response = await self.rest.rpc(
+            "create_batch_with_orders",
+            {
+                "p_restaurant_id": restaurant_id,
+                "p_batch_number": batch_number,
+                "p_order_ids": [str(order_id) for order_id in order_ids],
+                "p_notes": notes
+            }
+        ).execute()
+        logger.info("Batch created", batch_id=response.data["id"], order_count=len(order_ids))
+        return response.data
+    
     @handle_supabase_errors
     async def get_active_batches(self, restaurant_id: str) -> List[Dict[str, Any]]:
         """Get all active batches."""
-        response = self.client.table("batches")\
+        response = await self.rest.table("batches")\
             .select("*")\
             .eq("restaurant_id", restaurant_id)\
             .eq("status", "active")\
@@ -249,11 +543,49 @@ class SupabaseManager:
             .execute()
         return response.data
     
+    @handle_supabase_errors
+    async def get_open_order_items(self, restaurant_id: str) -> List[Dict[str, Any]]:
+        """Get active orders with the item fields that decide their batch."""
+        response = await self.rest.table("orders")\
+            .select(
+                "id, order_number, "
+                "items:order_items(id, item_name, size, category, modifiers, quantity, status, batch_id)"
+            )\
+            .eq("restaurant_id", restaurant_id)\
+            .in_("status", ["pending", "in_progress"])\
+            .execute()
+        return response.data
+    
+    @handle_supabase_errors
+    async def assign_item_batches(self, restaurant_id: str, assignments: List[Dict[str, Any]],
+                                  emptied_keys: List[str]) -> Dict[str, str]:
+        """Store batch membership of order items in one round trip.
+        
+        Args:
+            restaurant_id: Restaurant the items belong to
+            assignments: Rows with ``item_id``, ``item_key`` and the batch's
+                ``name``, ``size`` and ``category``
+            emptied_keys: Keys of batches without open items left; they are
+                completed unless open items still point at them
+            
+        Returns:
+            Active batch id per assigned item key
+        """
+        response = await self.rest.rpc(
+            "assign_item_batches",
+            {
+                "p_restaurant_id": restaurant_id,
+                "p_items": assignments,
+                "p_emptied_keys": emptied_keys
+            }
+        ).execute()
+        return response.data
+    
     # Station management
     @handle_supabase_errors
     async def get_stations(self, restaurant_id: str) -> List[Dict[str, Any]]:
         """Get all stations for a restaurant."""
-        response = self.client.table("stations")\
+        response = await self.rest.table("stations")\
             .select("*")\
             .eq("restaurant_id", restaurant_id)\
             .order("name")\
@@ -263,7 +595,7 @@ class SupabaseManager:
     @handle_supabase_errors
     async def update_station_items(self, station_id: str, active_items: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Update active items for a station."""
-        response = self.client.table("stations")\
+        response = await self.rest.table("stations")\
             .update({"active_items": active_items})\
             .eq("id", station_id)\
             .execute()
@@ -271,32 +603,125 @@ class SupabaseManager:
         return response.data[0]
     
     # Menu sync integration
-    @handle_supabase_errors
+    @handle_supabase_errors(idempotent=False)
     async def create_sync_status(self, restaurant_id: str) -> Dict[str, Any]:
         """Create a new sync status entry."""
         sync_data = {
             "restaurant_id": restaurant_id,
             "status": "pending"
         }
-        response = self.client.table("menu_sync_status").insert(sync_data).execute()
+        response = await self.rest.table("menu_sync_status").insert(sync_data).execute()
         logger.info("Menu sync started", sync_id=response.data[0]["id"])
         return response.data[0]
     
     @handle_supabase_errors
     async def update_sync_status(self, sync_id: str, status_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update sync status."""
-        response = self.client.table("menu_sync_status")\
+        response = await self.rest.table("menu_sync_status")\
             .update(status_data)\
             .eq("id", sync_id)\
             .execute()
         return response.data[0]
     
+    @handle_supabase_errors
+    async def apply_menu_changes(self, restaurant_id: str, version: int, items: List[Dict[str, Any]],
+                                 deleted_item_ids: List[str]) -> Dict[str, int]:
+        """Upsert and soft-delete one chunk of menu items in one round trip.
+        
+        Args:
+            restaurant_id: KDS restaurant the menu belongs to
+            version: Menu version the chunk belongs to; rows written by a
+                newer version are left alone
+            items: Item rows keyed by ``otter_item_id``
+            deleted_item_ids: Otter ids of items to soft-delete
+            
+        Returns:
+            Counts of ``upserted`` and ``deleted`` rows
+        """
+        response = await self.rest.rpc(
+            "apply_menu_changes",
+            {
+                "p_restaurant_id": restaurant_id,
+                "p_version": version,
+                "p_items": items,
+                "p_deleted": deleted_item_ids
+            }
+        ).execute()
+        return response.data
+    
+    @handle_supabase_errors
+    async def get_menu_version(self, restaurant_id: str) -> int:
+        """Get the newest menu version written for a restaurant, 0 if none."""
+        response = await self.rest.table("menu_items")\
+            .select("menu_version")\
+            .eq("restaurant_id", restaurant_id)\
+            .order("menu_version", desc=True)\
+            .limit(1)\
+            .execute()
+        return response.data[0]["menu_version"] if response.data else 0
+    
+    @handle_supabase_errors
+    async def get_menu_items(self, restaurant_id: str, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """Get a restaurant's menu items that are not deleted, a page at a time."""
+        items = []
+        while True:
+            response = await self.rest.table("menu_items")\
+                .select("otter_item_id, name, category")\
+                .eq("restaurant_id", restaurant_id)\
+                .is_("deleted_at", "null")\
+                .order("otter_item_id")\
+                .range(len(items), len(items) + page_size - 1)\
+                .execute()
+            items.extend(response.data)
+            if len(response.data) < page_size:
+                return items
+    
+    # Token revocation
+    @handle_supabase_errors
+    async def revoke_tokens(self, tokens: List[Dict[str, Any]]) -> int:
+        """Record revoked token ids in one round trip.
+        
+        Args:
+            tokens: Rows with ``token_id``, ``expires_at`` and ``revoked_at``
+                (epoch seconds)
+            
+        Returns:
+            Number of newly recorded ids
+        """
+        response = await self.rest.rpc("revoke_tokens", {"p_tokens": tokens}).execute()
+        return response.data
+    
+    @handle_supabase_errors
+    async def get_revoked_tokens(self, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Get unexpired revoked token ids, optionally only those recorded since ``since``."""
+        params = {}
+        if since is not None:
+            params["p_since"] = since
+        response = await self.rest.rpc("get_revoked_tokens", params).execute()
+        return response.data
+    
+    def subscribe_to_revocations(self, callback: Callable) -> str:
+        """Subscribe to real-time token revocations from other workers."""
+        channel = self.client.channel("revoked_tokens")
+        
+        channel.on(
+            event="INSERT",
+            schema="public",
+            table="revoked_tokens",
+            callback=callback
+        ).subscribe()
+        
+        subscription_id = "revoked_tokens"
+        self._realtime_subscriptions[subscription_id] = channel
+        logger.info("Subscribed to token revocations")
+        return subscription_id
+    
     # Helper methods
     async def test_connection(self) -> bool:
         """Test the Supabase connection."""
         try:
             # Try to get the current user (will fail if not authenticated)
-            user = self.client.auth.get_user()
+            user = await asyncio.to_thread(self.client.auth.get_user)
             if user:
                 logger.info("Supabase connection test successful", user_id=user.user.id)
             else:
@@ -2,10 +2,17 @@
 
 from src.menu_sync.models import (
     Menu, MenuItem, MenuCategory, MenuItemOption,
-    SyncStatus, SyncResponse, MenuDiff
+    SyncStatus, SyncResponse, MenuDiff, ProfileSyncResult
+)
+from src.menu_sync.sync import (
+    MenuSyncService, run_schedule, run_sync_scheduler, start_sync_service, sync_profiles
 )
-from src.menu_sync.sync import MenuSyncService, run_sync_scheduler, start_sync_service
 from src.menu_sync.otter_client import OtterClient
+from src.menu_sync.menu_store import MenuStore
+from src.menu_sync.diff import MenuFingerprints, diff_menus
+from src.menu_sync.writer import MenuWriter
+from src.menu_sync.push import MenuPushQueue, PushResult
+from src.menu_sync.scheduler import SyncScheduler
 
 __all__ = [
     "Menu",
@@ -15,8 +22,18 @@ __all__ = [
     "SyncStatus",
     "SyncResponse",
     "MenuDiff",
+    "ProfileSyncResult",
     "MenuSyncService",
+    "run_schedule",
     "run_sync_scheduler",
     "start_sync_service",
+    "sync_profiles",
     "OtterClient",
+    "MenuStore",
+    "MenuFingerprints",
+    "diff_menus",
+    "MenuWriter",
+    "MenuPushQueue",
+    "PushResult",
+    "SyncScheduler",
 ]
\ No newline at end of file
@@ -1,13 +1,16 @@
 """CLI interface for menu synchronization."""
 
 import asyncio
+from typing import List, Optional
 import click
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from src.config.settings import settings
-from src.menu_sync.sync import MenuSyncService, start_sync_service
+from src.menu_sync.menu_store import MenuStore
+from src.menu_sync.otter_client import create_http_client
+from src.menu_sync.sync import MenuSyncService, scheduled_profiles, start_sync_service, sync_profiles
 from src.utils.logging import setup_logging
 
 console = Console()
@@ -55,16 +58,52 @@ def sync(restaurant_id: str, dry_run: bool, profile: str, all_profiles: bool):
             console.print("[red]No profiles configured[/red]")
             return
         
-        console.print(f"[cyan]Syncing {len(profiles)} profiles...[/cyan]")
-        
-        for profile_name in profiles:
-            console.print(f"\n[bold]Profile: {profile_name}[/bold]")
-            _sync_single_profile(profile_name, restaurant_id)
+        console.print(
+            f"[cyan]Syncing {len(profiles)} profiles "
+            f"({settings.sync_concurrency} at a time)...[/cyan]"
+        )
+        _sync_all_profiles(profiles)
     else:
         # Single profile sync
         _sync_single_profile(profile, restaurant_id)
 
 
+def _sync_all_profiles(profiles: List[str]):
+    """Sync several profiles concurrently and show how long each took."""
+    async def run_sync():
+        menu_store = MenuStore(settings.snapshot_path)
+        async with create_http_client(max_connections=settings.sync_concurrency) as http_client:
+            services = {
+                profile_name: MenuSyncService(profile_name, http_client=http_client, menu_store=menu_store)
+                for profile_name in profiles
+            }
+            try:
+                return await sync_profiles(services, jitter_seconds=0)
+            finally:
+                menu_store.close()
+    
+    with console.status("Synchronizing menu data..."):
+        results = asyncio.run(run_sync())
+    
+    table = Table(title="Profile Sync Results")
+    table.add_column("Profile", style="cyan")
+    table.add_column("Status")
+    table.add_column("Duration", style="magenta")
+    table.add_column("Items", style="magenta")
+    table.add_column("Error", style="red")
+    
+    for result in results:
+        table.add_row(
+            result.profile,
+            "[green]✓[/green]" if result.status == "success" else "[red]✗[/red]",
+            f"{result.duration_seconds:.1f}s",
+            str(result.items_processed),
+            result.error or ""
+        )
+    
+    console.print(table)
+
+
 def _sync_single_profile(profile_name: Optional[str], restaurant_id: Optional[str]):
     """Sync a single profile."""
     with Progress(
@@ -111,7 +150,8 @@ def start():
     """Start the menu sync service (runs continuously)."""
     console.print(
         f"[green]Starting menu sync service[/green]\n"
-        f"Sync interval: {settings.sync_interval_minutes} minutes\n"
+        f"Sync interval: {settings.sync_min_interval_minutes}-{settings.sync_max_interval_minutes} "
+        f"minutes, adapting to menu changes\n"
         f"Press Ctrl+C to stop"
     )
     
@@ -121,6 +161,26 @@ def start():
         console.print("\n[yellow]Menu sync service stopped[/yellow]")
 
 
+@cli.command()
+@click.option(
+    '--profile',
+    help='Profile to sync now (default: all profiles)',
+    default=None
+)
+def trigger(profile: Optional[str]):
+    """Ask the running sync service to sync now, ahead of its schedule."""
+    profiles = scheduled_profiles()
+    try:
+        count = MenuStore(settings.snapshot_path).request_sync(profile, profiles)
+    except ValueError as e:
+        console.print(f"[red]{e}; configured profiles: {', '.join(profiles) or 'none'}[/red]")
+        raise click.exceptions.Exit(1)
+    if count:
+        console.print(f"[green]✓ Sync requested for {profile or f'{count} profiles'}[/green]")
+    else:
+        console.print("[yellow]No scheduled profiles yet; start the sync service first[/yellow]")
+
+
 @cli.command()
 def status():
     """Check the current configuration and status."""
@@ -130,7 +190,11 @@ def status():
     
     table.add_row("Otter Username", settings.otter_username)
     table.add_row("Otter Base URL", settings.otter_base_url)
-    table.add_row("Sync Interval", f"{settings.sync_interval_minutes} minutes")
+    table.add_row(
+        "Sync Interval",
+        f"{settings.sync_min_interval_minutes}-{settings.sync_max_interval_minutes} minutes "
+        f"(starting at {settings.sync_interval_minutes})"
+    )
     table.add_row("Sync Enabled", "Yes" if settings.sync_enabled else "No")
     table.add_row("Dry Run Mode", "Yes" if settings.dry_run_mode else "No")
     table.add_row("Log Level", settings.log_level)
@@ -0,0 +1,133 @@
+"""Fingerprint-based menu diffs.
+
+Every item, with its options, and every category gets a stable content
+hash, computed once per menu. Two menus are then compared by their hashes
+alone: unchanged menus cost one dict comparison, and otherwise each item
+and category is looked at once. Hashes are stable across processes so they can be stored
+(see ``MenuStore``) and compared with a later menu.
+"""
+
+import hashlib
+from decimal import Decimal
+from typing import Optional, Dict, List, Any
+
+from src.menu_sync.models import Menu, MenuItem, MenuItemOption, MenuCategory, MenuDiff
+
+# Separate fields and list entries in hashed content; never appear in menu text
+_SEP = "\x1f"
+_LIST_SEP = "\x1e"
+
+
+def _decimal(value: Decimal) -> str:
+    # 10.0 and 10.00 are the same price
+    return str(value.normalize())
+
+
+def _digest(content: str) -> str:
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def _option_content(option: MenuItemOption) -> str:
+    return _SEP.join((option.id, option.name, _decimal(option.price), str(option.available)))
+
+
+def item_fingerprint(item: MenuItem) -> str:
+    """Content hash of an item, its options included; timestamps are ignored."""
+    return _digest(_SEP.join((
+        item.name,
+        item.description or "",
+        _decimal(item.price),
+        item.category,
+        str(item.available),
+        _LIST_SEP.join(_option_content(option) for option in item.options),
+        _LIST_SEP.join(item.images),
+        _LIST_SEP.join(item.tags),
+        repr(sorted(item.nutritional_info.items())) if item.nutritional_info else ""
+    )))
+
+
+def category_fingerprint(category: MenuCategory) -> str:
+    """Content hash of a category's own fields; its items are hashed separately."""
+    return _digest(_SEP.join((
+        category.name,
+        category.description or "",
+        str(category.display_order),
+        str(category.active)
+    )))
+
+
+class MenuFingerprints:
+    """Item and category hashes of a menu, keyed by id.
+    
+    Built from a Menu with ``of``, or from stored hashes alone for the old
+    side of a diff.
+    """
+    
+    __slots__ = ("items", "categories", "menu_items", "menu_categories")
+    
+    def __init__(self, items: Dict[str, str], categories: Dict[str, str],
+                 menu_items: Optional[Dict[str, MenuItem]] = None,
+                 menu_categories: Optional[Dict[str, MenuCategory]] = None):
+        self.items = items
+        self.categories = categories
+        # The hashed objects, when built from a menu
+        self.menu_items = menu_items
+        self.menu_categories = menu_categories
+    
+    @classmethod
+    def of(cls, menu: Menu) -> "MenuFingerprints":
+        """Hash every item and category of a menu once.
+        
+        An id listed twice keeps its first position and last content, like
+        a dict built from the menu.
+        """
+        items, categories = {}, {}
+        menu_items, menu_categories = {}, {}
+        for category in menu.categories:
+            categories[category.id] = category_fingerprint(category)
+            menu_categories[category.id] = category
+            for item in category.items:
+                items[item.id] = item_fingerprint(item)
+                menu_items[item.id] = item
+        return cls(items, categories, menu_items, menu_categories)
+
+
+def _diff_hashes(old: Dict[str, str], new: Dict[str, str], objects: Dict[str, Any],
+                 added: List[Any], updated: List[Any]) -> List[str]:
+    """Fill added and updated objects from two hash maps; returns deleted ids."""
+    # Only ids whose (id, hash) pair is new can be added or updated
+    changed = new.items() - old.items()
+    if changed:
+        # Walk the new menu rather than the set to keep menu order
+        for pair in new.items():
+            if pair in changed:
+                key = pair[0]
+                (updated if key in old else added).append(objects[key])
+    # Every id of the new menu is either added or kept
+    if len(old) + len(added) == len(new):
+        return []
+    return [key for key in old if key not in new]
+
+
+def diff_menus(old: MenuFingerprints, new: MenuFingerprints) -> MenuDiff:
+    """
+    Diff two menus by their fingerprints.
+    
+    Args:
+        old: Hashes of the previous menu
+        new: Hashes of the new menu, built with ``MenuFingerprints.of``
+        
+    Returns:
+        MenuDiff with added and updated items and categories in menu order
+    """
+    diff = MenuDiff()
+    if old.items != new.items:
+        diff.deleted_items = _diff_hashes(
+            old.items, new.items, new.menu_items, diff.added_items, diff.updated_items
+        )
+    if old.categories != new.categories:
+        diff.deleted_categories = _diff_hashes(
+            old.categories, new.categories, new.menu_categories,
+            diff.added_categories, diff.updated_categories
+        )
+    return diff
@@ -0,0 +1,385 @@
+"""Versioned local store of synced menus, one history per profile and restaurant.
+
+Each sync records the fingerprints of the menu's items and categories (see
+``src.menu_sync.diff``). Diffs are computed against the stored fingerprints
+rather than a menu held in memory, so the first sync after a
+restart is incremental, and every change bumps the restaurant's menu
+version so "what changed since version N" can be answered from the store.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple, NamedTuple, Dict, Iterable
+
+from src.menu_sync.diff import MenuFingerprints, diff_menus, item_fingerprint
+from src.menu_sync.models import Menu, MenuItem, MenuDiff
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the fingerprint definition changes; stored ones are recomputed
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS menu_versions (
+    profile TEXT NOT NULL,
+    restaurant_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    menu_id TEXT NOT NULL,
+    item_count INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (profile, restaurant_id, version)
+);
+CREATE TABLE IF NOT EXISTS menu_items (
+    profile TEXT NOT NULL,
+    restaurant_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_version INTEGER NOT NULL,
+    changed_version INTEGER NOT NULL,
+    deleted_version INTEGER,
+    PRIMARY KEY (profile, restaurant_id, item_id)
+);
+CREATE INDEX IF NOT EXISTS menu_items_changed
+    ON menu_items (profile, restaurant_id, changed_version);
+CREATE TABLE IF NOT EXISTS menu_categories (
+    profile TEXT NOT NULL,
+    restaurant_id TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (profile, restaurant_id, category_id)
+);
+CREATE TABLE IF NOT EXISTS menu_writes (
+    profile TEXT NOT NULL,
+    restaurant_id TEXT NOT NULL,
+    applied_version INTEGER NOT NULL DEFAULT 0,
+    target_version INTEGER,
+    sync_id TEXT,
+    items_written INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (profile, restaurant_id)
+);
+CREATE TABLE IF NOT EXISTS sync_schedule (
+    profile TEXT PRIMARY KEY,
+    interval REAL NOT NULL,
+    change_rate REAL NOT NULL,
+    next_run_at REAL NOT NULL,
+    last_run_at REAL,
+    requested_at REAL
+);
+"""
+
+
+class WriteState(NamedTuple):
+    """Progress of writing a restaurant's menu to the KDS database."""
+    applied_version: int
+    # Version being written, its menu_sync_status id and changes written so far
+    target_version: Optional[int]
+    sync_id: Optional[str]
+    items_written: int
+
+
+class ScheduleEntry(NamedTuple):
+    """When a profile's menu is synced next, and how often it changes."""
+    profile: str
+    # Seconds between syncs and the smoothed share of syncs that found changes
+    interval: float
+    change_rate: float
+    next_run_at: float
+    last_run_at: Optional[float] = None
+    # Set by a "sync now" request until a sync starting after it finishes
+    requested_at: Optional[float] = None
+
+
+class MenuStore:
+    """SQLite store of menu versions and per-item fingerprints."""
+    
+    def __init__(self, path: str):
+        """Initialize the store; the database is opened on first use.
+        
+        Args:
+            path: SQLite file, shared by all profiles and worker processes
+        """
+        self.path = Path(path).expanduser()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+            self._conn = conn
+        return self._conn
+    
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            rows = conn.execute("SELECT rowid, data FROM menu_items").fetchall()
+            conn.executemany(
+                "UPDATE menu_items SET fingerprint = ? WHERE rowid = ?",
+                [(item_fingerprint(MenuItem.model_validate_json(data)), rowid) for rowid, data in rows]
+            )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if rows:
+            logger.info(f"Recomputed {len(rows)} stored menu item fingerprints")
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def latest_version(self, profile: str, restaurant_id: str) -> int:
+        """Current menu version of a restaurant, 0 if it was never synced."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT MAX(version) FROM menu_versions WHERE profile = ? AND restaurant_id = ?",
+                (profile, restaurant_id)
+            ).fetchone()
+        return row[0] or 0
+    
+    def record(self, profile: str, menu: Menu) -> Tuple[int, MenuDiff]:
+        """
+        Diff a menu against the stored one and store it as a new version.
+        
+        A new version is only created when something changed (or on the
+        restaurant's first sync).
+        
+        Args:
+            profile: Profile the menu was synced with
+            menu: Freshly fetched menu
+        
+        Returns:
+            The menu's version and its diff against the previous version
+        """
+        fingerprints = MenuFingerprints.of(menu)
+        
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                # Take the write lock up front so concurrent workers serialize
+                conn.execute("BEGIN IMMEDIATE")
+                key = (profile, menu.restaurant_id)
+                current = conn.execute(
+                    "SELECT MAX(version) FROM menu_versions WHERE profile = ? AND restaurant_id = ?",
+                    key
+                ).fetchone()[0] or 0
+                stored = MenuFingerprints(
+                    dict(conn.execute(
+                        "SELECT item_id, fingerprint FROM menu_items "
+                        "WHERE profile = ? AND restaurant_id = ? AND deleted_version IS NULL",
+                        key
+                    )),
+                    dict(conn.execute(
+                        "SELECT category_id, fingerprint FROM menu_categories "
+                        "WHERE profile = ? AND restaurant_id = ?",
+                        key
+                    ))
+                )
+                diff = diff_menus(stored, fingerprints)
+                
+                if current and not diff.has_changes:
+                    return current, diff
+                
+                version = current + 1
+                conn.execute(
+                    "INSERT INTO menu_versions VALUES (?, ?, ?, ?, ?, ?)",
+                    (*key, version, menu.id, len(fingerprints.items), time.time())
+                )
+                conn.executemany(
+                    "INSERT INTO menu_items VALUES (?, ?, ?, ?, ?, ?, ?, NULL) "
+                    "ON CONFLICT (profile, restaurant_id, item_id) DO UPDATE SET "
+                    "fingerprint = excluded.fingerprint, data = excluded.data, "
+                    "created_version = excluded.created_version, "
+                    "changed_version = excluded.changed_version, deleted_version = NULL",
+                    [
+                        (*key, item.id, fingerprints.items[item.id], item.model_dump_json(), version, version)
+                        for item in diff.added_items
+                    ]
+                )
+                conn.executemany(
+                    "UPDATE menu_items SET fingerprint = ?, data = ?, changed_version = ? "
+                    "WHERE profile = ? AND restaurant_id = ? AND item_id = ?",
+                    [
+                        (fingerprints.items[item.id], item.model_dump_json(), version, *key, item.id)
+                        for item in diff.updated_items
+                    ]
+                )
+                conn.executemany(
+                    "UPDATE menu_items SET changed_version = ?, deleted_version = ? "
+                    "WHERE profile = ? AND restaurant_id = ? AND item_id = ?",
+                    [(version, version, *key, item_id) for item_id in diff.deleted_items]
+                )
+                conn.executemany(
+                    "INSERT INTO menu_categories VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (profile, restaurant_id, category_id) DO UPDATE SET "
+                    "fingerprint = excluded.fingerprint",
+                    [
+                        (*key, category.id, fingerprints.categories[category.id])
+                        for category in diff.added_categories + diff.updated_categories
+                    ]
+                )
+                conn.executemany(
+                    "DELETE FROM menu_categories WHERE profile = ? AND restaurant_id = ? AND category_id = ?",
+                    [(*key, category_id) for category_id in diff.deleted_categories]
+                )
+        
+        logger.debug(
+            f"Stored menu {menu.restaurant_id} v{version} for {profile}: "
+            f"+{len(diff.added_items)} ~{len(diff.updated_items)} -{len(diff.deleted_items)}"
+        )
+        return version, diff
+    
+    def changes_since(self, profile: str, restaurant_id: str, version: int) -> MenuDiff:
+        """
+        Net item changes of a restaurant's menu after a version.
+        
+        Items added and deleted again since ``version`` are left out; an
+        item deleted and re-added is reported as added.
+        
+        Args:
+            profile: Profile the menu was synced with
+            restaurant_id: Restaurant of the menu
+            version: Version the caller has; 0 for everything
+        
+        Returns:
+            MenuDiff with the current state of added and updated items
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT item_id, data, created_version, deleted_version FROM menu_items "
+                "WHERE profile = ? AND restaurant_id = ? AND changed_version > ? "
+                "ORDER BY changed_version, item_id",
+                (profile, restaurant_id, version)
+            ).fetchall()
+        
+        diff = MenuDiff()
+        for item_id, data, created_version, deleted_version in rows:
+            if deleted_version is not None:
+                if created_version <= version:
+                    diff.deleted_items.append(item_id)
+            elif created_version > version:
+                diff.added_items.append(MenuItem.model_validate_json(data))
+            else:
+                diff.updated_items.append(MenuItem.model_validate_json(data))
+        return diff
+    
+    def write_state(self, profile: str, restaurant_id: str) -> WriteState:
+        """How far a restaurant's menu has been written to the KDS database."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT applied_version, target_version, sync_id, items_written FROM menu_writes "
+                "WHERE profile = ? AND restaurant_id = ?",
+                (profile, restaurant_id)
+            ).fetchone()
+        return WriteState(*row) if row else WriteState(0, None, None, 0)
+    
+    def begin_write(self, profile: str, restaurant_id: str, version: int, sync_id: str) -> None:
+        """Start writing a version, dropping the progress of any earlier attempt."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO menu_writes (profile, restaurant_id, target_version, sync_id) "
+                    "VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (profile, restaurant_id) DO UPDATE SET "
+                    "target_version = excluded.target_version, sync_id = excluded.sync_id, items_written = 0",
+                    (profile, restaurant_id, version, sync_id)
+                )
+    
+    def write_progress(self, profile: str, restaurant_id: str, items_written: int) -> None:
+        """Record how many changes of the version being written are applied."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE menu_writes SET items_written = ? WHERE profile = ? AND restaurant_id = ?",
+                    (items_written, profile, restaurant_id)
+                )
+    
+    def finish_write(self, profile: str, restaurant_id: str) -> None:
+        """Mark the version being written as applied."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "UPDATE menu_writes SET applied_version = target_version, target_version = NULL, "
+                    "sync_id = NULL, items_written = 0 "
+                    "WHERE profile = ? AND restaurant_id = ? AND target_version IS NOT NULL",
+                    (profile, restaurant_id)
+                )
+    
+    def load_schedule(self) -> Dict[str, ScheduleEntry]:
+        """Sync schedule of every profile, keyed by profile."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT profile, interval, change_rate, next_run_at, last_run_at, requested_at "
+                "FROM sync_schedule"
+            ).fetchall()
+        return {row[0]: ScheduleEntry(*row) for row in rows}
+    
+    def save_schedule(self, entry: ScheduleEntry, started_at: Optional[float] = None) -> None:
+        """
+        Store a profile's schedule after a sync.
+        
+        Args:
+            entry: New schedule of the profile
+            started_at: When the sync started; sync requests made before it
+                are cleared, later ones are kept
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO sync_schedule VALUES (?, ?, ?, ?, ?, NULL) "
+                    "ON CONFLICT (profile) DO UPDATE SET "
+                    "interval = excluded.interval, change_rate = excluded.change_rate, "
+                    "next_run_at = excluded.next_run_at, last_run_at = excluded.last_run_at, "
+                    "requested_at = CASE WHEN requested_at > ? THEN requested_at END",
+                    (*entry[:5], started_at if started_at is not None else time.time())
+                )
+    
+    def request_sync(self, profile: Optional[str] = None,
+                     known_profiles: Optional[Iterable[str]] = None) -> int:
+        """
+        Ask a running scheduler to sync a profile now.
+        
+        Args:
+            profile: Profile to sync; None for every scheduled profile
+            known_profiles: Profiles the sync service is configured for; a
+                request for any other profile is refused
+        
+        Returns:
+            Number of profiles the request applies to
+        
+        Raises:
+            ValueError: If the profile is not one of ``known_profiles``
+        """
+        if profile is not None and known_profiles is not None and profile not in set(known_profiles):
+            raise ValueError(f"Profile '{profile}' not found")
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if profile is None:
+                    return conn.execute("UPDATE sync_schedule SET requested_at = ?", (time.time(),)).rowcount
+                conn.execute(
+                    "INSERT INTO sync_schedule VALUES (?, 0, 0, 0, NULL, ?) "
+                    "ON CONFLICT (profile) DO UPDATE SET requested_at = excluded.requested_at",
+                    (profile, time.time())
+                )
+                return 1
+    
+    def sync_requests(self) -> Dict[str, float]:
+        """Pending sync requests, as request time per profile."""
+        with self._lock:
+            return dict(self._connect().execute(
+                "SELECT profile, requested_at FROM sync_schedule WHERE requested_at IS NOT NULL"
+            ))
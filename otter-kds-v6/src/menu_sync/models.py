@@ -121,6 +121,17 @@ class SyncResponse(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ProfileSyncResult(BaseModel):
+    """Outcome and duration of one profile's sync in a scheduler cycle."""
+    
+    profile: str
+    status: str = Field(..., pattern="^(success|error)$")
+    duration_seconds: float = Field(..., ge=0)
+    items_processed: int = Field(default=0, ge=0)
+    menu_changed: bool = False
+    error: Optional[str] = None
+
+
 class MenuDiff(BaseModel):
     """Model for tracking menu differences."""
     
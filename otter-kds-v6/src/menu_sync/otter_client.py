@@ -1,7 +1,11 @@
 """Otter API client for menu synchronization."""
 
+import asyncio
+import hashlib
 import logging
-from typing import Optional, Dict, Any, List
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple, Union
 import httpx
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -10,19 +14,69 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 
 from src.config.settings import settings
-from src.menu_sync.models import Menu, MenuItem, MenuCategory
+from src.menu_sync.models import Menu, MenuItem
+from src.menu_sync.parser import parse_menu
+from src.menu_sync.push import MenuPushQueue, PushResult
+from src.menu_sync.session_cache import SessionCache
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
+def create_http_client(max_connections: int = 10) -> httpx.AsyncClient:
+    """
+    Create a pooled HTTP client for Otter, shareable by many OtterClients.
+    
+    Uses HTTP/2 when the ``h2`` package is installed, so concurrent syncs
+    multiplex over a single connection.
+    
+    Args:
+        max_connections: Max pooled connections
+        
+    Returns:
+        httpx.AsyncClient; the caller is responsible for closing it
+    """
+    return httpx.AsyncClient(
+        headers={
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        },
+        timeout=30.0,
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+    )
+
+
+@dataclass
+class MenuSnapshot:
+    """Last menu fetched from a URL with the validators to re-check it."""
+    body_hash: str
+    menu: Menu
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
 class OtterClient:
     """Client for interacting with Otter API."""
     
-    def __init__(self, profile_name: Optional[str] = None):
+    def __init__(self, profile_name: Optional[str] = None,
+                 session_cache: Optional[SessionCache] = None,
+                 http_client: Optional[httpx.AsyncClient] = None):
         """Initialize Otter client.
         
         Args:
             profile_name: Optional profile name to use. If None, uses settings.
+            session_cache: Cache of session tokens (defaults to one in
+                settings.session_cache_dir)
+            http_client: Shared HTTP client to use; it is left open on exit.
+                If None, the client opens and closes its own.
         """
         if profile_name:
             from src.config.profiles import profile_manager
@@ -36,94 +90,163 @@ class OtterClient:
             # Use settings which handles profile or env vars
             self.username, self.password, self.base_url = settings.get_current_credentials()
         
+        self.profile_name = profile_name or settings.active_profile or "default"
+        self.session_cache = (
+            session_cache if session_cache is not None
+            else SessionCache(settings.session_cache_dir)
+        )
         self.session_token: Optional[str] = None
+        self._shared_client = http_client
         self._client: Optional[httpx.AsyncClient] = None
+        # Last menu per URL, for conditional requests
+        self._menu_snapshots: Dict[str, MenuSnapshot] = {}
+        # How the last fetch went: "changed", "not_modified" or "unchanged"
+        self.last_fetch_result: Optional[str] = None
     
     async def __aenter__(self):
         """Async context manager entry."""
-        self._client = httpx.AsyncClient(
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            },
-            timeout=30.0
-        )
+        self._client = self._shared_client or create_http_client()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        if self._client:
+        if self._client and self._client is not self._shared_client:
             await self._client.aclose()
     
-    async def authenticate(self) -> bool:
+    async def authenticate(self, force: bool = False) -> bool:
         """
-        Authenticate with Otter using Selenium for web-based login.
+        Authenticate with Otter, reusing a cached session token when valid.
         
+        Only one worker per profile runs the browser login at a time; the
+        others wait and pick up the token it stored.
+        
+        Args:
+            force: Ignore the cached token, e.g. after Otter rejected it
+            
         Returns:
             bool: True if authentication successful
         """
+        if not force:
+            token = self.session_cache.load(self.profile_name, self.username)
+            if token:
+                self.session_token = token
+                logger.debug(f"Reusing cached Otter session for profile {self.profile_name}")
+                return True
+        
+        rejected = self.session_token if force else None
         try:
-            logger.info("Starting Otter authentication")
-            
-            # Configure Chrome options
-            options = ChromeOptions()
-            options.add_argument('--headless')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            
-            driver = webdriver.Chrome(options=options)
-            wait = WebDriverWait(driver, 20)
-            
-            try:
-                # Navigate to login page
-                driver.get("https://app.tryotter.com/login")
-                
-                # Enter credentials
-                email_field = wait.until(
-                    EC.presence_of_element_located((By.NAME, "email"))
-                )
-                email_field.send_keys(self.username)
-                
-                password_field = driver.find_element(By.NAME, "password")
-                password_field.send_keys(self.password)
-                
-                # Click login button
-                login_button = driver.find_element(
-                    By.CSS_SELECTOR, "button[type='submit']"
-                )
-                login_button.click()
-                
-                # Wait for successful login
-                wait.until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "dashboard"))
-                )
-                
-                # Extract session token from cookies
-                cookies = driver.get_cookies()
-                for cookie in cookies:
-                    if cookie['name'] == 'session_token':
-                        self.session_token = cookie['value']
-                        break
-                
-                if self.session_token:
-                    logger.info("Authentication successful")
+            async with self.session_cache.lock(self.profile_name):
+                # Another worker may have logged in while we waited
+                token = self.session_cache.load(self.profile_name, self.username)
+                if token and token != rejected:
+                    self.session_token = token
                     return True
-                else:
+                
+                logger.info("Starting Otter authentication")
+                token, expires_at = await asyncio.to_thread(self._browser_login)
+                if not token:
                     logger.error("Session token not found")
                     return False
-                    
-            finally:
-                driver.quit()
+                
+                self.session_token = token
+                if expires_at is None:
+                    expires_at = time.time() + settings.session_ttl_hours * 3600
+                self.session_cache.save(self.profile_name, self.username, token, expires_at)
+                logger.info("Authentication successful")
+                return True
                 
         except Exception as e:
             logger.error(f"Authentication failed: {e}")
             return False
     
-    async def fetch_menu_data(self, restaurant_id: Optional[str] = None) -> Optional[Menu]:
+    def _browser_login(self) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Log in through a headless Chrome (blocking).
+        
+        Returns:
+            Tuple of (session token, cookie expiry as epoch seconds), either
+            of which may be None
+        """
+        # Configure Chrome options
+        options = ChromeOptions()
+        options.add_argument('--headless')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        
+        driver = webdriver.Chrome(options=options)
+        wait = WebDriverWait(driver, 20)
+        
+        try:
+            # Navigate to login page
+            driver.get("https://app.tryotter.com/login")
+            
+            # Enter credentials
+            email_field = wait.until(
+                EC.presence_of_element_located((By.NAME, "email"))
+            )
+            email_field.send_keys(self.username)
+            
+            password_field = driver.find_element(By.NAME, "password")
+            password_field.send_keys(self.password)
+            
+            # Click login button
+            login_button = driver.find_element(
+                By.CSS_SELECTOR, "button[type='submit']"
+            )
+            login_button.click()
+            
+            # Wait for successful login
+            wait.until(
+                EC.presence_of_element_located((By.CLASS_NAME, "dashboard"))
+            )
+            
+            # Extract session token from cookies
+            for cookie in driver.get_cookies():
+                if cookie['name'] == 'session_token':
+                    return cookie['value'], cookie.get('expiry')
+            return None, None
+            
+        finally:
+            driver.quit()
+    
+    async def _request(self, method: str, url: str,
+                       headers: Optional[Dict[str, str]] = None, **kwargs) -> httpx.Response:
+        """
+        Send an authorized request, logging in again once if Otter returns 401.
+        
+        Returns:
+            The response (status not checked)
+        """
+        for attempt in range(2):
+            headers = {
+                **(headers or {}),
+                "Authorization": f"Bearer {self.session_token}",
+                "Content-Type": "application/json"
+            }
+            response = await self._client.request(method, url, headers=headers, **kwargs)
+            if response.status_code != 401 or attempt:
+                return response
+            
+            logger.info("Otter session rejected, logging in again")
+            self.session_cache.invalidate(self.profile_name, self.session_token)
+            if not await self.authenticate(force=True):
+                return response
+        return response
+    
+    async def fetch_menu_data(self, restaurant_id: Optional[str] = None,
+                              raise_errors: bool = False) -> Optional[Menu]:
         """
         Fetch menu data from Otter API.
         
+        Repeat fetches send the last ETag/Last-Modified, and a 200 whose
+        body hashes the same as last time is not parsed again. In both
+        cases the previously returned Menu object is returned as-is, so
+        callers can detect "no change" by identity.
+        
         Args:
             restaurant_id: Optional restaurant ID to fetch specific menu
+            raise_errors: Raise request and parse errors instead of
+                returning None, so callers can tell which are worth retrying
             
         Returns:
             Menu object or None if error
@@ -138,69 +261,71 @@ class OtterClient:
             if restaurant_id:
                 url += f"/{restaurant_id}"
             
-            headers = {
-                "Authorization": f"Bearer {self.session_token}",
-                "Content-Type": "application/json"
-            }
+            snapshot = self._menu_snapshots.get(url)
+            headers = {}
+            if snapshot is not None:
+                if snapshot.etag:
+                    headers["If-None-Match"] = snapshot.etag
+                if snapshot.last_modified:
+                    headers["If-Modified-Since"] = snapshot.last_modified
             
-            response = await self._client.get(url, headers=headers)
+            response = await self._request("GET", url, headers=headers)
+            if response.status_code == 304 and snapshot is not None:
+                self.last_fetch_result = "not_modified"
+                return snapshot.menu
             response.raise_for_status()
             
-            data = response.json()
-            return self._parse_menu_data(data)
+            body_hash = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            
+            if snapshot is not None and snapshot.body_hash == body_hash:
+                snapshot.etag = etag
+                snapshot.last_modified = last_modified
+                self.last_fetch_result = "unchanged"
+                return snapshot.menu
+            
+            menu = self._parse_menu_data(response.content)
+            self._menu_snapshots[url] = MenuSnapshot(
+                body_hash=body_hash,
+                menu=menu,
+                etag=etag,
+                last_modified=last_modified
+            )
+            self.last_fetch_result = "changed"
+            return menu
             
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Failed to fetch menu data: {e}")
             return None
     
-    def _parse_menu_data(self, data: Dict[str, Any]) -> Menu:
+    def _parse_menu_data(self, data: Union[bytes, Dict[str, Any]]) -> Menu:
         """
         Parse raw API data into Menu model.
         
         Args:
-            data: Raw API response data
+            data: Raw response body (parsed incrementally) or decoded JSON
             
         Returns:
             Parsed Menu object
         """
-        categories = []
-        
-        for cat_data in data.get('categories', []):
-            items = []
-            
-            for item_data in cat_data.get('items', []):
-                item = MenuItem(
-                    id=item_data['id'],
-                    name=item_data['name'],
-                    description=item_data.get('description'),
-                    price=item_data['price'],
-                    category=cat_data['name'],
-                    available=item_data.get('available', True),
-                    options=[],  # Would parse options here
-                    images=item_data.get('images', []),
-                    tags=item_data.get('tags', [])
-                )
-                items.append(item)
-            
-            category = MenuCategory(
-                id=cat_data['id'],
-                name=cat_data['name'],
-                description=cat_data.get('description'),
-                display_order=cat_data.get('order', 0),
-                items=items
-            )
-            categories.append(category)
-        
-        menu = Menu(
-            id=data['id'],
-            restaurant_id=data['restaurant_id'],
-            name=data['name'],
-            description=data.get('description'),
-            categories=categories,
-            currency=data.get('currency', 'USD')
-        )
+        return parse_menu(data)
+    
+    async def put_menu_item(self, item: MenuItem) -> httpx.Response:
+        """
+        Send a menu item's state to Otter.
         
-        return menu
+        Args:
+            item: MenuItem to update
+            
+        Returns:
+            The response (status not checked)
+        """
+        url = f"{self.base_url}/api/v1/menu-items/{item.id}"
+        data = item.model_dump(mode="json", exclude={'created_at', 'updated_at'})
+        return await self._request("PUT", url, json=data)
     
     async def update_menu_item(self, item: MenuItem) -> bool:
         """
@@ -217,14 +342,7 @@ class OtterClient:
             return False
         
         try:
-            url = f"{self.base_url}/api/v1/menu-items/{item.id}"
-            headers = {
-                "Authorization": f"Bearer {self.session_token}",
-                "Content-Type": "application/json"
-            }
-            
-            data = item.model_dump(exclude={'created_at', 'updated_at'})
-            response = await self._client.put(url, headers=headers, json=data)
+            response = await self.put_menu_item(item)
             response.raise_for_status()
             
             logger.info(f"Successfully updated menu item: {item.name}")
@@ -232,4 +350,28 @@ class OtterClient:
             
         except Exception as e:
             logger.error(f"Failed to update menu item {item.id}: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    async def update_menu_items(self, items: List[MenuItem]) -> Dict[str, PushResult]:
+        """
+        Update many menu items in Otter concurrently, within its rate limit.
+        
+        See ``MenuPushQueue``; repeated item ids are sent once, in their
+        last state.
+        
+        Args:
+            items: MenuItems to update
+            
+        Returns:
+            PushResult per item id
+        """
+        if not self.session_token:
+            logger.error("Not authenticated")
+            return {item.id: PushResult(item.id, False, error="Not authenticated") for item in items}
+        
+        async with MenuPushQueue(self) as queue:
+            results = await queue.push(items)
+        
+        failed = sum(not result.success for result in results.values())
+        logger.info(f"Pushed {len(results)} menu items, {failed} failed")
+        return results
@@ -0,0 +1,247 @@
+"""Incremental parsing of Otter menu payloads.
+
+Menus of multi-brand virtual kitchens run to thousands of items. Decoding
+the whole body with ``json.loads`` holds a full dict tree next to the
+models built from it, and validating every item and option through
+pydantic's Python-level validators dominates parse time.
+
+``parse_menu`` instead streams the body with ijson (when installed), one
+category at a time, so only that category's raw items are alive while its
+models are built. Items and options whose fields already have the expected
+types are built directly after applying the same normalization as the model
+validators; anything unusual goes through full validation so invalid data
+is still rejected the same way.
+"""
+
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Union, Type, TypeVar
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from pydantic import BaseModel
+
+from src.menu_sync.models import Menu, MenuItem, MenuCategory, MenuItemOption
+
+logger = logging.getLogger(__name__)
+
+# ijson prefix of the streamed categories
+CATEGORY_PREFIX = "categories.item"
+MENU_FIELDS = {"id", "restaurant_id", "name", "description", "currency"}
+REQUIRED_MENU_FIELDS = {"id", "restaurant_id", "name"}
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _construct(model: Type[ModelT], values: Dict[str, Any]) -> ModelT:
+    """Create a model from complete, already valid field values.
+    
+    Same result as ``model.model_construct(**values)`` with every field
+    given, without its per-field default and alias handling, which costs
+    about as much as validating.
+    """
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__pydantic_fields_set__", set(values))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _number_price(value: Union[int, float]) -> Optional[Decimal]:
+    # Menus reuse a few hundred prices; share their Decimals
+    return _decimal_price(Decimal(repr(value)) if isinstance(value, float) else Decimal(value))
+
+
+def _decimal_price(price: Decimal) -> Optional[Decimal]:
+    if not price.is_finite() or price < 0 or -price.as_tuple().exponent > 2:
+        return None
+    return price
+
+
+def _price(value: Any) -> Optional[Decimal]:
+    """The price as pydantic would store it, or None to use full validation."""
+    if type(value) in (float, int):
+        return _number_price(value)
+    if isinstance(value, Decimal):
+        return _decimal_price(value)
+    return None
+
+
+def _name(value: Any, max_length: int) -> Optional[str]:
+    """A stripped name that passes the length limits, or None."""
+    if not isinstance(value, str):
+        return None
+    stripped = value.strip()
+    if not stripped or len(value) > max_length:
+        return None
+    return stripped
+
+
+def _str_list(value: Any) -> Optional[List[str]]:
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        return None
+    return value
+
+
+def build_option(data: Dict[str, Any]) -> MenuItemOption:
+    """Build a MenuItemOption, skipping validation when the data is clean."""
+    name = _name(data.get("name"), 255)
+    price = _price(data.get("price"))
+    available = data.get("available", True)
+    if (name is None or price is None or not isinstance(data.get("id"), str)
+            or not isinstance(available, bool)):
+        return MenuItemOption(**data)
+    return _construct(MenuItemOption, {
+        "id": data["id"],
+        "name": name,
+        "price": price,
+        "available": available
+    })
+
+
+def build_item(data: Dict[str, Any], category: str, now: Optional[datetime] = None) -> MenuItem:
+    """Build a MenuItem of a category, skipping validation when the data is clean.
+    
+    Args:
+        data: Raw item from the Otter payload
+        category: Raw name of the item's category
+        now: Timestamp for created_at/updated_at (defaults to utcnow)
+    """
+    name = _name(data.get("name"), 255)
+    category_name = _name(category, 100)
+    price = _price(data.get("price"))
+    description = data.get("description")
+    available = data.get("available", True)
+    images = _str_list(data.get("images", []))
+    tags = _str_list(data.get("tags", []))
+    raw_options = data.get("options") or []
+    
+    if (name is None or category_name is None or price is None
+            or not isinstance(data.get("id"), str)
+            or not isinstance(available, bool)
+            or images is None or tags is None
+            or not isinstance(raw_options, list)
+            or not (description is None or (isinstance(description, str) and len(description) <= 1000))):
+        return MenuItem(
+            id=data.get("id"),
+            name=data.get("name"),
+            description=description,
+            price=data.get("price"),
+            category=category,
+            available=available,
+            options=data.get("options") or [],
+            images=data.get("images", []),
+            tags=data.get("tags", [])
+        )
+    
+    now = now or datetime.utcnow()
+    return _construct(MenuItem, {
+        "id": data["id"],
+        "name": name,
+        "description": description,
+        "price": price,
+        "category": category_name.title(),
+        "available": available,
+        "options": [build_option(option) for option in raw_options],
+        "images": images,
+        "tags": tags,
+        "nutritional_info": None,
+        "created_at": now,
+        "updated_at": now
+    })
+
+
+def build_category(data: Dict[str, Any], now: Optional[datetime] = None) -> MenuCategory:
+    """Build a MenuCategory with its items from a raw category."""
+    now = now or datetime.utcnow()
+    items = [build_item(item, data.get("name"), now) for item in data.get("items", [])]
+    name = _name(data.get("name"), 100)
+    description = data.get("description")
+    order = data.get("order", 0)
+    if (name is None or not isinstance(data.get("id"), str)
+            or not isinstance(order, int) or isinstance(order, bool)
+            or not (description is None or (isinstance(description, str) and len(description) <= 500))):
+        return MenuCategory(
+            id=data.get("id"),
+            name=data.get("name"),
+            description=description,
+            display_order=order,
+            items=items
+        )
+    return _construct(MenuCategory, {
+        "id": data["id"],
+        "name": name.title(),
+        "description": description,
+        "display_order": order,
+        "items": items,
+        "active": True
+    })
+
+
+def _build_menu(data: Dict[str, Any], categories: List[MenuCategory]) -> Menu:
+    return Menu(
+        id=data['id'],
+        restaurant_id=data['restaurant_id'],
+        name=data['name'],
+        description=data.get('description'),
+        categories=categories,
+        currency=data.get('currency', 'USD')
+    )
+
+
+def parse_menu_dict(data: Dict[str, Any]) -> Menu:
+    """Build a Menu from an already decoded payload."""
+    now = datetime.utcnow()
+    categories = [build_category(cat_data, now) for cat_data in data.get("categories", [])]
+    return _build_menu(data, categories)
+
+
+def _menu_fields(body: bytes) -> Dict[str, Any]:
+    """Top-level scalar fields of a menu body.
+    
+    Otter sends them before the categories, so reading stops where the
+    categories start unless a required field is still missing.
+    """
+    fields: Dict[str, Any] = {}
+    for prefix, event, value in ijson.parse(body, use_float=True):
+        if prefix == "categories" and event == "start_array":
+            if REQUIRED_MENU_FIELDS <= fields.keys():
+                break
+        elif prefix in MENU_FIELDS and event in ("string", "number", "null", "boolean"):
+            fields[prefix] = value
+    return fields
+
+
+def _stream_menu(body: bytes) -> Menu:
+    now = datetime.utcnow()
+    categories = [
+        build_category(cat_data, now)
+        for cat_data in ijson.items(body, CATEGORY_PREFIX, use_float=True)
+    ]
+    return _build_menu(_menu_fields(body), categories)
+
+
+def parse_menu(body: Union[bytes, str, Dict[str, Any]]) -> Menu:
+    """Parse an Otter menu payload.
+    
+    Args:
+        body: Raw response body, or an already decoded payload
+    
+    Returns:
+        Parsed Menu
+    """
+    if isinstance(body, dict):
+        return parse_menu_dict(body)
+    if ijson is None:
+        return parse_menu_dict(json.loads(body))
+    if isinstance(body, str):
+        body = body.encode()
+    return _stream_menu(body)
@@ -0,0 +1,228 @@
+"""Rate-limited pushes of menu item changes to Otter.
+
+Changes are queued per item id: an item queued again before its push
+starts is sent once, in its latest state, and every caller that queued it
+gets that push's result. A fixed number of workers send the pushes, all
+drawing from one token bucket so bulk changes stay under Otter's rate
+limit; a 429 pauses the whole bucket for its ``Retry-After``.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Iterable, Set
+
+import httpx
+
+from src.config.settings import settings
+from src.menu_sync.models import MenuItem
+from src.utils.retry import retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+# Wait after a 429 without a usable Retry-After, doubled per retry
+DEFAULT_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+
+
+@dataclass
+class PushResult:
+    """Outcome of pushing one menu item to Otter."""
+    item_id: str
+    success: bool
+    status_code: Optional[int] = None
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class _PendingPush:
+    item: MenuItem
+    waiters: List[asyncio.Future] = field(default_factory=list)
+
+
+class TokenBucket:
+    """Token bucket shared by concurrent senders."""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        """Initialize the bucket, full.
+        
+        Args:
+            rate: Tokens added per second
+            burst: Max tokens held, i.e. requests sent back to back
+        """
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def pause(self, seconds: float) -> None:
+        """Hold back every sender for ``seconds``, then resume one at a time."""
+        resume_at = time.monotonic() + seconds
+        if resume_at > self._updated:
+            # One token at resume_at; refill is negative until then
+            self._tokens = 1.0
+            self._updated = resume_at
+    
+    async def acquire(self) -> None:
+        """Wait for and take one token; waiters are served in order."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                if tokens >= 1:
+                    self._tokens = tokens - 1
+                    self._updated = now
+                    return
+                await asyncio.sleep((1 - tokens) / self.rate)
+
+
+class MenuPushQueue:
+    """Pushes menu item updates to Otter with bounded concurrency and rate."""
+    
+    def __init__(self, client, concurrency: Optional[int] = None, rate: Optional[float] = None,
+                 burst: Optional[int] = None, max_retries: Optional[int] = None):
+        """Initialize the queue; workers start on the first submit.
+        
+        Args:
+            client: Authenticated OtterClient
+            concurrency: Max pushes in flight (defaults to settings.push_concurrency)
+            rate: Max pushes per second (defaults to settings.push_rate_per_second)
+            burst: Pushes allowed back to back (defaults to settings.push_burst)
+            max_retries: Retries of a push rejected with 429 (defaults to
+                settings.push_max_retries)
+        """
+        self.client = client
+        self.concurrency = concurrency or settings.push_concurrency
+        self.bucket = TokenBucket(
+            rate or settings.push_rate_per_second,
+            burst or settings.push_burst
+        )
+        self.max_retries = max_retries if max_retries is not None else settings.push_max_retries
+        self._pending: Dict[str, _PendingPush] = {}
+        self._in_flight: Set[str] = set()
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+    
+    async def __aenter__(self):
+        """Async context manager entry."""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Wait for queued pushes unless leaving on an error, then stop the workers."""
+        try:
+            if exc_type is None:
+                await self.join()
+        finally:
+            await self.close()
+    
+    def submit(self, item: MenuItem) -> "asyncio.Future[PushResult]":
+        """
+        Queue an item's latest state for pushing.
+        
+        Args:
+            item: Menu item to push
+        
+        Returns:
+            Future resolved with the result of the push that sends this
+            state (or a later state of the same item)
+        """
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+            ]
+        
+        waiter = asyncio.get_running_loop().create_future()
+        pending = self._pending.get(item.id)
+        if pending is not None:
+            pending.item = item
+            pending.waiters.append(waiter)
+        else:
+            self._pending[item.id] = _PendingPush(item, [waiter])
+            # An item being pushed is queued again once that push finishes
+            if item.id not in self._in_flight:
+                self._ready.put_nowait(item.id)
+        return waiter
+    
+    async def push(self, items: Iterable[MenuItem]) -> Dict[str, PushResult]:
+        """
+        Push items and wait for all of them.
+        
+        Args:
+            items: Menu items; for ids listed more than once the last state is sent
+        
+        Returns:
+            Result per item id, in the order the ids first appear
+        """
+        waiters = {}
+        for item in items:
+            waiters[item.id] = self.submit(item)
+        results = await asyncio.gather(*waiters.values())
+        return dict(zip(waiters, results))
+    
+    async def join(self) -> None:
+        """Wait until every queued push has finished."""
+        await self._ready.join()
+    
+    async def close(self) -> None:
+        """Stop the workers; pushes not yet sent are cancelled."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for pending in self._pending.values():
+            for waiter in pending.waiters:
+                waiter.cancel()
+        self._pending.clear()
+    
+    async def _worker(self) -> None:
+        while True:
+            item_id = await self._ready.get()
+            pending = self._pending.pop(item_id)
+            self._in_flight.add(item_id)
+            try:
+                result = await self._push(pending.item)
+            except asyncio.CancelledError:
+                for waiter in pending.waiters:
+                    waiter.cancel()
+                raise
+            except Exception as e:
+                result = PushResult(item_id, False, error=str(e))
+            finally:
+                self._in_flight.discard(item_id)
+                if item_id in self._pending:
+                    self._ready.put_nowait(item_id)
+                self._ready.task_done()
+            
+            for waiter in pending.waiters:
+                if not waiter.done():
+                    waiter.set_result(result)
+    
+    async def _push(self, item: MenuItem) -> PushResult:
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.bucket.acquire()
+            try:
+                response = await self.client.put_menu_item(item)
+            except httpx.HTTPError as e:
+                logger.error(f"Failed to push menu item {item.id}: {e}")
+                return PushResult(item.id, False, attempts=attempt, error=str(e))
+            
+            if response.status_code == 429 and attempt <= self.max_retries:
+                delay = retry_after_seconds(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = min(DEFAULT_RETRY_DELAY * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+                logger.warning(f"Otter rate limit hit pushing {item.id}, pausing pushes for {delay:.1f}s")
+                self.bucket.pause(delay)
+                continue
+            
+            if response.is_success:
+                return PushResult(item.id, True, response.status_code, attempt)
+            logger.error(f"Failed to push menu item {item.id}: HTTP {response.status_code}")
+            return PushResult(
+                item.id, False, response.status_code, attempt,
+                error=f"HTTP {response.status_code}"
+            )
@@ -0,0 +1,181 @@
+"""Adaptive per-profile menu sync schedule.
+
+Each profile (one Otter restaurant) keeps a smoothed change rate: the
+share of recent syncs that found menu changes. Its sync interval follows
+that rate on a log scale between the minimum and maximum interval, so a
+menu that changes every sync is polled at the minimum and one that never
+changes backs off to the maximum. ``next_run_at`` is stored in the
+MenuStore so a restarted scheduler resumes the schedule instead of
+syncing every profile at once, and ``MenuStore.request_sync`` (e.g. from
+``menu-sync trigger``) moves a profile to the front.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Optional, Dict, List, Iterable
+
+from src.config.settings import settings
+from src.menu_sync.menu_store import MenuStore, ScheduleEntry
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest sync in the change rate
+CHANGE_RATE_WEIGHT = 0.3
+# next_run_at is spread by this share of the interval so profiles drift apart
+INTERVAL_JITTER = 0.1
+
+
+class SyncScheduler:
+    """Decides which profiles are due for a menu sync."""
+    
+    def __init__(self, store: MenuStore, profiles: Iterable[str],
+                 min_interval: Optional[float] = None,
+                 max_interval: Optional[float] = None,
+                 initial_interval: Optional[float] = None,
+                 poll_seconds: Optional[float] = None):
+        """Initialize the scheduler; call ``load`` before use.
+        
+        Args:
+            store: Store the schedule is persisted in
+            profiles: Profiles to schedule
+            min_interval: Shortest interval in seconds (defaults to
+                settings.sync_min_interval_minutes)
+            max_interval: Longest interval in seconds (defaults to
+                settings.sync_max_interval_minutes)
+            initial_interval: Interval of a profile without history
+                (defaults to settings.sync_interval_minutes)
+            poll_seconds: How often sync requests from other processes are
+                checked (defaults to settings.sync_trigger_poll_seconds)
+        """
+        self.store = store
+        self.profiles = list(profiles)
+        self.min_interval = min_interval or settings.sync_min_interval_minutes * 60
+        self.max_interval = max(max_interval or settings.sync_max_interval_minutes * 60, self.min_interval)
+        initial = initial_interval or settings.sync_interval_minutes * 60
+        self.initial_rate = self._rate_for(min(max(initial, self.min_interval), self.max_interval))
+        self.poll_seconds = poll_seconds or settings.sync_trigger_poll_seconds
+        self.entries: Dict[str, ScheduleEntry] = {}
+        self._wakeup = asyncio.Event()
+    
+    def interval_for(self, change_rate: float) -> float:
+        """Sync interval for a change rate: the minimum at 1, the maximum at 0."""
+        return self.min_interval * (self.max_interval / self.min_interval) ** (1 - change_rate)
+    
+    def _rate_for(self, interval: float) -> float:
+        if self.max_interval == self.min_interval:
+            return 1.0
+        return 1 - math.log(interval / self.min_interval) / math.log(self.max_interval / self.min_interval)
+    
+    async def load(self) -> None:
+        """Read the stored schedule; new profiles start within the sync jitter."""
+        stored = await asyncio.to_thread(self.store.load_schedule)
+        now = time.time()
+        for profile in self.profiles:
+            entry = stored.get(profile)
+            if entry is None or entry.interval <= 0:
+                entry = ScheduleEntry(
+                    profile=profile,
+                    interval=self.interval_for(self.initial_rate),
+                    change_rate=self.initial_rate,
+                    next_run_at=now + random.uniform(0, settings.sync_jitter_seconds),
+                    requested_at=entry.requested_at if entry else None
+                )
+            self.entries[profile] = entry
+        
+        waiting = sum(1 for entry in self.entries.values() if entry.next_run_at > now)
+        logger.info(f"Loaded sync schedule: {len(self.entries) - waiting} profiles due, {waiting} waiting")
+    
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Profiles to sync now: requested ones first, then by next run."""
+        now = time.time() if now is None else now
+        due = [
+            entry for entry in self.entries.values()
+            if entry.requested_at is not None or entry.next_run_at <= now
+        ]
+        due.sort(key=lambda entry: (entry.requested_at is None, entry.next_run_at))
+        return [entry.profile for entry in due]
+    
+    def record(self, profile: str, changed: bool, started_at: float,
+               failed: bool = False, now: Optional[float] = None) -> ScheduleEntry:
+        """
+        Update a profile's change rate and next run after a sync.
+        
+        Args:
+            profile: Synced profile
+            changed: Whether the sync found menu changes
+            started_at: When the sync started; requests made after it are kept
+            failed: Whether the sync failed; failures don't move the change
+                rate and are retried after the minimum interval
+            now: When the sync finished
+        
+        Returns:
+            The profile's new schedule (not yet stored)
+        """
+        now = time.time() if now is None else now
+        entry = self.entries[profile]
+        if failed:
+            change_rate = entry.change_rate
+            delay = self.min_interval
+        else:
+            change_rate = (1 - CHANGE_RATE_WEIGHT) * entry.change_rate + CHANGE_RATE_WEIGHT * changed
+            delay = self.interval_for(change_rate)
+        
+        entry = ScheduleEntry(
+            profile=profile,
+            interval=self.interval_for(change_rate),
+            change_rate=change_rate,
+            next_run_at=now + delay * random.uniform(1 - INTERVAL_JITTER, 1 + INTERVAL_JITTER),
+            last_run_at=now,
+            requested_at=(
+                entry.requested_at
+                if entry.requested_at is not None and entry.requested_at > started_at else None
+            )
+        )
+        self.entries[profile] = entry
+        return entry
+    
+    async def save(self, entry: ScheduleEntry, started_at: float) -> None:
+        """Persist a profile's schedule, keeping requests made during its sync."""
+        await asyncio.to_thread(self.store.save_schedule, entry, started_at)
+    
+    def trigger(self, profile: Optional[str] = None) -> None:
+        """Sync a profile (None: every profile) as soon as possible, in this process."""
+        now = time.time()
+        for name in ([profile] if profile else self.profiles):
+            if name in self.entries:
+                self.entries[name] = self.entries[name]._replace(requested_at=now)
+        self._wakeup.set()
+    
+    def wake(self) -> None:
+        """End a pending ``wait`` early, e.g. because a sync finished."""
+        self._wakeup.set()
+    
+    async def wait(self, running: Iterable[str] = ()) -> None:
+        """Sleep until a profile is due, a trigger fires or requests need polling.
+        
+        Args:
+            running: Profiles already syncing, which don't count as due
+        """
+        running = set(running)
+        if any(profile not in running for profile in self.due()):
+            return
+        next_run_at = min(
+            (entry.next_run_at for entry in self.entries.values() if entry.profile not in running),
+            default=time.time() + self.poll_seconds
+        )
+        timeout = max(0.0, min(next_run_at - time.time(), self.poll_seconds))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+        
+        requests = await asyncio.to_thread(self.store.sync_requests)
+        for profile, requested_at in requests.items():
+            entry = self.entries.get(profile)
+            if entry is not None and entry.requested_at is None:
+                logger.info(f"Sync requested for {profile}")
+                self.entries[profile] = entry._replace(requested_at=requested_at)
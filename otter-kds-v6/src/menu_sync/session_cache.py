@@ -0,0 +1,139 @@
+"""On-disk cache of Otter session tokens, one file per profile.
+
+Logging in to Otter means driving a headless Chrome, which costs seconds
+and hundreds of MB per login. The session token it yields is stored here
+with its expiry so later syncs, including those of other worker processes,
+reuse it until it expires or Otter rejects it.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional, AsyncIterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Treat tokens as expired this long before Otter does
+EXPIRY_MARGIN_SECONDS = 60
+
+
+def _lock_file(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    else:
+        handle.seek(0)
+        while True:
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue  # LK_LOCK gives up after ~10s; keep waiting
+
+
+def _unlock_file(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SessionCache:
+    """Per-profile Otter session tokens stored on disk with their expiry."""
+    
+    def __init__(self, cache_dir: str):
+        """Initialize the cache.
+        
+        Args:
+            cache_dir: Directory holding one token file per profile
+        """
+        self.cache_dir = Path(cache_dir).expanduser()
+    
+    def _path(self, profile: str, suffix: str) -> Path:
+        # Profile names come from user config; keep file names safe
+        name = hashlib.sha1(profile.encode()).hexdigest()[:16]
+        return self.cache_dir / f"{name}{suffix}"
+    
+    def load(self, profile: str, username: str) -> Optional[str]:
+        """Get the cached token of a profile if it is still valid.
+        
+        Args:
+            profile: Profile name
+            username: Otter username the token must belong to
+        
+        Returns:
+            Session token or None
+        """
+        try:
+            with open(self._path(profile, ".json")) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if entry.get("username") != username:
+            return None
+        if entry.get("expires_at", 0) - EXPIRY_MARGIN_SECONDS <= time.time():
+            return None
+        return entry.get("token")
+    
+    def save(self, profile: str, username: str, token: str, expires_at: float) -> None:
+        """Store the token of a profile, readable only by the current user."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = {"username": username, "token": token, "expires_at": expires_at}
+        
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self._path(profile, ".json"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    
+    def invalidate(self, profile: str, token: Optional[str] = None) -> None:
+        """Drop the cached token of a profile.
+        
+        Args:
+            profile: Profile name
+            token: Only drop the entry if it still holds this token, so a
+                token another worker just refreshed is kept
+        """
+        path = self._path(profile, ".json")
+        if token is not None:
+            try:
+                with open(path) as f:
+                    if json.load(f).get("token") != token:
+                        return
+            except (OSError, ValueError):
+                return
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+    
+    @asynccontextmanager
+    async def lock(self, profile: str) -> AsyncIterator[None]:
+        """Hold the profile's lock file, so only one worker logs in at a time."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        handle = open(self._path(profile, ".lock"), "a+")
+        try:
+            await asyncio.to_thread(_lock_file, handle)
+            try:
+                yield
+            finally:
+                _unlock_file(handle)
+        finally:
+            handle.close()
@@ -2,15 +2,23 @@
 
 import asyncio
 import logging
+import random
+import time
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
+import httpx
+
 from src.config.settings import settings
 from src.menu_sync.models import (
-    Menu, MenuItem, MenuCategory, SyncStatus, SyncResponse, MenuDiff
+    Menu, MenuItem, MenuCategory, SyncStatus, SyncResponse, MenuDiff, ProfileSyncResult
 )
-from src.menu_sync.otter_client import OtterClient
-from src.utils.retry import retry
+from src.menu_sync.diff import MenuFingerprints, diff_menus, item_fingerprint
+from src.menu_sync.menu_store import MenuStore
+from src.menu_sync.otter_client import OtterClient, create_http_client
+from src.menu_sync.scheduler import SyncScheduler
+from src.menu_sync.writer import MenuWriter, create_menu_writer
+from src.utils.retry import retry, retry_budget, is_transient
 
 logger = logging.getLogger(__name__)
 
@@ -18,16 +26,33 @@ logger = logging.getLogger(__name__)
 class MenuSyncService:
     """Service for synchronizing Otter menu data."""
     
-    def __init__(self, profile_name: Optional[str] = None):
+    def __init__(self, profile_name: Optional[str] = None,
+                 http_client: Optional[httpx.AsyncClient] = None,
+                 menu_store: Optional[MenuStore] = None,
+                 menu_writer: Optional[MenuWriter] = None):
         """Initialize menu sync service.
         
         Args:
             profile_name: Optional profile name to use
+            http_client: Optional HTTP client shared with other services
+            menu_store: Store of synced menu versions (defaults to
+                settings.snapshot_path)
+            menu_writer: Writer of synced menus into the KDS database
+                (defaults to one for the profile's KDS restaurant, if any)
         """
         self.profile_name = profile_name
-        self.client = OtterClient(profile_name)
+        self.client = OtterClient(profile_name, http_client=http_client)
+        # Same fallback as OtterClient; keys this profile's menus in the store
+        self.store_profile = profile_name or settings.active_profile or "default"
+        self.menu_store = menu_store if menu_store is not None else MenuStore(settings.snapshot_path)
+        self.menu_writer = (
+            menu_writer if menu_writer is not None
+            else create_menu_writer(self.menu_store, profile_name)
+        )
         self.current_menu: Optional[Menu] = None
         self.sync_status: Optional[SyncStatus] = None
+        # Changes found by the last successful sync, for the scheduler
+        self.last_diff: Optional[MenuDiff] = None
     
     async def sync_menu(self, restaurant_id: Optional[str] = None) -> SyncResponse:
         """
@@ -40,6 +65,7 @@ class MenuSyncService:
             SyncResponse with status and data
         """
         self.sync_status = SyncStatus(status="in_progress")
+        self.last_diff = None
         
         try:
             # Authenticate with Otter
@@ -65,16 +91,25 @@ class MenuSyncService:
                         sync_status=self.sync_status
                     )
                 
-                # Process menu differences
-                if self.current_menu:
-                    menu_diff = self._calculate_menu_diff(self.current_menu, new_menu)
-                    await self._process_menu_changes(menu_diff)
-                else:
-                    # First sync - all items are new
-                    self.sync_status.items_created = sum(
-                        len(cat.items) for cat in new_menu.categories
+                # Otter returned the menu we already have; nothing to diff
+                if new_menu is self.current_menu:
+                    logger.info("Menu unchanged since last sync")
+                    self.last_diff = MenuDiff()
+                    self.sync_status.mark_completed()
+                    return SyncResponse(
+                        status="success",
+                        data=new_menu,
+                        sync_status=self.sync_status
                     )
                 
+                # Diff against the stored version, which survives restarts
+                version, menu_diff = await asyncio.to_thread(
+                    self.menu_store.record, self.store_profile, new_menu
+                )
+                new_menu.version = version
+                await self._process_menu_changes(menu_diff, new_menu.restaurant_id)
+                self.last_diff = menu_diff
+                
                 # Update current menu
                 self.current_menu = new_menu
                 self.sync_status.items_processed = sum(
@@ -105,14 +140,36 @@ class MenuSyncService:
                 sync_status=self.sync_status
             )
     
-    @retry(attempts=3, delay=1.0)
+    async def changes_since(self, version: int, restaurant_id: Optional[str] = None) -> MenuDiff:
+        """
+        Item changes of a synced menu after a version, without refetching.
+        
+        Args:
+            version: Menu version the caller has; 0 for everything
+            restaurant_id: Restaurant of the menu (defaults to the last synced one)
+            
+        Returns:
+            MenuDiff with the current state of added and updated items
+        """
+        restaurant_id = restaurant_id or (self.current_menu.restaurant_id if self.current_menu else None)
+        if restaurant_id is None:
+            raise ValueError("No restaurant given and no menu synced yet")
+        return await asyncio.to_thread(
+            self.menu_store.changes_since, self.store_profile, restaurant_id, version
+        )
+    
+    @retry(attempts=3, delay=1.0, max_delay=10.0, jitter=True,
+           retry_if=is_transient, breaker="otter", budget=retry_budget)
     async def _fetch_menu_with_retry(
         self, 
         client: OtterClient, 
         restaurant_id: Optional[str] = None
     ) -> Optional[Menu]:
         """
-        Fetch menu data with retry logic.
+        Fetch menu data, retrying network errors, 429s and 5xxs.
+        
+        Retries are jittered and honor Retry-After; while Otter keeps
+        failing, the shared "otter" circuit breaker fails syncs fast.
         
         Args:
             client: OtterClient instance
@@ -121,7 +178,7 @@ class MenuSyncService:
         Returns:
             Menu object or None
         """
-        return await client.fetch_menu_data(restaurant_id)
+        return await client.fetch_menu_data(restaurant_id, raise_errors=True)
     
     def _calculate_menu_diff(self, old_menu: Menu, new_menu: Menu) -> MenuDiff:
         """
@@ -134,35 +191,7 @@ class MenuSyncService:
         Returns:
             MenuDiff object with changes
         """
-        diff = MenuDiff()
-        
-        # Create lookup maps
-        old_items_map = {}
-        new_items_map = {}
-        
-        for cat in old_menu.categories:
-            for item in cat.items:
-                old_items_map[item.id] = item
-        
-        for cat in new_menu.categories:
-            for item in cat.items:
-                new_items_map[item.id] = item
-        
-        # Find added and updated items
-        for item_id, new_item in new_items_map.items():
-            if item_id not in old_items_map:
-                diff.added_items.append(new_item)
-            else:
-                old_item = old_items_map[item_id]
-                if self._item_has_changed(old_item, new_item):
-                    diff.updated_items.append(new_item)
-        
-        # Find deleted items
-        for item_id in old_items_map:
-            if item_id not in new_items_map:
-                diff.deleted_items.append(item_id)
-        
-        return diff
+        return diff_menus(MenuFingerprints.of(old_menu), MenuFingerprints.of(new_menu))
     
     def _item_has_changed(self, old_item: MenuItem, new_item: MenuItem) -> bool:
         """
@@ -175,101 +204,239 @@ class MenuSyncService:
         Returns:
             bool: True if item has changed
         """
-        # Compare relevant fields
-        fields_to_compare = ['name', 'description', 'price', 'category', 'available']
-        
-        for field in fields_to_compare:
-            if getattr(old_item, field) != getattr(new_item, field):
-                return True
-        
-        return False
+        return item_fingerprint(old_item) != item_fingerprint(new_item)
     
-    async def _process_menu_changes(self, diff: MenuDiff) -> None:
+    async def _process_menu_changes(self, diff: MenuDiff, restaurant_id: Optional[str] = None) -> None:
         """
-        Process menu changes (e.g., update database, send notifications).
+        Process menu changes and write them to the KDS database.
         
         Args:
             diff: MenuDiff object with changes
+            restaurant_id: Otter restaurant of the menu, whose stored versions
+                are written
         """
-        if not diff.has_changes:
+        if diff.has_changes:
+            # Update sync status counters
+            self.sync_status.items_created = len(diff.added_items)
+            self.sync_status.items_updated = len(diff.updated_items)
+            self.sync_status.items_deleted = len(diff.deleted_items)
+            
+            # Log changes
+            if diff.added_items:
+                logger.info(f"Added {len(diff.added_items)} new menu items")
+            if diff.updated_items:
+                logger.info(f"Updated {len(diff.updated_items)} menu items")
+            if diff.deleted_items:
+                logger.info(f"Deleted {len(diff.deleted_items)} menu items")
+            category_changes = (
+                len(diff.added_categories) + len(diff.updated_categories) + len(diff.deleted_categories)
+            )
+            if category_changes:
+                logger.info(
+                    f"Categories: {len(diff.added_categories)} added, "
+                    f"{len(diff.updated_categories)} updated, {len(diff.deleted_categories)} deleted"
+                )
+        else:
             logger.info("No menu changes detected")
-            return
         
-        # Update sync status counters
-        self.sync_status.items_created = len(diff.added_items)
-        self.sync_status.items_updated = len(diff.updated_items)
-        self.sync_status.items_deleted = len(diff.deleted_items)
+        if settings.dry_run_mode:
+            if diff.has_changes:
+                logger.info("Dry run mode - no changes applied")
+            return
         
-        # Log changes
-        if diff.added_items:
-            logger.info(f"Added {len(diff.added_items)} new menu items")
-        if diff.updated_items:
-            logger.info(f"Updated {len(diff.updated_items)} menu items")
-        if diff.deleted_items:
-            logger.info(f"Deleted {len(diff.deleted_items)} menu items")
+        if self.menu_writer is not None and restaurant_id is not None:
+            # Also finishes a write an earlier run left incomplete
+            await self.menu_writer.apply(self.store_profile, restaurant_id)
+
+
+async def sync_profiles(
+    services: Dict[str, MenuSyncService],
+    concurrency: Optional[int] = None,
+    jitter_seconds: Optional[float] = None
+) -> List[ProfileSyncResult]:
+    """
+    Sync several profiles concurrently.
+    
+    Each profile waits a random 0..jitter_seconds before starting so the
+    syncs don't hit Otter in one burst, then at most ``concurrency`` run at
+    a time.
+    
+    Args:
+        services: Sync service per profile name
+        concurrency: Max concurrent syncs (defaults to settings.sync_concurrency)
+        jitter_seconds: Max start delay (defaults to settings.sync_jitter_seconds)
         
-        # Here you would typically:
-        # 1. Update database
-        # 2. Send notifications
-        # 3. Update external systems
+    Returns:
+        One result per profile, in the order of ``services``
+    """
+    semaphore = asyncio.Semaphore(concurrency or settings.sync_concurrency)
+    jitter = settings.sync_jitter_seconds if jitter_seconds is None else jitter_seconds
+    
+    return await asyncio.gather(*(
+        _sync_profile(profile_name, service, semaphore, jitter)
+        for profile_name, service in services.items()
+    ))
+
+
+async def _sync_profile(
+    profile_name: str,
+    service: MenuSyncService,
+    semaphore: asyncio.Semaphore,
+    jitter: float = 0
+) -> ProfileSyncResult:
+    """Sync one profile under a shared concurrency limit, never raising."""
+    if jitter > 0:
+        await asyncio.sleep(random.uniform(0, jitter))
+    
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            result = await service.sync_menu()
+            status, error = result.status, result.error
+            items = result.sync_status.items_processed if result.sync_status else 0
+            diff = getattr(service, "last_diff", None)
+            changed = diff is not None and diff.has_changes
+        except Exception as e:
+            status, error, items, changed = "error", str(e), 0, False
+        duration = time.perf_counter() - start
+    
+    if status == "error":
+        logger.error(f"Sync failed for {profile_name} after {duration:.1f}s: {error}")
+    else:
+        logger.info(f"Synced profile {profile_name} in {duration:.1f}s ({items} items)")
+    
+    return ProfileSyncResult(
+        profile=profile_name,
+        status=status,
+        duration_seconds=duration,
+        items_processed=items,
+        menu_changed=changed,
+        error=error
+    )
+
+
+def _log_cycle(results: List[ProfileSyncResult], elapsed: float) -> None:
+    """Log a summary of one scheduler cycle."""
+    durations = sorted(result.duration_seconds for result in results)
+    failed = sum(1 for result in results if result.status == "error")
+    changed = sum(1 for result in results if result.menu_changed)
+    slowest = max(results, key=lambda result: result.duration_seconds)
+    
+    logger.info(
+        f"Sync cycle finished in {elapsed:.1f}s: {len(results) - failed} succeeded "
+        f"({changed} with menu changes), {failed} failed; "
+        f"per-profile median {durations[len(durations) // 2]:.1f}s, "
+        f"slowest {slowest.profile} {slowest.duration_seconds:.1f}s"
+    )
+    if elapsed > settings.sync_min_interval_minutes * 60:
+        logger.warning(
+            f"Sync cycle took longer than the {settings.sync_min_interval_minutes} minute "
+            f"minimum interval; raise MENU_SYNC_CONCURRENCY or the interval"
+        )
+
+
+async def run_schedule(services: Dict[str, MenuSyncService], scheduler: SyncScheduler) -> None:
+    """
+    Sync each profile whenever the scheduler says it is due.
+    
+    Every due profile syncs in its own task, at most settings.sync_concurrency
+    at a time, and is rescheduled as soon as it finishes, so a triggered
+    profile never waits for a slow one.
+    
+    Args:
+        services: Sync service per profile name
+        scheduler: Schedule of the same profiles
+    """
+    await scheduler.load()
+    semaphore = asyncio.Semaphore(settings.sync_concurrency)
+    running: Dict[str, asyncio.Task] = {}
+    
+    async def run(profile: str) -> ProfileSyncResult:
+        started_at = time.time()
+        # The schedule already spreads profiles out; no start jitter
+        result = await _sync_profile(profile, services[profile], semaphore)
+        entry = scheduler.record(profile, result.menu_changed, started_at, failed=result.status == "error")
+        try:
+            await scheduler.save(entry, started_at)
+        except Exception as e:
+            logger.error(f"Failed to save the sync schedule of {profile}: {e}")
+        logger.debug(
+            f"Next sync of {profile} in {entry.next_run_at - time.time():.0f}s "
+            f"(change rate {entry.change_rate:.2f})"
+        )
+        return result
+    
+    def finished(profile: str) -> None:
+        running.pop(profile, None)
+        scheduler.wake()
+    
+    async def log_when_done(tasks: List[asyncio.Task], start: float) -> None:
+        _log_cycle(await asyncio.gather(*tasks), time.perf_counter() - start)
+    
+    try:
+        while settings.sync_enabled:
+            due = [profile for profile in scheduler.due() if profile not in running]
+            if due:
+                logger.info(
+                    f"Starting scheduled sync for {len(due)} of {len(services)} profiles "
+                    f"({len(running)} already syncing)"
+                )
+                tasks = []
+                for profile in due:
+                    task = asyncio.create_task(run(profile))
+                    task.add_done_callback(lambda _, profile=profile: finished(profile))
+                    running[profile] = task
+                    tasks.append(task)
+                asyncio.create_task(log_when_done(tasks, time.perf_counter()))
+            await scheduler.wait(running)
         
-        if settings.dry_run_mode:
-            logger.info("Dry run mode - no changes applied")
-        else:
-            # Apply changes (placeholder for actual implementation)
-            pass
+        # Let in-flight syncs finish and save their schedule
+        await asyncio.gather(*running.values())
+    finally:
+        for task in list(running.values()):
+            task.cancel()
+
+
+def scheduled_profiles() -> List[str]:
+    """Profiles the sync service schedules, as keyed in the menu store."""
+    if settings.sync_all_profiles:
+        from src.config.profiles import profile_manager
+        return profile_manager.list_profiles()
+    return [settings.active_profile or "default"]
 
 
 async def run_sync_scheduler():
-    """Run periodic menu sync based on configured interval."""
+    """Run menu syncs on each profile's adaptive schedule."""
+    menu_store = MenuStore(settings.snapshot_path)
+    
     if settings.sync_all_profiles:
         # Sync all profiles
-        from src.config.profiles import profile_manager
-        profiles = profile_manager.list_profiles()
+        profiles = scheduled_profiles()
         
         if not profiles:
             logger.error("No profiles configured for sync")
             return
-            
-        while settings.sync_enabled:
-            logger.info(f"Starting scheduled sync for {len(profiles)} profiles")
-            
-            for profile_name in profiles:
-                try:
-                    logger.info(f"Syncing profile: {profile_name}")
-                    sync_service = MenuSyncService(profile_name)
-                    result = await sync_service.sync_menu()
-                    
-                    if result.status == "error":
-                        logger.error(f"Sync failed for {profile_name}: {result.error}")
-                except Exception as e:
-                    logger.error(f"Unexpected error syncing {profile_name}: {e}")
-            
-            # Wait for next sync interval
-            await asyncio.sleep(settings.sync_interval_minutes * 60)
+        
+        # One pooled client, one menu store and one long-lived service per
+        # profile, so connections and the last synced menu carry over
+        # between cycles
+        async with create_http_client(max_connections=settings.sync_concurrency) as http_client:
+            services = {
+                profile_name: MenuSyncService(profile_name, http_client=http_client, menu_store=menu_store)
+                for profile_name in profiles
+            }
+            await run_schedule(services, SyncScheduler(menu_store, services))
     else:
         # Single profile sync
-        sync_service = MenuSyncService()
-        
-        while settings.sync_enabled:
-            logger.info("Starting scheduled menu sync")
-            
-            try:
-                result = await sync_service.sync_menu()
-                
-                if result.status == "error":
-                    logger.error(f"Sync failed: {result.error}")
-                
-            except Exception as e:
-                logger.error(f"Unexpected error in sync scheduler: {e}")
-            
-            # Wait for next sync interval
-            await asyncio.sleep(settings.sync_interval_minutes * 60)
+        sync_service = MenuSyncService(menu_store=menu_store)
+        services = {sync_service.store_profile: sync_service}
+        await run_schedule(services, SyncScheduler(menu_store, services))
 
 
 def start_sync_service():
     """Start the menu sync service."""
     logger.info(
-        f"Starting menu sync service (interval: {settings.sync_interval_minutes} minutes)"
+        f"Starting menu sync service (interval: {settings.sync_min_interval_minutes}-"
+        f"{settings.sync_max_interval_minutes} minutes, starting at {settings.sync_interval_minutes})"
     )
     asyncio.run(run_sync_scheduler())
\ No newline at end of file
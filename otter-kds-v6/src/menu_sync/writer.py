@@ -0,0 +1,154 @@
+"""Write-through of synced menus into the KDS database.
+
+Each new menu version recorded in the MenuStore is written to the
+``menu_items`` table as the net changes since the last written version,
+in chunks of one ``apply_menu_changes`` call each (one upsert and one
+soft-delete). Progress is kept both in ``menu_sync_status`` and in the
+local store, so a write interrupted by a crash resumes at the first
+unwritten chunk on the next sync.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from src.config.settings import settings
+from src.menu_sync.menu_store import MenuStore
+from src.menu_sync.models import MenuItem
+
+logger = logging.getLogger(__name__)
+
+
+def item_row(item: MenuItem) -> Dict[str, Any]:
+    """The ``menu_items`` row of an Otter menu item."""
+    return {
+        "otter_item_id": item.id,
+        "name": item.name,
+        "description": item.description,
+        "price": str(item.price),
+        "category": item.category,
+        "available": item.available,
+        "options": [option.model_dump(mode="json") for option in item.options],
+        "images": item.images,
+        "tags": item.tags
+    }
+
+
+class MenuWriter:
+    """Applies stored menu versions of one KDS restaurant to Supabase."""
+    
+    def __init__(self, store: MenuStore, restaurant_id: str, db=None,
+                 chunk_size: Optional[int] = None):
+        """Initialize the writer.
+        
+        Args:
+            store: Store the menu versions are read from
+            restaurant_id: KDS restaurant the menu is written to
+            db: SupabaseManager (created on first write if not given)
+            chunk_size: Max changes per database call (defaults to
+                settings.write_chunk_size)
+        """
+        self.store = store
+        self.restaurant_id = restaurant_id
+        self._db = db
+        self._owns_db = db is None
+        self.chunk_size = chunk_size or settings.write_chunk_size
+    
+    @property
+    def db(self):
+        """The SupabaseManager, connected on first use."""
+        if self._db is None:
+            from src.database.supabase_manager import SupabaseManager
+            self._db = SupabaseManager()
+        return self._db
+    
+    async def apply(self, profile: str, menu_restaurant_id: str) -> int:
+        """
+        Write the menu's changes since the last written version.
+        
+        Args:
+            profile: Profile the menu was synced with
+            menu_restaurant_id: Otter restaurant id of the menu in the store
+        
+        Returns:
+            Number of item changes written by this call
+        """
+        store = self.store
+        latest = await asyncio.to_thread(store.latest_version, profile, menu_restaurant_id)
+        state = await asyncio.to_thread(store.write_state, profile, menu_restaurant_id)
+        if latest <= state.applied_version:
+            return 0
+        
+        diff = await asyncio.to_thread(
+            store.changes_since, profile, menu_restaurant_id, state.applied_version
+        )
+        rows = [item_row(item) for item in diff.added_items + diff.updated_items]
+        deleted = diff.deleted_items
+        total = len(rows) + len(deleted)
+        
+        if state.target_version == latest and state.sync_id:
+            # Same changes as the interrupted attempt, in the same order
+            sync_id, start = state.sync_id, state.items_written
+            logger.info(f"Resuming menu write v{latest} for {profile} at {start}/{total}")
+        else:
+            sync_id = str((await self.db.create_sync_status(self.restaurant_id))["id"])
+            await asyncio.to_thread(store.begin_write, profile, menu_restaurant_id, latest, sync_id)
+            start = 0
+        
+        try:
+            await self.db.update_sync_status(sync_id, {
+                "status": "in_progress",
+                "menu_version": latest,
+                "items_total": total,
+                "items_synced": start
+            })
+            for offset in range(start, total, self.chunk_size):
+                end = min(offset + self.chunk_size, total)
+                await self.db.apply_menu_changes(
+                    self.restaurant_id,
+                    latest,
+                    rows[offset:end],
+                    deleted[max(offset - len(rows), 0):max(end - len(rows), 0)]
+                )
+                await asyncio.to_thread(store.write_progress, profile, menu_restaurant_id, end)
+                await self.db.update_sync_status(sync_id, {"items_synced": end})
+        except Exception as e:
+            try:
+                await self.db.update_sync_status(sync_id, {"status": "failed", "errors": [str(e)]})
+            except Exception:
+                pass
+            raise
+        
+        await self.db.update_sync_status(sync_id, {
+            "status": "completed",
+            "items_synced": total,
+            "last_sync_at": datetime.utcnow().isoformat()
+        })
+        await asyncio.to_thread(store.finish_write, profile, menu_restaurant_id)
+        logger.info(f"Wrote menu v{latest} for {profile}: {total - start} changes")
+        return total - start
+    
+    async def close(self) -> None:
+        """Close the database client if this writer created it."""
+        if self._owns_db and self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+def create_menu_writer(store: MenuStore, profile_name: Optional[str] = None) -> Optional[MenuWriter]:
+    """
+    Writer for a profile's KDS restaurant, or None if none is configured.
+    
+    The restaurant comes from the profile's ``kds_restaurant_id``, falling
+    back to settings.kds_restaurant_id.
+    """
+    restaurant_id = None
+    if profile_name:
+        from src.config.profiles import profile_manager
+        profile = profile_manager.get_profile(profile_name)
+        restaurant_id = profile.kds_restaurant_id if profile else None
+    restaurant_id = restaurant_id or settings.kds_restaurant_id
+    if not restaurant_id:
+        return None
+    return MenuWriter(store, restaurant_id)
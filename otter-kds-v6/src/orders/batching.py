@@ -0,0 +1,560 @@
+"""Server-side item batching for Otter KDS v6.
+
+Ports the Chrome extension's OrderBatcher and ItemMatcher.generateItemKey:
+open order items with the same size, category, base name, modifiers and
+rice substitution are cooked together as one batch. Instead of every tablet
+regrouping all orders on each scrape, a BatchBoard per restaurant is seeded
+once and kept current from realtime order and item events, emitting a
+delta per batch that changed. Membership is persisted on
+``order_items.batch_id`` so batches keep their ids across restarts.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple
+import structlog
+
+from .board import ACTIVE_STATUSES
+
+logger = structlog.get_logger()
+
+_MODIFIERS = re.compile(r"\(([^)]+)\)")
+_SIZE_IN_NAME = re.compile(r"\((Small|Medium|Large|Regular)\)", re.IGNORECASE)
+_SIZE = re.compile(r"^(Small|Medium|Large|Regular)$", re.IGNORECASE)
+
+NO_SIZE = "no-size"
+
+
+def split_modifiers(name: str) -> Tuple[str, List[str]]:
+    """Base name and parenthesized modifiers of an item name, as in ItemMatcher."""
+    match = _MODIFIERS.search(name)
+    if match is None:
+        return name.strip(), []
+    base = (name[:match.start()].rstrip() + " " + name[match.end():].lstrip()).strip()
+    return base, [modifier.strip() for modifier in match.group(1).split(",")]
+
+
+def size_from_name(name: str) -> Optional[str]:
+    """Size in an item name's parentheses or modifiers, if any."""
+    match = _SIZE_IN_NAME.search(name)
+    if match is not None:
+        return match.group(1)
+    for modifier in split_modifiers(name)[1]:
+        if _SIZE.match(modifier):
+            return modifier
+    return None
+
+
+def compound_key(name: str, size: Optional[str] = None, category: Optional[str] = None,
+                 rice_substitution: Optional[str] = None) -> str:
+    """
+    Readable batch key of an item: ``size|category|base name|modifiers``.
+    
+    Same rules as the extension's ``generateItemKey``: the size comes from
+    the name when not given, a fried rice used as size becomes part of the
+    base name, and an urban bowl's rice substitution stands in for its size.
+    """
+    base, modifiers = split_modifiers(name)
+    base = base.lower()
+    size = size or size_from_name(name) or NO_SIZE
+    
+    if "fried rice" in base and size != NO_SIZE:
+        if not re.match(r"^(small|medium|large|regular)\s*-?\s*", base) and "fried rice" in size.lower():
+            base = f"{base} - {size.lower()}"
+    if "urban bowl" in base and rice_substitution:
+        size = rice_substitution
+    
+    parts = [size.strip().lower()]
+    if category:
+        parts.append(category.strip().lower())
+    parts.append(base)
+    if modifiers:
+        parts.append(",".join(sorted(modifier.lower() for modifier in modifiers)))
+    return "|".join(parts)
+
+
+def item_key(name: str, size: Optional[str] = None, category: Optional[str] = None,
+             rice_substitution: Optional[str] = None) -> str:
+    """Hashed batch key of an item, short enough to index and send to clients."""
+    key = compound_key(name, size, category, rice_substitution)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def row_key(item: Dict[str, Any]) -> str:
+    """Batch key of an ``order_items`` row."""
+    modifiers = item.get("modifiers")
+    rice = modifiers.get("riceSubstitution") if isinstance(modifiers, dict) else None
+    return item_key(item.get("item_name") or "", item.get("size"), item.get("category"), rice)
+
+
+@dataclass
+class BatchItem:
+    """One order item counted in a batch."""
+    item_id: str
+    order_id: str
+    quantity: int
+
+
+@dataclass
+class Batch:
+    """Open items that share a batch key."""
+    key: str
+    name: str
+    size: str
+    category: Optional[str]
+    batch_id: Optional[str] = None
+    items: Dict[str, BatchItem] = field(default_factory=dict)
+    total_quantity: int = 0
+    
+    def to_dict(self, order_numbers: Dict[str, str]) -> Dict[str, Any]:
+        """Batch as sent to clients, with its orders in arrival order."""
+        orders: Dict[str, Dict[str, Any]] = {}
+        for item in self.items.values():
+            entry = orders.setdefault(item.order_id, {
+                "order_id": item.order_id,
+                "order_number": order_numbers.get(item.order_id),
+                "quantity": 0
+            })
+            entry["quantity"] += item.quantity
+        return {
+            "key": self.key,
+            "batch_id": self.batch_id,
+            "name": self.name,
+            "size": self.size,
+            "category": self.category,
+            "total_quantity": self.total_quantity,
+            "orders": list(orders.values())
+        }
+
+
+class BatchBoard:
+    """Batches of one restaurant's open items, kept current from realtime events.
+    
+    Every ``apply_*`` call returns the batch deltas it caused: ``update``
+    with the whole batch, or ``delete`` with its key once it is empty.
+    Membership changes and emptied batches not yet persisted are collected
+    for ``take_changes``.
+    """
+    
+    def __init__(self, restaurant_id: str, max_closed_orders: int = 1000):
+        self.restaurant_id = restaurant_id
+        self.seeded = False
+        self._batches: Dict[str, Batch] = {}
+        self._item_keys: Dict[str, str] = {}
+        self._order_items: Dict[str, Set[str]] = {}
+        self._order_numbers: Dict[str, str] = {}
+        # Recently closed orders, so late item events don't reopen them
+        self._closed: "OrderedDict[str, None]" = OrderedDict()
+        self._max_closed = max_closed_orders
+        # item id -> batch key, and emptied batch keys, waiting to be persisted
+        self._assignments: Dict[str, str] = {}
+        self._emptied: Set[str] = set()
+        # Events received while seeding, applied once the seed is in
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+    
+    def __len__(self) -> int:
+        return len(self._batches)
+    
+    async def seed(self, db) -> None:
+        """Load the open items of active orders and their stored batches once."""
+        orders = await db.get_open_order_items(self.restaurant_id)
+        for order in orders:
+            self._order_numbers[order["id"]] = order.get("order_number")
+            for item in order.get("items") or []:
+                self._put_item({**item, "order_id": order["id"]}, set())
+        self.seeded = True
+        
+        pending, self._pending = self._pending, []
+        for kind, event in pending:
+            if kind == "orders":
+                self.apply_order_event(event)
+            else:
+                self.apply_item_event(event)
+        logger.info("Batch board seeded", restaurant_id=self.restaurant_id, batches=len(self._batches))
+    
+    def batches(self) -> List[Dict[str, Any]]:
+        """Open batches by category, largest first, as in OrderBatcher.getBatchedItems."""
+        ordered = sorted(
+            self._batches.values(),
+            key=lambda batch: ((batch.category or "").lower(), -batch.total_quantity)
+        )
+        return [batch.to_dict(self._order_numbers) for batch in ordered]
+    
+    def apply_order_event(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Apply a realtime change of the orders table."""
+        if not self.seeded:
+            self._pending.append(("orders", event))
+            return []
+        
+        new = event.get("new") or {}
+        old = event.get("old") or {}
+        event_type = event.get("eventType") or event.get("type")
+        order_id = new.get("id") or old.get("id")
+        if not order_id:
+            return []
+        
+        changed: Set[str] = set()
+        if event_type == "DELETE" or not new or new.get("status", "pending") not in ACTIVE_STATUSES:
+            self._close_order(order_id, changed)
+        elif new.get("order_number") and self._order_numbers.get(order_id) != new["order_number"]:
+            self._order_numbers[order_id] = new["order_number"]
+            changed.update(self._item_keys[item_id] for item_id in self._order_items.get(order_id, ()))
+        return self._deltas(changed)
+    
+    def apply_item_event(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Apply a realtime change of the order_items table."""
+        if not self.seeded:
+            self._pending.append(("items", event))
+            return []
+        
+        new = event.get("new") or {}
+        old = event.get("old") or {}
+        event_type = event.get("eventType") or event.get("type")
+        changed: Set[str] = set()
+        
+        if event_type == "DELETE" or not new:
+            if old.get("id"):
+                self._remove_item(old["id"], changed)
+        elif new.get("id") and new.get("order_id"):
+            if new["order_id"] in self._closed or new.get("status") == "completed":
+                self._remove_item(new["id"], changed)
+            else:
+                self._put_item(new, changed)
+        return self._deltas(changed)
+    
+    def has_changes(self) -> bool:
+        """Whether anything waits to be persisted."""
+        return bool(self._assignments or self._emptied)
+    
+    def take_changes(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Changes to persist, in ``assign_item_batches`` shape.
+        
+        Returns:
+            Tuple of (item assignments, keys of batches emptied since)
+        """
+        assignments, self._assignments = self._assignments, {}
+        emptied, self._emptied = self._emptied, set()
+        rows = []
+        for item_id, key in assignments.items():
+            batch = self._batches.get(key)
+            if batch is None:
+                continue
+            rows.append({
+                "item_id": item_id,
+                "item_key": key,
+                "name": batch.name,
+                "size": batch.size,
+                "category": batch.category
+            })
+        return rows, sorted(key for key in emptied if key not in self._batches)
+    
+    def restore_changes(self, rows: Iterable[Dict[str, Any]], emptied: Iterable[str]) -> None:
+        """Queue changes whose persisting failed again, unless superseded."""
+        for row in rows:
+            self._assignments.setdefault(row["item_id"], row["item_key"])
+        self._emptied.update(emptied)
+    
+    def set_batch_ids(self, batch_ids: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Record stored batch ids by key; returns deltas for batches that got one."""
+        changed = set()
+        for key, batch_id in batch_ids.items():
+            batch = self._batches.get(key)
+            if batch is not None and batch.batch_id != batch_id:
+                batch.batch_id = batch_id
+                changed.add(key)
+        return self._deltas(changed)
+    
+    def _put_item(self, item: Dict[str, Any], changed: Set[str]) -> None:
+        if item.get("status") == "completed":
+            return
+        item_id = item["id"]
+        order_id = item["order_id"]
+        key = row_key(item)
+        quantity = item.get("quantity") or 1
+        
+        previous = self._item_keys.get(item_id)
+        if previous == key:
+            entry = self._batches[key].items[item_id]
+            if entry.quantity != quantity:
+                self._batches[key].total_quantity += quantity - entry.quantity
+                entry.quantity = quantity
+                changed.add(key)
+            return
+        if previous is not None:
+            self._remove_item(item_id, changed)
+        
+        batch = self._batches.get(key)
+        if batch is None:
+            self._emptied.discard(key)
+            name = item.get("item_name") or ""
+            batch = self._batches[key] = Batch(
+                key=key,
+                name=split_modifiers(name)[0],
+                size=item.get("size") or size_from_name(name) or NO_SIZE,
+                category=item.get("category")
+            )
+        if batch.batch_id is None and item.get("batch_id") and previous is None:
+            batch.batch_id = item["batch_id"]
+        
+        batch.items[item_id] = BatchItem(item_id, order_id, quantity)
+        batch.total_quantity += quantity
+        self._item_keys[item_id] = key
+        self._order_items.setdefault(order_id, set()).add(item_id)
+        if item.get("batch_id") is None or item["batch_id"] != batch.batch_id:
+            self._assignments[item_id] = key
+        changed.add(key)
+    
+    def _remove_item(self, item_id: str, changed: Set[str]) -> None:
+        key = self._item_keys.pop(item_id, None)
+        if key is None:
+            return
+        batch = self._batches[key]
+        entry = batch.items.pop(item_id)
+        batch.total_quantity -= entry.quantity
+        order_items = self._order_items.get(entry.order_id)
+        if order_items is not None:
+            order_items.discard(item_id)
+            if not order_items:
+                del self._order_items[entry.order_id]
+        if not batch.items:
+            del self._batches[key]
+            if batch.batch_id is not None:
+                self._emptied.add(key)
+        if self._assignments.get(item_id) == key:
+            # Never persisted, nothing to undo
+            del self._assignments[item_id]
+        changed.add(key)
+    
+    def _close_order(self, order_id: str, changed: Set[str]) -> None:
+        for item_id in list(self._order_items.get(order_id, ())):
+            self._remove_item(item_id, changed)
+        self._order_numbers.pop(order_id, None)
+        self._closed[order_id] = None
+        self._closed.move_to_end(order_id)
+        if len(self._closed) > self._max_closed:
+            self._closed.popitem(last=False)
+    
+    def _deltas(self, keys: Iterable[str]) -> List[Dict[str, Any]]:
+        deltas = []
+        for key in keys:
+            batch = self._batches.get(key)
+            if batch is None:
+                deltas.append({"type": "batch_update", "action": "delete", "key": key})
+            else:
+                deltas.append({
+                    "type": "batch_update",
+                    "action": "update",
+                    "batch": batch.to_dict(self._order_numbers)
+                })
+        return deltas
+
+
+class BatchBoards:
+    """Per-restaurant batch boards in the API process, fed by the realtime hub.
+    
+    A board lives while at least one socket subscribes to its batches. Its
+    deltas go to those sockets, and membership changes are written in one
+    ``assign_item_batches`` call per flush. A board is only kept while the
+    hub has live order and item channels for its restaurant; otherwise
+    subscribers get a one-off snapshot and realtime is tried again later.
+    """
+    
+    def __init__(self, hub, flush_seconds: Optional[float] = None,
+                 retry_seconds: Optional[float] = None):
+        """Initialize the registry.
+        
+        Args:
+            hub: RealtimeHub providing shared channels, listeners and sends
+            flush_seconds: Delay before membership changes are persisted, so
+                a burst of events is written at once (defaults to env var
+                BATCH_FLUSH_SECONDS or 0.5)
+            retry_seconds: After realtime fails for a restaurant, wait this
+                long before trying again (defaults to env var
+                BATCH_REALTIME_RETRY_SECONDS or 30)
+        """
+        self.hub = hub
+        self.flush_seconds = flush_seconds or float(os.getenv("BATCH_FLUSH_SECONDS", "0.5"))
+        self.retry_seconds = retry_seconds or float(os.getenv("BATCH_REALTIME_RETRY_SECONDS", "30"))
+        self._boards: Dict[str, BatchBoard] = {}
+        self._subscribers: Dict[str, Set[Any]] = {}
+        self._listeners: Dict[str, Tuple[Any, Any]] = {}
+        self._flushes: Dict[str, asyncio.TimerHandle] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Restaurant id -> pending retry of its realtime channels
+        self._retries: Dict[str, asyncio.TimerHandle] = {}
+    
+    async def subscribe(self, db, restaurant_id: str, websocket) -> List[Dict[str, Any]]:
+        """
+        Send a socket the restaurant's batch deltas from now on.
+        
+        Without live realtime the socket is still subscribed; once a retry
+        starts the board, every subscriber gets a fresh snapshot.
+        
+        Returns:
+            The current batches, to send the socket as its snapshot
+        """
+        lock = self._locks.setdefault(restaurant_id, asyncio.Lock())
+        async with lock:
+            board = self._boards.get(restaurant_id)
+            if board is None and restaurant_id not in self._retries:
+                board = await self._start(db, restaurant_id)
+            self._subscribers.setdefault(restaurant_id, set()).add(websocket)
+        
+        if board is None:
+            board = BatchBoard(restaurant_id)
+            try:
+                await board.seed(db)
+            except Exception:
+                self.unsubscribe(db, restaurant_id, websocket)
+                raise
+        return board.batches()
+    
+    def is_live(self, restaurant_id: str) -> bool:
+        """Whether subscribers of a restaurant receive live deltas."""
+        return restaurant_id in self._boards
+    
+    def snapshot(self, restaurant_id: str, batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Message replacing a subscriber's batches."""
+        return {
+            "type": "batch_snapshot",
+            "action": "replace",
+            "live": self.is_live(restaurant_id),
+            "batches": batches
+        }
+    
+    def unsubscribe(self, db, restaurant_id: str, websocket) -> None:
+        """Stop sending a socket deltas; the last one stops the board."""
+        sockets = self._subscribers.get(restaurant_id)
+        if not sockets or websocket not in sockets:
+            return
+        sockets.discard(websocket)
+        if not sockets:
+            del self._subscribers[restaurant_id]
+            self._stop(db, restaurant_id)
+    
+    async def get_batches(self, db, restaurant_id: str) -> List[Dict[str, Any]]:
+        """Current batches, from the live board or a one-off seed."""
+        board = self._boards.get(restaurant_id)
+        if board is None:
+            board = BatchBoard(restaurant_id)
+            await board.seed(db)
+        return board.batches()
+    
+    async def _start(self, db, restaurant_id: str) -> Optional[BatchBoard]:
+        board = BatchBoard(restaurant_id)
+        on_order = lambda event: self._publish(db, restaurant_id, board.apply_order_event(event))
+        on_item = lambda event: self._publish(db, restaurant_id, board.apply_item_event(event))
+        self.hub.acquire(db, restaurant_id, kind="orders")
+        self.hub.acquire(db, restaurant_id, kind="items")
+        self.hub.add_listener(restaurant_id, "orders", on_order)
+        self.hub.add_listener(restaurant_id, "items", on_item)
+        self._listeners[restaurant_id] = (on_order, on_item)
+        self._boards[restaurant_id] = board
+        
+        if not (
+            self.hub.is_live(restaurant_id, kind="orders")
+            and self.hub.is_live(restaurant_id, kind="items")
+        ):
+            # Deltas would never arrive; serve snapshots until a retry works
+            self._stop(db, restaurant_id)
+            self._schedule_retry(db, restaurant_id)
+            logger.warning(
+                "Batch realtime unavailable, retrying later",
+                restaurant_id=restaurant_id,
+                retry_seconds=self.retry_seconds
+            )
+            return None
+        
+        try:
+            await board.seed(db)
+        except Exception:
+            self._stop(db, restaurant_id)
+            raise
+        if board.has_changes():
+            self._schedule_flush(db, restaurant_id)
+        return board
+    
+    def _stop(self, db, restaurant_id: str) -> None:
+        board = self._boards.pop(restaurant_id, None)
+        if board is None:
+            return
+        on_order, on_item = self._listeners.pop(restaurant_id)
+        self.hub.remove_listener(restaurant_id, "orders", on_order)
+        self.hub.remove_listener(restaurant_id, "items", on_item)
+        self.hub.release(db, restaurant_id, kind="orders")
+        self.hub.release(db, restaurant_id, kind="items")
+        flush = self._flushes.pop(restaurant_id, None)
+        if flush is not None:
+            flush.cancel()
+        # Persist what the board still holds before forgetting it
+        if board.seeded:
+            asyncio.create_task(self._flush(db, restaurant_id, board))
+    
+    def _schedule_retry(self, db, restaurant_id: str) -> None:
+        if restaurant_id in self._retries:
+            return
+        self._retries[restaurant_id] = asyncio.get_running_loop().call_later(
+            self.retry_seconds,
+            lambda: asyncio.create_task(self._retry(db, restaurant_id))
+        )
+    
+    async def _retry(self, db, restaurant_id: str) -> None:
+        self._retries.pop(restaurant_id, None)
+        lock = self._locks.setdefault(restaurant_id, asyncio.Lock())
+        async with lock:
+            if restaurant_id in self._boards or not self._subscribers.get(restaurant_id):
+                return
+            try:
+                board = await self._start(db, restaurant_id)
+            except Exception as e:
+                logger.warning("Starting batch board failed", restaurant_id=restaurant_id, error=str(e))
+                self._schedule_retry(db, restaurant_id)
+                return
+            sockets = self._subscribers.get(restaurant_id)
+            if board is not None and sockets:
+                self.hub.send(restaurant_id, sockets, self.snapshot(restaurant_id, board.batches()))
+    
+    def _publish(self, db, restaurant_id: str, deltas: List[Dict[str, Any]]) -> None:
+        sockets = self._subscribers.get(restaurant_id)
+        if sockets:
+            for delta in deltas:
+                self.hub.send(restaurant_id, sockets, delta)
+        board = self._boards.get(restaurant_id)
+        if board is not None and board.has_changes():
+            self._schedule_flush(db, restaurant_id)
+    
+    def _schedule_flush(self, db, restaurant_id: str) -> None:
+        if restaurant_id in self._flushes or restaurant_id not in self._boards:
+            return
+        self._flushes[restaurant_id] = asyncio.get_running_loop().call_later(
+            self.flush_seconds,
+            lambda: asyncio.create_task(self._flush(db, restaurant_id, self._boards.get(restaurant_id)))
+        )
+    
+    async def _flush(self, db, restaurant_id: str, board: Optional[BatchBoard]) -> None:
+        self._flushes.pop(restaurant_id, None)
+        if board is None or db is None or not board.has_changes():
+            return
+        assignments, emptied = board.take_changes()
+        try:
+            batch_ids = await db.assign_item_batches(restaurant_id, assignments, emptied)
+        except Exception as e:
+            logger.warning("Persisting batch membership failed", restaurant_id=restaurant_id, error=str(e))
+            board.restore_changes(assignments, emptied)
+            self._schedule_flush(db, restaurant_id)
+            return
+        self._publish(db, restaurant_id, board.set_batch_ids(batch_ids or {}))
+    
+    def close(self, db) -> None:
+        """Stop every board and release its channels."""
+        for retry in self._retries.values():
+            retry.cancel()
+        self._retries.clear()
+        for restaurant_id in list(self._boards):
+            self._subscribers.pop(restaurant_id, None)
+            self._stop(db, restaurant_id)
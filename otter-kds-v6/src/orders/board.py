@@ -0,0 +1,355 @@
+"""In-memory board of active orders for Otter KDS v6.
+
+The ``get_active_orders`` RPC re-aggregates orders and their items on every
+call. An ActiveOrderBoard is seeded once per restaurant and then kept
+current from realtime order and item events, so reads are memory lookups.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+# Order statuses shown on the board
+ACTIVE_STATUSES = {"pending", "in_progress"}
+
+
+def _parse_time(value: Any) -> datetime:
+    """Parse a timestamp from Supabase into an aware datetime."""
+    if isinstance(value, datetime):
+        parsed = value
+    elif value:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    else:
+        parsed = datetime.now(timezone.utc)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def urgency_score(elapsed_minutes: float) -> int:
+    """Urgency bucket for an order's age, matching the SQL function."""
+    if elapsed_minutes > 30:
+        return 3
+    if elapsed_minutes > 20:
+        return 2
+    if elapsed_minutes > 10:
+        return 1
+    return 0
+
+
+@dataclass
+class BoardOrder:
+    """One active order and the status of each of its items."""
+    order_id: str
+    order_number: str
+    customer_name: Optional[str]
+    status: str
+    ordered_at: datetime
+    item_status: Dict[str, str] = field(default_factory=dict)
+    completed_items: int = 0
+    
+    def set_item(self, item_id: str, status: Optional[str]):
+        """Add, update or (with status None) remove an item."""
+        previous = self.item_status.pop(item_id, None)
+        if previous == "completed":
+            self.completed_items -= 1
+        if status is not None:
+            self.item_status[item_id] = status
+            if status == "completed":
+                self.completed_items += 1
+    
+    def to_row(self, now: datetime) -> Dict[str, Any]:
+        """Row in the shape returned by the ``get_active_orders`` RPC."""
+        elapsed = (now - self.ordered_at).total_seconds() / 60
+        return {
+            "order_id": self.order_id,
+            "order_number": self.order_number,
+            "customer_name": self.customer_name,
+            "status": self.status,
+            "ordered_at": self.ordered_at.isoformat(),
+            "elapsed_minutes": int(elapsed),
+            "total_items": len(self.item_status),
+            "completed_items": self.completed_items,
+            "urgency_score": urgency_score(elapsed)
+        }
+
+
+class ActiveOrderBoard:
+    """Active orders of one restaurant, kept current from realtime events."""
+    
+    def __init__(self, restaurant_id: str, max_orphans: int = 1000):
+        self.restaurant_id = restaurant_id
+        self.seeded = False
+        self._orders: Dict[str, BoardOrder] = {}
+        self._item_orders: Dict[str, str] = {}
+        # Items whose order event has not arrived yet, by order id
+        self._orphans: Dict[str, Dict[str, str]] = {}
+        self._max_orphans = max_orphans
+        self._sorted: Optional[List[BoardOrder]] = None
+        # Events received while seeding, applied once the seed is in
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+    
+    def __len__(self) -> int:
+        return len(self._orders)
+    
+    async def seed(self, db):
+        """Load the active orders and their items once."""
+        orders = await db.get_active_orders_with_items(self.restaurant_id)
+        self._orders.clear()
+        self._item_orders.clear()
+        for order in orders:
+            self._put_order(order)
+            for item in order.get("items") or []:
+                self._set_item(order["id"], item["id"], item.get("status"))
+        self._sorted = None
+        self.seeded = True
+        
+        pending, self._pending = self._pending, []
+        for kind, event in pending:
+            if kind == "orders":
+                self.apply_order_event(event)
+            else:
+                self.apply_item_event(event)
+        logger.info("Order board seeded", restaurant_id=self.restaurant_id, orders=len(self._orders))
+    
+    def _put_order(self, order: Dict[str, Any]):
+        existing = self._orders.get(order["id"])
+        if existing is not None:
+            existing.order_number = order.get("order_number", existing.order_number)
+            existing.customer_name = order.get("customer_name", existing.customer_name)
+            existing.status = order.get("status", existing.status)
+            return
+        
+        board_order = BoardOrder(
+            order_id=order["id"],
+            order_number=order.get("order_number", ""),
+            customer_name=order.get("customer_name"),
+            status=order.get("status", "pending"),
+            ordered_at=_parse_time(order.get("ordered_at"))
+        )
+        self._orders[order["id"]] = board_order
+        for item_id, status in self._orphans.pop(order["id"], {}).items():
+            self._set_item(order["id"], item_id, status)
+        self._sorted = None
+    
+    def _remove_order(self, order_id: str):
+        board_order = self._orders.pop(order_id, None)
+        if board_order is not None:
+            for item_id in board_order.item_status:
+                self._item_orders.pop(item_id, None)
+            self._sorted = None
+        self._orphans.pop(order_id, None)
+    
+    def _set_item(self, order_id: str, item_id: str, status: Optional[str]):
+        board_order = self._orders.get(order_id)
+        if board_order is None:
+            if status is not None:
+                if order_id not in self._orphans and len(self._orphans) >= self._max_orphans:
+                    self._orphans.pop(next(iter(self._orphans)))
+                self._orphans.setdefault(order_id, {})[item_id] = status
+            return
+        
+        board_order.set_item(item_id, status)
+        if status is None:
+            self._item_orders.pop(item_id, None)
+        else:
+            self._item_orders[item_id] = order_id
+    
+    def apply_order_event(self, event: Dict[str, Any]):
+        """Apply a realtime change of the orders table."""
+        if not self.seeded:
+            self._pending.append(("orders", event))
+            return
+        
+        new = event.get("new") or {}
+        old = event.get("old") or {}
+        event_type = event.get("eventType") or event.get("type")
+        
+        if event_type == "DELETE" or not new:
+            if old.get("id"):
+                self._remove_order(old["id"])
+            return
+        
+        if new.get("status", "pending") in ACTIVE_STATUSES:
+            self._put_order(new)
+        else:
+            self._remove_order(new["id"])
+    
+    def apply_item_event(self, event: Dict[str, Any]):
+        """Apply a realtime change of the order_items table."""
+        if not self.seeded:
+            self._pending.append(("items", event))
+            return
+        
+        new = event.get("new") or {}
+        old = event.get("old") or {}
+        event_type = event.get("eventType") or event.get("type")
+        
+        if event_type == "DELETE" or not new:
+            item_id = old.get("id")
+            order_id = old.get("order_id") or self._item_orders.get(item_id)
+            if item_id and order_id:
+                self._set_item(order_id, item_id, None)
+            return
+        
+        if new.get("id") and new.get("order_id"):
+            self._set_item(new["order_id"], new["id"], new.get("status", "pending"))
+    
+    def rows(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Active orders, most urgent first.
+        
+        Urgency only grows with age, so the RPC's ordering (urgency
+        descending, then oldest first) is simply oldest first.
+        """
+        if self._sorted is None:
+            self._sorted = sorted(self._orders.values(), key=lambda order: order.ordered_at)
+        now = now or datetime.now(timezone.utc)
+        return [order.to_row(now) for order in self._sorted]
+
+
+class ActiveOrderBoards:
+    """Per-restaurant boards in the API process, fed by the realtime hub.
+    
+    A board is only trusted while the hub has live order and item channels
+    for its restaurant; otherwise reads fall back to the RPC, without trying
+    realtime again for a while. Boards not read for a while are dropped and
+    release their channels.
+    """
+    
+    def __init__(self, hub, idle_seconds: Optional[float] = None,
+                 retry_seconds: Optional[float] = None):
+        """Initialize the registry.
+        
+        Args:
+            hub: RealtimeHub providing shared channels and event listeners
+            idle_seconds: Drop a board after this long without reads
+                (defaults to env var ORDER_BOARD_IDLE_SECONDS or 300)
+            retry_seconds: After realtime fails for a restaurant, serve it
+                from the RPC this long before trying again (defaults to env
+                var ORDER_BOARD_REALTIME_RETRY_SECONDS or 30)
+        """
+        self.hub = hub
+        self.idle_seconds = idle_seconds or float(os.getenv("ORDER_BOARD_IDLE_SECONDS", "300"))
+        self.retry_seconds = retry_seconds or float(os.getenv("ORDER_BOARD_REALTIME_RETRY_SECONDS", "30"))
+        self._boards: Dict[str, Tuple[ActiveOrderBoard, float]] = {}
+        # Restaurant id -> when realtime may be tried again
+        self._retry_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    async def get_active_orders(self, db, restaurant_id: str) -> List[Dict[str, Any]]:
+        """Active orders for a restaurant, from its board when live."""
+        self._expire_idle(db)
+        
+        board = await self._board(db, restaurant_id)
+        if board is None:
+            return await db.get_active_orders(restaurant_id)
+        
+        self._boards[restaurant_id] = (board, time.monotonic())
+        return board.rows()
+    
+    async def _board(self, db, restaurant_id: str) -> Optional[ActiveOrderBoard]:
+        entry = self._boards.get(restaurant_id)
+        if entry is not None and self._is_live(restaurant_id):
+            return entry[0]
+        
+        if self._retry_at.get(restaurant_id, 0) > time.monotonic():
+            return None
+        
+        lock = self._locks.setdefault(restaurant_id, asyncio.Lock())
+        async with lock:
+            entry = self._boards.get(restaurant_id)
+            if entry is not None:
+                if self._is_live(restaurant_id):
+                    return entry[0]
+                # Channel dropped; the board may have missed events
+                self._drop(db, restaurant_id)
+            if self._retry_at.get(restaurant_id, 0) > time.monotonic():
+                return None
+            
+            board = ActiveOrderBoard(restaurant_id)
+            self.hub.acquire(db, restaurant_id, kind="orders")
+            self.hub.acquire(db, restaurant_id, kind="items")
+            self.hub.add_listener(restaurant_id, "orders", board.apply_order_event)
+            self.hub.add_listener(restaurant_id, "items", board.apply_item_event)
+            self._boards[restaurant_id] = (board, time.monotonic())
+            
+            if not self._is_live(restaurant_id):
+                self._drop(db, restaurant_id)
+                self._retry_at[restaurant_id] = time.monotonic() + self.retry_seconds
+                return None
+            self._retry_at.pop(restaurant_id, None)
+            
+            try:
+                await board.seed(db)
+            except Exception:
+                self._drop(db, restaurant_id)
+                raise
+            return board
+    
+    def _is_live(self, restaurant_id: str) -> bool:
+        return (
+            self.hub.is_live(restaurant_id, kind="orders")
+            and self.hub.is_live(restaurant_id, kind="items")
+        )
+    
+    def _drop(self, db, restaurant_id: str):
+        entry = self._boards.pop(restaurant_id, None)
+        if entry is None:
+            return
+        board = entry[0]
+        self.hub.remove_listener(restaurant_id, "orders", board.apply_order_event)
+        self.hub.remove_listener(restaurant_id, "items", board.apply_item_event)
+        self.hub.release(db, restaurant_id, kind="orders")
+        self.hub.release(db, restaurant_id, kind="items")
+    
+    def _expire_idle(self, db):
+        now = time.monotonic()
+        cutoff = now - self.idle_seconds
+        for restaurant_id, (_, last_read) in list(self._boards.items()):
+            if last_read < cutoff:
+                self._drop(db, restaurant_id)
+        for restaurant_id in [k for k, retry_at in self._retry_at.items() if retry_at <= now]:
+            del self._retry_at[restaurant_id]
+    
+    def close(self, db):
+        """Drop every board and release its channels."""
+        for restaurant_id in list(self._boards):
+            self._drop(db, restaurant_id)
+
+
+async def follow_board(db, restaurant_id: str) -> Tuple[Optional[ActiveOrderBoard], List[str]]:
+    """Seed a board kept current by direct realtime subscriptions.
+    
+    For processes without the API's realtime hub, such as the CLI.
+    
+    Returns:
+        Tuple of (board, subscription ids). The board is None if realtime
+        is unavailable, in which case callers should poll the RPC.
+    """
+    loop = asyncio.get_running_loop()
+    board = ActiveOrderBoard(restaurant_id)
+    subscriptions = []
+    
+    try:
+        subscriptions.append(db.subscribe_to_orders(
+            restaurant_id,
+            lambda event: loop.call_soon_threadsafe(board.apply_order_event, event)
+        ))
+        subscriptions.append(db.subscribe_to_restaurant_items(
+            restaurant_id,
+            lambda event: loop.call_soon_threadsafe(board.apply_item_event, event)
+        ))
+        await board.seed(db)
+    except Exception as e:
+        logger.warning("Realtime unavailable, falling back to polling", restaurant_id=restaurant_id, error=str(e))
+        for subscription_id in subscriptions:
+            db.unsubscribe(subscription_id)
+        return None, []
+    
+    return board, subscriptions
@@ -0,0 +1,373 @@
+"""In-process deduplication of re-sent orders for Otter KDS v6.
+
+The Chrome extension resends every order it can see on each scrape. This
+module remembers what was last written for each order so unchanged
+resubmissions never reach the database and real changes are written as a
+field-level diff.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Tuple, Callable
+import structlog
+
+logger = structlog.get_logger()
+
+# Order columns the extension may change on an existing order
+MUTABLE_ORDER_FIELDS = (
+    "customer_name",
+    "customer_phone",
+    "order_type",
+    "total_amount",
+    "notes",
+    "metadata",
+)
+
+# Columns filled in by the server, ignored when hashing a submission
+SERVER_FIELDS = {"ordered_at", "status", "priority", "items"}
+
+OrderKey = Tuple[str, str, str]
+
+# Fills in item rows before they are written, e.g. MenuIndex.enrich_items
+Enricher = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+
+def order_key(order: Dict[str, Any]) -> OrderKey:
+    """Natural key of an order: (restaurant_id, platform, order_number)."""
+    return (
+        str(order["restaurant_id"]),
+        order.get("platform") or "otter",
+        order["order_number"],
+    )
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def content_hash(order: Dict[str, Any], items: List[Dict[str, Any]]) -> str:
+    """Stable hash of the client-supplied content of an order."""
+    payload = {k: v for k, v in order.items() if k not in SERVER_FIELDS}
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_canonical(payload).encode())
+    digest.update(_canonical(items).encode())
+    return digest.hexdigest()
+
+
+def diff_order(
+    old_order: Dict[str, Any],
+    old_items: List[Dict[str, Any]],
+    new_order: Dict[str, Any],
+    new_items: List[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], int]:
+    """Compute the changes between two submissions of the same order.
+    
+    Returns:
+        Tuple of (changed order fields, items to add, number of items that
+        disappeared). Removed items are only counted; a ticket the kitchen may
+        already be working on is never deleted by a scrape.
+    """
+    changes = {
+        field: new_order.get(field)
+        for field in MUTABLE_ORDER_FIELDS
+        if new_order.get(field) != old_order.get(field)
+    }
+    
+    remaining = Counter(_canonical(item) for item in old_items)
+    added = []
+    for item in new_items:
+        fingerprint = _canonical(item)
+        if remaining[fingerprint]:
+            remaining[fingerprint] -= 1
+        else:
+            added.append(item)
+    
+    return changes, added, sum(remaining.values())
+
+
+def _item_identity(item: Dict[str, Any]) -> str:
+    """What a client resend says about an item, comparable with a stored row."""
+    return _canonical([
+        item.get("item_name"),
+        item.get("quantity") or 1,
+        item.get("modifiers") or {},
+        item.get("special_instructions"),
+    ])
+
+
+def diff_stored_items(
+    stored_items: List[Dict[str, Any]],
+    new_items: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Compare a submission's items with the rows stored for the order.
+    
+    Used when no earlier submission is cached. Stored rows carry server and
+    enriched columns, so items are matched on name, quantity, modifiers and
+    special instructions only.
+    
+    Returns:
+        Tuple of (items to add, number of stored items not re-sent)
+    """
+    remaining = Counter(_item_identity(item) for item in stored_items)
+    added = []
+    for item in new_items:
+        identity = _item_identity(item)
+        if remaining[identity]:
+            remaining[identity] -= 1
+        else:
+            added.append(item)
+    return added, sum(remaining.values())
+
+
+@dataclass
+class DedupEntry:
+    """Last written state of one order."""
+    content_hash: str
+    order_id: str
+    order_row: Dict[str, Any]
+    items: List[Dict[str, Any]]
+    order: Optional[Dict[str, Any]]  # Full order response, if known
+    expires_at: float
+
+
+class OrderDedupCache:
+    """Bounded LRU cache of recently written orders with a TTL."""
+    
+    def __init__(self, max_size: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        """Initialize the cache.
+        
+        Args:
+            max_size: Max orders remembered (defaults to env var
+                ORDER_DEDUP_MAX_SIZE or 10000)
+            ttl_seconds: How long an entry is trusted (defaults to env var
+                ORDER_DEDUP_TTL_SECONDS or 6 hours)
+        """
+        self.max_size = max_size or int(os.getenv("ORDER_DEDUP_MAX_SIZE", "10000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("ORDER_DEDUP_TTL_SECONDS", "21600"))
+        self._entries: "OrderedDict[OrderKey, DedupEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: OrderKey) -> Optional[DedupEntry]:
+        """Get a live entry and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+    
+    def put(
+        self,
+        key: OrderKey,
+        content_hash: str,
+        order_id: str,
+        order_row: Dict[str, Any],
+        items: List[Dict[str, Any]],
+        order: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Remember the state just written for an order."""
+        self._entries[key] = DedupEntry(
+            content_hash=content_hash,
+            order_id=str(order_id),
+            order_row=order_row,
+            items=items,
+            order=order,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def discard(self, key: OrderKey) -> None:
+        """Forget an order."""
+        self._entries.pop(key, None)
+
+
+class OrderDeduplicator:
+    """Write-through dedup layer in front of SupabaseManager order creation."""
+    
+    def __init__(self, cache: Optional[OrderDedupCache] = None):
+        self.cache = cache if cache is not None else OrderDedupCache()
+    
+    async def create_order(
+        self,
+        db,
+        order_row: Dict[str, Any],
+        items: List[Dict[str, Any]],
+        enrich: Optional[Enricher] = None
+    ) -> Tuple[Dict[str, Any], str]:
+        """Create an order, skipping or diffing re-sent submissions.
+        
+        Args:
+            db: SupabaseManager instance
+            order_row: Order row as built for the database
+            items: Item rows for the order
+            enrich: Fills in item rows before they are written; resends are
+                compared on the rows as received, so a menu change never
+                makes an unchanged order look new
+            
+        Returns:
+            Tuple of (full order with items, outcome) where outcome is
+            "created", "unchanged", "updated" or "existing"
+        """
+        key = order_key(order_row)
+        new_hash = content_hash(order_row, items)
+        entry = self.cache.get(key)
+        
+        if entry is not None and entry.content_hash == new_hash and entry.order is not None:
+            self.cache.hits += 1
+            return entry.order, "unchanged"
+        
+        self.cache.misses += 1
+        if entry is not None and entry.content_hash != new_hash:
+            changes, added, removed = diff_order(entry.order_row, entry.items, order_row, items)
+            order = await self._apply_diff(db, entry.order_id, changes, added, removed, enrich)
+            outcome = "updated"
+        else:
+            order = await db.create_order_with_items(order_row, enrich(items) if enrich else items)
+            outcome = "created" if order.pop("created", True) else "existing"
+            if outcome == "existing":
+                # Nothing cached, e.g. after a restart: the resend may carry
+                # changes the insert skipped, so diff it against the stored order
+                changes = {
+                    field: order_row.get(field)
+                    for field in MUTABLE_ORDER_FIELDS
+                    if order_row.get(field) != order.get(field)
+                }
+                added, removed = diff_stored_items(order.get("items") or [], items)
+                if changes or added:
+                    order = await self._apply_diff(db, str(order["id"]), changes, added, removed, enrich)
+                    outcome = "updated"
+        
+        self.cache.put(key, new_hash, order["id"], order_row, items, order)
+        return order, outcome
+    
+    async def upsert_orders(
+        self,
+        db,
+        restaurant_id: str,
+        rows: List[Dict[str, Any]],
+        enrich: Optional[Enricher] = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Upsert a batch of orders, skipping unchanged resubmissions.
+        
+        Changed orders get their new items in one extra bulk insert, so the
+        statement count stays constant. Existing orders missing from the
+        cache cost one more query, for their stored items.
+        
+        Args:
+            db: SupabaseManager instance
+            restaurant_id: Restaurant the orders belong to
+            rows: Order rows, each with its item rows under ``items``
+            enrich: Fills in item rows before they are written
+            
+        Returns:
+            Tuple of (upsert results, rows skipped as unchanged)
+        """
+        pending = []
+        unchanged = []
+        added_items = []
+        hashes = {}
+        seen = set()
+        
+        for row in rows:
+            key = order_key(row)
+            new_hash = content_hash(row, row["items"])
+            entry = self.cache.get(key)
+            if entry is not None and entry.content_hash == new_hash:
+                self.cache.hits += 1
+                unchanged.append(row)
+                continue
+            
+            self.cache.misses += 1
+            if entry is not None:
+                seen.add(key)
+                _, added, _ = diff_order(entry.order_row, entry.items, row, row["items"])
+                if enrich:
+                    added = enrich(added)
+                added_items.extend({**item, "order_id": entry.order_id} for item in added)
+            hashes[key] = new_hash
+            pending.append(row)
+        
+        upserted = []
+        if pending:
+            written_rows = pending
+            if enrich:
+                written_rows = [{**row, "items": enrich(row["items"])} for row in pending]
+            upserted = await db.upsert_orders_with_items(restaurant_id, written_rows)
+        
+        # Orders that already existed but were not cached only had their
+        # order fields updated; add the items their resend brought in
+        uncached = {
+            str(result["order_id"]): row
+            for row, result in self._match_results(pending, upserted)
+            if not result["inserted"] and order_key(row) not in seen
+        }
+        if uncached:
+            stored = await db.get_items_for_orders(list(uncached))
+            for order_id, row in uncached.items():
+                added, _ = diff_stored_items(stored.get(order_id, []), row["items"])
+                if enrich:
+                    added = enrich(added)
+                added_items.extend({**item, "order_id": order_id} for item in added)
+        if added_items:
+            await db.create_order_items(added_items)
+        
+        for row, result in self._match_results(pending, upserted):
+            key = order_key(row)
+            self.cache.put(key, hashes[key], result["order_id"], row, row["items"])
+        
+        return upserted, unchanged
+    
+    @staticmethod
+    def _match_results(rows: List[Dict[str, Any]], upserted: List[Dict[str, Any]]):
+        """Pair upserted order rows with the upsert results for them."""
+        results = {(result["order_number"], result["platform"]): result for result in upserted}
+        for row in rows:
+            result = results.get((row["order_number"], row["platform"]))
+            if result is not None:
+                yield row, result
+    
+    async def _apply_diff(
+        self,
+        db,
+        order_id: str,
+        changes: Dict[str, Any],
+        added: List[Dict[str, Any]],
+        removed: int,
+        enrich: Optional[Enricher] = None
+    ) -> Dict[str, Any]:
+        """Write only what changed since the last known submission."""
+        if enrich:
+            added = enrich(added)
+        
+        if changes:
+            await db.update_order(order_id, changes)
+        if added:
+            await db.create_order_items([
+                {**item, "order_id": order_id} for item in added
+            ])
+        if removed:
+            logger.warning(
+                "Re-sent order is missing items; keeping existing tickets",
+                order_id=order_id,
+                missing_items=removed
+            )
+        
+        logger.info(
+            "Order updated from resubmission",
+            order_id=order_id,
+            changed_fields=list(changes),
+            added_items=len(added)
+        )
+        return await db.get_order(order_id)
@@ -0,0 +1,243 @@
+"""Menu-backed enrichment of incoming order items for Otter KDS v6.
+
+The Chrome extension sends free-text item names, often without a category,
+station, protein or size. A MenuIndex maps normalized menu item names to
+what the synced menu knows about them, so each incoming item is enriched
+with one dict lookup; names without an exact match fall back to a fuzzy
+match that is memoized per index.
+
+The menu sync service runs in its own process and publishes each synced
+menu version to the ``menu_items`` table (see ``MenuWriter``). MenuIndexes
+keeps one index per restaurant built from that table and, when a newer
+``menu_version`` shows up, builds a new index in the background and swaps
+it in.
+"""
+
+import asyncio
+import difflib
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Iterable
+import structlog
+
+logger = structlog.get_logger()
+
+# Sizes recognized in item names and modifiers, as in the extension's itemMatcher
+SIZES = {"small", "medium", "large", "regular"}
+
+# Protein of a menu item by the words in its name, checked in order; from
+# the extension's categoryManager
+PROTEIN_RULES = (
+    ("Pork Belly", ("pork belly",)),
+    ("Grilled Chicken", ("grilled", "chicken")),
+    ("Crispy Chicken", ("crispy", "chicken")),
+    ("Steak", ("steak",)),
+    ("Salmon", ("salmon",)),
+    ("Shrimp", ("shrimp",)),
+    ("Crispy Fish", ("fish",)),
+    ("Tofu", ("tofu",)),
+    ("Cauliflower Nugget", ("cauliflower",)),
+)
+
+# Order item columns the menu can fill in when the extension left them out
+ENRICHED_FIELDS = ("category", "station", "protein_type")
+
+_PARENTHESIZED = re.compile(r"\(([^)]*)\)")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase words of an item name, without parenthesized modifiers."""
+    return " ".join(_NON_WORD.sub(" ", _PARENTHESIZED.sub(" ", name.lower())).split())
+
+
+def extract_size(name: str, modifiers: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Size given in an item name's parentheses or as a modifier value."""
+    for group in _PARENTHESIZED.findall(name):
+        for part in group.split(","):
+            if part.strip().lower() in SIZES:
+                return part.strip().title()
+    for value in (modifiers or {}).values():
+        if isinstance(value, str) and value.strip().lower() in SIZES:
+            return value.strip().title()
+    return None
+
+
+def protein_for(name: str) -> Optional[str]:
+    """Protein of a menu item, from the words in its name."""
+    lowered = name.lower()
+    for protein, words in PROTEIN_RULES:
+        if all(word in lowered for word in words):
+            return protein
+    return None
+
+
+@dataclass(frozen=True)
+class MenuMatch:
+    """What the menu says about one item."""
+    item_id: str
+    name: str
+    category: Optional[str]
+    station: Optional[str]
+    protein_type: Optional[str]
+
+
+class MenuIndex:
+    """Immutable lookup of one restaurant's menu by normalized item name."""
+    
+    # Similarity a fuzzy match needs (difflib ratio)
+    FUZZY_CUTOFF = 0.85
+    
+    def __init__(self, restaurant_id: str, version: int, matches: Dict[str, MenuMatch],
+                 max_memo: int = 4096):
+        self.restaurant_id = restaurant_id
+        self.version = version
+        self._exact = matches
+        # Menu names by word, to narrow fuzzy candidates
+        self._by_word: Dict[str, List[str]] = {}
+        for key in matches:
+            for word in set(key.split()):
+                self._by_word.setdefault(word, []).append(key)
+        self._memo: Dict[str, Optional[MenuMatch]] = {}
+        self._max_memo = max_memo
+    
+    def __len__(self) -> int:
+        return len(self._exact)
+    
+    @classmethod
+    def build(cls, restaurant_id: str, version: int, items: Iterable[Dict[str, Any]],
+              stations: Iterable[Dict[str, Any]] = ()) -> "MenuIndex":
+        """
+        Index menu item rows.
+        
+        Args:
+            restaurant_id: Restaurant of the menu
+            version: Menu version the rows belong to
+            items: Rows with ``otter_item_id``, ``name`` and ``category``
+            stations: Station rows; a station takes the menu categories
+                listed under ``settings.categories``
+        """
+        station_by_category = {}
+        for station in stations:
+            if station.get("active", True) is False:
+                continue
+            for category in (station.get("settings") or {}).get("categories", []):
+                station_by_category.setdefault(category.strip().lower(), station["name"])
+        
+        matches = {}
+        for item in items:
+            key = normalize_name(item["name"])
+            if not key or key in matches:
+                continue
+            category = item.get("category")
+            matches[key] = MenuMatch(
+                item_id=item["otter_item_id"],
+                name=item["name"],
+                category=category,
+                station=station_by_category.get((category or "").lower()),
+                protein_type=protein_for(item["name"])
+            )
+        return cls(restaurant_id, version, matches)
+    
+    def lookup(self, name: str) -> Optional[MenuMatch]:
+        """Menu item for an order item name, exact first, then fuzzy."""
+        key = normalize_name(name)
+        match = self._exact.get(key)
+        if match is not None or not key:
+            return match
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        
+        candidates = {other for word in key.split() for other in self._by_word.get(word, ())}
+        close = difflib.get_close_matches(key, candidates, n=1, cutoff=self.FUZZY_CUTOFF) if candidates else []
+        match = self._exact[close[0]] if close else None
+        if len(self._memo) >= self._max_memo:
+            self._memo.clear()
+        self._memo[key] = match
+        return match
+    
+    def enrich(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fill in an order item row's missing fields from the menu.
+        
+        Returns:
+            A new row if anything was filled in, else the row itself;
+            values sent by the extension are never overwritten
+        """
+        name = item.get("item_name") or ""
+        fills = {}
+        match = self.lookup(name)
+        if match is not None:
+            for field in ENRICHED_FIELDS:
+                value = getattr(match, field)
+                if value and not item.get(field):
+                    fills[field] = value
+        if not item.get("size"):
+            size = extract_size(name, item.get("modifiers"))
+            if size:
+                fills["size"] = size
+        return {**item, **fills} if fills else item
+    
+    def enrich_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enrich every item row of an order."""
+        return [self.enrich(item) for item in items]
+
+
+class MenuIndexes:
+    """Latest MenuIndex per restaurant, rebuilt when a new menu version lands."""
+    
+    def __init__(self, check_seconds: Optional[float] = None):
+        """Initialize the registry.
+        
+        Args:
+            check_seconds: How often a restaurant's menu version is checked
+                (defaults to env var MENU_INDEX_CHECK_SECONDS or 30)
+        """
+        self.check_seconds = check_seconds or float(os.getenv("MENU_INDEX_CHECK_SECONDS", "30"))
+        self._indexes: Dict[str, MenuIndex] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._refreshes: Dict[str, asyncio.Task] = {}
+    
+    async def get(self, db, restaurant_id: str) -> Optional[MenuIndex]:
+        """
+        The restaurant's current index, None until its first build lands.
+        
+        Never waits on the database: every ``check_seconds`` a check for a
+        new menu version is started in the background, so ingest runs
+        unenriched until a restaurant's first index is built.
+        """
+        checked_at = self._checked_at.get(restaurant_id)
+        if checked_at is None or time.monotonic() - checked_at >= self.check_seconds:
+            if restaurant_id not in self._refreshes:
+                self._checked_at[restaurant_id] = time.monotonic()
+                task = asyncio.create_task(self.refresh(db, restaurant_id))
+                self._refreshes[restaurant_id] = task
+                task.add_done_callback(lambda _: self._refreshes.pop(restaurant_id, None))
+        return self._indexes.get(restaurant_id)
+    
+    async def refresh(self, db, restaurant_id: str) -> Optional[MenuIndex]:
+        """Rebuild the restaurant's index if a newer menu version was written."""
+        try:
+            version = await db.get_menu_version(restaurant_id)
+            current = self._indexes.get(restaurant_id)
+            if current is not None and version <= current.version:
+                return current
+            
+            items, stations = [], []
+            if version:
+                items, stations = await asyncio.gather(
+                    db.get_menu_items(restaurant_id),
+                    db.get_stations(restaurant_id)
+                )
+            index = await asyncio.to_thread(MenuIndex.build, restaurant_id, version, items, stations)
+            # Readers see either the old or the new index, never a partial one
+            self._indexes[restaurant_id] = index
+            logger.info("Menu index built", restaurant_id=restaurant_id, version=version, items=len(index))
+            return index
+        except Exception as e:
+            logger.warning("Menu index refresh failed", restaurant_id=restaurant_id, error=str(e))
+            return self._indexes.get(restaurant_id)
@@ -1,20 +1,304 @@
-"""Retry utility for handling transient failures."""
+"""Retry utility for handling transient failures.
+
+Besides plain exponential backoff, ``retry`` can spread retries with full
+jitter, retry only errors classified as transient, wait out a
+``Retry-After``, fail fast while a dependency's circuit breaker is open,
+and draw retries from a shared budget so an outage is not multiplied by
+every caller retrying at once.
+"""
 
 import asyncio
 import functools
 import logging
-from typing import TypeVar, Callable, Any, Union
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import TypeVar, Callable, Any, Union, Optional, Dict
+
+import httpx
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# HTTP statuses worth retrying: timeouts, rate limits and server errors
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait from a ``Retry-After`` header.
+    
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+    
+    Returns:
+        Non-negative delay, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_from(exc: BaseException) -> Optional[float]:
+    """The ``Retry-After`` delay of an error carrying an HTTP response, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+    return retry_after_seconds(headers.get("Retry-After"))
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    Whether an error is likely to go away on retry.
+    
+    Network errors, timeouts and retryable HTTP statuses are transient;
+    anything else (bad requests, auth failures, bugs) is not.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (httpx.TransportError, ConnectionError, TimeoutError, asyncio.TimeoutError))
+
+
+def full_jitter(delay: float) -> float:
+    """A random wait between 0 and ``delay``, so callers don't retry in lockstep."""
+    return random.uniform(0, delay)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+    
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.1f}s")
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency until it recovers.
+    
+    Closed: calls go through and consecutive transient failures are
+    counted. Open (after ``failure_threshold`` of them): calls fail with
+    CircuitOpenError for ``reset_timeout`` seconds. Half-open: up to
+    ``half_open_max_calls`` probe calls go through; a success closes the
+    circuit, a failure opens it again.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state; an open circuit past its timeout reads as half-open."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+    
+    def before_call(self) -> None:
+        """Let a call through or raise CircuitOpenError."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN:
+                remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                self._state = self.HALF_OPEN
+                self._probes = 0
+            if self._probes >= self.half_open_max_calls:
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self._probes += 1
+    
+    def release_probe(self) -> None:
+        """Free the slot of a probe that ended without an outcome, e.g. was cancelled."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+    
+    def record_success(self) -> None:
+        """The dependency answered; close the circuit."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state = self.CLOSED
+            self._failures = 0
+    
+    def record_failure(self) -> None:
+        """Count a transient failure, opening the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"Circuit '{self.name}' opened after {self._failures} failures, "
+                        f"pausing calls for {self.reset_timeout:.0f}s"
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """Caps retries at a fraction of recent calls, shared by all callers.
+    
+    Within a sliding ``window``, retries are allowed while they stay under
+    ``ratio`` times the first attempts made, plus ``min_retries`` so a
+    quiet process can still retry.
+    """
+    
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._calls: deque = deque()
+        self._retries: deque = deque()
+        self._lock = threading.Lock()
+    
+    def _prune(self, now: float) -> None:
+        for times in (self._calls, self._retries):
+            while times and now - times[0] > self.window:
+                times.popleft()
+    
+    def record_call(self) -> None:
+        """Count a first attempt."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            self._calls.append(now)
+    
+    def try_retry(self) -> bool:
+        """Take one retry from the budget; False if it is spent."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._calls):
+                return False
+            self._retries.append(now)
+            return True
+
+
+# Shared by every retrying call in the process
+retry_budget = RetryBudget()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """
+    The process-wide circuit breaker of a dependency.
+    
+    Args:
+        name: Dependency name, e.g. "supabase" or "otter"
+        **kwargs: CircuitBreaker settings, used when it is first created
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+        return breaker
+
+
+class _RetryPolicy:
+    """Decides, per failed attempt, whether and how long to wait."""
+    
+    def __init__(self, name: str, attempts: int, backoff: float, jitter: bool,
+                 max_delay: Optional[float], retry_if: Optional[Callable[[BaseException], bool]],
+                 breaker: Optional[CircuitBreaker], budget: Optional[RetryBudget]):
+        self.name = name
+        self.attempts = attempts
+        self.backoff = backoff
+        self.jitter = jitter
+        self.max_delay = max_delay
+        self.retry_if = retry_if
+        self.breaker = breaker
+        self.budget = budget
+    
+    def before_attempt(self, attempt: int) -> None:
+        if self.breaker is not None:
+            self.breaker.before_call()
+        if attempt == 0 and self.budget is not None:
+            self.budget.record_call()
+    
+    def on_success(self) -> None:
+        if self.breaker is not None:
+            self.breaker.record_success()
+    
+    def on_abort(self) -> None:
+        # Cancelled or raised something the caller doesn't retry on: no
+        # verdict on the dependency, but a half-open probe slot must not leak
+        if self.breaker is not None:
+            self.breaker.release_probe()
+    
+    def on_failure(self, exc: BaseException, attempt: int, current_delay: float) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up."""
+        retryable = self.retry_if is None or self.retry_if(exc)
+        if self.breaker is not None:
+            # A non-transient error still means the dependency answered
+            if retryable:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+        
+        if not retryable:
+            return None
+        if attempt >= self.attempts - 1:
+            logger.error(f"All {self.attempts} attempts failed for {self.name}: {exc}")
+            return None
+        if self.breaker is not None and self.breaker.state == CircuitBreaker.OPEN:
+            return None
+        if self.budget is not None and not self.budget.try_retry():
+            logger.warning(f"Retry budget exhausted, not retrying {self.name}: {exc}")
+            return None
+        
+        wait = full_jitter(current_delay) if self.jitter else current_delay
+        if self.max_delay is not None:
+            wait = min(wait, self.max_delay)
+        retry_after = retry_after_from(exc)
+        if retry_after is not None:
+            wait = max(wait, retry_after)
+        
+        logger.warning(
+            f"Attempt {attempt + 1}/{self.attempts} failed for {self.name}: {exc}. "
+            f"Retrying in {wait:.1f}s..."
+        )
+        return wait
+
 
 def retry(
     attempts: int = 3,
     delay: float = 1.0,
     backoff: float = 2.0,
-    exceptions: tuple = (Exception,)
+    exceptions: tuple = (Exception,),
+    jitter: bool = False,
+    max_delay: Optional[float] = None,
+    retry_if: Optional[Callable[[BaseException], bool]] = None,
+    breaker: Union[str, CircuitBreaker, None] = None,
+    budget: Optional[RetryBudget] = None
 ) -> Callable[[Callable[..., T]], Callable[..., T]]:
     """
     Retry decorator for functions that may fail transiently.
@@ -24,61 +308,66 @@ def retry(
         delay: Initial delay between attempts in seconds
         backoff: Multiplier for delay after each attempt
         exceptions: Tuple of exceptions to catch and retry
-        
+        jitter: Wait a random time up to the delay (full jitter)
+        max_delay: Cap on the backoff delay; a longer Retry-After is still honored
+        retry_if: Classifier of caught exceptions, e.g. ``is_transient``;
+            others are raised at once. All caught exceptions are retried if None.
+        breaker: Circuit breaker, or the dependency name of a shared one
+        budget: Retry budget to draw retries from, e.g. ``retry_budget``
+    
     Returns:
         Decorated function
     """
+    if isinstance(breaker, str):
+        breaker = get_circuit_breaker(breaker)
+    
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        policy = _RetryPolicy(
+            func.__name__, attempts, backoff, jitter, max_delay, retry_if, breaker, budget
+        )
+        
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs) -> T:
             current_delay = delay
-            last_exception = None
             
             for attempt in range(attempts):
+                policy.before_attempt(attempt)
                 try:
-                    return await func(*args, **kwargs)
+                    result = await func(*args, **kwargs)
                 except exceptions as e:
-                    last_exception = e
-                    if attempt < attempts - 1:
-                        logger.warning(
-                            f"Attempt {attempt + 1}/{attempts} failed for {func.__name__}: {e}. "
-                            f"Retrying in {current_delay:.1f}s..."
-                        )
-                        await asyncio.sleep(current_delay)
-                        current_delay *= backoff
-                    else:
-                        logger.error(
-                            f"All {attempts} attempts failed for {func.__name__}: {e}"
-                        )
-            
-            if last_exception:
-                raise last_exception
+                    wait = policy.on_failure(e, attempt, current_delay)
+                    if wait is None:
+                        raise
+                    await asyncio.sleep(wait)
+                    current_delay *= backoff
+                except BaseException:
+                    policy.on_abort()
+                    raise
+                else:
+                    policy.on_success()
+                    return result
         
         @functools.wraps(func)
         def sync_wrapper(*args, **kwargs) -> T:
             current_delay = delay
-            last_exception = None
             
             for attempt in range(attempts):
+                policy.before_attempt(attempt)
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except exceptions as e:
-                    last_exception = e
-                    if attempt < attempts - 1:
-                        logger.warning(
-                            f"Attempt {attempt + 1}/{attempts} failed for {func.__name__}: {e}. "
-                            f"Retrying in {current_delay:.1f}s..."
-                        )
-                        import time
-                        time.sleep(current_delay)
-                        current_delay *= backoff
-                    else:
-                        logger.error(
-                            f"All {attempts} attempts failed for {func.__name__}: {e}"
-                        )
-            
-            if last_exception:
-                raise last_exception
+                    wait = policy.on_failure(e, attempt, current_delay)
+                    if wait is None:
+                        raise
+                    # Only used for blocking code; async callers never get here
+                    time.sleep(wait)
+                    current_delay *= backoff
+                except BaseException:
+                    policy.on_abort()
+                    raise
+                else:
+                    policy.on_success()
+                    return result
         
         # Return appropriate wrapper based on function type
         if asyncio.iscoroutinefunction(func):
@@ -86,4 +375,4 @@ def retry(
         else:
             return sync_wrapper
     
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,75 @@
+-- Single round-trip order ingestion for Otter KDS v6
+-- Inserts an order and all of its items in one transaction
+
+-- Item classification columns sent by the Chrome extension
+ALTER TABLE order_items ADD COLUMN IF NOT EXISTS category TEXT;
+ALTER TABLE order_items ADD COLUMN IF NOT EXISTS subcategory TEXT;
+ALTER TABLE order_items ADD COLUMN IF NOT EXISTS protein_type TEXT;
+ALTER TABLE order_items ADD COLUMN IF NOT EXISTS sauce TEXT;
+ALTER TABLE order_items ADD COLUMN IF NOT EXISTS size TEXT;
+
+-- Function to create an order together with its items
+CREATE OR REPLACE FUNCTION create_order_with_items(
+  p_order JSONB,
+  p_items JSONB DEFAULT '[]'
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_order orders;
+  v_items JSONB;
+BEGIN
+  INSERT INTO orders (
+    restaurant_id, order_number, customer_name, customer_phone, order_type,
+    platform, status, priority, ordered_at, total_amount, notes, metadata
+  )
+  SELECT
+    r.restaurant_id,
+    r.order_number,
+    r.customer_name,
+    r.customer_phone,
+    COALESCE(r.order_type, 'dine-in'),
+    COALESCE(r.platform, 'otter'),
+    COALESCE(r.status, 'pending'),
+    COALESCE(r.priority, 0),
+    COALESCE(r.ordered_at, NOW()),
+    r.total_amount,
+    r.notes,
+    COALESCE(r.metadata, '{}')
+  FROM jsonb_populate_record(NULL::orders, p_order) r
+  RETURNING * INTO v_order;
+
+  WITH inserted AS (
+    INSERT INTO order_items (
+      order_id, item_name, quantity, price, modifiers, special_instructions,
+      status, station, category, subcategory, protein_type, sauce, size
+    )
+    SELECT
+      v_order.id,
+      i.item_name,
+      COALESCE(i.quantity, 1),
+      i.price,
+      COALESCE(i.modifiers, '{}'),
+      i.special_instructions,
+      COALESCE(i.status, 'pending'),
+      i.station,
+      i.category,
+      i.subcategory,
+      i.protein_type,
+      i.sauce,
+      i.size
+    FROM jsonb_populate_recordset(NULL::order_items, p_items) i
+    RETURNING *
+  )
+  SELECT COALESCE(jsonb_agg(to_jsonb(inserted) ORDER BY inserted.created_at), '[]')
+  INTO v_items
+  FROM inserted;
+
+  RETURN to_jsonb(v_order) || jsonb_build_object('items', v_items);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Grant execute permissions
+GRANT EXECUTE ON FUNCTION create_order_with_items(JSONB, JSONB) TO authenticated;
+
+-- Comments
+COMMENT ON FUNCTION create_order_with_items IS 'Create an order and its items in a single transaction, returning the full order';
@@ -0,0 +1,149 @@
+-- Bulk, idempotent order ingestion for Otter KDS v6
+-- Lets the Chrome extension push a backlog of scraped orders in one call
+
+-- An order is identified by its platform order number within a restaurant.
+-- Orders ingested before this key existed may lack a platform or have been
+-- inserted twice, so those are cleaned up first.
+
+-- A NULL platform would never conflict in the unique key
+UPDATE orders SET platform = 'otter' WHERE platform IS NULL;
+ALTER TABLE orders ALTER COLUMN platform SET DEFAULT 'otter';
+ALTER TABLE orders ALTER COLUMN platform SET NOT NULL;
+
+-- Keep the earliest row of each duplicated order. A duplicate is usually a
+-- re-send of the same ticket, so only items the kept row lacks (by name,
+-- modifiers and quantity) are moved onto it, each from the earliest
+-- duplicate that has it; the rest are deleted with their order
+CREATE TEMP TABLE duplicate_orders AS
+SELECT id, keep_id, position
+FROM (
+  SELECT
+    id,
+    first_value(id) OVER w AS keep_id,
+    row_number() OVER w AS position
+  FROM orders
+  WINDOW w AS (
+    PARTITION BY restaurant_id, order_number, platform
+    ORDER BY created_at, ordered_at, id
+  )
+) ranked
+WHERE id <> keep_id;
+
+WITH missing_items AS (
+  SELECT
+    oi.id,
+    d.keep_id,
+    d.position,
+    min(d.position) OVER (
+      PARTITION BY d.keep_id, oi.item_name, oi.modifiers, oi.quantity
+    ) AS first_position
+  FROM order_items oi
+  JOIN duplicate_orders d ON d.id = oi.order_id
+  WHERE NOT EXISTS (
+    SELECT 1 FROM order_items kept
+    WHERE kept.order_id = d.keep_id
+      AND kept.item_name = oi.item_name
+      AND kept.modifiers IS NOT DISTINCT FROM oi.modifiers
+      AND kept.quantity = oi.quantity
+  )
+)
+UPDATE order_items oi
+SET order_id = m.keep_id
+FROM missing_items m
+WHERE oi.id = m.id AND m.position = m.first_position;
+
+-- Remaining items of the duplicates go with them (ON DELETE CASCADE)
+DELETE FROM orders o
+USING duplicate_orders d
+WHERE o.id = d.id;
+
+DROP TABLE duplicate_orders;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_natural_key
+  ON orders(restaurant_id, order_number, platform);
+
+-- Function to upsert many orders and insert items for the new ones
+CREATE OR REPLACE FUNCTION upsert_orders_with_items(
+  p_restaurant_id UUID,
+  p_orders JSONB
+)
+RETURNS TABLE (
+  order_id UUID,
+  order_number TEXT,
+  platform TEXT,
+  inserted BOOLEAN
+) AS $$
+#variable_conflict use_column
+BEGIN
+  RETURN QUERY
+  WITH incoming AS (
+    SELECT
+      r.order_number,
+      COALESCE(r.platform, 'otter') AS platform,
+      r.customer_name,
+      r.customer_phone,
+      COALESCE(r.order_type, 'dine-in') AS order_type,
+      COALESCE(r.status, 'pending') AS status,
+      COALESCE(r.priority, 0) AS priority,
+      COALESCE(r.ordered_at, NOW()) AS ordered_at,
+      r.total_amount,
+      r.notes,
+      COALESCE(r.metadata, '{}') AS metadata,
+      COALESCE(e.value -> 'items', '[]') AS items
+    FROM jsonb_array_elements(p_orders) e
+    CROSS JOIN LATERAL jsonb_populate_record(NULL::orders, e.value) r
+  ),
+  upserted AS (
+    INSERT INTO orders AS o (
+      restaurant_id, order_number, customer_name, customer_phone, order_type,
+      platform, status, priority, ordered_at, total_amount, notes, metadata
+    )
+    SELECT
+      p_restaurant_id, i.order_number, i.customer_name, i.customer_phone,
+      i.order_type, i.platform, i.status, i.priority, i.ordered_at,
+      i.total_amount, i.notes, i.metadata
+    FROM incoming i
+    ON CONFLICT (restaurant_id, order_number, platform) DO UPDATE SET
+      customer_name = COALESCE(EXCLUDED.customer_name, o.customer_name),
+      customer_phone = COALESCE(EXCLUDED.customer_phone, o.customer_phone),
+      total_amount = COALESCE(EXCLUDED.total_amount, o.total_amount),
+      notes = COALESCE(EXCLUDED.notes, o.notes),
+      metadata = o.metadata || EXCLUDED.metadata
+    RETURNING o.id, o.order_number, o.platform, (o.xmax = 0) AS inserted
+  ),
+  new_items AS (
+    INSERT INTO order_items (
+      order_id, item_name, quantity, price, modifiers, special_instructions,
+      status, station, category, subcategory, protein_type, sauce, size
+    )
+    SELECT
+      u.id,
+      it.item_name,
+      COALESCE(it.quantity, 1),
+      it.price,
+      COALESCE(it.modifiers, '{}'),
+      it.special_instructions,
+      COALESCE(it.status, 'pending'),
+      it.station,
+      it.category,
+      it.subcategory,
+      it.protein_type,
+      it.sauce,
+      it.size
+    FROM upserted u
+    JOIN incoming i
+      ON i.order_number = u.order_number AND i.platform = u.platform
+    CROSS JOIN LATERAL jsonb_populate_recordset(NULL::order_items, i.items) it
+    WHERE u.inserted
+    RETURNING 1
+  )
+  SELECT u.id, u.order_number, u.platform, u.inserted
+  FROM upserted u;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Grant execute permissions
+GRANT EXECUTE ON FUNCTION upsert_orders_with_items(UUID, JSONB) TO authenticated;
+
+-- Comments
+COMMENT ON FUNCTION upsert_orders_with_items IS 'Idempotently upsert a batch of orders by (restaurant_id, order_number, platform), inserting items for new orders only';
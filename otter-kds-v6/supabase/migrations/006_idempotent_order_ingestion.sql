@@ -0,0 +1,81 @@
+-- Idempotent single-order ingestion for Otter KDS v6
+-- Re-sent orders return the existing row instead of failing on the natural key
+
+CREATE OR REPLACE FUNCTION create_order_with_items(
+  p_order JSONB,
+  p_items JSONB DEFAULT '[]'
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_order orders;
+  v_items JSONB;
+BEGIN
+  INSERT INTO orders (
+    restaurant_id, order_number, customer_name, customer_phone, order_type,
+    platform, status, priority, ordered_at, total_amount, notes, metadata
+  )
+  SELECT
+    r.restaurant_id,
+    r.order_number,
+    r.customer_name,
+    r.customer_phone,
+    COALESCE(r.order_type, 'dine-in'),
+    COALESCE(r.platform, 'otter'),
+    COALESCE(r.status, 'pending'),
+    COALESCE(r.priority, 0),
+    COALESCE(r.ordered_at, NOW()),
+    r.total_amount,
+    r.notes,
+    COALESCE(r.metadata, '{}')
+  FROM jsonb_populate_record(NULL::orders, p_order) r
+  ON CONFLICT (restaurant_id, order_number, platform) DO NOTHING
+  RETURNING * INTO v_order;
+
+  -- Order already exists: return it with its current items
+  IF NOT FOUND THEN
+    SELECT o.* INTO v_order
+    FROM orders o
+    WHERE o.restaurant_id = (p_order ->> 'restaurant_id')::UUID
+      AND o.order_number = p_order ->> 'order_number'
+      AND o.platform = COALESCE(p_order ->> 'platform', 'otter');
+
+    SELECT COALESCE(jsonb_agg(to_jsonb(oi) ORDER BY oi.created_at), '[]')
+    INTO v_items
+    FROM order_items oi
+    WHERE oi.order_id = v_order.id;
+
+    RETURN to_jsonb(v_order) || jsonb_build_object('items', v_items, 'created', false);
+  END IF;
+
+  WITH inserted AS (
+    INSERT INTO order_items (
+      order_id, item_name, quantity, price, modifiers, special_instructions,
+      status, station, category, subcategory, protein_type, sauce, size
+    )
+    SELECT
+      v_order.id,
+      i.item_name,
+      COALESCE(i.quantity, 1),
+      i.price,
+      COALESCE(i.modifiers, '{}'),
+      i.special_instructions,
+      COALESCE(i.status, 'pending'),
+      i.station,
+      i.category,
+      i.subcategory,
+      i.protein_type,
+      i.sauce,
+      i.size
+    FROM jsonb_populate_recordset(NULL::order_items, p_items) i
+    RETURNING *
+  )
+  SELECT COALESCE(jsonb_agg(to_jsonb(inserted) ORDER BY inserted.created_at), '[]')
+  INTO v_items
+  FROM inserted;
+
+  RETURN to_jsonb(v_order) || jsonb_build_object('items', v_items, 'created', true);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Comments
+COMMENT ON FUNCTION create_order_with_items IS 'Create an order and its items in a single transaction, or return the existing order if it was already ingested';
@@ -0,0 +1,41 @@
+-- Station-level realtime routing for Otter KDS v6
+-- Realtime filters only see a row's own columns, so order_items carries its
+-- restaurant_id to let the API subscribe to one restaurant's item changes
+
+ALTER TABLE order_items
+  ADD COLUMN IF NOT EXISTS restaurant_id UUID REFERENCES restaurants(id) ON DELETE CASCADE;
+
+-- Backfill existing items from their orders
+UPDATE order_items oi
+SET restaurant_id = o.restaurant_id
+FROM orders o
+WHERE o.id = oi.order_id
+  AND oi.restaurant_id IS NULL;
+
+-- Function to copy the restaurant from the parent order
+CREATE OR REPLACE FUNCTION set_order_item_restaurant()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.restaurant_id IS NULL THEN
+    SELECT restaurant_id INTO NEW.restaurant_id
+    FROM orders
+    WHERE id = NEW.order_id;
+  END IF;
+  
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger to fill restaurant_id on every new item
+DROP TRIGGER IF EXISTS set_order_item_restaurant ON order_items;
+CREATE TRIGGER set_order_item_restaurant
+  BEFORE INSERT ON order_items
+  FOR EACH ROW
+  EXECUTE FUNCTION set_order_item_restaurant();
+
+-- Open tickets per restaurant and station
+CREATE INDEX IF NOT EXISTS idx_order_items_restaurant_station
+  ON order_items(restaurant_id, station) WHERE status != 'completed';
+
+-- Comments
+COMMENT ON COLUMN order_items.restaurant_id IS 'Copied from the parent order so realtime can filter item changes by restaurant';
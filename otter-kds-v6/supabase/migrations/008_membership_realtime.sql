@@ -0,0 +1,25 @@
+-- Membership realtime for Otter KDS v6
+-- The API caches user memberships and restaurant names and drops them when
+-- these tables change
+
+-- Publish membership and restaurant changes
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_publication_tables
+    WHERE pubname = 'supabase_realtime' AND tablename = 'restaurant_users'
+  ) THEN
+    ALTER PUBLICATION supabase_realtime ADD TABLE restaurant_users;
+  END IF;
+  
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_publication_tables
+    WHERE pubname = 'supabase_realtime' AND tablename = 'restaurants'
+  ) THEN
+    ALTER PUBLICATION supabase_realtime ADD TABLE restaurants;
+  END IF;
+END;
+$$;
+
+-- Deleted memberships must carry user_id so the right user is invalidated
+ALTER TABLE restaurant_users REPLICA IDENTITY FULL;
@@ -0,0 +1,77 @@
+-- Refresh token revocation for Otter KDS v6
+-- Refreshes are served from signed tokens; only revoked token and family ids
+-- are stored, and every API worker keeps a copy in memory
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+  token_id TEXT PRIMARY KEY,
+  expires_at TIMESTAMPTZ NOT NULL,
+  revoked_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_recorded_at ON revoked_tokens(recorded_at);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+
+-- Only reachable through the functions below
+ALTER TABLE revoked_tokens ENABLE ROW LEVEL SECURITY;
+
+-- Function to record a batch of revocations, pruning expired ones
+CREATE OR REPLACE FUNCTION revoke_tokens(p_tokens JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  v_count INTEGER;
+BEGIN
+  DELETE FROM revoked_tokens WHERE expires_at < NOW();
+  
+  INSERT INTO revoked_tokens (token_id, expires_at, revoked_at)
+  SELECT t.token_id, to_timestamp(t.expires_at), to_timestamp(t.revoked_at)
+  FROM jsonb_to_recordset(p_tokens) AS t(token_id TEXT, expires_at DOUBLE PRECISION, revoked_at DOUBLE PRECISION)
+  WHERE to_timestamp(t.expires_at) > NOW()
+  ON CONFLICT (token_id) DO NOTHING;
+  
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Function to read unexpired revocations as epoch seconds
+CREATE OR REPLACE FUNCTION get_revoked_tokens(p_since DOUBLE PRECISION DEFAULT NULL)
+RETURNS TABLE (
+  token_id TEXT,
+  expires_at DOUBLE PRECISION,
+  revoked_at DOUBLE PRECISION,
+  recorded_at DOUBLE PRECISION
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    rt.token_id,
+    EXTRACT(EPOCH FROM rt.expires_at)::DOUBLE PRECISION,
+    EXTRACT(EPOCH FROM rt.revoked_at)::DOUBLE PRECISION,
+    EXTRACT(EPOCH FROM rt.recorded_at)::DOUBLE PRECISION
+  FROM revoked_tokens rt
+  WHERE rt.expires_at > NOW()
+    AND (p_since IS NULL OR rt.recorded_at >= to_timestamp(p_since));
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Only the API's service role may read or record revocations
+REVOKE EXECUTE ON FUNCTION revoke_tokens(JSONB) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION get_revoked_tokens(DOUBLE PRECISION) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION revoke_tokens(JSONB) TO service_role;
+GRANT EXECUTE ON FUNCTION get_revoked_tokens(DOUBLE PRECISION) TO service_role;
+
+-- Other workers learn about revocations through realtime
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_publication_tables
+    WHERE pubname = 'supabase_realtime' AND tablename = 'revoked_tokens'
+  ) THEN
+    ALTER PUBLICATION supabase_realtime ADD TABLE revoked_tokens;
+  END IF;
+END;
+$$;
+
+-- Comments
+COMMENT ON TABLE revoked_tokens IS 'Revoked refresh token (jti) and token family (fam) ids, kept until the tokens expire';
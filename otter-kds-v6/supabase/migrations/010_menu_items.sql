@@ -0,0 +1,97 @@
+-- Synced Otter menus for Otter KDS v6
+-- The menu sync service writes each menu diff here in chunks; removed items
+-- are soft-deleted so past orders can still be matched to them
+
+CREATE TABLE IF NOT EXISTS menu_items (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  restaurant_id UUID REFERENCES restaurants(id) ON DELETE CASCADE NOT NULL,
+  otter_item_id TEXT NOT NULL,
+  name TEXT NOT NULL,
+  description TEXT,
+  price DECIMAL(10,2) NOT NULL,
+  category TEXT NOT NULL,
+  available BOOLEAN DEFAULT true,
+  options JSONB DEFAULT '[]',
+  images JSONB DEFAULT '[]',
+  tags JSONB DEFAULT '[]',
+  menu_version INTEGER NOT NULL,
+  deleted_at TIMESTAMPTZ,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+  UNIQUE (restaurant_id, otter_item_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_menu_items_active
+  ON menu_items(restaurant_id, category) WHERE deleted_at IS NULL;
+
+ALTER TABLE menu_items ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their restaurant's menu" ON menu_items;
+CREATE POLICY "Users can view their restaurant's menu" ON menu_items
+  FOR SELECT USING (
+    restaurant_id = ANY(get_user_restaurant_ids())
+  );
+
+-- Which menu version a sync run writes and how many item changes it has
+ALTER TABLE menu_sync_status ADD COLUMN IF NOT EXISTS menu_version INTEGER;
+ALTER TABLE menu_sync_status ADD COLUMN IF NOT EXISTS items_total INTEGER;
+
+-- Function to apply one chunk of a menu diff: one upsert and one soft-delete.
+-- Rows already written by a newer menu version are left alone, so replaying
+-- a chunk after a crash is harmless.
+CREATE OR REPLACE FUNCTION apply_menu_changes(
+  p_restaurant_id UUID,
+  p_version INTEGER,
+  p_items JSONB,
+  p_deleted TEXT[]
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_upserted INTEGER;
+  v_deleted INTEGER;
+BEGIN
+  INSERT INTO menu_items AS m (
+    restaurant_id, otter_item_id, name, description, price, category,
+    available, options, images, tags, menu_version
+  )
+  SELECT
+    p_restaurant_id, i.otter_item_id, i.name, i.description, i.price, i.category,
+    COALESCE(i.available, true), COALESCE(i.options, '[]'), COALESCE(i.images, '[]'),
+    COALESCE(i.tags, '[]'), p_version
+  FROM jsonb_to_recordset(p_items) AS i(
+    otter_item_id TEXT, name TEXT, description TEXT, price DECIMAL(10,2), category TEXT,
+    available BOOLEAN, options JSONB, images JSONB, tags JSONB
+  )
+  ON CONFLICT (restaurant_id, otter_item_id) DO UPDATE SET
+    name = EXCLUDED.name,
+    description = EXCLUDED.description,
+    price = EXCLUDED.price,
+    category = EXCLUDED.category,
+    available = EXCLUDED.available,
+    options = EXCLUDED.options,
+    images = EXCLUDED.images,
+    tags = EXCLUDED.tags,
+    menu_version = EXCLUDED.menu_version,
+    deleted_at = NULL,
+    updated_at = NOW()
+  WHERE m.menu_version <= EXCLUDED.menu_version;
+  GET DIAGNOSTICS v_upserted = ROW_COUNT;
+
+  UPDATE menu_items
+  SET deleted_at = NOW(), menu_version = p_version, updated_at = NOW()
+  WHERE restaurant_id = p_restaurant_id
+    AND otter_item_id = ANY(p_deleted)
+    AND deleted_at IS NULL
+    AND menu_version <= p_version;
+  GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+  RETURN jsonb_build_object('upserted', v_upserted, 'deleted', v_deleted);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Grant execute permissions
+GRANT EXECUTE ON FUNCTION apply_menu_changes(UUID, INTEGER, JSONB, TEXT[]) TO authenticated;
+
+-- Comments
+COMMENT ON TABLE menu_items IS 'Otter menu items per restaurant, kept in sync by the menu sync service';
+COMMENT ON FUNCTION apply_menu_changes IS 'Upsert and soft-delete one chunk of menu items for a menu version; idempotent';
@@ -0,0 +1,9 @@
+-- Menu version lookups for Otter KDS v6
+-- The API checks each restaurant's newest menu version to know when to
+-- rebuild its in-memory menu index; this keeps that check to one index probe
+
+CREATE INDEX IF NOT EXISTS idx_menu_items_version
+  ON menu_items(restaurant_id, menu_version DESC);
+
+-- Comments
+COMMENT ON COLUMN stations.settings IS 'Station options; "categories" lists the menu categories whose items are routed to this station';
@@ -0,0 +1,86 @@
+-- Server-side item batches for Otter KDS v6
+-- The API groups open order items by batch key (size, category, base name,
+-- modifiers, rice substitution) and records each item's batch here, so batch
+-- ids survive restarts and every worker agrees on them
+
+ALTER TABLE batches ADD COLUMN IF NOT EXISTS item_key TEXT;
+ALTER TABLE batches ADD COLUMN IF NOT EXISTS item_name TEXT;
+ALTER TABLE batches ADD COLUMN IF NOT EXISTS size TEXT;
+ALTER TABLE batches ADD COLUMN IF NOT EXISTS category TEXT;
+
+ALTER TABLE order_items
+  ADD COLUMN IF NOT EXISTS batch_id UUID REFERENCES batches(id) ON DELETE SET NULL;
+
+-- At most one open batch per item key
+CREATE UNIQUE INDEX IF NOT EXISTS idx_batches_active_key
+  ON batches(restaurant_id, item_key) WHERE status = 'active' AND item_key IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_order_items_batch
+  ON order_items(batch_id) WHERE batch_id IS NOT NULL;
+
+-- Function to record batch membership of many items in one round trip.
+-- Open batches are found or created by key, items are pointed at them, and
+-- batches reported empty are completed unless open items still use them.
+-- Replaying a call is harmless.
+CREATE OR REPLACE FUNCTION assign_item_batches(
+  p_restaurant_id UUID,
+  p_items JSONB,
+  p_emptied_keys TEXT[]
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_batch_ids JSONB;
+BEGIN
+  INSERT INTO batches (restaurant_id, batch_number, status, item_key, item_name, size, category)
+  SELECT DISTINCT ON (i.item_key)
+    p_restaurant_id, i.name, 'active', i.item_key, i.name, i.size, i.category
+  FROM jsonb_to_recordset(p_items) AS i(
+    item_id UUID, item_key TEXT, name TEXT, size TEXT, category TEXT
+  )
+  ORDER BY i.item_key
+  ON CONFLICT (restaurant_id, item_key) WHERE status = 'active' AND item_key IS NOT NULL
+  DO NOTHING;
+
+  UPDATE order_items oi
+  SET batch_id = b.id
+  FROM jsonb_to_recordset(p_items) AS i(item_id UUID, item_key TEXT)
+  JOIN batches b
+    ON b.restaurant_id = p_restaurant_id
+    AND b.item_key = i.item_key
+    AND b.status = 'active'
+  WHERE oi.id = i.item_id
+    AND oi.restaurant_id = p_restaurant_id
+    AND oi.batch_id IS DISTINCT FROM b.id;
+
+  UPDATE batches b
+  SET status = 'completed', completed_at = NOW()
+  WHERE b.restaurant_id = p_restaurant_id
+    AND b.status = 'active'
+    AND b.item_key = ANY(p_emptied_keys)
+    AND NOT EXISTS (
+      SELECT 1
+      FROM order_items oi
+      JOIN orders o ON o.id = oi.order_id
+      WHERE oi.batch_id = b.id
+        AND oi.status != 'completed'
+        AND o.status IN ('pending', 'in_progress')
+    );
+
+  SELECT COALESCE(jsonb_object_agg(b.item_key, b.id), '{}')
+  INTO v_batch_ids
+  FROM batches b
+  WHERE b.restaurant_id = p_restaurant_id
+    AND b.status = 'active'
+    AND b.item_key IN (SELECT i.item_key FROM jsonb_to_recordset(p_items) AS i(item_key TEXT));
+
+  RETURN v_batch_ids;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Grant execute permissions
+GRANT EXECUTE ON FUNCTION assign_item_batches(UUID, JSONB, TEXT[]) TO authenticated;
+
+-- Comments
+COMMENT ON COLUMN batches.item_key IS 'Hashed batch key of the items grouped in this batch; NULL for batches created by hand';
+COMMENT ON COLUMN order_items.batch_id IS 'Batch the item was last grouped into';
+COMMENT ON FUNCTION assign_item_batches IS 'Find or create open batches by item key, point items at them and complete emptied batches; idempotent';
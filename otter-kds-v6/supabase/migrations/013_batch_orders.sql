@@ -0,0 +1,54 @@
+-- Manual order batches for Otter KDS v6
+-- POST /api/orders/batch links whole orders to a batch; the link and the
+-- batch are written in one transaction so a failed request leaves nothing behind
+
+ALTER TABLE batches ADD COLUMN IF NOT EXISTS notes TEXT;
+
+ALTER TABLE orders
+  ADD COLUMN IF NOT EXISTS batch_id UUID REFERENCES batches(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_orders_batch
+  ON orders(batch_id) WHERE batch_id IS NOT NULL;
+
+-- Function to create a batch and link orders to it atomically.
+-- Raises, creating nothing, if any order is missing or belongs to another
+-- restaurant.
+CREATE OR REPLACE FUNCTION create_batch_with_orders(
+  p_restaurant_id UUID,
+  p_batch_number TEXT,
+  p_order_ids UUID[],
+  p_notes TEXT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+  v_batch batches%ROWTYPE;
+  v_expected INTEGER;
+  v_linked INTEGER;
+BEGIN
+  SELECT COUNT(DISTINCT id) INTO v_expected FROM unnest(p_order_ids) AS id;
+
+  INSERT INTO batches (restaurant_id, batch_number, status, notes)
+  VALUES (p_restaurant_id, p_batch_number, 'active', p_notes)
+  RETURNING * INTO v_batch;
+
+  UPDATE orders
+  SET batch_id = v_batch.id
+  WHERE id = ANY(p_order_ids)
+    AND restaurant_id = p_restaurant_id;
+  GET DIAGNOSTICS v_linked = ROW_COUNT;
+
+  IF v_linked <> v_expected THEN
+    RAISE EXCEPTION 'Only % of % orders belong to restaurant %', v_linked, v_expected, p_restaurant_id
+      USING ERRCODE = 'foreign_key_violation';
+  END IF;
+
+  RETURN to_jsonb(v_batch);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Grant execute permissions
+GRANT EXECUTE ON FUNCTION create_batch_with_orders(UUID, TEXT, UUID[], TEXT) TO authenticated;
+
+-- Comments
+COMMENT ON COLUMN orders.batch_id IS 'Batch the order was grouped into by hand';
+COMMENT ON FUNCTION create_batch_with_orders IS 'Create a batch and link orders to it in one transaction; fails if any order is not the restaurant''s';
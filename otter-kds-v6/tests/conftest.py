@@ -80,10 +80,11 @@ def mock_otter_client():
 
 
 @pytest.fixture
-def mock_settings(monkeypatch):
+def mock_settings(monkeypatch, tmp_path):
     """Mock settings for testing."""
     monkeypatch.setattr("src.config.settings.settings.otter_username", "test@example.com")
     monkeypatch.setattr("src.config.settings.settings.otter_password", "test_password")
     monkeypatch.setattr("src.config.settings.settings.sync_interval_minutes", 30)
     monkeypatch.setattr("src.config.settings.settings.sync_enabled", True)
-    monkeypatch.setattr("src.config.settings.settings.dry_run_mode", False)
\ No newline at end of file
+    monkeypatch.setattr("src.config.settings.settings.dry_run_mode", False)
+    monkeypatch.setattr("src.config.settings.settings.snapshot_path", str(tmp_path / "menus.db"))
\ No newline at end of file
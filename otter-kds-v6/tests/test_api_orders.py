@@ -0,0 +1,268 @@
+"""Tests for the order API endpoints."""
+
+import asyncio
+import os
+
+import jwt
+import pytest
+from unittest.mock import AsyncMock, Mock
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.orders.dedup import OrderDeduplicator
+from src.orders.menu_index import MenuIndexes
+
+RESTAURANT_ID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def auth_headers():
+    """Authorization header with a valid JWT for the test restaurant."""
+    token = jwt.encode(
+        {
+            "user_id": "user_123",
+            "email": "chef@example.com",
+            "restaurant_id": RESTAURANT_ID,
+            "restaurant_name": "Test Kitchen",
+            "role": "chef",
+            "permissions": {}
+        },
+        os.getenv("JWT_SECRET", "your-secret-key"),
+        algorithm="HS256"
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def mock_db():
+    """Mock database manager attached to the app."""
+    db = Mock()
+    app.state.db = db
+    app.state.order_dedup = OrderDeduplicator()
+    app.state.menu_indexes = MenuIndexes()
+    yield db
+    app.state.db = None
+
+
+@pytest.fixture
+def client():
+    """Test client that does not run the app lifespan."""
+    return TestClient(app)
+
+
+def _order(order_number: str, items: int = 1) -> dict:
+    return {
+        "order_number": order_number,
+        "items": [{"item_name": f"Bowl {i}"} for i in range(items)]
+    }
+
+
+class TestBulkOrders:
+    """Tests for POST /api/orders/bulk."""
+    
+    def test_bulk_push_single_database_call(self, client, mock_db, auth_headers):
+        """Test all orders are upserted with one database call."""
+        mock_db.upsert_orders_with_items = AsyncMock(return_value=[
+            {"order_id": "10000000-0000-0000-0000-000000000001",
+             "order_number": "A1", "platform": "otter", "inserted": True},
+            {"order_id": "10000000-0000-0000-0000-000000000002",
+             "order_number": "A2", "platform": "otter", "inserted": False},
+        ])
+        # A2 existed before this process saw it; its stored items are compared once
+        mock_db.get_items_for_orders = AsyncMock(return_value={
+            "10000000-0000-0000-0000-000000000002": [{"item_name": "Bowl 0", "quantity": 1}]
+        })
+        mock_db.create_order_items = AsyncMock()
+        
+        response = client.post(
+            "/api/orders/bulk",
+            json=[_order("A1", items=3), _order("A2")],
+            headers=auth_headers
+        )
+        
+        assert response.status_code == 200
+        body = response.json()
+        assert body["created"] == 1
+        assert body["updated"] == 1
+        assert [r["status"] for r in body["results"]] == ["created", "updated"]
+        
+        mock_db.upsert_orders_with_items.assert_awaited_once()
+        restaurant_id, rows = mock_db.upsert_orders_with_items.await_args.args
+        assert restaurant_id == RESTAURANT_ID
+        assert len(rows) == 2
+        assert len(rows[0]["items"]) == 3
+        mock_db.create_order_items.assert_not_awaited()
+    
+    def test_bulk_push_enriches_items_from_menu(self, client, mock_db, auth_headers):
+        """Test items are written with the category and station of their menu item."""
+        mock_db.get_menu_version = AsyncMock(return_value=1)
+        mock_db.get_menu_items = AsyncMock(return_value=[
+            {"otter_item_id": "item_1", "name": "Bowl 0", "category": "Bowls"}
+        ])
+        mock_db.get_stations = AsyncMock(return_value=[
+            {"name": "Grill", "settings": {"categories": ["Bowls"]}}
+        ])
+        asyncio.run(app.state.menu_indexes.refresh(mock_db, RESTAURANT_ID))
+        mock_db.upsert_orders_with_items = AsyncMock(return_value=[])
+        
+        client.post("/api/orders/bulk", json=[_order("A1")], headers=auth_headers)
+        
+        _, rows = mock_db.upsert_orders_with_items.await_args.args
+        assert rows[0]["items"][0]["category"] == "Bowls"
+        assert rows[0]["items"][0]["station"] == "Grill"
+    
+    def test_bulk_push_collapses_repeated_orders(self, client, mock_db, auth_headers):
+        """Test an order repeated in one payload is only written once."""
+        mock_db.upsert_orders_with_items = AsyncMock(return_value=[
+            {"order_id": "10000000-0000-0000-0000-000000000001",
+             "order_number": "A1", "platform": "otter", "inserted": True},
+        ])
+        
+        response = client.post(
+            "/api/orders/bulk",
+            json=[_order("A1"), _order("A1", items=2)],
+            headers=auth_headers
+        )
+        
+        body = response.json()
+        assert body["duplicates"] == 1
+        assert body["results"][-1]["status"] == "duplicate"
+        _, rows = mock_db.upsert_orders_with_items.await_args.args
+        assert len(rows) == 1
+        assert len(rows[0]["items"]) == 2
+    
+    def test_bulk_push_rejects_invalid_payload(self, client, mock_db, auth_headers):
+        """Test one invalid order rejects the whole payload before any write."""
+        mock_db.upsert_orders_with_items = AsyncMock()
+        
+        response = client.post(
+            "/api/orders/bulk",
+            json=[_order("A1"), {"order_number": "A2"}],
+            headers=auth_headers
+        )
+        
+        assert response.status_code == 422
+        mock_db.upsert_orders_with_items.assert_not_awaited()
+    
+    def test_bulk_push_skips_unchanged_resend(self, client, mock_db, auth_headers):
+        """Test re-sending the same backlog does not touch the database."""
+        mock_db.upsert_orders_with_items = AsyncMock(return_value=[
+            {"order_id": "10000000-0000-0000-0000-000000000001",
+             "order_number": "A1", "platform": "otter", "inserted": True},
+        ])
+        
+        client.post("/api/orders/bulk", json=[_order("A1")], headers=auth_headers)
+        response = client.post("/api/orders/bulk", json=[_order("A1")], headers=auth_headers)
+        
+        body = response.json()
+        assert body["unchanged"] == 1
+        assert body["results"][0]["status"] == "unchanged"
+        mock_db.upsert_orders_with_items.assert_awaited_once()
+
+
+class TestCreateOrder:
+    """Tests for POST /api/orders/."""
+    
+    def test_resend_served_from_dedup_cache(self, client, mock_db, auth_headers):
+        """Test an identical resubmission returns the cached order."""
+        mock_db.create_order_with_items = AsyncMock(return_value={
+            "id": "10000000-0000-0000-0000-000000000001",
+            "restaurant_id": RESTAURANT_ID,
+            "order_number": "A1",
+            "customer_name": None,
+            "customer_phone": None,
+            "order_type": "dine-in",
+            "platform": "otter",
+            "status": "pending",
+            "priority": 0,
+            "ordered_at": "2024-01-01T12:00:00",
+            "started_at": None,
+            "completed_at": None,
+            "prep_time_minutes": None,
+            "total_amount": None,
+            "notes": None,
+            "created_at": "2024-01-01T12:00:00",
+            "updated_at": "2024-01-01T12:00:00",
+            "metadata": {},
+            "items": [],
+            "created": True
+        })
+        
+        first = client.post("/api/orders/", json=_order("A1", items=0), headers=auth_headers)
+        second = client.post("/api/orders/", json=_order("A1", items=0), headers=auth_headers)
+        
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        mock_db.create_order_with_items.assert_awaited_once()
+
+
+class TestItemBatches:
+    """Tests for GET /api/orders/batches."""
+    
+    def test_open_items_grouped_into_batches(self, client, mock_db, auth_headers):
+        """Test matching open items of different orders are returned as one batch."""
+        mock_db.get_open_order_items = AsyncMock(return_value=[
+            {"id": "10000000-0000-0000-0000-000000000001", "order_number": "A1", "items": [
+                {"id": "20000000-0000-0000-0000-000000000001", "item_name": "Thai Tea (Large)", "quantity": 2, "status": "pending"}
+            ]},
+            {"id": "10000000-0000-0000-0000-000000000002", "order_number": "A2", "items": [
+                {"id": "20000000-0000-0000-0000-000000000002", "item_name": "Thai Tea (Large)", "quantity": 1, "status": "in_progress"}
+            ]},
+        ])
+        
+        response = client.get("/api/orders/batches", headers=auth_headers)
+        
+        assert response.status_code == 200
+        batches = response.json()
+        assert len(batches) == 1
+        assert batches[0]["name"] == "Thai Tea"
+        assert batches[0]["size"] == "Large"
+        assert batches[0]["total_quantity"] == 3
+        assert [entry["order_number"] for entry in batches[0]["orders"]] == ["A1", "A2"]
+        mock_db.get_open_order_items.assert_awaited_once_with(RESTAURANT_ID)
+
+
+class TestCreateBatch:
+    """Tests for POST /api/orders/batch."""
+    
+    ORDER_IDS = [f"10000000-0000-0000-0000-00000000000{i}" for i in range(1, 4)]
+    
+    def test_orders_verified_and_linked_in_two_calls(self, client, mock_db, auth_headers):
+        """Test the orders are checked with one query and linked with one RPC."""
+        mock_db.get_orders_by_ids = AsyncMock(return_value={
+            "orders": [{"id": order_id, "restaurant_id": RESTAURANT_ID} for order_id in self.ORDER_IDS],
+            "missing": [],
+            "foreign": []
+        })
+        mock_db.create_batch_with_orders = AsyncMock(return_value={"id": "b1", "batch_number": "Rush"})
+        mock_db.get_order = AsyncMock()
+        
+        response = client.post("/api/orders/batch", json={
+            "order_ids": self.ORDER_IDS, "batch_name": "Rush", "notes": "table 4"
+        }, headers=auth_headers)
+        
+        assert response.status_code == 200
+        assert response.json()["data"] == {"batch_id": "b1", "batch_number": "Rush", "order_count": 3}
+        mock_db.get_orders_by_ids.assert_awaited_once_with(RESTAURANT_ID, self.ORDER_IDS)
+        mock_db.create_batch_with_orders.assert_awaited_once_with(
+            RESTAURANT_ID, "Rush", self.ORDER_IDS, notes="table 4"
+        )
+        mock_db.get_order.assert_not_awaited()
+    
+    def test_missing_and_foreign_orders_rejected(self, client, mock_db, auth_headers):
+        """Test missing orders give 404 and other restaurants' orders 403, creating nothing."""
+        mock_db.create_batch_with_orders = AsyncMock()
+        mock_db.get_orders_by_ids = AsyncMock(return_value={
+            "orders": [], "missing": [self.ORDER_IDS[0]], "foreign": [self.ORDER_IDS[1]]
+        })
+        
+        response = client.post("/api/orders/batch", json={"order_ids": self.ORDER_IDS}, headers=auth_headers)
+        assert response.status_code == 404
+        assert self.ORDER_IDS[0] in response.json()["detail"]
+        
+        mock_db.get_orders_by_ids.return_value = {
+            "orders": [], "missing": [], "foreign": [self.ORDER_IDS[1]]
+        }
+        response = client.post("/api/orders/batch", json={"order_ids": self.ORDER_IDS}, headers=auth_headers)
+        assert response.status_code == 403
+        mock_db.create_batch_with_orders.assert_not_awaited()
@@ -0,0 +1,157 @@
+"""Tests for the cached membership directory."""
+
+import asyncio
+
+import httpx
+import pytest
+from postgrest.utils import AsyncClient as PostgrestHTTPClient
+
+from src.auth.directory import MembershipDirectory
+from src.auth.manager import AuthManager
+from src.auth.models import LoginRequest, SwitchRestaurantRequest
+from src.database.supabase_manager import SupabaseManager
+
+USER_ID = "6f1c2a9e-0000-4000-8000-000000000001"
+KITCHEN_ID = "6f1c2a9e-0000-4000-8000-0000000000a1"
+CAFE_ID = "6f1c2a9e-0000-4000-8000-0000000000a2"
+
+
+def _user():
+    return {
+        "id": USER_ID,
+        "email": "chef@example.com",
+        "name": "Chef",
+        "restaurant_users": [
+            {
+                "restaurant_id": KITCHEN_ID,
+                "user_id": USER_ID,
+                "role": "chef",
+                "active": True,
+                "restaurants": {"id": KITCHEN_ID, "name": "Kitchen", "location": None}
+            },
+            {
+                "restaurant_id": CAFE_ID,
+                "user_id": USER_ID,
+                "role": "manager",
+                "active": True,
+                "restaurants": {"id": CAFE_ID, "name": "Cafe", "location": None}
+            }
+        ]
+    }
+
+
+@pytest.fixture
+def db():
+    """Manager whose PostgREST calls are counted and served from memory."""
+    requests = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/users"):
+            return httpx.Response(200, json=_user())
+        return httpx.Response(200, json=[{"id": KITCHEN_ID, "name": "Kitchen"}])
+    
+    manager = SupabaseManager("http://localhost:54321", "header.payload.signature")
+    manager.rest.session = PostgrestHTTPClient(
+        base_url="http://localhost:54321/rest/v1",
+        headers=dict(manager.rest.session.headers),
+        transport=httpx.MockTransport(handler)
+    )
+    manager.requests = requests
+    
+    async def sign_in(email, password):
+        return {"user": {"id": USER_ID}}
+    manager.sign_in = sign_in
+    return manager
+
+
+class TestMembershipDirectory:
+    """Tests for MembershipDirectory."""
+    
+    @pytest.mark.asyncio
+    async def test_login_then_switch_reads_memberships_once(self, db):
+        """Test a restaurant switch after login needs no database read."""
+        auth = AuthManager(db, MembershipDirectory())
+        
+        login = await auth.login(LoginRequest(email="chef@example.com", password="Secret123"))
+        switched = await auth.switch_restaurant(USER_ID, SwitchRestaurantRequest(restaurant_id=CAFE_ID))
+        
+        assert len(db.requests) == 1
+        assert str(login.active_restaurant.id) == KITCHEN_ID
+        assert switched.active_restaurant.name == "Cafe"
+        assert switched.active_restaurant.role == "manager"
+        assert len(switched.restaurants) == 2
+    
+    @pytest.mark.asyncio
+    async def test_token_uses_cached_restaurant_name(self, db):
+        """Test token generation takes the name from the directory."""
+        directory = MembershipDirectory()
+        await directory.get_user(db, USER_ID)
+        auth = AuthManager(db, directory)
+        
+        token = auth._generate_token(USER_ID, "chef@example.com", CAFE_ID, "manager")
+        session = auth.verify_token(token.access_token)
+        
+        assert session.active_restaurant_name == "Cafe"
+        assert len(db.requests) == 1
+    
+    @pytest.mark.asyncio
+    async def test_membership_event_invalidates_user(self, db):
+        """Test a restaurant_users change forces a fresh read."""
+        directory = MembershipDirectory()
+        await directory.get_user(db, USER_ID)
+        
+        directory.apply_membership_event({
+            "eventType": "DELETE",
+            "new": {},
+            "old": {"user_id": USER_ID, "restaurant_id": CAFE_ID}
+        })
+        await directory.get_user(db, USER_ID)
+        
+        assert len(db.requests) == 2
+    
+    @pytest.mark.asyncio
+    async def test_restaurant_event_drops_name_and_members(self, db):
+        """Test a restaurants change drops its name and users embedding it."""
+        directory = MembershipDirectory()
+        await directory.get_user(db, USER_ID)
+        assert directory.cached_restaurant_name(CAFE_ID) == "Cafe"
+        
+        directory.apply_restaurant_event({
+            "eventType": "UPDATE",
+            "new": {"id": CAFE_ID, "name": "Cafe 2"},
+            "old": {"id": CAFE_ID}
+        })
+        
+        assert directory.cached_restaurant_name(CAFE_ID) is None
+        assert directory.cached_restaurant_name(KITCHEN_ID) == "Kitchen"
+        await directory.get_user(db, USER_ID)
+        assert len(db.requests) == 2
+    
+    @pytest.mark.asyncio
+    async def test_invalidation_during_read_is_not_cached(self, db):
+        """Test a read racing an invalidation does not cache stale rows."""
+        directory = MembershipDirectory()
+        
+        read = asyncio.ensure_future(directory.get_user(db, USER_ID))
+        await asyncio.sleep(0)
+        directory.invalidate_user(USER_ID)
+        await read
+        await directory.get_user(db, USER_ID)
+        
+        assert len(db.requests) == 2
+    
+    @pytest.mark.asyncio
+    async def test_entries_expire_and_are_bounded(self, db, monkeypatch):
+        """Test entries expire after the TTL and the cache is size bounded."""
+        directory = MembershipDirectory(ttl_seconds=60, max_restaurants=1)
+        directory.put_restaurant_name(KITCHEN_ID, "Kitchen")
+        directory.put_restaurant_name(CAFE_ID, "Cafe")
+        assert directory.cached_restaurant_name(KITCHEN_ID) is None
+        
+        now = asyncio.get_running_loop().time()
+        monkeypatch.setattr("src.auth.directory.time.monotonic", lambda: now + 3600)
+        
+        assert directory.cached_restaurant_name(CAFE_ID) is None
+        assert await directory.get_restaurant_name(db, KITCHEN_ID) == "Kitchen"
+        assert db.requests[0].url.path == "/rest/v1/restaurants"
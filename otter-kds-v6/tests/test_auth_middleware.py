@@ -0,0 +1,109 @@
+"""Tests for the JWT authentication middleware."""
+
+import os
+import time
+
+import jwt
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.middleware.auth import AuthMiddleware, TokenCache, UserContext
+
+JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key")
+
+
+def _token(**claims) -> str:
+    payload = {
+        "user_id": "user_123",
+        "email": "chef@example.com",
+        "restaurant_id": "rest_123",
+        "restaurant_name": "Test Kitchen",
+        "role": "chef",
+        "permissions": {"orders": True}
+    }
+    payload.update(claims)
+    return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
+
+
+@pytest.fixture
+def middleware():
+    """Middleware instance with a fresh token cache."""
+    return AuthMiddleware(app=None, token_cache=TokenCache(max_size=10))
+
+
+class TestAuthMiddleware:
+    """Tests for AuthMiddleware token verification."""
+    
+    def test_verified_token_is_cached(self, middleware):
+        """Test a token is only decoded once."""
+        token = _token(exp=int(time.time()) + 60)
+        
+        with patch("src.api.middleware.auth.jwt.decode", wraps=jwt.decode) as decode:
+            first = middleware.authenticate(token)
+            second = middleware.authenticate(token)
+        
+        assert decode.call_count == 1
+        assert first is second
+        assert first.restaurant_id == "rest_123"
+    
+    def test_cached_token_expires_with_exp(self, middleware, monkeypatch):
+        """Test a cached token is dropped once its exp has passed."""
+        now = time.time()
+        token = _token(exp=int(now) + 60)
+        middleware.authenticate(token)
+        assert middleware.token_cache.get(token) is not None
+        
+        monkeypatch.setattr("src.api.middleware.auth.time.time", lambda: now + 120)
+        
+        assert middleware.token_cache.get(token) is None
+        assert len(middleware.token_cache) == 0
+    
+    def test_expired_token_rejected(self, middleware):
+        """Test an expired token is rejected rather than served from cache."""
+        token = _token(exp=int(time.time()) - 10)
+        
+        with pytest.raises(jwt.ExpiredSignatureError):
+            middleware.authenticate(token)
+    
+    def test_invalid_token_not_cached(self, middleware):
+        """Test a token with a bad signature is never cached."""
+        token = jwt.encode({"user_id": "x"}, "wrong-secret", algorithm="HS256")
+        
+        with pytest.raises(jwt.InvalidTokenError):
+            middleware.authenticate(token)
+        assert len(middleware.token_cache) == 0
+    
+    def test_cache_is_bounded(self):
+        """Test the least recently used token is evicted."""
+        cache = TokenCache(max_size=2)
+        user = UserContext.from_claims({"user_id": "u"})
+        for token in ("a", "b"):
+            cache.put(token, user, None)
+        cache.get("a")
+        cache.put("c", user, None)
+        
+        assert cache.get("a") is user
+        assert cache.get("b") is None
+        assert len(cache) == 2
+    
+    def test_user_context_is_immutable(self):
+        """Test the user context cannot be changed by a handler."""
+        user = UserContext.from_claims({"user_id": "u", "permissions": {"orders": True}})
+        
+        with pytest.raises(AttributeError):
+            user.role = "owner"
+        with pytest.raises(TypeError):
+            user.permissions["orders"] = False
+        assert not hasattr(user, "__dict__")
+    
+    def test_me_endpoint_uses_context(self):
+        """Test route handlers read the user from the context."""
+        client = TestClient(app)
+        response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {_token()}"})
+        
+        assert response.status_code == 200
+        body = response.json()
+        assert body["restaurant"] == {"id": "rest_123", "name": "Test Kitchen"}
+        assert body["permissions"] == {"orders": True}
@@ -0,0 +1,215 @@
+"""Tests for refresh token rotation and revocation."""
+
+import time
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.main import app
+from src.api.middleware.auth import AuthMiddleware, TokenCache
+from src.auth.manager import AuthManager
+from src.auth.tokens import RevocationList
+
+RESTAURANT_ID = "6f1c2a9e-0000-4000-8000-0000000000a1"
+
+
+class FakeRevocationStore:
+    """Stands in for the revoked_tokens RPCs."""
+    
+    def __init__(self):
+        self.rows = []
+    
+    async def revoke_tokens(self, tokens):
+        for token in tokens:
+            self.rows.append({**token, "recorded_at": time.time()})
+        return len(tokens)
+    
+    async def get_revoked_tokens(self, since=None):
+        return [row for row in self.rows if since is None or row["recorded_at"] >= since]
+
+
+class FakeDirectory:
+    """Stands in for the membership directory with one member."""
+    
+    def __init__(self):
+        self.memberships = [{
+            "restaurant_id": RESTAURANT_ID,
+            "role": "chef",
+            "active": True,
+            "restaurants": {"id": RESTAURANT_ID, "name": "Kitchen"}
+        }]
+    
+    async def get_user(self, db, user_id):
+        return {"id": str(user_id), "restaurant_users": self.memberships}
+    
+    def cached_restaurant_name(self, restaurant_id):
+        return None
+
+
+@pytest.fixture
+def auth():
+    """AuthManager without a database."""
+    return AuthManager(None, FakeDirectory(), RevocationList())
+
+
+def _login(auth: AuthManager):
+    return auth._generate_token(
+        user_id="user_123",
+        email="chef@example.com",
+        restaurant_id=RESTAURANT_ID,
+        role="chef",
+        permissions={"orders": True},
+        restaurant_name="Kitchen"
+    )
+
+
+class TestRefreshTokens:
+    """Tests for AuthManager.refresh."""
+    
+    @pytest.mark.asyncio
+    async def test_refresh_rotates_from_claims(self, auth):
+        """Test a refresh mints new tokens carrying the same context."""
+        first = _login(auth)
+        second, claims = await auth.refresh(first.refresh_token)
+        
+        assert claims["restaurant_name"] == "Kitchen"
+        assert second.refresh_token != first.refresh_token
+        access = jwt.decode(second.access_token, auth.jwt_secret, algorithms=["HS256"])
+        assert access["restaurant_id"] == RESTAURANT_ID
+        assert access["permissions"] == {"orders": True}
+        assert access["exp"] > time.time()
+        
+        old = jwt.decode(first.refresh_token, auth.jwt_secret, algorithms=["HS256"])
+        new = jwt.decode(second.refresh_token, auth.jwt_secret, algorithms=["HS256"])
+        assert new["fam"] == old["fam"]
+        assert auth.revocations.is_revoked(old["jti"])
+    
+    @pytest.mark.asyncio
+    async def test_replay_within_grace_is_allowed(self, auth):
+        """Test a client retrying a refresh is not logged out."""
+        first = _login(auth)
+        await auth.refresh(first.refresh_token)
+        
+        token, _ = await auth.refresh(first.refresh_token)
+        
+        assert token.access_token
+    
+    @pytest.mark.asyncio
+    async def test_reuse_after_grace_revokes_family(self, auth):
+        """Test a replayed rotated token revokes every token of its family."""
+        auth.refresh_reuse_grace = -1
+        first = _login(auth)
+        second, _ = await auth.refresh(first.refresh_token)
+        
+        with pytest.raises(ValueError):
+            await auth.refresh(first.refresh_token)
+        with pytest.raises(ValueError):
+            await auth.refresh(second.refresh_token)
+    
+    @pytest.mark.asyncio
+    async def test_logout_revokes_family(self, auth):
+        """Test revoking a refresh token stops its rotations too."""
+        first = _login(auth)
+        second, _ = await auth.refresh(first.refresh_token)
+        
+        auth.revoke_refresh_token(first.refresh_token)
+        
+        with pytest.raises(ValueError):
+            await auth.refresh(second.refresh_token)
+    
+    @pytest.mark.asyncio
+    async def test_token_types_are_not_interchangeable(self, auth):
+        """Test access and refresh tokens are only accepted where they belong."""
+        token = _login(auth)
+        middleware = AuthMiddleware(app=None, token_cache=TokenCache(max_size=10))
+        
+        with pytest.raises(ValueError):
+            await auth.refresh(token.access_token)
+        with pytest.raises(jwt.InvalidTokenError):
+            middleware.authenticate(token.refresh_token)
+        assert middleware.authenticate(token.access_token).role == "chef"
+    
+    @pytest.mark.asyncio
+    async def test_removed_member_cannot_refresh(self, auth):
+        """Test a user removed from the restaurant loses its whole token family."""
+        first = _login(auth)
+        second, _ = await auth.refresh(first.refresh_token)
+        
+        auth.directory.memberships[0]["active"] = False
+        with pytest.raises(ValueError):
+            await auth.refresh(second.refresh_token)
+        
+        auth.directory.memberships[0]["active"] = True
+        with pytest.raises(ValueError):
+            await auth.refresh(second.refresh_token)
+    
+    def test_refresh_endpoint(self, auth, monkeypatch):
+        """Test the endpoint rotates a refresh token sent in the body."""
+        monkeypatch.setattr(app.state, "auth_directory", auth.directory)
+        monkeypatch.setattr(app.state, "db", None, raising=False)
+        client = TestClient(app)
+        token = _login(auth)
+        
+        response = client.post("/api/auth/refresh", json={"refresh_token": token.refresh_token})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["restaurant_name"] == "Kitchen"
+        assert body["refresh_token"]
+        
+        response = client.post("/api/auth/refresh", json={"refresh_token": "not-a-token"})
+        assert response.status_code == 401
+
+
+class TestRevocationList:
+    """Tests for RevocationList syncing."""
+    
+    @pytest.mark.asyncio
+    async def test_revocations_are_shared_between_workers(self):
+        """Test a revocation written by one worker is read by another."""
+        store = FakeRevocationStore()
+        worker_a = RevocationList()
+        worker_b = RevocationList()
+        await worker_b.sync(store)
+        
+        worker_a.revoke("jti_1", time.time() + 60)
+        await worker_a.sync(store)
+        assert not worker_b.is_revoked("jti_1")
+        
+        await worker_b.sync(store)
+        assert worker_b.is_revoked("jti_1")
+        assert len(store.rows) == 1
+    
+    @pytest.mark.asyncio
+    async def test_polls_while_subscribed(self):
+        """Test revocations are read back even with a realtime subscription."""
+        store = FakeRevocationStore()
+        worker = RevocationList()
+        worker._subscription_id = "sub_1"
+        await worker.sync(store)
+        
+        await store.revoke_tokens([{"token_id": "fam_1", "expires_at": time.time() + 60, "revoked_at": time.time()}])
+        await worker.sync(store)
+        
+        assert worker.is_revoked("fam_1")
+    
+    def test_realtime_event_and_pruning(self, monkeypatch):
+        """Test realtime inserts are applied and expired ids are dropped."""
+        revocations = RevocationList()
+        now = time.time()
+        revocations.apply_event({
+            "eventType": "INSERT",
+            "new": {
+                "token_id": "fam_1",
+                "expires_at": "2999-01-01T00:00:00+00:00",
+                "revoked_at": "2026-01-01T00:00:00+00:00"
+            }
+        })
+        revocations.revoke("jti_2", now + 60)
+        assert revocations.is_revoked("fam_1")
+        
+        monkeypatch.setattr("src.auth.tokens.time.time", lambda: now + 120)
+        revocations.prune()
+        
+        assert revocations.is_revoked("fam_1")
+        assert not revocations.is_revoked("jti_2")
@@ -0,0 +1,197 @@
+"""Tests for server-side item batching."""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.orders.batching import BatchBoard, BatchBoards, compound_key, row_key
+
+RESTAURANT_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def _item(item_id: str, order_id: str, name: str = "Grilled Chicken Rice Bowl (Large)",
+          quantity: int = 1, **extra) -> dict:
+    return {"id": item_id, "order_id": order_id, "item_name": name, "category": "Rice Bowls",
+            "quantity": quantity, "status": "pending", **extra}
+
+
+def _db(orders=()) -> Mock:
+    db = Mock()
+    db.get_open_order_items = AsyncMock(return_value=list(orders))
+    db.assign_item_batches = AsyncMock(return_value={})
+    return db
+
+
+def _order(order_id: str, *items) -> dict:
+    return {"id": order_id, "order_number": order_id.upper(), "status": "pending", "items": list(items)}
+
+
+class TestBatchKeys:
+    """Tests for the batch key rules ported from the extension."""
+    
+    def test_size_and_modifiers(self):
+        """Test the size comes from the name and modifiers are order-independent."""
+        assert compound_key("Grilled Chicken Rice Bowl (Large)", category="Rice Bowls") == \
+            "large|rice bowls|grilled chicken rice bowl|large"
+        assert compound_key("Bowl (extra sauce, no onion)") == compound_key("Bowl (no onion, extra sauce)")
+        assert compound_key("Thai Tea") == "no-size|thai tea"
+    
+    def test_fried_rice_size_joins_name(self):
+        """Test a fried rice given as size becomes part of the base name."""
+        assert compound_key("Pork Belly", size="Garlic Fried Rice") == \
+            "garlic fried rice|pork belly"
+        assert compound_key("Fried Rice", size="Garlic Fried Rice") == \
+            "garlic fried rice|fried rice - garlic fried rice"
+    
+    def test_urban_bowl_rice_substitution(self):
+        """Test an urban bowl's rice substitution stands in for its size."""
+        plain = _item("i1", "a1", name="Crispy Fish Urban Bowl", size="Small")
+        brown = {**plain, "modifiers": {"riceSubstitution": "Brown Rice"}}
+        
+        assert row_key(plain) != row_key(brown)
+        assert row_key(brown) == row_key({**brown, "id": "i2", "size": "Large"})
+
+
+class TestBatchBoard:
+    """Tests for BatchBoard."""
+    
+    @pytest.mark.asyncio
+    async def test_seed_groups_matching_items(self):
+        """Test matching items of different orders form one batch, largest first."""
+        board = BatchBoard(RESTAURANT_ID)
+        await board.seed(_db([
+            _order("a1", _item("i1", "a1", quantity=2), _item("i2", "a1", name="Thai Tea")),
+            _order("a2", _item("i3", "a2")),
+        ]))
+        
+        batches = board.batches()
+        
+        assert [batch["total_quantity"] for batch in batches] == [3, 1]
+        assert batches[0]["orders"] == [
+            {"order_id": "a1", "order_number": "A1", "quantity": 2},
+            {"order_id": "a2", "order_number": "A2", "quantity": 1},
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_events_return_batch_deltas(self):
+        """Test item and order events emit an update or delete per changed batch."""
+        board = BatchBoard(RESTAURANT_ID)
+        await board.seed(_db([_order("a1", _item("i1", "a1"))]))
+        key = row_key(_item("i1", "a1"))
+        
+        deltas = board.apply_item_event({"eventType": "INSERT", "new": _item("i2", "a2", quantity=3)})
+        assert [(delta["action"], delta["batch"]["total_quantity"]) for delta in deltas] == [("update", 4)]
+        
+        deltas = board.apply_item_event({"new": {**_item("i1", "a1"), "status": "completed"}})
+        assert deltas[0]["batch"]["total_quantity"] == 3
+        
+        deltas = board.apply_order_event({"new": {"id": "a2", "status": "completed"}})
+        assert deltas == [{"type": "batch_update", "action": "delete", "key": key}]
+        assert len(board) == 0
+        
+        assert board.apply_item_event({"new": _item("i4", "a2")}) == []
+    
+    @pytest.mark.asyncio
+    async def test_changes_collected_for_persisting(self):
+        """Test new members are queued and emptied stored batches reported."""
+        board = BatchBoard(RESTAURANT_ID)
+        await board.seed(_db([_order("a1", _item("i1", "a1", batch_id="b1"))]))
+        key = row_key(_item("i1", "a1"))
+        assert not board.has_changes()
+        
+        board.apply_item_event({"new": _item("i2", "a2")})
+        board.apply_item_event({"new": _item("i3", "a2", name="Thai Tea")})
+        board.apply_item_event({"eventType": "DELETE", "old": {"id": "i3"}})
+        rows, emptied = board.take_changes()
+        
+        assert [(row["item_id"], row["item_key"]) for row in rows] == [("i2", key)]
+        assert emptied == []
+        
+        board.apply_order_event({"eventType": "DELETE", "old": {"id": "a1"}})
+        board.apply_order_event({"eventType": "DELETE", "old": {"id": "a2"}})
+        assert board.take_changes() == ([], [key])
+    
+    @pytest.mark.asyncio
+    async def test_events_during_seed_are_replayed(self):
+        """Test events received while seeding are applied after the seed."""
+        board = BatchBoard(RESTAURANT_ID)
+        
+        assert board.apply_item_event({"new": _item("i2", "a1")}) == []
+        await board.seed(_db([_order("a1", _item("i1", "a1"))]))
+        
+        assert board.batches()[0]["total_quantity"] == 2
+
+
+class TestBatchBoards:
+    """Tests for the per-restaurant batch board registry."""
+    
+    @pytest.mark.asyncio
+    async def test_subscribe_flush_and_unsubscribe(self):
+        """Test deltas reach subscribers and membership is written in one call."""
+        hub = Mock()
+        boards = BatchBoards(hub, flush_seconds=0.01)
+        db = _db([_order("a1", _item("i1", "a1"))])
+        key = row_key(_item("i1", "a1"))
+        db.assign_item_batches.return_value = {key: "b1"}
+        socket = object()
+        
+        snapshot = await boards.subscribe(db, RESTAURANT_ID, socket)
+        assert snapshot[0]["batch_id"] is None
+        on_item = hub.add_listener.call_args_list[1].args[2]
+        on_item({"new": _item("i2", "a2")})
+        await asyncio.sleep(0.05)
+        
+        db.assign_item_batches.assert_awaited_once()
+        assignments, emptied = db.assign_item_batches.await_args.args[1:]
+        assert sorted(row["item_id"] for row in assignments) == ["i1", "i2"]
+        assert emptied == []
+        sent = [call.args[2] for call in hub.send.call_args_list]
+        assert sent[-1]["batch"]["batch_id"] == "b1"
+        assert (await boards.get_batches(db, RESTAURANT_ID))[0]["batch_id"] == "b1"
+        
+        boards.unsubscribe(db, RESTAURANT_ID, socket)
+        assert hub.release.call_count == 2
+        hub.remove_listener.assert_any_call(RESTAURANT_ID, "items", on_item)
+    
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self):
+        """Test changes are kept and written again after a database error."""
+        hub = Mock()
+        boards = BatchBoards(hub, flush_seconds=0.01)
+        db = _db([_order("a1", _item("i1", "a1"))])
+        db.assign_item_batches.side_effect = [Exception("timeout"), {}]
+        
+        await boards.subscribe(db, RESTAURANT_ID, object())
+        await asyncio.sleep(0.05)
+        
+        assert db.assign_item_batches.await_count == 2
+        assert db.assign_item_batches.await_args.args[1][0]["item_id"] == "i1"
+    
+    @pytest.mark.asyncio
+    async def test_snapshot_only_until_realtime_is_live(self):
+        """Test a board is refused without live channels and started by a retry."""
+        hub = Mock()
+        hub.is_live = Mock(return_value=False)
+        boards = BatchBoards(hub, flush_seconds=0.01, retry_seconds=0.05)
+        db = _db([_order("a1", _item("i1", "a1"))])
+        first, second = object(), object()
+        
+        snapshot = await boards.subscribe(db, RESTAURANT_ID, first)
+        await boards.subscribe(db, RESTAURANT_ID, second)
+        
+        assert snapshot[0]["total_quantity"] == 1
+        assert not boards.is_live(RESTAURANT_ID)
+        assert hub.acquire.call_count == 2
+        assert hub.release.call_count == 2
+        assert hub.remove_listener.call_count == 2
+        
+        hub.is_live.return_value = True
+        await asyncio.sleep(0.08)
+        
+        assert boards.is_live(RESTAURANT_ID)
+        assert hub.acquire.call_count == 4
+        sockets, message = hub.send.call_args.args[1:]
+        assert sockets == {first, second}
+        assert message["type"] == "batch_snapshot" and message["live"] is True
+        assert message["batches"][0]["total_quantity"] == 1
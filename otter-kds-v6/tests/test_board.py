@@ -0,0 +1,156 @@
+"""Tests for the in-memory active order board."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.orders.board import ActiveOrderBoard, ActiveOrderBoards
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _order(order_id: str, minutes_ago: int, status: str = "pending", items=()) -> dict:
+    return {
+        "id": order_id,
+        "order_number": order_id.upper(),
+        "customer_name": "Sam",
+        "status": status,
+        "ordered_at": (NOW - timedelta(minutes=minutes_ago)).isoformat(),
+        "items": [{"id": item_id, "status": item_status} for item_id, item_status in items]
+    }
+
+
+def _db(orders) -> Mock:
+    db = Mock()
+    db.get_active_orders_with_items = AsyncMock(return_value=orders)
+    db.get_active_orders = AsyncMock(return_value=[])
+    return db
+
+
+class TestActiveOrderBoard:
+    """Tests for ActiveOrderBoard."""
+    
+    @pytest.mark.asyncio
+    async def test_seed_matches_rpc_rows(self):
+        """Test seeded rows carry counts and urgency, oldest first."""
+        board = ActiveOrderBoard("rest_123")
+        await board.seed(_db([
+            _order("a1", 5, items=[("i1", "pending"), ("i2", "completed")]),
+            _order("a2", 25),
+        ]))
+        
+        rows = board.rows(now=NOW)
+        
+        assert [row["order_id"] for row in rows] == ["a2", "a1"]
+        assert rows[0]["urgency_score"] == 2
+        assert rows[0]["elapsed_minutes"] == 25
+        assert (rows[1]["total_items"], rows[1]["completed_items"]) == (2, 1)
+    
+    @pytest.mark.asyncio
+    async def test_events_update_counts_and_membership(self):
+        """Test item and order events keep the board current."""
+        board = ActiveOrderBoard("rest_123")
+        await board.seed(_db([_order("a1", 5, items=[("i1", "pending")])]))
+        
+        board.apply_item_event({"new": {"id": "i1", "order_id": "a1", "status": "completed"}})
+        board.apply_item_event({"eventType": "INSERT", "new": {"id": "i2", "order_id": "a1", "status": "pending"}})
+        row = board.rows(now=NOW)[0]
+        assert (row["total_items"], row["completed_items"]) == (2, 1)
+        
+        board.apply_item_event({"eventType": "DELETE", "old": {"id": "i1"}})
+        row = board.rows(now=NOW)[0]
+        assert (row["total_items"], row["completed_items"]) == (1, 0)
+        
+        board.apply_order_event({"new": {"id": "a1", "status": "completed"}})
+        assert board.rows(now=NOW) == []
+    
+    @pytest.mark.asyncio
+    async def test_items_before_their_order(self):
+        """Test items that arrive before their order event are kept."""
+        board = ActiveOrderBoard("rest_123")
+        await board.seed(_db([]))
+        
+        board.apply_item_event({"new": {"id": "i1", "order_id": "a9", "status": "pending"}})
+        board.apply_order_event({"eventType": "INSERT", "new": _order("a9", 1)})
+        
+        assert board.rows(now=NOW)[0]["total_items"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_events_during_seed_are_replayed(self):
+        """Test events received while seeding are applied after the seed."""
+        board = ActiveOrderBoard("rest_123")
+        db = _db([_order("a1", 5, items=[("i1", "pending")])])
+        
+        board.apply_item_event({"new": {"id": "i1", "order_id": "a1", "status": "completed"}})
+        await board.seed(db)
+        
+        assert board.rows(now=NOW)[0]["completed_items"] == 1
+
+
+class TestActiveOrderBoards:
+    """Tests for the per-restaurant board registry."""
+    
+    def _hub(self, live: bool) -> Mock:
+        hub = Mock()
+        hub.is_live = Mock(return_value=live)
+        return hub
+    
+    @pytest.mark.asyncio
+    async def test_reads_served_from_memory_when_live(self):
+        """Test only the first read touches the database."""
+        hub = self._hub(live=True)
+        boards = ActiveOrderBoards(hub)
+        db = _db([_order("a1", 5)])
+        
+        for _ in range(3):
+            rows = await boards.get_active_orders(db, "rest_123")
+        
+        assert [row["order_id"] for row in rows] == ["a1"]
+        db.get_active_orders_with_items.assert_awaited_once()
+        db.get_active_orders.assert_not_awaited()
+        assert hub.add_listener.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_to_rpc_without_realtime(self):
+        """Test reads use the RPC and release channels if realtime is down."""
+        hub = self._hub(live=False)
+        boards = ActiveOrderBoards(hub)
+        db = _db([])
+        
+        await boards.get_active_orders(db, "rest_123")
+        
+        db.get_active_orders.assert_awaited_once_with("rest_123")
+        db.get_active_orders_with_items.assert_not_awaited()
+        assert hub.release.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_realtime_retried_after_backoff(self):
+        """Test a failed restaurant skips realtime until its retry time."""
+        hub = self._hub(live=False)
+        boards = ActiveOrderBoards(hub, retry_seconds=0.05)
+        db = _db([])
+        
+        for _ in range(3):
+            await boards.get_active_orders(db, "rest_123")
+        assert hub.acquire.call_count == 2
+        assert db.get_active_orders.await_count == 3
+        
+        await asyncio.sleep(0.06)
+        await boards.get_active_orders(db, "rest_123")
+        assert hub.acquire.call_count == 4
+    
+    @pytest.mark.asyncio
+    async def test_idle_board_dropped(self):
+        """Test a board unread for the idle period releases its channels."""
+        hub = self._hub(live=True)
+        boards = ActiveOrderBoards(hub, idle_seconds=0.01)
+        db = _db([])
+        
+        await boards.get_active_orders(db, "rest_123")
+        boards._boards["rest_123"] = (boards._boards["rest_123"][0], 0)
+        await boards.get_active_orders(db, "rest_456")
+        
+        assert "rest_123" not in boards._boards
+        hub.release.assert_any_call(db, "rest_123", kind="orders")
@@ -0,0 +1,149 @@
+"""Tests for the Supabase database manager."""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+from postgrest.utils import AsyncClient as PostgrestHTTPClient
+
+from src.database.supabase_manager import SupabaseManager
+
+
+def _mock_manager(handler) -> SupabaseManager:
+    """Build a manager whose PostgREST session is served by ``handler``."""
+    manager = SupabaseManager("http://localhost:54321", "header.payload.signature")
+    manager.rest.session = PostgrestHTTPClient(
+        base_url="http://localhost:54321/rest/v1",
+        headers=dict(manager.rest.session.headers),
+        transport=httpx.MockTransport(handler)
+    )
+    return manager
+
+
+class TestSupabaseManager:
+    """Tests for SupabaseManager."""
+    
+    def test_rest_client_uses_connection_pool(self):
+        """Test the async REST client is configured with pool limits."""
+        manager = SupabaseManager(
+            "http://localhost:54321",
+            "header.payload.signature",
+            pool_size=7
+        )
+        
+        pool = manager.rest.session._transport._pool
+        assert pool._max_connections == 7
+        assert manager.rest.session.headers["apikey"] == "header.payload.signature"
+    
+    @pytest.mark.asyncio
+    async def test_create_order(self):
+        """Test order insert goes through the async REST client."""
+        requests = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            body = json.loads(request.content)
+            return httpx.Response(201, json=[{"id": "order_1", **body}])
+        
+        manager = _mock_manager(handler)
+        order = await manager.create_order({"order_number": "A1"})
+        
+        assert order["id"] == "order_1"
+        assert order["order_number"] == "A1"
+        assert requests[0].method == "POST"
+        assert requests[0].url.path == "/rest/v1/orders"
+    
+    @pytest.mark.asyncio
+    async def test_rpc_calls_run_concurrently(self):
+        """Test slow queries overlap instead of blocking the event loop."""
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(0.1)
+            return httpx.Response(200, json=[])
+        
+        manager = _mock_manager(handler)
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            manager.get_active_orders("rest_123") for _ in range(10)
+        ))
+        elapsed = time.perf_counter() - start
+        
+        assert results == [[]] * 10
+        assert elapsed < 0.5  # Serial execution would take ~1s
+    
+    @pytest.mark.asyncio
+    async def test_create_order_with_items_single_round_trip(self):
+        """Test order and items are created with one RPC call."""
+        requests = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            params = json.loads(request.content)
+            return httpx.Response(200, json={
+                "id": "order_1",
+                **params["p_order"],
+                "items": [
+                    {"id": f"item_{i}", "order_id": "order_1", **item}
+                    for i, item in enumerate(params["p_items"])
+                ]
+            })
+        
+        manager = _mock_manager(handler)
+        items = [{"item_name": f"Bowl {i}", "quantity": 1} for i in range(12)]
+        order = await manager.create_order_with_items({"order_number": "A1"}, items)
+        
+        assert len(requests) == 1
+        assert requests[0].url.path == "/rest/v1/rpc/create_order_with_items"
+        assert order["id"] == "order_1"
+        assert len(order["items"]) == 12
+    
+    @pytest.mark.asyncio
+    async def test_get_orders_by_ids_single_query(self):
+        """Test orders are checked with one query and missing or foreign ids reported."""
+        requests = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json=[
+                {"id": "order_1", "restaurant_id": "rest_123", "order_number": "A1", "status": "pending"},
+                {"id": "order_3", "restaurant_id": "rest_456", "order_number": "B1", "status": "pending"},
+            ])
+        
+        manager = _mock_manager(handler)
+        result = await manager.get_orders_by_ids("rest_123", ["order_1", "order_2", "order_3", "order_1"])
+        
+        assert len(requests) == 1
+        assert requests[0].url.params["id"] == "in.(order_1,order_2,order_3)"
+        assert [order["id"] for order in result["orders"]] == ["order_1"]
+        assert result["missing"] == ["order_2"]
+        assert result["foreign"] == ["order_3"]
+    
+    @pytest.mark.asyncio
+    async def test_transient_errors_retried(self):
+        """Test reads are retried after a gateway error."""
+        statuses = [503, 200]
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            status = statuses.pop(0)
+            return httpx.Response(status, json=[] if status == 200 else {"message": "unavailable", "code": "PGRST000"})
+        
+        manager = _mock_manager(handler)
+        assert await manager.get_active_orders("rest_123") == []
+        assert statuses == []
+    
+    @pytest.mark.asyncio
+    async def test_inserts_not_repeated(self):
+        """Test a failed insert that may have reached Supabase is not retried."""
+        requests = []
+        
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(503, json={"message": "unavailable", "code": "PGRST000"})
+        
+        manager = _mock_manager(handler)
+        with pytest.raises(APIError):
+            await manager.create_order({"order_number": "A1"})
+        assert len(requests) == 1
@@ -0,0 +1,193 @@
+"""Tests for re-sent order deduplication."""
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.orders.dedup import OrderDedupCache, OrderDeduplicator, content_hash, order_key
+
+
+def _row(order_number: str = "A1", **fields) -> dict:
+    row = {
+        "restaurant_id": "rest_123",
+        "order_number": order_number,
+        "platform": "otter",
+        "customer_name": "Sam",
+        "notes": None,
+        "status": "pending",
+        "ordered_at": "2024-01-01T12:00:00",
+    }
+    row.update(fields)
+    return row
+
+
+def _db() -> Mock:
+    db = Mock()
+    db.create_order_with_items = AsyncMock(side_effect=lambda row, items: {
+        "id": "order_1", **row, "items": items, "created": True
+    })
+    db.update_order = AsyncMock(return_value={})
+    db.create_order_items = AsyncMock(return_value=[])
+    db.get_order = AsyncMock(return_value={"id": "order_1", "items": []})
+    return db
+
+
+class TestOrderDedupCache:
+    """Tests for OrderDedupCache."""
+    
+    def test_content_hash_ignores_server_fields(self):
+        """Test hashing ignores fields the server fills in."""
+        items = [{"item_name": "Bowl"}]
+        assert content_hash(_row(), items) == content_hash(
+            _row(ordered_at="2024-01-01T12:05:00", status="in_progress"), items
+        )
+        assert content_hash(_row(), items) != content_hash(_row(notes="No onions"), items)
+    
+    def test_evicts_least_recently_used(self):
+        """Test the cache stays within its size bound."""
+        cache = OrderDedupCache(max_size=2, ttl_seconds=60)
+        for number in ("A1", "A2"):
+            cache.put(order_key(_row(number)), "hash", number, _row(number), [])
+        cache.get(order_key(_row("A1")))
+        cache.put(order_key(_row("A3")), "hash", "A3", _row("A3"), [])
+        
+        assert len(cache) == 2
+        assert cache.get(order_key(_row("A1"))) is not None
+        assert cache.get(order_key(_row("A2"))) is None
+    
+    def test_entries_expire(self, monkeypatch):
+        """Test entries are dropped after the TTL."""
+        clock = [1000.0]
+        monkeypatch.setattr("src.orders.dedup.time.monotonic", lambda: clock[0])
+        cache = OrderDedupCache(max_size=10, ttl_seconds=60)
+        cache.put(order_key(_row()), "hash", "order_1", _row(), [])
+        
+        clock[0] += 61
+        
+        assert cache.get(order_key(_row())) is None
+        assert len(cache) == 0
+
+
+class TestOrderDeduplicator:
+    """Tests for OrderDeduplicator."""
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_resend_skips_database(self):
+        """Test an identical resubmission makes no database call."""
+        db = _db()
+        dedup = OrderDeduplicator(OrderDedupCache(max_size=10, ttl_seconds=60))
+        items = [{"item_name": "Bowl"}]
+        
+        _, first = await dedup.create_order(db, _row(), items)
+        order, second = await dedup.create_order(
+            db, _row(ordered_at="2024-01-01T12:05:00"), items
+        )
+        
+        assert (first, second) == ("created", "unchanged")
+        assert order["id"] == "order_1"
+        db.create_order_with_items.assert_awaited_once()
+        assert dedup.cache.hits == 1
+    
+    @pytest.mark.asyncio
+    async def test_changed_resend_writes_diff(self):
+        """Test a changed resubmission writes only the changed fields and items."""
+        db = _db()
+        dedup = OrderDeduplicator(OrderDedupCache(max_size=10, ttl_seconds=60))
+        
+        await dedup.create_order(db, _row(), [{"item_name": "Bowl"}])
+        _, outcome = await dedup.create_order(
+            db, _row(notes="No onions"), [{"item_name": "Bowl"}, {"item_name": "Soda"}]
+        )
+        
+        assert outcome == "updated"
+        db.update_order.assert_awaited_once_with("order_1", {"notes": "No onions"})
+        db.create_order_items.assert_awaited_once_with([
+            {"item_name": "Soda", "order_id": "order_1"}
+        ])
+        db.create_order_with_items.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_existing_order_reported(self):
+        """Test an order already in the database is reported as existing."""
+        db = _db()
+        db.create_order_with_items = AsyncMock(return_value={
+            "id": "order_1", **_row(), "items": [
+                {"id": "item_1", "order_id": "order_1", "item_name": "Bowl", "quantity": 1,
+                 "modifiers": {}, "status": "in_progress", "category": "Bowls"}
+            ], "created": False
+        })
+        dedup = OrderDeduplicator(OrderDedupCache(max_size=10, ttl_seconds=60))
+        
+        order, outcome = await dedup.create_order(db, _row(), [{"item_name": "Bowl"}])
+        
+        assert outcome == "existing"
+        assert "created" not in order
+        db.update_order.assert_not_awaited()
+        db.create_order_items.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_changed_resend_after_cache_cleared(self):
+        """Test a changed resend of a stored but uncached order is written as a diff."""
+        db = _db()
+        dedup = OrderDeduplicator(OrderDedupCache(max_size=10, ttl_seconds=60))
+        await dedup.create_order(db, _row(), [{"item_name": "Bowl"}])
+        dedup = OrderDeduplicator(OrderDedupCache(max_size=10, ttl_seconds=60))
+        db.create_order_with_items = AsyncMock(return_value={
+            "id": "order_1", **_row(), "items": [
+                {"id": "item_1", "order_id": "order_1", "item_name": "Bowl", "quantity": 1, "modifiers": {}}
+            ], "created": False
+        })
+        changed = [{"item_name": "Bowl"}, {"item_name": "Soda"}]
+        
+        _, outcome = await dedup.create_order(db, _row(notes="No onions"), changed)
+        
+        assert outcome == "updated"
+        db.update_order.assert_awaited_once_with("order_1", {"notes": "No onions"})
+        db.create_order_items.assert_awaited_once_with([
+            {"item_name": "Soda", "order_id": "order_1"}
+        ])
+        
+        # The new content is cached only after it was written
+        db.update_order.reset_mock()
+        _, outcome = await dedup.create_order(db, _row(notes="No onions"), changed)
+        assert outcome == "unchanged"
+        db.update_order.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_bulk_changed_resend_after_cache_cleared(self):
+        """Test items added to an uncached existing order are inserted by the bulk path."""
+        db = _db()
+        db.upsert_orders_with_items = AsyncMock(return_value=[
+            {"order_id": "order_1", "order_number": "A1", "platform": "otter", "inserted": False},
+            {"order_id": "order_2", "order_number": "A2", "platform": "otter", "inserted": True},
+        ])
+        db.get_items_for_orders = AsyncMock(return_value={
+            "order_1": [{"id": "item_1", "order_id": "order_1", "item_name": "Bowl", "quantity": 1}]
+        })
+        dedup = OrderDeduplicator(OrderDedupCache(max_size=10, ttl_seconds=60))
+        rows = [
+            {**_row("A1"), "items": [{"item_name": "Bowl"}, {"item_name": "Soda"}]},
+            {**_row("A2"), "items": [{"item_name": "Bowl"}]},
+        ]
+        
+        await dedup.upsert_orders(db, "rest_123", rows)
+        
+        db.get_items_for_orders.assert_awaited_once_with(["order_1"])
+        db.create_order_items.assert_awaited_once_with([
+            {"item_name": "Soda", "order_id": "order_1"}
+        ])
+    
+    @pytest.mark.asyncio
+    async def test_enriched_items_compared_as_received(self):
+        """Test enrichment changes the written rows but not the resend check."""
+        db = _db()
+        dedup = OrderDeduplicator(OrderDedupCache(max_size=10, ttl_seconds=60))
+        items = [{"item_name": "Bowl"}]
+        enrich = lambda rows: [{**row, "category": "Bowls"} for row in rows]
+        
+        await dedup.create_order(db, _row(), items, enrich)
+        _, outcome = await dedup.create_order(db, _row(), items, enrich)
+        
+        assert outcome == "unchanged"
+        _, written = db.create_order_with_items.await_args.args
+        assert written == [{"item_name": "Bowl", "category": "Bowls"}]
+        assert items == [{"item_name": "Bowl"}]
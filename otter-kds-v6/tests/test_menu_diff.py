@@ -0,0 +1,86 @@
+"""Tests for fingerprint-based menu diffs."""
+
+from decimal import Decimal
+
+from src.menu_sync.diff import MenuFingerprints, diff_menus, item_fingerprint
+from src.menu_sync.models import Menu, MenuItem, MenuCategory, MenuItemOption
+
+
+def _item(item_id, category="Bowls", price="10.00", options=None):
+    return MenuItem(
+        id=item_id,
+        name=f"Item {item_id}",
+        price=Decimal(price),
+        category=category,
+        options=options or []
+    )
+
+
+def _menu(*categories):
+    return Menu(id="menu_1", restaurant_id="rest_1", name="Main Menu", categories=list(categories))
+
+
+def _diff(old, new):
+    return diff_menus(MenuFingerprints.of(old), MenuFingerprints.of(new))
+
+
+class TestMenuDiff:
+    """Tests for diff_menus."""
+    
+    def test_unchanged_menu(self):
+        """Test equal content with new timestamps and price scale has no changes."""
+        old = _menu(MenuCategory(id="c1", name="Bowls", items=[_item("a", price="10.0")]))
+        new = _menu(MenuCategory(id="c1", name="Bowls", items=[_item("a", price="10.00")]))
+        
+        assert not _diff(old, new).has_changes
+    
+    def test_items_in_menu_order(self):
+        """Test added, updated and deleted items are reported in menu order."""
+        old = _menu(MenuCategory(id="c1", name="Bowls", items=[_item("a"), _item("b"), _item("c")]))
+        new = _menu(MenuCategory(id="c1", name="Bowls", items=[
+            _item("d"), _item("c", price="11.00"), _item("a", price="9.00"), _item("e")
+        ]))
+        
+        diff = _diff(old, new)
+        
+        assert [item.id for item in diff.added_items] == ["d", "e"]
+        assert [item.id for item in diff.updated_items] == ["c", "a"]
+        assert diff.deleted_items == ["b"]
+        assert not diff.added_categories and not diff.updated_categories
+    
+    def test_option_change_updates_item(self):
+        """Test a changed option price marks its item as updated."""
+        option = MenuItemOption(id="o1", name="Extra Egg", price=Decimal("1.00"))
+        old = _menu(MenuCategory(id="c1", name="Bowls", items=[_item("a", options=[option])]))
+        cheaper = option.model_copy(update={"price": Decimal("0.75")})
+        new = _menu(MenuCategory(id="c1", name="Bowls", items=[_item("a", options=[cheaper])]))
+        
+        diff = _diff(old, new)
+        
+        assert [item.id for item in diff.updated_items] == ["a"]
+    
+    def test_category_changes(self):
+        """Test categories are added, updated and deleted on their own fields."""
+        old = _menu(
+            MenuCategory(id="c1", name="Bowls", display_order=1, items=[_item("a")]),
+            MenuCategory(id="c2", name="Drinks", items=[_item("b", category="Drinks")])
+        )
+        new = _menu(
+            MenuCategory(id="c1", name="Bowls", display_order=2, items=[_item("a")]),
+            MenuCategory(id="c3", name="Sides", items=[_item("b", category="Drinks")])
+        )
+        
+        diff = _diff(old, new)
+        
+        assert [category.id for category in diff.updated_categories] == ["c1"]
+        assert [category.id for category in diff.added_categories] == ["c3"]
+        assert diff.deleted_categories == ["c2"]
+        assert not diff.added_items and not diff.updated_items and not diff.deleted_items
+    
+    def test_fingerprint_is_stable(self):
+        """Test an item's fingerprint only depends on its content."""
+        item = _item("a")
+        copy = MenuItem.model_validate_json(item.model_dump_json())
+        
+        assert item_fingerprint(item) == item_fingerprint(copy)
+        assert item_fingerprint(item) != item_fingerprint(_item("a", price="10.01"))
@@ -0,0 +1,157 @@
+"""Tests for menu-backed order item enrichment."""
+
+import asyncio
+import difflib
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.orders.menu_index import (
+    MenuIndex, MenuIndexes, normalize_name, extract_size, protein_for
+)
+
+RESTAURANT_ID = "00000000-0000-0000-0000-000000000001"
+
+ITEMS = [
+    {"otter_item_id": "item_1", "name": "Grilled Chicken Rice Bowl", "category": "Rice Bowls"},
+    {"otter_item_id": "item_2", "name": "Crispy Fish Urban Bowl", "category": "Urban Bowls"},
+    {"otter_item_id": "item_3", "name": "Thai Tea", "category": "Drinks"},
+]
+
+STATIONS = [
+    {"name": "Grill", "active": True, "settings": {"categories": ["Rice Bowls", "Urban Bowls"]}},
+    {"name": "Bar", "active": False, "settings": {"categories": ["Drinks"]}},
+]
+
+
+def _index(version: int = 1) -> MenuIndex:
+    return MenuIndex.build(RESTAURANT_ID, version, ITEMS, STATIONS)
+
+
+def _db(version: int = 1, items=ITEMS) -> Mock:
+    db = Mock()
+    db.get_menu_version = AsyncMock(return_value=version)
+    db.get_menu_items = AsyncMock(return_value=items)
+    db.get_stations = AsyncMock(return_value=STATIONS)
+    return db
+
+
+class TestMenuIndex:
+    """Tests for MenuIndex."""
+    
+    def test_name_helpers(self):
+        """Test names are normalized and sizes and proteins read from them."""
+        assert normalize_name("Grilled Chicken  Rice-Bowl (Large)") == "grilled chicken rice bowl"
+        assert extract_size("Rice Bowl (Large, Extra Rice)") == "Large"
+        assert extract_size("Rice Bowl", {"Size": "small"}) == "Small"
+        assert extract_size("Rice Bowl") is None
+        assert protein_for("Crispy Chicken Bowl") == "Crispy Chicken"
+        assert protein_for("Thai Tea") is None
+    
+    def test_exact_lookup(self):
+        """Test an item is found whatever its case, spacing or modifiers."""
+        match = _index().lookup("grilled chicken rice bowl (Large)")
+        
+        assert match.item_id == "item_1"
+        assert match.category == "Rice Bowls"
+        assert match.station == "Grill"
+        assert match.protein_type == "Grilled Chicken"
+    
+    def test_fuzzy_lookup_is_memoized(self, monkeypatch):
+        """Test a misspelled name is matched once and then served from the memo."""
+        index = _index()
+        calls = []
+        original = difflib.get_close_matches
+        monkeypatch.setattr(
+            "src.orders.menu_index.difflib.get_close_matches",
+            lambda *args, **kwargs: calls.append(args) or original(*args, **kwargs)
+        )
+        
+        assert index.lookup("Grilled Chiken Rice Bowl").item_id == "item_1"
+        assert index.lookup("Grilled Chiken Rice Bowl").item_id == "item_1"
+        assert index.lookup("Poke Nachos") is None
+        assert index.lookup("Poke Nachos") is None
+        assert len(calls) == 1
+    
+    def test_enrich_fills_only_missing_fields(self):
+        """Test fields sent by the extension are kept."""
+        index = _index()
+        item = {"item_name": "Crispy Fish Urban Bowl (Small)", "category": "Specials"}
+        
+        enriched = index.enrich(item)
+        
+        assert enriched == {
+            "item_name": "Crispy Fish Urban Bowl (Small)",
+            "category": "Specials",
+            "station": "Grill",
+            "protein_type": "Crispy Fish",
+            "size": "Small"
+        }
+        assert item == {"item_name": "Crispy Fish Urban Bowl (Small)", "category": "Specials"}
+    
+    def test_inactive_station_not_assigned(self):
+        """Test categories of inactive stations get no station."""
+        enriched = _index().enrich({"item_name": "Thai Tea"})
+        
+        assert enriched == {"item_name": "Thai Tea", "category": "Drinks"}
+
+
+class TestMenuIndexes:
+    """Tests for the per-restaurant MenuIndexes registry."""
+    
+    @pytest.mark.asyncio
+    async def test_first_get_builds_index_in_background(self):
+        """Test the first lookup does not wait for the index and later ones reuse it."""
+        db = _db()
+        indexes = MenuIndexes(check_seconds=60)
+        
+        assert await indexes.get(db, RESTAURANT_ID) is None
+        await asyncio.sleep(0.01)
+        first = await indexes.get(db, RESTAURANT_ID)
+        second = await indexes.get(db, RESTAURANT_ID)
+        
+        assert first is second
+        assert len(first) == 3
+        db.get_menu_items.assert_awaited_once_with(RESTAURANT_ID)
+    
+    @pytest.mark.asyncio
+    async def test_new_version_swapped_in_background(self):
+        """Test a new menu version replaces the index without blocking lookups."""
+        db = _db(version=1)
+        indexes = MenuIndexes(check_seconds=0.05)
+        old = await indexes.refresh(db, RESTAURANT_ID)
+        
+        db.get_menu_version.return_value = 2
+        db.get_menu_items.return_value = ITEMS[:1]
+        await asyncio.sleep(0.06)
+        
+        assert await indexes.get(db, RESTAURANT_ID) is old
+        await asyncio.sleep(0.01)
+        new = await indexes.get(db, RESTAURANT_ID)
+        
+        assert new.version == 2
+        assert len(new) == 1
+        assert len(old) == 3
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_version_not_rebuilt(self):
+        """Test a version check that finds no new menu keeps the index."""
+        db = _db()
+        indexes = MenuIndexes(check_seconds=60)
+        index = await indexes.refresh(db, RESTAURANT_ID)
+        
+        assert await indexes.refresh(db, RESTAURANT_ID) is index
+        assert db.get_menu_version.await_count == 2
+        db.get_menu_items.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_failed_build_returns_none(self):
+        """Test a database error leaves orders unenriched until the next check."""
+        db = _db()
+        db.get_menu_version = AsyncMock(side_effect=Exception("relation does not exist"))
+        indexes = MenuIndexes(check_seconds=30)
+        
+        assert await indexes.get(db, RESTAURANT_ID) is None
+        await asyncio.sleep(0.01)
+        assert await indexes.get(db, RESTAURANT_ID) is None
+        db.get_menu_version.assert_awaited_once()
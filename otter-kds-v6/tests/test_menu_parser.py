@@ -0,0 +1,131 @@
+"""Tests for the incremental menu parser."""
+
+import json
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from src.menu_sync import parser
+from src.menu_sync.models import Menu, MenuItem, MenuCategory
+from src.menu_sync.parser import parse_menu, parse_menu_dict
+
+
+def _payload():
+    return {
+        "id": "menu_1",
+        "restaurant_id": "rest_1",
+        "name": " Main Menu ",
+        "currency": "USD",
+        "categories": [
+            {
+                "id": "cat_1",
+                "name": " rice bowls ",
+                "order": 1,
+                "items": [
+                    {
+                        "id": "item_1",
+                        "name": "Chicken Bowl ",
+                        "description": "Grilled chicken",
+                        "price": 12.99,
+                        "options": [{"id": "opt_1", "name": "Extra Egg", "price": 1.5}],
+                        "tags": ["popular"]
+                    },
+                    {"id": "item_2", "name": "Tofu Bowl", "price": "11.50", "available": False}
+                ]
+            },
+            {
+                # Items before the category's name
+                "items": [{"id": "item_3", "name": "Lemonade", "price": 3}],
+                "id": "cat_2",
+                "name": "drinks"
+            }
+        ]
+    }
+
+
+def _validated(data):
+    """Menu built with full validation, as before the parser existed."""
+    categories = []
+    for cat_data in data["categories"]:
+        items = [
+            MenuItem(
+                id=item["id"],
+                name=item["name"],
+                description=item.get("description"),
+                price=item["price"],
+                category=cat_data["name"],
+                available=item.get("available", True),
+                options=item.get("options", []),
+                images=item.get("images", []),
+                tags=item.get("tags", [])
+            )
+            for item in cat_data["items"]
+        ]
+        categories.append(MenuCategory(
+            id=cat_data["id"],
+            name=cat_data["name"],
+            description=cat_data.get("description"),
+            display_order=cat_data.get("order", 0),
+            items=items
+        ))
+    return Menu(id=data["id"], restaurant_id=data["restaurant_id"], name=data["name"], categories=categories)
+
+
+def _dump(menu):
+    """Menu as a dict without timestamps."""
+    data = menu.model_dump(exclude={"created_at", "updated_at"})
+    for category in data["categories"]:
+        for item in category["items"]:
+            item.pop("created_at")
+            item.pop("updated_at")
+    return data
+
+
+class TestParseMenu:
+    """Test parse_menu."""
+    
+    def test_streamed_matches_validated(self):
+        """Test streaming a body gives the same menu as full validation."""
+        data = _payload()
+        menu = parse_menu(json.dumps(data).encode())
+        
+        assert _dump(menu) == _dump(_validated(data))
+        assert menu.categories[0].name == "Rice Bowls"
+        assert menu.categories[0].items[0].price == Decimal("12.99")
+        assert menu.categories[0].items[0].options[0].name == "Extra Egg"
+    
+    def test_dict_matches_streamed(self):
+        """Test a decoded payload and a str body give the same menu."""
+        data = _payload()
+        
+        assert _dump(parse_menu_dict(data)) == _dump(parse_menu(json.dumps(data)))
+    
+    def test_items_before_category_name(self):
+        """Test items streamed before their category's name get it."""
+        menu = parse_menu(json.dumps(_payload()).encode())
+        
+        assert menu.categories[1].items[0].category == "Drinks"
+    
+    def test_json_fallback_without_ijson(self, monkeypatch):
+        """Test parsing without ijson decodes the whole body."""
+        monkeypatch.setattr(parser, "ijson", None)
+        data = _payload()
+        
+        assert _dump(parse_menu(json.dumps(data).encode())) == _dump(_validated(data))
+    
+    @pytest.mark.parametrize("body", [
+        json.dumps({"id": "m", "restaurant_id": "r", "name": "Menu", "categories": [
+            {"id": "c", "name": "Bowls", "items": [{"id": "i", "name": "Bowl", "price": -1}]}
+        ]}),
+        json.dumps({"id": "m", "restaurant_id": "r", "name": "Menu", "categories": [
+            {"id": "c", "name": "Bowls", "items": [{"id": "i", "name": "x" * 256, "price": 5}]}
+        ]}),
+        json.dumps({"id": "m", "restaurant_id": "r", "name": "Menu", "categories": [
+            {"id": "c", "name": "Bowls", "items": [{"id": "i", "name": "Bowl", "price": 5.999}]}
+        ]})
+    ])
+    def test_invalid_items_rejected(self, body):
+        """Test invalid items still fail validation."""
+        with pytest.raises(ValidationError):
+            parse_menu(body.encode())
@@ -0,0 +1,140 @@
+"""Tests for rate-limited menu item pushes to Otter."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.menu_sync.models import MenuItem
+from src.menu_sync.push import MenuPushQueue, TokenBucket
+from src.utils.retry import retry_after_seconds
+
+
+def _item(item_id, available=True):
+    return MenuItem(id=item_id, name=f"Item {item_id}", price=10, category="Bowls", available=available)
+
+
+class FakeOtter:
+    """Records pushes and answers with scripted responses per item id."""
+    
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.pushed = []
+        self.responses = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def put_menu_item(self, item):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            self.pushed.append((item.id, item.available))
+            scripted = self.responses.get(item.id)
+            if scripted:
+                return scripted.pop(0)
+            return httpx.Response(200)
+        finally:
+            self.in_flight -= 1
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket."""
+    
+    @pytest.mark.asyncio
+    async def test_limits_rate_after_burst(self):
+        """Test tokens beyond the burst are handed out at the rate."""
+        bucket = TokenBucket(rate=50, burst=5)
+        start = time.monotonic()
+        for _ in range(10):
+            await bucket.acquire()
+        assert time.monotonic() - start >= 5 / 50 * 0.9
+    
+    @pytest.mark.asyncio
+    async def test_pause_holds_back_senders(self):
+        """Test a pause delays the next token even with a full bucket."""
+        bucket = TokenBucket(rate=1000, burst=10)
+        bucket.pause(0.1)
+        start = time.monotonic()
+        await bucket.acquire()
+        assert time.monotonic() - start >= 0.09
+
+
+class TestMenuPushQueue:
+    """Tests for MenuPushQueue."""
+    
+    @pytest.mark.asyncio
+    async def test_bounded_concurrency(self):
+        """Test no more pushes than the concurrency are in flight."""
+        otter = FakeOtter()
+        async with MenuPushQueue(otter, concurrency=3, rate=1000, burst=100) as queue:
+            results = await queue.push([_item(f"item_{i}") for i in range(12)])
+        
+        assert len(results) == 12
+        assert all(result.success for result in results.values())
+        assert otter.max_in_flight == 3
+    
+    @pytest.mark.asyncio
+    async def test_coalesces_repeated_item(self):
+        """Test an item queued twice before its push is sent once, in its last state."""
+        otter = FakeOtter()
+        async with MenuPushQueue(otter, concurrency=1, rate=1000, burst=100) as queue:
+            first = queue.submit(_item("item_1", available=True))
+            second = queue.submit(_item("item_1", available=False))
+            results = await asyncio.gather(first, second)
+        
+        assert otter.pushed == [("item_1", False)]
+        assert results[0] is results[1]
+    
+    @pytest.mark.asyncio
+    async def test_item_queued_during_push_is_sent_after(self):
+        """Test a change queued while the item is being pushed is sent afterwards."""
+        otter = FakeOtter(delay=0.05)
+        async with MenuPushQueue(otter, concurrency=4, rate=1000, burst=100) as queue:
+            first = queue.submit(_item("item_1", available=True))
+            await asyncio.sleep(0.01)
+            second = queue.submit(_item("item_1", available=False))
+            assert otter.max_in_flight == 1
+            await asyncio.gather(first, second)
+        
+        assert otter.pushed == [("item_1", True), ("item_1", False)]
+        assert otter.max_in_flight == 1
+    
+    @pytest.mark.asyncio
+    async def test_retries_after_429(self):
+        """Test a 429 is retried after its Retry-After."""
+        otter = FakeOtter()
+        otter.responses["item_1"] = [httpx.Response(429, headers={"Retry-After": "0.1"})]
+        start = time.monotonic()
+        async with MenuPushQueue(otter, concurrency=2, rate=1000, burst=100) as queue:
+            results = await queue.push([_item("item_1")])
+        
+        assert results["item_1"].success
+        assert results["item_1"].attempts == 2
+        assert time.monotonic() - start >= 0.1
+    
+    @pytest.mark.asyncio
+    async def test_per_item_failures(self):
+        """Test failures are reported per item without stopping other pushes."""
+        otter = FakeOtter()
+        otter.responses["item_2"] = [httpx.Response(404)]
+        otter.responses["item_3"] = [httpx.Response(429, headers={"Retry-After": "0"})] * 2
+        async with MenuPushQueue(otter, rate=1000, burst=100, max_retries=1) as queue:
+            results = await queue.push([_item("item_1"), _item("item_2"), _item("item_3")])
+        
+        assert list(results) == ["item_1", "item_2", "item_3"]
+        assert results["item_1"].success
+        assert (results["item_2"].success, results["item_2"].status_code) == (False, 404)
+        assert (results["item_3"].status_code, results["item_3"].attempts) == (429, 2)
+
+
+class TestRetryAfter:
+    """Tests for Retry-After parsing."""
+    
+    def test_parses_seconds_and_dates(self):
+        """Test delay seconds, HTTP dates and invalid values."""
+        assert retry_after_seconds("120") == 120
+        assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+        assert retry_after_seconds("soon") is None
+        assert retry_after_seconds(None) is None
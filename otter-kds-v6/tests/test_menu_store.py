@@ -0,0 +1,152 @@
+"""Tests for the versioned menu store."""
+
+from decimal import Decimal
+
+import pytest
+from unittest.mock import patch
+
+from src.menu_sync.menu_store import MenuStore
+from src.menu_sync.models import Menu, MenuItem, MenuCategory
+from src.menu_sync.sync import MenuSyncService
+
+
+def _menu(items):
+    return Menu(
+        id="menu_1",
+        restaurant_id="rest_1",
+        name="Main Menu",
+        categories=[MenuCategory(id="cat_1", name="Bowls", items=items)]
+    )
+
+
+def _item(item_id, price=10.0, name=None):
+    return MenuItem(id=item_id, name=name or f"Item {item_id}", price=price, category="Bowls")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MenuStore(str(tmp_path / "menus.db"))
+    yield store
+    store.close()
+
+
+class TestMenuStore:
+    """Tests for MenuStore."""
+    
+    def test_first_record_adds_everything(self, store):
+        """Test the first menu of a restaurant is version 1 with all items added."""
+        version, diff = store.record("default", _menu([_item("a"), _item("b")]))
+        
+        assert version == 1
+        assert [item.id for item in diff.added_items] == ["a", "b"]
+        assert store.latest_version("default", "rest_1") == 1
+    
+    def test_unchanged_menu_keeps_version(self, store):
+        """Test recording the same menu again creates no version."""
+        store.record("default", _menu([_item("a")]))
+        version, diff = store.record("default", _menu([_item("a")]))
+        
+        assert version == 1
+        assert not diff.has_changes
+    
+    def test_incremental_diff(self, store):
+        """Test changed, added and removed items bump the version."""
+        store.record("default", _menu([_item("a"), _item("b")]))
+        version, diff = store.record("default", _menu([_item("a", price=11.0), _item("c")]))
+        
+        assert version == 2
+        assert [item.id for item in diff.added_items] == ["c"]
+        assert [item.id for item in diff.updated_items] == ["a"]
+        assert diff.deleted_items == ["b"]
+    
+    def test_survives_reopen(self, store, tmp_path):
+        """Test a new store on the same file diffs against the stored menu."""
+        store.record("default", _menu([_item("a")]))
+        store.close()
+        
+        reopened = MenuStore(str(tmp_path / "menus.db"))
+        version, diff = reopened.record("default", _menu([_item("a", name="Renamed")]))
+        reopened.close()
+        
+        assert version == 2
+        assert diff.added_items == []
+        assert [item.name for item in diff.updated_items] == ["Renamed"]
+    
+    def test_profiles_are_separate(self, store):
+        """Test the same restaurant under another profile has its own history."""
+        store.record("default", _menu([_item("a")]))
+        version, diff = store.record("other", _menu([_item("a")]))
+        
+        assert version == 1
+        assert len(diff.added_items) == 1
+    
+    def test_changes_since(self, store):
+        """Test net changes after a version are read back from the store."""
+        store.record("default", _menu([_item("a"), _item("b"), _item("c")]))
+        store.record("default", _menu([_item("a", price=12.0), _item("c"), _item("d")]))
+        store.record("default", _menu([_item("a", price=12.0), _item("d", price=5.0), _item("e")]))
+        
+        since_1 = store.changes_since("default", "rest_1", 1)
+        assert sorted(item.id for item in since_1.added_items) == ["d", "e"]
+        assert [item.id for item in since_1.updated_items] == ["a"]
+        assert since_1.updated_items[0].price == 12
+        assert sorted(since_1.deleted_items) == ["b", "c"]
+        
+        since_2 = store.changes_since("default", "rest_1", 2)
+        assert [item.id for item in since_2.added_items] == ["e"]
+        assert [item.id for item in since_2.updated_items] == ["d"]
+        assert since_2.deleted_items == ["c"]
+        
+        assert not store.changes_since("default", "rest_1", 3).has_changes
+    
+    def test_tracks_categories(self, store):
+        """Test category changes are diffed against the stored categories."""
+        store.record("default", _menu([_item("a")]))
+        renamed = _menu([_item("a")])
+        renamed.categories[0].name = "Rice Bowls"
+        
+        version, diff = store.record("default", renamed)
+        
+        assert version == 2
+        assert [category.id for category in diff.updated_categories] == ["cat_1"]
+        assert not diff.updated_items
+    
+    def test_outdated_fingerprints_recomputed(self, store, tmp_path):
+        """Test fingerprints from an older schema are recomputed on open."""
+        store.record("default", _menu([_item("a")]))
+        store._conn.execute("UPDATE menu_items SET fingerprint = 'old'")
+        store._conn.execute("PRAGMA user_version = 0")
+        store._conn.commit()
+        store.close()
+        
+        reopened = MenuStore(str(tmp_path / "menus.db"))
+        version, diff = reopened.record("default", _menu([_item("a")]))
+        reopened.close()
+        
+        assert version == 1
+        assert not diff.has_changes
+
+
+class TestSyncWithStore:
+    """Tests for MenuSyncService diffs across restarts."""
+    
+    @pytest.mark.asyncio
+    async def test_restart_is_incremental(self, mock_otter_client, sample_menu, mock_settings):
+        """Test a new service after a restart reports updates, not creations."""
+        mock_otter_client.fetch_menu_data.return_value = sample_menu
+        with patch('src.menu_sync.sync.OtterClient', return_value=mock_otter_client):
+            await MenuSyncService().sync_menu()
+            
+            changed = sample_menu.model_copy(deep=True)
+            changed.categories[0].items[0].price = Decimal("13.49")
+            mock_otter_client.fetch_menu_data.return_value = changed
+            
+            service = MenuSyncService()
+            result = await service.sync_menu()
+            changes = await service.changes_since(1)
+        
+        assert result.status == "success"
+        assert result.data.version == 2
+        assert result.sync_status.items_created == 0
+        assert result.sync_status.items_updated == 1
+        assert [item.id for item in changes.updated_items] == ["item_123"]
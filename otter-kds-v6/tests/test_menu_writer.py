@@ -0,0 +1,142 @@
+"""Tests for the menu write-through into the KDS database."""
+
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+
+from src.menu_sync.menu_store import MenuStore
+from src.menu_sync.models import Menu, MenuItem, MenuCategory
+from src.menu_sync.sync import MenuSyncService
+from src.menu_sync.writer import MenuWriter
+
+KDS_RESTAURANT_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def _menu(item_ids, price=10.0):
+    return Menu(
+        id="menu_1",
+        restaurant_id="rest_1",
+        name="Main Menu",
+        categories=[MenuCategory(id="cat_1", name="Bowls", items=[
+            MenuItem(id=item_id, name=f"Item {item_id}", price=price, category="Bowls")
+            for item_id in item_ids
+        ])]
+    )
+
+
+def _db():
+    db = Mock()
+    db.create_sync_status = AsyncMock(side_effect=[{"id": "sync_1"}, {"id": "sync_2"}])
+    db.update_sync_status = AsyncMock(return_value={})
+    db.apply_menu_changes = AsyncMock(return_value={"upserted": 0, "deleted": 0})
+    return db
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MenuStore(str(tmp_path / "menus.db"))
+    yield store
+    store.close()
+
+
+class TestMenuWriter:
+    """Tests for MenuWriter."""
+    
+    @pytest.mark.asyncio
+    async def test_writes_in_chunks(self, store):
+        """Test a new version is written in chunks and marked applied."""
+        store.record("default", _menu(["a", "b", "c", "d", "e"]))
+        db = _db()
+        writer = MenuWriter(store, KDS_RESTAURANT_ID, db=db, chunk_size=2)
+        
+        assert await writer.apply("default", "rest_1") == 5
+        
+        chunks = [call.args for call in db.apply_menu_changes.call_args_list]
+        assert [[row["otter_item_id"] for row in items] for _, _, items, _ in chunks] == [
+            ["a", "b"], ["c", "d"], ["e"]
+        ]
+        assert all(args[:2] == (KDS_RESTAURANT_ID, 1) for args in chunks)
+        assert db.update_sync_status.call_args.args[1]["status"] == "completed"
+        assert store.write_state("default", "rest_1").applied_version == 1
+        assert await writer.apply("default", "rest_1") == 0
+    
+    @pytest.mark.asyncio
+    async def test_deletes_share_chunks(self, store):
+        """Test upserts and soft-deletes of a version fill the same chunks."""
+        db = _db()
+        writer = MenuWriter(store, KDS_RESTAURANT_ID, db=db, chunk_size=2)
+        store.record("default", _menu(["a", "b", "c"]))
+        await writer.apply("default", "rest_1")
+        db.apply_menu_changes.reset_mock()
+        
+        store.record("default", _menu(["a"], price=11.0))
+        await writer.apply("default", "rest_1")
+        
+        chunks = [call.args for call in db.apply_menu_changes.call_args_list]
+        assert [(len(items), deleted) for _, version, items, deleted in chunks] == [(1, ["b"]), (0, ["c"])]
+        assert chunks[0][1] == 2
+    
+    @pytest.mark.asyncio
+    async def test_resumes_after_failure(self, store):
+        """Test a failed write resumes at the first unwritten chunk."""
+        store.record("default", _menu(["a", "b", "c", "d", "e"]))
+        db = _db()
+        db.apply_menu_changes.side_effect = [{}, Exception("connection reset")]
+        
+        with pytest.raises(Exception, match="connection reset"):
+            await MenuWriter(store, KDS_RESTAURANT_ID, db=db, chunk_size=2).apply("default", "rest_1")
+        assert store.write_state("default", "rest_1").items_written == 2
+        
+        db = _db()
+        assert await MenuWriter(store, KDS_RESTAURANT_ID, db=db, chunk_size=2).apply("default", "rest_1") == 3
+        
+        db.create_sync_status.assert_not_called()
+        assert db.update_sync_status.call_args.args[0] == "sync_1"
+        assert [[row["otter_item_id"] for row in call.args[2]] for call in db.apply_menu_changes.call_args_list] == [
+            ["c", "d"], ["e"]
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_new_version_restarts_write(self, store):
+        """Test a version recorded after a failed write is written in full."""
+        store.record("default", _menu(["a", "b", "c"]))
+        db = _db()
+        db.apply_menu_changes.side_effect = [{}, Exception("timeout")]
+        writer = MenuWriter(store, KDS_RESTAURANT_ID, db=db, chunk_size=2)
+        with pytest.raises(Exception):
+            await writer.apply("default", "rest_1")
+        
+        store.record("default", _menu(["a", "b", "c", "d"]))
+        db.apply_menu_changes.side_effect = None
+        
+        assert await writer.apply("default", "rest_1") == 4
+        assert store.write_state("default", "rest_1").applied_version == 2
+
+
+class TestSyncWriteThrough:
+    """Tests for MenuSyncService writing synced menus."""
+    
+    @pytest.mark.asyncio
+    async def test_sync_writes_menu(self, mock_otter_client, sample_menu, mock_settings):
+        """Test a sync hands the synced menu to the writer."""
+        mock_otter_client.fetch_menu_data.return_value = sample_menu
+        writer = Mock(spec=MenuWriter)
+        writer.apply = AsyncMock(return_value=1)
+        
+        with patch('src.menu_sync.sync.OtterClient', return_value=mock_otter_client):
+            result = await MenuSyncService(menu_writer=writer).sync_menu()
+        
+        assert result.status == "success"
+        writer.apply.assert_awaited_once_with("default", "rest_123")
+    
+    @pytest.mark.asyncio
+    async def test_dry_run_skips_write(self, mock_otter_client, sample_menu, mock_settings, monkeypatch):
+        """Test nothing is written in dry-run mode."""
+        monkeypatch.setattr("src.config.settings.settings.dry_run_mode", True)
+        mock_otter_client.fetch_menu_data.return_value = sample_menu
+        writer = Mock(spec=MenuWriter)
+        writer.apply = AsyncMock()
+        
+        with patch('src.menu_sync.sync.OtterClient', return_value=mock_otter_client):
+            await MenuSyncService(menu_writer=writer).sync_menu()
+        
+        writer.apply.assert_not_called()
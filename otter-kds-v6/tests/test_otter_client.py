@@ -0,0 +1,214 @@
+"""Tests for Otter session reuse against a local fake Otter server."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from unittest.mock import patch
+
+from src.menu_sync.models import MenuItem
+from src.menu_sync.otter_client import OtterClient
+from src.menu_sync.session_cache import SessionCache
+
+MENU = {
+    "id": "menu_1",
+    "restaurant_id": "rest_1",
+    "name": "Main Menu",
+    "categories": [
+        {
+            "id": "cat_1",
+            "name": "Bowls",
+            "items": [{"id": "item_1", "name": "Rice Bowl", "price": 11.5}]
+        }
+    ]
+}
+
+
+class FakeOtterHandler(BaseHTTPRequestHandler):
+    """Serves the menu to requests bearing the server's current token."""
+    
+    def do_GET(self):
+        self.server.requests.append(self.headers.get("Authorization"))
+        if self.headers.get("Authorization") != f"Bearer {self.server.valid_token}":
+            self.send_response(401)
+            self.end_headers()
+            return
+        self.server.conditional.append(self.headers.get("If-None-Match"))
+        if self.server.etag and self.headers.get("If-None-Match") == self.server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(self.server.menu).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.etag:
+            self.send_header("ETag", self.server.etag)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.pushed.append(json.loads(body))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def otter_server():
+    """Fake Otter API on a free local port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOtterHandler)
+    server.valid_token = "token_1"
+    server.menu = MENU
+    server.etag = None
+    server.requests = []
+    server.conditional = []
+    server.pushed = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_client(otter_server, tmp_path, monkeypatch):
+    """Build clients sharing one on-disk session cache and a fake browser login."""
+    logins = []
+    
+    def browser_login(self):
+        time.sleep(0.05)
+        logins.append(self.profile_name)
+        return otter_server.valid_token, time.time() + 3600
+    
+    monkeypatch.setattr(OtterClient, "_browser_login", browser_login)
+    monkeypatch.setattr("src.config.settings.settings.otter_username", "chef@example.com")
+    monkeypatch.setattr("src.config.settings.settings.otter_password", "secret")
+    monkeypatch.setattr("src.config.settings.settings.otter_base_url", f"http://127.0.0.1:{otter_server.server_port}")
+    
+    def make():
+        return OtterClient(session_cache=SessionCache(str(tmp_path)))
+    make.logins = logins
+    return make
+
+
+class TestOtterSessionCache:
+    """Tests for OtterClient session token reuse."""
+    
+    @pytest.mark.asyncio
+    async def test_token_reused_across_clients(self, make_client):
+        """Test only the first sync launches a browser login."""
+        for _ in range(3):
+            async with make_client() as client:
+                assert await client.authenticate()
+                menu = await client.fetch_menu_data()
+                assert menu.name == "Main Menu"
+        
+        assert len(make_client.logins) == 1
+    
+    @pytest.mark.asyncio
+    async def test_login_again_after_401(self, make_client, otter_server):
+        """Test a rejected token triggers one browser login and a retry."""
+        async with make_client() as client:
+            await client.authenticate()
+        otter_server.valid_token = "token_2"
+        
+        async with make_client() as client:
+            await client.authenticate()
+            menu = await client.fetch_menu_data()
+        
+        assert menu is not None
+        assert len(make_client.logins) == 2
+        assert otter_server.requests == ["Bearer token_1", "Bearer token_2"]
+        
+        async with make_client() as client:
+            await client.authenticate()
+            assert client.session_token == "token_2"
+        assert len(make_client.logins) == 2
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_workers_log_in_once(self, make_client):
+        """Test workers racing on an empty cache share one login."""
+        clients = [make_client() for _ in range(4)]
+        results = await asyncio.gather(*(client.authenticate() for client in clients))
+        
+        assert all(results)
+        assert len(make_client.logins) == 1
+        assert {client.session_token for client in clients} == {"token_1"}
+    
+    def test_expired_or_foreign_entries_ignored(self, tmp_path):
+        """Test expired tokens and tokens of another username are not reused."""
+        cache = SessionCache(str(tmp_path))
+        cache.save("default", "chef@example.com", "token_1", time.time() + 3600)
+        
+        assert cache.load("default", "chef@example.com") == "token_1"
+        assert cache.load("default", "owner@example.com") is None
+        
+        cache.save("default", "chef@example.com", "token_1", time.time() + 30)
+        assert cache.load("default", "chef@example.com") is None
+
+
+class TestConditionalMenuFetch:
+    """Tests for skipping unchanged menus in fetch_menu_data."""
+    
+    @pytest.mark.asyncio
+    async def test_not_modified_returns_previous_menu(self, make_client, otter_server):
+        """Test a 304 answer returns the last menu without parsing."""
+        otter_server.etag = '"v1"'
+        
+        async with make_client() as client:
+            await client.authenticate()
+            with patch.object(client, "_parse_menu_data", wraps=client._parse_menu_data) as parse:
+                first = await client.fetch_menu_data()
+                second = await client.fetch_menu_data()
+        
+        assert second is first
+        assert parse.call_count == 1
+        assert client.last_fetch_result == "not_modified"
+        assert otter_server.conditional == [None, '"v1"']
+    
+    @pytest.mark.asyncio
+    async def test_same_body_is_not_parsed_again(self, make_client, otter_server):
+        """Test an identical 200 body is recognized by its hash."""
+        async with make_client() as client:
+            await client.authenticate()
+            with patch.object(client, "_parse_menu_data", wraps=client._parse_menu_data) as parse:
+                first = await client.fetch_menu_data()
+                second = await client.fetch_menu_data()
+                
+                otter_server.menu = {**MENU, "name": "Late Menu"}
+                third = await client.fetch_menu_data()
+        
+        assert second is first
+        assert third is not first
+        assert third.name == "Late Menu"
+        assert parse.call_count == 2
+        assert client.last_fetch_result == "changed"
+
+
+class TestMenuItemPush:
+    """Tests for pushing menu item updates to Otter."""
+    
+    @pytest.mark.asyncio
+    async def test_update_menu_items(self, make_client, otter_server):
+        """Test items are pushed with JSON prices and a result per item."""
+        items = [
+            MenuItem(id=f"item_{i}", name=f"Item {i}", price="11.50", category="Bowls", available=False)
+            for i in range(5)
+        ]
+        async with make_client() as client:
+            await client.authenticate()
+            results = await client.update_menu_items(items)
+        
+        assert list(results) == [item.id for item in items]
+        assert all(result.success for result in results.values())
+        assert sorted(body["id"] for body in otter_server.pushed) == list(results)
+        assert otter_server.pushed[0]["price"] == "11.50"
+        assert otter_server.pushed[0]["available"] is False
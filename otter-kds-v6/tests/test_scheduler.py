@@ -0,0 +1,199 @@
+"""Tests for the adaptive menu sync schedule."""
+
+import asyncio
+import time
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import Mock, AsyncMock
+
+from src.menu_sync import cli as cli_module
+from src.menu_sync.menu_store import MenuStore
+from src.menu_sync.models import MenuDiff
+from src.menu_sync.scheduler import SyncScheduler
+from src.menu_sync.sync import MenuSyncService, run_schedule
+
+MINUTE = 60
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MenuStore(str(tmp_path / "menus.db"))
+    yield store
+    store.close()
+
+
+def _scheduler(store, profiles=("downtown", "airport")):
+    return SyncScheduler(
+        store, profiles,
+        min_interval=5 * MINUTE, max_interval=240 * MINUTE, initial_interval=30 * MINUTE, poll_seconds=0.05
+    )
+
+
+class TestSyncScheduler:
+    """Tests for SyncScheduler."""
+    
+    @pytest.mark.asyncio
+    async def test_interval_follows_change_rate(self, store):
+        """Test stable menus back off to the max interval and changing ones speed up."""
+        scheduler = _scheduler(store)
+        await scheduler.load()
+        assert scheduler.entries["downtown"].interval == pytest.approx(30 * MINUTE)
+        
+        intervals = []
+        for _ in range(15):
+            intervals.append(scheduler.record("downtown", changed=False, started_at=time.time()).interval)
+        assert intervals == sorted(intervals)
+        assert intervals[-1] > 200 * MINUTE
+        
+        for _ in range(15):
+            entry = scheduler.record("airport", changed=True, started_at=time.time())
+        assert entry.interval < 6 * MINUTE
+        assert scheduler.interval_for(0) == 240 * MINUTE
+        assert scheduler.interval_for(1) == 5 * MINUTE
+    
+    @pytest.mark.asyncio
+    async def test_failures_retry_at_min_interval(self, store):
+        """Test a failed sync keeps the change rate and retries soon."""
+        scheduler = _scheduler(store)
+        await scheduler.load()
+        rate = scheduler.entries["downtown"].change_rate
+        now = time.time()
+        
+        entry = scheduler.record("downtown", changed=False, started_at=now, failed=True, now=now)
+        
+        assert entry.change_rate == rate
+        assert entry.next_run_at - now <= 5.5 * MINUTE
+    
+    @pytest.mark.asyncio
+    async def test_schedule_survives_restart(self, store):
+        """Test a restarted scheduler waits for stored next runs instead of syncing everything."""
+        scheduler = _scheduler(store)
+        await scheduler.load()
+        for profile in scheduler.profiles:
+            started_at = time.time()
+            await scheduler.save(scheduler.record(profile, changed=False, started_at=started_at), started_at)
+        
+        restarted = _scheduler(store, ("downtown", "airport", "harbor"))
+        await restarted.load()
+        
+        assert restarted.entries["downtown"] == scheduler.entries["downtown"]
+        assert restarted.due(time.time() + 60) == ["harbor"]
+    
+    @pytest.mark.asyncio
+    async def test_sync_request_jumps_queue(self, store):
+        """Test a request from another process makes a profile due first."""
+        scheduler = _scheduler(store)
+        await scheduler.load()
+        for profile in scheduler.profiles:
+            started_at = time.time()
+            await scheduler.save(scheduler.record(profile, changed=False, started_at=started_at), started_at)
+        
+        assert MenuStore(str(store.path)).request_sync("airport") == 1
+        await scheduler.wait()
+        assert scheduler.due() == ["airport"]
+        
+        started_at = time.time()
+        await scheduler.save(scheduler.record("airport", changed=False, started_at=started_at), started_at)
+        assert store.sync_requests() == {}
+        assert scheduler.due() == []
+    
+    def test_request_for_unknown_profile_refused(self, store, monkeypatch):
+        """Test a trigger for a profile the service doesn't sync is an error, not a stray schedule."""
+        with pytest.raises(ValueError):
+            store.request_sync("uptown", known_profiles=("downtown", "airport"))
+        assert store.request_sync("airport", known_profiles=("downtown", "airport")) == 1
+        assert list(store.sync_requests()) == ["airport"]
+        
+        monkeypatch.setattr(cli_module, "setup_logging", lambda: None)
+        monkeypatch.setattr(cli_module.settings, "snapshot_path", str(store.path))
+        monkeypatch.setattr(cli_module, "scheduled_profiles", lambda: ["downtown", "airport"])
+        result = CliRunner().invoke(cli_module.cli, ["trigger", "--profile", "uptown"])
+        
+        assert result.exit_code == 1
+        assert "Profile 'uptown' not found" in result.output
+        assert list(store.sync_requests()) == ["airport"]
+    
+    @pytest.mark.asyncio
+    async def test_request_during_sync_is_kept(self, store):
+        """Test a request made while a profile syncs causes one more sync."""
+        scheduler = _scheduler(store)
+        await scheduler.load()
+        started_at = time.time() - 1
+        scheduler.trigger("downtown")
+        store.request_sync("downtown")
+        
+        entry = scheduler.record("downtown", changed=False, started_at=started_at)
+        await scheduler.save(entry, started_at)
+        
+        assert entry.requested_at is not None
+        assert "downtown" in store.sync_requests()
+
+
+class TestRunSchedule:
+    """Tests for the scheduler loop."""
+    
+    @pytest.mark.asyncio
+    async def test_only_due_profiles_sync(self, store, mock_settings, monkeypatch):
+        """Test profiles sync when due and triggers wake the loop."""
+        monkeypatch.setattr("src.config.settings.settings.sync_jitter_seconds", 0)
+        scheduler = _scheduler(store)
+        synced = []
+        
+        def service(profile, changed):
+            async def sync_menu():
+                synced.append(profile)
+                if len(synced) == 3:
+                    monkeypatch.setattr("src.config.settings.settings.sync_enabled", False)
+                return Mock(status="success", error=None, sync_status=Mock(items_processed=1))
+            mock = Mock(spec=MenuSyncService)
+            mock.sync_menu = AsyncMock(side_effect=sync_menu)
+            mock.last_diff = MenuDiff(deleted_items=["item_1"]) if changed else MenuDiff()
+            return mock
+        
+        services = {"downtown": service("downtown", False), "airport": service("airport", True)}
+        loop = asyncio.create_task(run_schedule(services, scheduler))
+        await asyncio.sleep(0.2)
+        assert sorted(synced) == ["airport", "downtown"]
+        assert scheduler.entries["airport"].change_rate > scheduler.entries["downtown"].change_rate
+        
+        scheduler.trigger("downtown")
+        await asyncio.wait_for(loop, 1)
+        
+        assert synced[2] == "downtown"
+    
+    @pytest.mark.asyncio
+    async def test_trigger_does_not_wait_for_slow_profile(self, store, mock_settings, monkeypatch):
+        """Test a triggered profile syncs while another is still syncing."""
+        monkeypatch.setattr("src.config.settings.settings.sync_jitter_seconds", 0)
+        monkeypatch.setattr("src.config.settings.settings.sync_concurrency", 2)
+        scheduler = _scheduler(store)
+        release = asyncio.Event()
+        synced = []
+        
+        def service(profile, slow):
+            async def sync_menu():
+                synced.append(profile)
+                if slow:
+                    await release.wait()
+                return Mock(status="success", error=None, sync_status=Mock(items_processed=1))
+            mock = Mock(spec=MenuSyncService)
+            mock.sync_menu = AsyncMock(side_effect=sync_menu)
+            mock.last_diff = MenuDiff()
+            return mock
+        
+        services = {"downtown": service("downtown", False), "airport": service("airport", True)}
+        loop = asyncio.create_task(run_schedule(services, scheduler))
+        await asyncio.sleep(0.2)
+        assert sorted(synced) == ["airport", "downtown"]
+        
+        scheduler.trigger()
+        await asyncio.sleep(0.1)
+        assert synced.count("downtown") == 2
+        assert synced.count("airport") == 1
+        assert scheduler.entries["airport"].last_run_at is None
+        
+        monkeypatch.setattr("src.config.settings.settings.sync_enabled", False)
+        release.set()
+        await asyncio.wait_for(loop, 1)
+        assert scheduler.entries["airport"].last_run_at is not None
@@ -1,9 +1,13 @@
 """Tests for menu synchronization service."""
 
+import asyncio
+
+import httpx
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 
-from src.menu_sync.sync import MenuSyncService
+from src.menu_sync.otter_client import OtterClient
+from src.menu_sync.sync import MenuSyncService, sync_profiles
 from src.menu_sync.models import Menu, MenuItem, MenuCategory, SyncStatus, MenuDiff
 
 
@@ -168,4 +172,63 @@ class TestMenuSyncService:
         assert result.status == "error"
         assert "Network error" in result.error
         assert result.sync_status.status == "failed"
-        assert len(result.sync_status.errors) > 0
\ No newline at end of file
+        assert len(result.sync_status.errors) > 0
+
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_menu_skips_diff(self, mock_otter_client, sample_menu, mock_settings):
+        """Test a menu the client reports as unchanged is not diffed."""
+        mock_otter_client.fetch_menu_data.return_value = sample_menu
+        
+        with patch('src.menu_sync.sync.OtterClient', return_value=mock_otter_client):
+            service = MenuSyncService()
+            service.current_menu = sample_menu
+            with patch.object(service, "_calculate_menu_diff") as diff:
+                result = await service.sync_menu()
+        
+        assert result.status == "success"
+        assert result.data is sample_menu
+        diff.assert_not_called()
+
+class TestSyncProfiles:
+    """Tests for concurrent multi-profile sync."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, sample_menu):
+        """Test profiles sync concurrently up to the limit, each timed."""
+        running = 0
+        peak = 0
+        
+        async def slow_sync():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            return Mock(status="success", error=None, sync_status=Mock(items_processed=3))
+        
+        services = {}
+        for i in range(6):
+            service = Mock(spec=MenuSyncService)
+            service.sync_menu = AsyncMock(side_effect=slow_sync)
+            services[f"location_{i}"] = service
+        services["location_2"].sync_menu = AsyncMock(side_effect=Exception("Otter down"))
+        
+        results = await sync_profiles(services, concurrency=2, jitter_seconds=0)
+        
+        assert peak == 2
+        assert [result.profile for result in results] == list(services)
+        assert results[0].status == "success"
+        assert results[0].items_processed == 3
+        assert results[0].duration_seconds >= 0.05
+        assert results[2].status == "error"
+        assert results[2].error == "Otter down"
+    
+    @pytest.mark.asyncio
+    async def test_shared_http_client_stays_open(self, mock_settings):
+        """Test an OtterClient does not close a client it was given."""
+        async with httpx.AsyncClient() as http_client:
+            async with OtterClient(http_client=http_client) as client:
+                assert client._client is http_client
+            assert not http_client.is_closed
+
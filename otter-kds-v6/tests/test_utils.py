@@ -5,7 +5,11 @@ import asyncio
 import time
 from unittest.mock import Mock
 
-from src.utils.retry import retry
+import httpx
+
+from src.utils.retry import (
+    retry, is_transient, CircuitBreaker, CircuitOpenError, RetryBudget
+)
 
 
 class TestRetryDecorator:
@@ -135,4 +139,168 @@ class TestRetryDecorator:
             assert abs(delays[0] - 0.1) < 0.01  # First delay
             assert abs(delays[1] - 0.2) < 0.01  # Second delay (backoff)
         finally:
-            time.sleep = original_sleep
\ No newline at end of file
+            time.sleep = original_sleep
+
+
+def _status_error(status, headers=None):
+    request = httpx.Request("GET", "https://api.tryotter.com/api/v1/menus")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=response)
+
+
+class TestRetryPolicies:
+    """Tests for jitter, classification, Retry-After and budgets."""
+    
+    def test_full_jitter_stays_under_delay(self, monkeypatch):
+        """Test jittered waits are spread between 0 and the backoff delay."""
+        delays = []
+        monkeypatch.setattr(time, "sleep", delays.append)
+        
+        @retry(attempts=6, delay=0.1, backoff=2.0, jitter=True)
+        def func():
+            raise ValueError("Error")
+        
+        with pytest.raises(ValueError):
+            func()
+        
+        assert len(delays) == 5
+        assert all(0 <= wait <= 0.1 * 2 ** i for i, wait in enumerate(delays))
+        assert len(set(delays)) > 1
+    
+    @pytest.mark.asyncio
+    async def test_permanent_errors_not_retried(self):
+        """Test errors the classifier rejects are raised at once."""
+        calls = []
+        
+        @retry(attempts=3, delay=0.01, retry_if=is_transient)
+        async def func():
+            calls.append(1)
+            raise _status_error(404)
+        
+        with pytest.raises(httpx.HTTPStatusError):
+            await func()
+        assert len(calls) == 1
+    
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honored(self, monkeypatch):
+        """Test a Retry-After longer than the backoff delay is waited out."""
+        delays = []
+        
+        async def fake_sleep(seconds):
+            delays.append(seconds)
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        calls = []
+        
+        @retry(attempts=2, delay=0.01, max_delay=0.05, retry_if=is_transient)
+        async def func():
+            calls.append(1)
+            if len(calls) == 1:
+                raise _status_error(429, {"Retry-After": "3"})
+            return "success"
+        
+        assert await func() == "success"
+        assert delays == [3.0]
+    
+    @pytest.mark.asyncio
+    async def test_budget_limits_retries(self):
+        """Test retries stop once the shared budget is spent."""
+        budget = RetryBudget(ratio=0, min_retries=2)
+        calls = []
+        
+        @retry(attempts=5, delay=0, budget=budget)
+        async def func():
+            calls.append(1)
+            raise ConnectionError("down")
+        
+        with pytest.raises(ConnectionError):
+            await func()
+        with pytest.raises(ConnectionError):
+            await func()
+        
+        # 2 first attempts + the 2 retries the budget allows
+        assert len(calls) == 4
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker."""
+    
+    @pytest.mark.asyncio
+    async def test_opens_and_fails_fast(self):
+        """Test transient failures open the circuit and later calls are not made."""
+        breaker = CircuitBreaker("otter", failure_threshold=2, reset_timeout=60)
+        calls = []
+        
+        @retry(attempts=5, delay=0, retry_if=is_transient, breaker=breaker)
+        async def func():
+            calls.append(1)
+            raise ConnectionError("down")
+        
+        with pytest.raises(ConnectionError):
+            await func()
+        assert len(calls) == 2
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        with pytest.raises(CircuitOpenError):
+            await func()
+        assert len(calls) == 2
+    
+    def test_half_open_probe(self):
+        """Test one probe is let through after the timeout and its outcome decides."""
+        breaker = CircuitBreaker("supabase", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        
+        time.sleep(0.06)
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        time.sleep(0.06)
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.before_call()
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_frees_its_slot(self):
+        """Test a probe cancelled by a timeout lets the next call probe again."""
+        breaker = CircuitBreaker("otter", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        calls = []
+        
+        @retry(attempts=1, exceptions=(ConnectionError,), breaker=breaker)
+        async def func(seconds):
+            calls.append(seconds)
+            await asyncio.sleep(seconds)
+            return "ok"
+        
+        await asyncio.sleep(0.06)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(func(1), timeout=0.01)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        
+        assert await func(0) == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert calls == [1, 0]
+    
+    @pytest.mark.asyncio
+    async def test_unhandled_error_in_probe_frees_its_slot(self):
+        """Test a probe raising an exception outside ``exceptions`` doesn't wedge the circuit."""
+        breaker = CircuitBreaker("otter", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        
+        @retry(attempts=1, exceptions=(ConnectionError,), breaker=breaker)
+        async def func(error):
+            if error:
+                raise KeyError("id")
+            return "ok"
+        
+        await asyncio.sleep(0.06)
+        with pytest.raises(KeyError):
+            await func(True)
+        
+        assert await func(False) == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
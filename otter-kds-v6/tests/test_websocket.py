@@ -0,0 +1,440 @@
+"""Tests for the WebSocket endpoints."""
+
+import asyncio
+import json
+import os
+import time
+
+import jwt
+import pytest
+from unittest.mock import AsyncMock, Mock
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.api.main import app
+from src.api.routers import websocket as ws_router
+from src.api.routers.websocket import ConnectionManager, OrderEventLog, RealtimeHub
+
+RESTAURANT_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def _token(restaurant_id: str = RESTAURANT_ID, **claims) -> str:
+    return jwt.encode(
+        {"user_id": "user_123", "restaurant_id": restaurant_id, **claims},
+        os.getenv("JWT_SECRET", "your-secret-key"),
+        algorithm="HS256"
+    )
+
+
+def _wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+class FakeSocket:
+    """Minimal WebSocket that records what it was sent."""
+    
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+    
+    async def accept(self):
+        pass
+    
+    async def send_text(self, data: str):
+        await asyncio.sleep(self.delay)
+        self.sent.append(data)
+    
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed_with = code
+
+
+async def _disconnect_all(manager: ConnectionManager):
+    for restaurant_id, sockets in list(manager.active_connections.items()):
+        for socket in list(sockets):
+            manager.disconnect(socket, restaurant_id)
+    for restaurant_id, stations in list(manager.station_connections.items()):
+        for sockets in list(stations.values()):
+            for socket in list(sockets):
+                manager.disconnect(socket, restaurant_id)
+    await asyncio.sleep(0)
+
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """Mock database manager recording realtime subscriptions."""
+    monkeypatch.setattr(ws_router.hub, "linger_seconds", 0)
+    db = Mock()
+    db.callbacks = []
+    
+    def subscribe(restaurant_id, callback):
+        db.callbacks.append(callback)
+        return f"orders_{restaurant_id}"
+    
+    db.subscribe_to_orders = Mock(side_effect=subscribe)
+    db.item_callbacks = []
+    
+    def subscribe_items(restaurant_id, callback):
+        db.item_callbacks.append(callback)
+        return f"restaurant_items_{restaurant_id}"
+    
+    db.subscribe_to_restaurant_items = Mock(side_effect=subscribe_items)
+    app.state.db = db
+    yield db
+    app.state.db = None
+
+
+@pytest.fixture
+def client():
+    """Test client that does not run the app lifespan."""
+    return TestClient(app)
+
+
+class TestRealtimeHub:
+    """Tests for the shared realtime channel hub."""
+    
+    def test_one_channel_per_restaurant(self, client, mock_db):
+        """Test many sockets share one upstream subscription."""
+        url = f"/ws/orders?token={_token()}"
+        with client.websocket_connect(url) as first, client.websocket_connect(url) as second:
+            first.receive_json()
+            second.receive_json()
+            
+            assert mock_db.subscribe_to_orders.call_count == 1
+            assert ws_router.hub.subscriber_count(RESTAURANT_ID) == 2
+        
+        _wait_for(lambda: ws_router.hub.subscriber_count(RESTAURANT_ID) == 0)
+        mock_db.unsubscribe.assert_called_once_with(f"orders_{RESTAURANT_ID}")
+    
+    def test_event_fans_out_to_all_sockets(self, client, mock_db):
+        """Test one realtime event reaches every socket of the restaurant."""
+        url = f"/ws/orders?token={_token()}"
+        with client.websocket_connect(url) as first, client.websocket_connect(url) as second:
+            first.receive_json()
+            second.receive_json()
+            
+            mock_db.callbacks[0]({"new": {"id": "order_1", "restaurant_id": RESTAURANT_ID}})
+            
+            for socket in (first, second):
+                message = socket.receive_json()
+                assert message["type"] == "order_update"
+                assert message["data"]["order"]["id"] == "order_1"
+    
+    def test_listeners_receive_channel_events(self, client, mock_db):
+        """Test in-process listeners get every event of a shared channel."""
+        received = []
+        ws_router.hub.add_listener(RESTAURANT_ID, ws_router.ORDERS_CHANNEL, received.append)
+        try:
+            with client.websocket_connect(f"/ws/orders?token={_token()}") as socket:
+                socket.receive_json()
+                mock_db.callbacks[0]({"new": {"id": "order_1"}})
+                socket.receive_json()
+        finally:
+            ws_router.hub.remove_listener(RESTAURANT_ID, ws_router.ORDERS_CHANNEL, received.append)
+        
+        assert received == [{"new": {"id": "order_1"}}]
+    
+    def test_channel_reopened_after_last_socket_leaves(self, client, mock_db):
+        """Test a new socket after teardown opens a fresh channel."""
+        url = f"/ws/orders?token={_token()}"
+        with client.websocket_connect(url) as socket:
+            socket.receive_json()
+        _wait_for(lambda: ws_router.hub.subscriber_count(RESTAURANT_ID) == 0)
+        
+        with client.websocket_connect(url) as socket:
+            socket.receive_json()
+        
+        assert mock_db.subscribe_to_orders.call_count == 2
+
+
+class TestAuthentication:
+    """Tests for WebSocket token checks."""
+    
+    def test_connected_first_then_pong(self, client, mock_db):
+        """Test the connection message comes first and pings are answered."""
+        for url in (f"/ws/orders?token={_token()}", f"/ws/kitchen/grill?token={_token()}"):
+            with client.websocket_connect(url) as socket:
+                assert socket.receive_json()["action"] == "connected"
+                socket.send_text(json.dumps({"type": "ping"}))
+                assert socket.receive_json()["type"] == "pong"
+    
+    def test_refresh_token_refused(self, client, mock_db):
+        """Test a refresh token can't open a socket or read stats."""
+        token = _token(type="refresh", jti="jti_1", fam="fam_1")
+        
+        for url in (f"/ws/orders?token={token}", f"/ws/kitchen/grill?token={token}"):
+            with pytest.raises(WebSocketDisconnect) as closed:
+                with client.websocket_connect(url):
+                    pass
+            assert closed.value.code == 4001
+        
+        assert client.get(f"/ws/stats?token={token}").status_code == 401
+        mock_db.subscribe_to_orders.assert_not_called()
+        mock_db.subscribe_to_restaurant_items.assert_not_called()
+
+
+class TestStationRouting:
+    """Tests for /ws/kitchen/{station} item routing."""
+    
+    def test_item_event_reaches_only_its_station(self, client, mock_db):
+        """Test a grill ticket goes to grill screens and not to the fryer."""
+        token = _token()
+        with client.websocket_connect(f"/ws/kitchen/grill?token={token}") as grill, \
+                client.websocket_connect(f"/ws/kitchen/fryer?token={token}") as fryer:
+            grill.receive_json()
+            fryer.receive_json()
+            assert mock_db.subscribe_to_restaurant_items.call_count == 1
+            
+            mock_db.item_callbacks[0]({
+                "eventType": "INSERT",
+                "new": {"id": "item_1", "station": "grill", "restaurant_id": RESTAURANT_ID}
+            })
+            message = grill.receive_json()
+            assert message["type"] == "item_update"
+            assert message["action"] == "create"
+            assert message["data"]["item"]["id"] == "item_1"
+            
+            fryer.send_json({"type": "ping"})
+            assert fryer.receive_json()["type"] == "pong"
+        
+        _wait_for(lambda: ws_router.hub.subscriber_count(RESTAURANT_ID, ws_router.ITEMS_CHANNEL) == 0)
+        mock_db.unsubscribe.assert_called_once_with(f"restaurant_items_{RESTAURANT_ID}")
+    
+    @pytest.mark.asyncio
+    async def test_station_move_notifies_both_stations(self):
+        """Test an item moved between stations reaches the old and new one."""
+        manager = ConnectionManager()
+        grill, fryer, salad = FakeSocket(), FakeSocket(), FakeSocket()
+        await manager.connect(grill, "rest_123", station="grill")
+        await manager.connect(fryer, "rest_123", station="Fryer")
+        await manager.connect(salad, "rest_123", station="salad")
+        
+        await manager.send_to_stations("rest_123", {"grill", "fryer"}, {"type": "item_update"})
+        await asyncio.sleep(0.05)
+        
+        assert len(grill.sent) == 1
+        assert len(fryer.sent) == 1
+        assert salad.sent == []
+        await _disconnect_all(manager)
+        assert manager.station_connections == {}
+
+
+def _patch_data(payload: str) -> dict:
+    return json.loads(payload)["data"]
+
+
+class TestOrderEventLog:
+    """Tests for sequenced order patches."""
+    
+    def test_patches_only_changed_fields(self):
+        """Test an update after a known row carries only the changed fields."""
+        log = OrderEventLog(buffer_size=10)
+        created = _patch_data(log.record({
+            "eventType": "INSERT",
+            "new": {"id": "o1", "status": "pending", "notes": None}
+        }))
+        updated = _patch_data(log.record({
+            "eventType": "UPDATE",
+            "new": {"id": "o1", "status": "in_progress", "notes": None}
+        }))
+        
+        assert (created["seq"], created["action"]) == (1, "create")
+        assert created["patch"] == {"id": "o1", "status": "pending", "notes": None}
+        assert (updated["seq"], updated["action"]) == (2, "update")
+        assert updated["patch"] == {"status": "in_progress"}
+    
+    def test_replay_and_gap(self):
+        """Test replay covers the buffer and reports a gap beyond it."""
+        log = OrderEventLog(buffer_size=3)
+        for i in range(5):
+            log.record({"new": {"id": f"o{i}"}})
+        
+        assert [_patch_data(p)["seq"] for p in log.since(3)] == [4, 5]
+        assert log.since(5) == []
+        assert log.since(1) is None  # seq 2 was dropped from the buffer
+        assert log.since(2) is not None
+        assert log.since(9) is None
+        assert log.since(3, epoch="other") is None
+
+
+class TestDeltaProtocol:
+    """Tests for protocol 2 on /ws/orders."""
+    
+    def test_snapshot_then_patches(self, client, mock_db):
+        """Test a new delta client gets a snapshot followed by patches."""
+        mock_db.get_active_orders = AsyncMock(return_value=[{"id": "o1", "status": "pending"}])
+        with client.websocket_connect(f"/ws/orders?token={_token()}&protocol=2") as socket:
+            connected = socket.receive_json()
+            snapshot = socket.receive_json()
+            assert connected["data"]["protocol"] == 2
+            assert snapshot["type"] == "snapshot"
+            assert snapshot["data"]["orders"] == [{"id": "o1", "status": "pending"}]
+            
+            mock_db.callbacks[0]({"eventType": "UPDATE", "new": {"id": "o1", "status": "in_progress"}})
+            patch = socket.receive_json()
+            assert patch["type"] == "order_patch"
+            assert patch["data"]["seq"] == 1
+            assert patch["data"]["epoch"] == connected["data"]["epoch"]
+    
+    def test_resume_replays_missed_patches(self, client, mock_db):
+        """Test reconnecting with since replays only the missed patches."""
+        mock_db.get_active_orders = AsyncMock(return_value=[])
+        token = _token()
+        
+        # Keep every socket on one event loop, as in the server
+        with client:
+            app.state.db = mock_db
+            with client.websocket_connect(f"/ws/orders?token={token}") as legacy:
+                legacy.receive_json()
+                with client.websocket_connect(f"/ws/orders?token={token}&protocol=2") as socket:
+                    epoch = socket.receive_json()["data"]["epoch"]
+                    socket.receive_json()
+                    mock_db.callbacks[0]({"new": {"id": "o1", "status": "pending"}})
+                    assert socket.receive_json()["data"]["seq"] == 1
+                
+                # Missed while disconnected
+                mock_db.callbacks[0]({"new": {"id": "o1", "status": "in_progress"}})
+                mock_db.callbacks[0]({"new": {"id": "o2", "status": "pending"}})
+                assert legacy.receive_json()["type"] == "order_update"
+                assert legacy.receive_json()["type"] == "order_update"
+                
+                url = f"/ws/orders?token={token}&since=1&epoch={epoch}"
+                with client.websocket_connect(url) as socket:
+                    assert socket.receive_json()["data"]["seq"] == 3
+                    replayed = [socket.receive_json()["data"] for _ in range(2)]
+                    assert [p["seq"] for p in replayed] == [2, 3]
+                    assert replayed[0]["patch"] == {"status": "in_progress"}
+        
+        mock_db.get_active_orders.assert_awaited_once()
+    
+    def test_unknown_epoch_falls_back_to_snapshot(self, client, mock_db):
+        """Test a client resuming from another epoch gets a snapshot."""
+        mock_db.get_active_orders = AsyncMock(return_value=[])
+        url = f"/ws/orders?token={_token()}&since=42&epoch=stale"
+        with client.websocket_connect(url) as socket:
+            socket.receive_json()
+            assert socket.receive_json()["type"] == "snapshot"
+    
+    @pytest.mark.asyncio
+    async def test_channel_lingers_for_quick_reconnect(self):
+        """Test a reconnect within the linger keeps the channel and its log."""
+        db = Mock()
+        db.subscribe_to_orders = Mock(return_value="orders_rest_123")
+        hub = RealtimeHub(ConnectionManager(), linger_seconds=0.05)
+        
+        hub.acquire(db, "rest_123")
+        log = hub.logs["rest_123"]
+        hub.release(db, "rest_123")
+        hub.acquire(db, "rest_123")
+        
+        assert hub.logs["rest_123"] is log
+        assert db.subscribe_to_orders.call_count == 1
+        
+        hub.release(db, "rest_123")
+        await asyncio.sleep(0.1)
+        db.unsubscribe.assert_called_once_with("orders_rest_123")
+        assert "rest_123" not in hub.logs
+
+
+class TestConnectionManager:
+    """Tests for the queued broadcast path."""
+    
+    @pytest.mark.asyncio
+    async def test_serializes_once_per_broadcast(self, monkeypatch):
+        """Test the message is encoded once however many sockets listen."""
+        calls = []
+        original = ws_router.encode_message
+        monkeypatch.setattr(ws_router, "encode_message", lambda m: calls.append(m) or original(m))
+        manager = ConnectionManager()
+        sockets = [FakeSocket() for _ in range(5)]
+        for socket in sockets:
+            await manager.connect(socket, "rest_123")
+        
+        await manager.send_to_restaurant("rest_123", {"type": "order_update", "order": {"id": "o1"}})
+        await asyncio.sleep(0.05)
+        
+        assert len(calls) == 1
+        assert all(len(socket.sent) == 1 for socket in sockets)
+        assert json.loads(sockets[0].sent[0])["data"]["order"]["id"] == "o1"
+        await _disconnect_all(manager)
+    
+    @pytest.mark.asyncio
+    async def test_slow_socket_does_not_delay_others(self):
+        """Test fast sockets are served while a slow one is still sending."""
+        manager = ConnectionManager()
+        fast, slow = FakeSocket(), FakeSocket(delay=1.0)
+        await manager.connect(fast, "rest_123")
+        await manager.connect(slow, "rest_123")
+        
+        await manager.send_to_restaurant("rest_123", {"type": "order_update"})
+        await asyncio.sleep(0.05)
+        
+        assert len(fast.sent) == 1
+        assert slow.sent == []
+        await _disconnect_all(manager)
+    
+    @pytest.mark.asyncio
+    async def test_replies_share_the_socket_queue(self):
+        """Test the connection message and replies go out in order through the writer task."""
+        manager = ConnectionManager()
+        socket = FakeSocket(delay=0.01)
+        await manager.connect(socket, "rest_123", catch_up=lambda: ['{"type":"connection"}'])
+        
+        await manager.send_to_restaurant("rest_123", {"type": "order_update"})
+        manager.send_to_socket(socket, {"type": "pong"})
+        await asyncio.sleep(0.1)
+        
+        assert [json.loads(sent)["type"] for sent in socket.sent] == ["connection", "order_update", "pong"]
+        await _disconnect_all(manager)
+    
+    @pytest.mark.asyncio
+    async def test_slow_consumer_evicted_when_queue_full(self):
+        """Test a socket whose queue overflows is dropped and closed."""
+        manager = ConnectionManager(queue_size=2)
+        fast, slow = FakeSocket(), FakeSocket(delay=10)
+        await manager.connect(fast, "rest_123")
+        await manager.connect(slow, "rest_123")
+        
+        for i in range(4):
+            await manager.send_to_restaurant("rest_123", {"type": "order_update", "n": i})
+            await asyncio.sleep(0.01)
+        
+        assert manager.active_connections["rest_123"] == {fast}
+        assert slow.closed_with == 1013
+        assert len(fast.sent) == 4
+        
+        metrics = manager.get_fanout_metrics()["rest_123"]
+        assert metrics["messages"] == 4
+        assert metrics["deliveries"] == 4
+        assert metrics["evictions"] == 1
+        assert metrics["connections"] == 1
+        await _disconnect_all(manager)
+    
+    @pytest.mark.asyncio
+    async def test_stats_bounded_to_connected_restaurants(self):
+        """Test stats of restaurants without sockets are forgotten beyond the cap."""
+        manager = ConnectionManager(max_stats=2)
+        socket = FakeSocket()
+        await manager.connect(socket, "rest_1")
+        
+        for restaurant_id in ("rest_1", "rest_2", "rest_3", "rest_4"):
+            manager.stats(restaurant_id).messages += 1
+        
+        assert list(manager.get_fanout_metrics()) == ["rest_1", "rest_4"]
+        await _disconnect_all(manager)
+    
+    @pytest.mark.asyncio
+    async def test_timed_out_send_evicts(self):
+        """Test a send that exceeds the timeout evicts the socket."""
+        manager = ConnectionManager(send_timeout=0.05)
+        stuck = FakeSocket(delay=1.0)
+        await manager.connect(stuck, "rest_123")
+        
+        await manager.send_to_restaurant("rest_123", {"type": "order_update"})
+        await asyncio.sleep(0.15)
+        
+        assert "rest_123" not in manager.active_connections
+        assert manager.stats("rest_123").evictions == 1